@@ -0,0 +1,48 @@
+"""booking_expiry
+
+Revision ID: 2b038353cac8
+Revises: e69961e64923
+Create Date: 2026-10-17 09:12:31.402118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2b038353cac8'
+down_revision: Union[str, None] = 'e69961e64923'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _drop_if_invalid(name: str, table: str) -> None:
+    # An interrupted CREATE INDEX CONCURRENTLY leaves an INVALID index behind, which
+    # IF NOT EXISTS would then keep; drop it so a rerun builds it again
+    if op.get_context().as_sql:
+        return
+    invalid = op.get_bind().execute(sa.text(
+        "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE c.relname = :name AND NOT i.indisvalid"
+    ), {'name': name}).first()
+    if invalid:
+        op.drop_index(name, table_name=table, postgresql_concurrently=True)
+
+
+def upgrade() -> None:
+    # ALTER TYPE ... ADD VALUE and CREATE INDEX CONCURRENTLY cannot run inside a
+    # transaction block on Postgres; CONCURRENTLY keeps Booking writable during the build
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE bookingstatusenum ADD VALUE IF NOT EXISTS 'EXPIRED'")
+        _drop_if_invalid('ix_booking_status_created_at', 'Booking')
+        op.create_index('ix_booking_status_created_at', 'Booking', ['booking_status', 'created_at'], unique=False,
+                        if_not_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_booking_status_created_at', table_name='Booking', if_exists=True,
+                      postgresql_concurrently=True)
+    # Postgres cannot drop a single enum value — EXPIRED stays in bookingstatusenum
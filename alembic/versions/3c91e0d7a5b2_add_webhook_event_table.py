@@ -0,0 +1,41 @@
+"""add_webhook_event_table
+
+Revision ID: 3c91e0d7a5b2
+Revises: f6dff41acd1b
+Create Date: 2026-10-17 17:02:41.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c91e0d7a5b2'
+down_revision: Union[str, None] = 'f6dff41acd1b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('webhook_event',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('event_id', sa.String(), nullable=False),
+    sa.Column('type', sa.String(), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.String(), nullable=True),
+    sa.Column('received_at', sa.DateTime(), nullable=False),
+    sa.Column('processed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_webhook_event_event_id'), 'webhook_event', ['event_id'], unique=False)
+    op.create_index('ix_webhook_event_status_id', 'webhook_event', ['status', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_webhook_event_status_id', table_name='webhook_event')
+    op.drop_index(op.f('ix_webhook_event_event_id'), table_name='webhook_event')
+    op.drop_table('webhook_event')
@@ -0,0 +1,50 @@
+"""add_inventory_shard_tables
+
+Revision ID: 5d1f8c2e9a47
+Revises: a4e27b9f1c06
+Create Date: 2026-10-17 18:12:37.640518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d1f8c2e9a47'
+down_revision: Union[str, None] = 'a4e27b9f1c06'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('inventory_shard',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('room_id', sa.BigInteger(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('shard', sa.Integer(), nullable=False),
+    sa.Column('capacity', sa.Integer(), nullable=False),
+    sa.Column('claimed', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['room_id'], ['Room.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('room_id', 'date', 'shard', name='unique_room_date_shard')
+    )
+    op.create_table('inventory_shard_claim',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('booking_id', sa.BigInteger(), nullable=False),
+    sa.Column('room_id', sa.BigInteger(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('shard', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['booking_id'], ['Booking.id'], ),
+    sa.ForeignKeyConstraint(['room_id'], ['Room.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_inventory_shard_claim_booking_id'), 'inventory_shard_claim', ['booking_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_inventory_shard_claim_booking_id'), table_name='inventory_shard_claim')
+    op.drop_table('inventory_shard_claim')
+    op.drop_table('inventory_shard')
@@ -0,0 +1,41 @@
+"""add_inventory_hold_table
+
+Revision ID: 70a83e8a84f1
+Revises: 2b038353cac8
+Create Date: 2026-10-17 11:40:05.918724
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '70a83e8a84f1'
+down_revision: Union[str, None] = '2b038353cac8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('inventory_hold',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('room_id', sa.BigInteger(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.Column('booking_id', sa.BigInteger(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['booking_id'], ['Booking.id'], ),
+    sa.ForeignKeyConstraint(['room_id'], ['Room.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_inventory_hold_room_date_expires', 'inventory_hold', ['room_id', 'date', 'expires_at'], unique=False)
+    op.create_index(op.f('ix_inventory_hold_booking_id'), 'inventory_hold', ['booking_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_inventory_hold_booking_id'), table_name='inventory_hold')
+    op.drop_index('ix_inventory_hold_room_date_expires', table_name='inventory_hold')
+    op.drop_table('inventory_hold')
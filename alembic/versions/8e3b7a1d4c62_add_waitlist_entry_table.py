@@ -0,0 +1,48 @@
+"""add_waitlist_entry_table
+
+Revision ID: 8e3b7a1d4c62
+Revises: 5d1f8c2e9a47
+Create Date: 2026-10-17 19:04:51.218377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e3b7a1d4c62'
+down_revision: Union[str, None] = '5d1f8c2e9a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('waitlist_entry',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('user_id', sa.BigInteger(), nullable=False),
+    sa.Column('hotel_id', sa.BigInteger(), nullable=False),
+    sa.Column('room_id', sa.BigInteger(), nullable=False),
+    sa.Column('check_in_date', sa.Date(), nullable=False),
+    sa.Column('check_out_date', sa.Date(), nullable=False),
+    sa.Column('rooms_count', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('booking_id', sa.BigInteger(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('promoted_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['booking_id'], ['Booking.id'], ),
+    sa.ForeignKeyConstraint(['hotel_id'], ['Hotel.id'], ),
+    sa.ForeignKeyConstraint(['room_id'], ['Room.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['app_user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_waitlist_entry_room_status_dates', 'waitlist_entry',
+                    ['room_id', 'status', 'check_in_date', 'check_out_date'], unique=False)
+    op.create_index(op.f('ix_waitlist_entry_user_id'), 'waitlist_entry', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_waitlist_entry_user_id'), table_name='waitlist_entry')
+    op.drop_index('ix_waitlist_entry_room_status_dates', table_name='waitlist_entry')
+    op.drop_table('waitlist_entry')
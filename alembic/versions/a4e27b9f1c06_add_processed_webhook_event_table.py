@@ -0,0 +1,33 @@
+"""add_processed_webhook_event_table
+
+Revision ID: a4e27b9f1c06
+Revises: 3c91e0d7a5b2
+Create Date: 2026-10-17 17:31:09.274415
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4e27b9f1c06'
+down_revision: Union[str, None] = '3c91e0d7a5b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('processed_webhook_event',
+    sa.Column('event_id', sa.String(), nullable=False),
+    sa.Column('type', sa.String(), nullable=False),
+    sa.Column('received_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('event_id')
+    )
+    op.create_index(op.f('ix_processed_webhook_event_received_at'), 'processed_webhook_event', ['received_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_processed_webhook_event_received_at'), table_name='processed_webhook_event')
+    op.drop_table('processed_webhook_event')
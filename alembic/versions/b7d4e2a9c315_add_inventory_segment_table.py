@@ -0,0 +1,47 @@
+"""add_inventory_segment_table
+
+Revision ID: b7d4e2a9c315
+Revises: c2a6f0e93b18
+Create Date: 2026-10-17 21:05:42.118930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d4e2a9c315'
+down_revision: Union[str, None] = 'c2a6f0e93b18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('inventory_segment',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('hotel_id', sa.BigInteger(), nullable=False),
+    sa.Column('room_id', sa.BigInteger(), nullable=False),
+    sa.Column('start_date', sa.Date(), nullable=False),
+    sa.Column('end_date', sa.Date(), nullable=False),
+    sa.Column('book_count', sa.Integer(), nullable=False),
+    sa.Column('reserved_count', sa.Integer(), nullable=False),
+    sa.Column('total_count', sa.Integer(), nullable=False),
+    sa.Column('surge_factor', sa.Numeric(precision=5, scale=2), nullable=False),
+    sa.Column('price', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('city', sa.String(), nullable=False),
+    sa.Column('closed', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['hotel_id'], ['Hotel.id'], ),
+    sa.ForeignKeyConstraint(['room_id'], ['Room.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('room_id', 'start_date', name='unique_room_segment_start')
+    )
+    op.create_index('ix_inventory_segment_end_start', 'inventory_segment', ['end_date', 'start_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_inventory_segment_end_start', table_name='inventory_segment')
+    op.drop_table('inventory_segment')
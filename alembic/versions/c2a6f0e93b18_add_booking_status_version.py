@@ -0,0 +1,27 @@
+"""add_booking_status_version
+
+Revision ID: c2a6f0e93b18
+Revises: 8e3b7a1d4c62
+Create Date: 2026-10-17 19:41:09.553102
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2a6f0e93b18'
+down_revision: Union[str, None] = '8e3b7a1d4c62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # server_default fills existing rows without rewriting the table (PG 11+)
+    op.add_column('Booking', sa.Column('status_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('Booking', 'status_version')
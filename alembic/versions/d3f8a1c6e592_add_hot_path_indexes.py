@@ -0,0 +1,61 @@
+"""add_hot_path_indexes
+
+Revision ID: d3f8a1c6e592
+Revises: b7d4e2a9c315
+Create Date: 2026-10-17 23:18:05.642417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3f8a1c6e592'
+down_revision: Union[str, None] = 'b7d4e2a9c315'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (name, table, columns, extra create_index kwargs)
+INDEXES = [
+    ('ix_inventory_room_date', 'Inventory', ['room_id', 'date'], {}),
+    ('ix_inventory_open_date_hotel', 'Inventory', ['date', 'hotel_id'], {
+        'postgresql_include': ['price', 'total_count', 'book_count', 'reserved_count', 'room_id'],
+        'postgresql_where': sa.text('closed = false'),
+    }),
+    ('ix_booking_user_created_at', 'Booking', ['user_id', 'created_at'], {}),
+    ('ix_booking_hotel_status_check_in', 'Booking', ['hotel_id', 'booking_status', 'check_in_date'], {
+        'postgresql_include': ['amount'],
+    }),
+]
+
+
+def _drop_if_invalid(name: str, table: str) -> None:
+    # An interrupted CREATE INDEX CONCURRENTLY leaves an INVALID index behind, which
+    # IF NOT EXISTS would then keep; drop it so a rerun builds it again
+    if op.get_context().as_sql:
+        return
+    invalid = op.get_bind().execute(sa.text(
+        "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE c.relname = :name AND NOT i.indisvalid"
+    ), {'name': name}).first()
+    if invalid:
+        op.drop_index(name, table_name=table, postgresql_concurrently=True)
+
+
+def upgrade() -> None:
+    # CONCURRENTLY builds without blocking writes to Inventory/Booking, but cannot
+    # run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            _drop_if_invalid(name, table)
+            op.create_index(name, table, columns, unique=False, if_not_exists=True,
+                            postgresql_concurrently=True, **kwargs)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
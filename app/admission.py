@@ -0,0 +1,159 @@
+"""
+In-process admission control for /bookings/init, keyed by room_id.
+
+Under a burst, every request for a hot room would otherwise open a transaction
+and wait on the same Inventory row locks, each one pinning a pooled connection
+(pool_size 10 + max_overflow 20 per worker) while it waits. admit() sits in
+front of the transaction:
+
+  - at most `admission_max_inflight` bookings per room run against the DB at
+    once in this process; the rest wait on a per-room semaphore WITHOUT holding
+    a connection (the caller's session is rolled back before waiting)
+  - at most `admission_queue_size` requests wait per room; beyond that, and
+    after `admission_wait_seconds`, the request gets 429 + Retry-After
+  - a request that failed for lack of availability is remembered for
+    `admission_sold_out_ttl_seconds`; a request that asks for at least as many
+    rooms over a range covering it is rejected with the same 400 without
+    touching the DB. Releasing rooms (cancel, expiry) forgets the room's entries.
+
+This is per process — gunicorn workers don't share gates, so the DB still sees
+up to workers × admission_max_inflight transactions per room.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date
+from typing import Callable, Iterable
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.reservation.strategy import RoomUnavailable
+from app import metrics
+
+
+class _Gate:
+    """Per-room semaphore plus a count of requests waiting on it."""
+    def __init__(self, slots: int):
+        self.slots = threading.Semaphore(slots)
+        self.waiting = 0
+        self.users = 0          # requests inside admit() — the gate is dropped at 0
+
+
+_gates: dict[int, _Gate] = {}
+_sold_out: dict[int, list[tuple[date, date, int, float]]] = {}   # room_id → (in, out, rooms, expires)
+_lock = threading.Lock()
+
+_MAX_SOLD_OUT_PER_ROOM = 32
+
+
+def _known_sold_out(room_id: int, check_in: date, check_out: date, rooms_count: int) -> bool:
+    now = time.monotonic()
+    with _lock:
+        entries = [e for e in _sold_out.get(room_id, ()) if e[3] > now]
+        if entries:
+            _sold_out[room_id] = entries
+        else:
+            _sold_out.pop(room_id, None)
+        return any(check_in <= ci and check_out >= co and rooms_count >= n for ci, co, n, _ in entries)
+
+
+def _remember_sold_out(room_id: int, check_in: date, check_out: date, rooms_count: int) -> None:
+    expires = time.monotonic() + settings.admission_sold_out_ttl_seconds
+    with _lock:
+        entries = _sold_out.setdefault(room_id, [])
+        entries.append((check_in, check_out, rooms_count, expires))
+        del entries[:-_MAX_SOLD_OUT_PER_ROOM]
+
+
+def rooms_released(room_ids: Iterable[int]) -> None:
+    """Forget sold-out knowledge for rooms that just got availability back."""
+    with _lock:
+        for room_id in room_ids:
+            _sold_out.pop(room_id, None)
+
+
+def _busy(reason: str) -> HTTPException:
+    metrics.inc("admission_rejected_total", reason=reason)
+    return HTTPException(429, "Too many bookings for this room right now, please retry",
+                         headers={"Retry-After": "1"})
+
+
+@contextmanager
+def admit(db: Session, room_id: int, check_in: date, check_out: date, rooms_count: int):
+    """
+    Runs the body once this process has a free transaction slot for `room_id`.
+
+    Example:
+        with admission.admit(db, data.room_id, data.check_in_date, data.check_out_date, data.rooms_count):
+            return _create_booking(db, data, current_user)
+    """
+    if settings.admission_max_inflight <= 0:
+        yield
+        return
+
+    def sold_out() -> None:
+        if _known_sold_out(room_id, check_in, check_out, rooms_count):
+            metrics.inc("admission_rejected_total", reason="sold_out")
+            raise RoomUnavailable(room_id)
+
+    sold_out()
+    # Whoever went first may have taken the last rooms — checked again after a wait
+    with slot(db, room_id, after_wait=sold_out):
+        try:
+            yield
+        except RoomUnavailable:
+            # Only a genuine lack of rooms; any other 400 (bad dates, ...) is about that request
+            _remember_sold_out(room_id, check_in, check_out, rooms_count)
+            raise
+
+
+@contextmanager
+def slot(db: Session, room_id: int, after_wait: Callable[[], None] = None):
+    """
+    Just the per-room transaction slot of admit(), without the sold-out memory.
+
+    For writers that are not one booking request — waitlist promotion holds rooms
+    for many ranges at once — but must still queue behind the room's bookings
+    instead of adding to the load on its rows. `after_wait` runs once a slot is
+    granted after waiting; raising from it gives the slot back.
+    """
+    if settings.admission_max_inflight <= 0:
+        yield
+        return
+
+    with _lock:
+        gate = _gates.setdefault(room_id, _Gate(settings.admission_max_inflight))
+        gate.users += 1
+    try:
+        if not gate.slots.acquire(blocking=False):
+            with _lock:
+                if gate.waiting >= settings.admission_queue_size:
+                    raise _busy("queue_full")
+                gate.waiting += 1
+            metrics.inc("admission_queued_total")
+            # Give the pooled connection back while we wait
+            if db.in_transaction():
+                db.rollback()
+            try:
+                admitted = gate.slots.acquire(timeout=settings.admission_wait_seconds)
+            finally:
+                with _lock:
+                    gate.waiting -= 1
+            if not admitted:
+                raise _busy("timeout")
+            if after_wait is not None:
+                try:
+                    after_wait()
+                except BaseException:
+                    gate.slots.release()
+                    raise
+
+        try:
+            yield
+        finally:
+            gate.slots.release()
+    finally:
+        with _lock:
+            gate.users -= 1
+            if gate.users == 0:
+                _gates.pop(room_id, None)
@@ -0,0 +1,163 @@
+"""
+In-process pub/sub of booking status changes, for GET /bookings/{id}/status/stream.
+
+Writers stage a change on their session (stage()) next to the status UPDATE;
+it is published only once that transaction commits, and dropped on rollback.
+Waiting clients share ONE subscription per booking: a hundred browser tabs
+watching the same booking cost one dict entry, and no query of their own.
+
+A change committed by another process never reaches this process's pub/sub.
+As the cross-worker fallback, one poller task per process reads
+(id, booking_status, status_version) for every subscribed booking in a single
+primary-key query every `booking_status_poll_seconds`, and only wakes the
+subscriptions whose status_version moved.
+
+Subscriptions live on the event loop thread; publish() may be called from any
+thread (request threadpool, webhook consumer) and hands over with
+call_soon_threadsafe.
+"""
+import asyncio
+import logging
+from typing import AsyncIterator, Iterable, Optional
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from app import database, metrics
+from app.config import settings
+from app.models.booking import Booking
+
+logger = logging.getLogger(__name__)
+
+Change = tuple[int, str, int]   # (booking_id, booking_status, status_version)
+
+
+class _Subscription:
+    """Latest known status of one booking, and the clients waiting on it."""
+    def __init__(self, status: str, version: int):
+        self.status = status
+        self.version = version
+        self.clients = 0
+        self.changed = asyncio.Event()
+
+
+_subs: dict[int, _Subscription] = {}
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_poller: Optional[asyncio.Task] = None
+
+
+# ── Publishing side — any thread ─────────────────────────────────────────────
+
+def stage(db: Session, changes: Iterable[Change]) -> None:
+    """Queues status changes to publish when `db`'s current transaction commits."""
+    db.info.setdefault("booking_events", []).extend(changes)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed(session: Session) -> None:
+    changes = session.info.pop("booking_events", None)
+    if changes:
+        publish(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_rolled_back(session: Session) -> None:
+    session.info.pop("booking_events", None)
+
+
+def publish(changes: Iterable[Change]) -> None:
+    """Wakes the subscriptions of changed bookings. Safe to call from any thread."""
+    loop = _loop
+    watched = [c for c in changes if c[0] in _subs]
+    if not watched or loop is None or loop.is_closed():
+        return
+    loop.call_soon_threadsafe(_apply, watched, "local")
+
+
+def _apply(changes: Iterable[Change], source: str) -> None:
+    """Loop thread only: records newer versions and wakes their clients."""
+    for booking_id, status, version in changes:
+        sub = _subs.get(booking_id)
+        if sub is None or version <= sub.version:
+            continue
+        sub.status, sub.version = status, version
+        sub.changed.set()
+        sub.changed = asyncio.Event()
+        metrics.inc("booking_status_notifications_total", source=source)
+
+
+# ── Cross-worker fallback ────────────────────────────────────────────────────
+
+def _read_versions(booking_ids: list[int]) -> list[Change]:
+    db = database.SessionLocal()
+    try:
+        rows = db.execute(
+            select(Booking.id, Booking.booking_status, Booking.status_version)
+            .where(Booking.id.in_(booking_ids))
+        ).all()
+        return [(r.id, r.booking_status.value, r.status_version) for r in rows]
+    finally:
+        db.close()
+
+
+async def _poll() -> None:
+    while _subs:
+        await asyncio.sleep(settings.booking_status_poll_seconds)
+        stale = [i for i, s in _subs.items() if s.clients]
+        if not stale:
+            continue
+        try:
+            _apply(await run_in_threadpool(_read_versions, stale), "poll")
+        except Exception:
+            logger.exception("booking status poll failed")
+
+
+def _ensure_poller(loop: asyncio.AbstractEventLoop) -> None:
+    global _poller
+    if _poller is None or _poller.done() or _poller.get_loop() is not loop:
+        _poller = loop.create_task(_poll())
+
+
+# ── Subscribing side — event loop ────────────────────────────────────────────
+
+async def updates(booking_id: int, status: str, version: int, since: int,
+                  timeout: float, heartbeat: float) -> AsyncIterator[Optional[tuple[str, int]]]:
+    """
+    Yields (status, version) whenever the booking is newer than what the client
+    has seen, starting with the current state if it is newer than `since`.
+    Yields None every `heartbeat` seconds of silence; stops after `timeout`.
+
+    `status`/`version` are what the caller just read from the database; they seed
+    (or refresh) the booking's shared subscription.
+    """
+    global _loop
+    loop = _loop = asyncio.get_running_loop()
+    sub = _subs.get(booking_id)
+    if sub is None:
+        sub = _subs[booking_id] = _Subscription(status, version)
+    elif version > sub.version:
+        _apply([(booking_id, status, version)], "read")
+    sub.clients += 1
+    metrics.set_gauge("booking_status_subscriptions", len(_subs))
+    _ensure_poller(loop)
+
+    deadline = loop.time() + timeout
+    seen = since
+    try:
+        while True:
+            if sub.version > seen:
+                seen = sub.version
+                yield sub.status, sub.version
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            try:
+                await asyncio.wait_for(sub.changed.wait(), min(remaining, heartbeat))
+            except asyncio.TimeoutError:
+                if loop.time() < deadline:
+                    yield None
+    finally:
+        sub.clients -= 1
+        if sub.clients == 0 and _subs.get(booking_id) is sub:
+            del _subs[booking_id]
+        metrics.set_gauge("booking_status_subscriptions", len(_subs))
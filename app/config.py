@@ -11,6 +11,66 @@ class Settings(BaseSettings):
     stripe_webhook_secret: str = ""
     frontend_url: str = "http://localhost:3000"
 
+    # ── Reservation engine ──────────────────────────────────────────────────
+    # "locking" — SELECT FOR UPDATE, then increment in Python (original behaviour)
+    # "atomic"  — single guarded UPDATE ... RETURNING (see app/reservation/atomic.py)
+    # "ledger"  — holds appended to inventory_hold, Inventory rows never rewritten on hold
+    # "segments" — run-length inventory_segment rows instead of one Inventory row per night
+    reservation_mode: str = "locking"
+    booking_hold_minutes: int = 10               # payment window before a hold expires
+
+    # ── Transaction policy for inventory writes (see app/transactions.py) ───
+    lock_timeout_ms: int = 2000
+    statement_timeout_ms: int = 5000
+    txn_max_attempts: int = 3                    # 1 = no retry
+    txn_retry_base_delay_ms: int = 25
+    slow_txn_log_ms: int = 250                   # log @transactional calls slower than this; 0 = off
+    txn_metrics_room_label: bool = False         # add a room label to txn_* histograms (one series per room!)
+    booking_lock_nowait: bool = False            # init_booking: FOR UPDATE NOWAIT instead of waiting
+    # What lock_inventory() locks (see app/locks.py):
+    # "row" — FOR UPDATE per night; "advisory" — pg_advisory_xact_lock per room; "local" — in-process per room
+    lock_provider: str = "row"
+    room_lock_dir: str = ""                      # local provider: also flock() a file per room here (multi-process)
+    booking_import_max_lines: int = 5000         # POST /bookings/import upload limit
+
+    # ── Per-room admission gate in front of init_booking (see app/admission.py) ──
+    admission_max_inflight: int = 2              # DB transactions per room per process; 0 = off
+    admission_queue_size: int = 50               # waiters per room before 429
+    admission_wait_seconds: float = 5
+    admission_sold_out_ttl_seconds: float = 2    # how long a failed range fast-rejects repeats
+
+    # ── Idempotency-Key on mutating booking routes ──────────────────────────
+    idempotency_cache_size: int = 10_000         # in-process LRU of completed responses
+    idempotency_wait_seconds: float = 10         # how long a duplicate waits for the first request
+    idempotency_stale_seconds: int = 60          # IN_PROGRESS older than this is taken over
+    idempotency_retention_hours: int = 24
+
+    # ── Background workers (one set per gunicorn worker process) ────────────
+    run_background_workers: bool = True
+    expiry_sweep_interval_seconds: int = 30
+    expiry_sweep_batch_size: int = 500
+    hold_compaction_interval_seconds: int = 15   # ledger mode only
+    hold_compaction_batch_size: int = 1000
+    outbox_poll_interval_seconds: int = 5
+    outbox_batch_size: int = 50
+    outbox_max_attempts: int = 8
+    outbox_lease_seconds: int = 60               # a claimed message is retried if not finished by then
+    webhook_consume_interval_seconds: float = 1
+    webhook_batch_size: int = 100
+    webhook_max_attempts: int = 5
+    webhook_dedup_cache_size: int = 10_000       # in-process LRU of recently seen Stripe event ids
+    webhook_event_retention_days: int = 7
+    waitlist_promote_batch_size: int = 100       # entries per promotion transaction
+    waitlist_notify_url: str = ""                # POSTed a JSON notice per promoted entry; "" = log only
+    waitlist_notify_timeout_seconds: float = 5
+    booking_status_stream_seconds: int = 120     # GET /bookings/{id}/status/stream closes after this
+    booking_status_heartbeat_seconds: float = 15
+    booking_status_poll_seconds: float = 2       # cross-worker fallback: one query per process per tick
+    inventory_horizon_days: int = 365            # keep every active room stocked this many days ahead
+    inventory_horizon_interval_seconds: int = 3600
+    inventory_horizon_batch_rooms: int = 500     # rooms per horizon-extension transaction
+    inventory_propagate_chunk_days: int = 92     # nights per transaction when a room edit is pushed to inventory
+
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,196 @@
+"""
+Pluggable room locks behind lock_inventory() (app/transactions.py).
+
+Every inventory write path that needs "one writer per room" gets it from
+lock_inventory(). What that lock physically is depends on `settings.lock_provider`:
+
+  row       SELECT ... FOR UPDATE on every Inventory row read — the original
+            behaviour. A 14-night booking locks 14 rows, a 365-night admin edit 365.
+  advisory  one Postgres transaction-scoped advisory lock per room
+            (pg_advisory_xact_lock), then a plain read of the rows. One lock per
+            room however many nights, and no row is marked locked. On any other
+            database it falls back to `local`.
+  local     a per-room lock in this process, plus an flock()ed file per room
+            under `room_lock_dir` when that is set, so processes on one host
+            agree. Released when the session's transaction ends. For SQLite,
+            which ignores FOR UPDATE.
+
+The advisory and local providers lock whole rooms: two bookings of the same
+room on different dates wait for each other, where row locks let them run side
+by side. Writers that skip lock_inventory() stay correct under every provider
+because they only ever write relative to the current value
+(reserved_count = reserved_count - n), never a value read earlier.
+"""
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Sequence
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from app.config import settings
+
+try:
+    import fcntl
+except ImportError:     # not POSIX — in-process locks only
+    fcntl = None
+
+# Top 16 bits of the bigint advisory lock key, so room ids never collide with other advisory lock users
+ADVISORY_NAMESPACE = 7301
+ADVISORY_ROOM_BITS = 48
+
+
+def advisory_key(room_id: int) -> int:
+    """The single-bigint pg_advisory_xact_lock key of a room: namespace, then the room id in the low 48 bits.
+
+    The two-int4 form would overflow once room ids (BIGINT) pass 2**31 - 1.
+    """
+    if not 0 <= room_id < 1 << ADVISORY_ROOM_BITS:
+        raise ValueError(f"room id {room_id} does not fit an advisory lock key")
+    return ADVISORY_NAMESPACE << ADVISORY_ROOM_BITS | room_id
+
+
+class LockNotAvailable(Exception):
+    """A room lock was not free (NOWAIT) or not granted within lock_timeout_ms.
+
+    @transactional treats it like Postgres's lock_not_available: retried, then 409.
+    """
+
+
+class LockProvider(ABC):
+    """How lock_inventory() makes one transaction the only writer of a room."""
+
+    row_locks = False   # True: lock_inventory's own FOR UPDATE is the lock
+
+    @abstractmethod
+    def acquire(self, db: Session, room_ids: Sequence[int], nowait: bool = False,
+                skip_locked: bool = False) -> list[int]:
+        """
+        Lock each room, in the given (ascending) order, until `db`'s transaction
+        ends. Returns the rooms locked: all of them, except busy ones with
+        `skip_locked`. A busy room raises LockNotAvailable with `nowait`, or once
+        lock_timeout_ms has passed.
+        """
+
+
+class RowLockProvider(LockProvider):
+    """SELECT ... FOR UPDATE, issued by lock_inventory() itself."""
+    row_locks = True
+
+    def acquire(self, db: Session, room_ids: Sequence[int], nowait: bool = False,
+                skip_locked: bool = False) -> list[int]:
+        return list(room_ids)
+
+
+class AdvisoryLockProvider(LockProvider):
+    """pg_advisory_xact_lock per room — waits obey the transaction's lock_timeout."""
+
+    def acquire(self, db: Session, room_ids: Sequence[int], nowait: bool = False,
+                skip_locked: bool = False) -> list[int]:
+        if db.get_bind().dialect.name != "postgresql":
+            return LocalLockProvider().acquire(db, room_ids, nowait, skip_locked)
+        locked = []
+        for room_id in room_ids:
+            params = {"key": advisory_key(room_id)}
+            if nowait or skip_locked:
+                if not db.execute(text("SELECT pg_try_advisory_xact_lock(CAST(:key AS bigint))"), params).scalar():
+                    if skip_locked:
+                        continue
+                    raise LockNotAvailable(f"room {room_id} is locked")
+            else:
+                db.execute(text("SELECT pg_advisory_xact_lock(CAST(:key AS bigint))"), params)
+            locked.append(room_id)
+        return locked
+
+
+# ── Local locks — held per session, released when its transaction ends ────────
+
+_room_locks: dict[int, threading.Lock] = {}
+_registry_lock = threading.Lock()
+
+
+def _file_lock(room_id: int, deadline: float):
+    """flock() the room's lock file, polling until `deadline`. Returns the open file, or None."""
+    f = open(os.path.join(settings.room_lock_dir, f"room-{room_id}.lock"), "a+")
+    while True:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return f
+        except BlockingIOError:
+            if time.monotonic() >= deadline:
+                f.close()
+                return None
+            time.sleep(0.005)
+
+
+def _take(room_id: int, timeout: float):
+    """Takes one room's local lock. Returns its release function, or None if not granted in time."""
+    deadline = time.monotonic() + timeout
+    with _registry_lock:
+        lock = _room_locks.setdefault(room_id, threading.Lock())
+    acquired = lock.acquire(timeout=timeout) if timeout > 0 else lock.acquire(blocking=False)
+    if not acquired:
+        return None
+    if not settings.room_lock_dir or fcntl is None:
+        return lock.release
+
+    f = _file_lock(room_id, deadline)
+    if f is None:
+        lock.release()
+        return None
+
+    def release():
+        fcntl.flock(f, fcntl.LOCK_UN)
+        f.close()
+        lock.release()
+    return release
+
+
+class LocalLockProvider(LockProvider):
+    """Per-room locks in this process (plus lock files under room_lock_dir, if set)."""
+
+    def acquire(self, db: Session, room_ids: Sequence[int], nowait: bool = False,
+                skip_locked: bool = False) -> list[int]:
+        held: dict[int, Callable[[], None]] = db.info.setdefault("room_locks", {})
+        timeout = 0 if nowait or skip_locked else settings.lock_timeout_ms / 1000
+        locked = []
+        for room_id in room_ids:
+            if room_id not in held:
+                release = _take(room_id, timeout)
+                if release is None:
+                    if skip_locked:
+                        continue
+                    raise LockNotAvailable(f"room {room_id} is locked")
+                held[room_id] = release
+            locked.append(room_id)
+        return locked
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _release_local_locks(session: Session, transaction) -> None:
+    if transaction.parent is not None:
+        return
+    for release in session.info.pop("room_locks", {}).values():
+        release()
+
+
+# Keyed by settings.lock_provider — add new providers here
+_PROVIDERS = {
+    "row":      RowLockProvider,
+    "advisory": AdvisoryLockProvider,
+    "local":    LocalLockProvider,
+}
+
+
+def get_lock_provider() -> LockProvider:
+    """
+    Returns the provider selected by LOCK_PROVIDER.
+
+    Read on every call (not cached at import) so it can be flipped in tests and
+    benchmarks without reloading modules.
+    """
+    try:
+        return _PROVIDERS[settings.lock_provider]()
+    except KeyError:
+        raise ValueError(f"Unknown lock_provider: {settings.lock_provider!r} "
+                         f"(expected one of {sorted(_PROVIDERS)})")
@@ -1,4 +1,5 @@
 import stripe
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.config import settings
 
@@ -6,11 +7,35 @@ from app.config import settings
 stripe.api_key = settings.stripe_secret_key
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Starts this process's background workers on boot and stops them on shutdown."""
+    workers = []
+    if settings.run_background_workers:
+        from app.workers import expiry_sweeper
+        workers.append(expiry_sweeper.build_worker())
+        from app.workers import outbox_dispatcher
+        workers.append(outbox_dispatcher.build_worker())
+        from app.workers import webhook_consumer
+        workers.append(webhook_consumer.build_worker())
+        from app.workers import horizon_extender
+        workers.append(horizon_extender.build_worker())
+        if settings.reservation_mode == "ledger":
+            from app.workers import hold_compactor
+            workers.append(hold_compactor.build_worker())
+    for worker in workers:
+        worker.start()
+    yield
+    for worker in workers:
+        worker.stop()
+
+
 def create_app() -> FastAPI:
     app = FastAPI(
         title="AirBnb API",
         version="1.0.0",
         docs_url="/swagger-ui.html",
+        lifespan=lifespan,
     )
 
     # ── Routers ─────────────────────────────────────────────────────────────────
@@ -23,7 +48,9 @@ def create_app() -> FastAPI:
     from app.routers import inventory_admin; app.include_router(inventory_admin.router)
     from app.routers import hotels_browse;   app.include_router(hotels_browse.router)
     from app.routers import bookings;        app.include_router(bookings.router)
+    from app.routers import waitlist;        app.include_router(waitlist.router)
     from app.routers import webhooks;        app.include_router(webhooks.router)
+    from app.routers import metrics;         app.include_router(metrics.router)
 
     # ── Exception handlers ──────────────────────────────────────────────────
     # Note: Global exception handlers can be configured here.
@@ -0,0 +1,105 @@
+"""
+In-process metrics registry — counters, gauges and histograms, rendered in the
+Prometheus text format by GET /metrics (app/routers/metrics.py).
+
+Each gunicorn worker keeps its own registry; the scraper sums across workers.
+All operations take one short lock, so they are safe to call from request
+threads and background workers alike.
+
+Usage:
+    from app import metrics
+    metrics.inc("booking_holds_reclaimed_total", 12)
+    metrics.set_gauge("expiry_sweep_last_reclaimed", 12)
+    metrics.observe("txn_duration_seconds", 0.042, op="init_booking")
+"""
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+_lock = threading.Lock()
+_counters: dict[tuple[str, tuple], float] = defaultdict(float)
+_gauges: dict[tuple[str, tuple], float] = {}
+# Per series: one (non-cumulative) count per bucket, then +Inf, then the sum
+_histograms: dict[tuple[str, tuple], list] = {}
+_bounds: dict[str, tuple] = {}
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 30, 100, 365, 1000, 5000)
+
+
+def _key(name: str, labels: dict) -> tuple[str, tuple]:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def inc(name: str, value: float = 1, **labels) -> None:
+    """Add `value` to a monotonically increasing counter."""
+    with _lock:
+        _counters[_key(name, labels)] += value
+
+
+def set_gauge(name: str, value: float, **labels) -> None:
+    """Overwrite a gauge with its latest value."""
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def observe(name: str, value: float, buckets: tuple = SECONDS_BUCKETS, **labels) -> None:
+    """Record one observation in a histogram. A name always keeps the buckets it was first used with."""
+    key = _key(name, labels)
+    with _lock:
+        bounds = _bounds.setdefault(name, buckets)
+        series = _histograms.get(key)
+        if series is None:
+            series = _histograms[key] = [0] * (len(bounds) + 1) + [0.0]
+        series[bisect_left(bounds, value)] += 1
+        series[-1] += value
+
+
+def get_histogram(name: str, **labels) -> tuple[int, float]:
+    """(count, sum) of a histogram series — handy in tests."""
+    with _lock:
+        series = _histograms.get(_key(name, labels))
+        return (sum(series[:-1]), series[-1]) if series else (0, 0.0)
+
+
+def get(name: str, **labels) -> float:
+    """Current value of a counter or gauge (0 if never recorded) — handy in tests."""
+    key = _key(name, labels)
+    with _lock:
+        return _counters.get(key, _gauges.get(key, 0))
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+def render() -> str:
+    """Prometheus text exposition of every recorded series."""
+    with _lock:
+        counters = sorted(_counters.items())
+        gauges = sorted(_gauges.items())
+        histograms = sorted((key, list(series)) for key, series in _histograms.items())
+        bounds = dict(_bounds)
+    lines = []
+    for kind, series in (("counter", counters), ("gauge", gauges)):
+        seen = set()
+        for (name, labels), value in series:
+            if name not in seen:
+                lines.append(f"# TYPE {name} {kind}")
+                seen.add(name)
+            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+
+    seen = set()
+    for (name, labels), series in histograms:
+        if name not in seen:
+            lines.append(f"# TYPE {name} histogram")
+            seen.add(name)
+        cumulative = 0
+        for le, n in zip([*(f"{b:g}" for b in bounds[name]), "+Inf"], series[:-1]):
+            cumulative += n
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {series[-1]:g}")
+        lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
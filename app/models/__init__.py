@@ -5,5 +5,14 @@ from app.models.user import User, UserRole           # noqa
 from app.models.hotel import Hotel                   # noqa
 from app.models.room import Room                     # noqa
 from app.models.inventory import Inventory           # noqa
+from app.models.inventory_hold import InventoryHold  # noqa
+from app.models.inventory_shard import InventoryShard  # noqa
+from app.models.inventory_shard_claim import InventoryShardClaim  # noqa
+from app.models.inventory_segment import InventorySegment  # noqa
 from app.models.guest import Guest                   # noqa
 from app.models.booking import Booking, booking_guest  # noqa
+from app.models.idempotency import IdempotencyRecord  # noqa
+from app.models.outbox import OutboxMessage          # noqa
+from app.models.webhook_event import WebhookEvent    # noqa
+from app.models.processed_webhook_event import ProcessedWebhookEvent  # noqa
+from app.models.waitlist_entry import WaitlistEntry    # noqa
@@ -1,6 +1,6 @@
 from sqlalchemy import (
     Column, BigInteger, Integer, Numeric, Date, DateTime,
-    String, ForeignKey, Table, Enum as PgEnum
+    String, ForeignKey, Table, Index, Enum as PgEnum
 )
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
@@ -19,6 +19,16 @@ booking_guest = Table(
 
 class Booking(Base):
     __tablename__ = "Booking"
+    __table_args__ = (
+        # Expiry sweeper: "holds in status X created before T", oldest first
+        Index("ix_booking_status_created_at", "booking_status", "created_at"),
+        # "My bookings": one guest's bookings, newest first
+        Index("ix_booking_user_created_at", "user_id", "created_at"),
+        # Hotel bookings list and revenue report: confirmed stays checking in within
+        # a range. Postgres carries amount too, so the report never touches the heap.
+        Index("ix_booking_hotel_status_check_in", "hotel_id", "booking_status", "check_in_date",
+              postgresql_include=["amount"]),
+    )
 
     id                 = Column(BigInteger, primary_key=True, autoincrement=True)
     hotel_id           = Column(BigInteger, ForeignKey("Hotel.id"),    nullable=False)
@@ -34,6 +44,8 @@ class Booking(Base):
     )
     amount             = Column(Numeric(10, 2), nullable=False)         # total price calculated at init
     payment_session_id = Column(String, unique=True, nullable=True)     # Stripe checkout session ID
+    status_version     = Column(Integer, nullable=False, default=0,
+                                server_default="0")                      # +1 on every status change
     created_at         = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at         = Column(DateTime, default=lambda: datetime.now(timezone.utc),
                                 onupdate=lambda: datetime.now(timezone.utc))
@@ -42,3 +54,7 @@ class Booking(Base):
     room   = relationship("Room")
     user   = relationship("User",   back_populates="bookings")
     guests = relationship("Guest",  secondary=booking_guest)   # via association table
+    holds  = relationship("InventoryHold", back_populates="booking",
+                          cascade="all, delete-orphan")            # only used in ledger mode
+    shard_claims = relationship("InventoryShardClaim", back_populates="booking",
+                                cascade="all, delete-orphan")      # only on sharded nights
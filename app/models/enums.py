@@ -19,6 +19,7 @@ class BookingStatusEnum(str, Enum):
     PAYMENTS_PENDING = "PAYMENTS_PENDING"   # Stripe checkout session created
     CONFIRMED        = "CONFIRMED"          # payment webhook received — booking is live
     CANCELLED        = "CANCELLED"          # cancelled + refunded
+    EXPIRED          = "EXPIRED"            # hold abandoned — released by the expiry sweeper
 
 
 class PaymentStatusEnum(str, Enum):
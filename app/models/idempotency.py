@@ -0,0 +1,30 @@
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, JSON, ForeignKey, UniqueConstraint
+from datetime import datetime, timezone
+from app.database import Base
+
+
+class IdempotencyRecord(Base):
+    """
+    One row per (user, Idempotency-Key) — the stored outcome of a mutating booking request.
+
+    status:
+      IN_PROGRESS — claimed by the first request; duplicates wait for it to finish
+      COMPLETED   — response_status/response_body hold what the first request returned
+    """
+    __tablename__ = "idempotency_record"
+    __table_args__ = (
+        # Keys are scoped per user — two users may pick the same key
+        UniqueConstraint("user_id", "key", name="unique_user_idempotency_key"),
+    )
+
+    id              = Column(BigInteger, primary_key=True, autoincrement=True)
+    user_id         = Column(BigInteger, ForeignKey("app_user.id"), nullable=False)
+    key             = Column(String(255), nullable=False)
+    endpoint        = Column(String, nullable=False)      # e.g. "POST /bookings/init"
+    request_hash    = Column(String(64), nullable=False)  # sha256 of endpoint + body
+    status          = Column(String(20), nullable=False, default="IN_PROGRESS")
+    response_status = Column(Integer, nullable=True)
+    response_body   = Column(JSON, nullable=True)
+    created_at      = Column(DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+    updated_at      = Column(DateTime, default=lambda: datetime.now(timezone.utc),
+                             onupdate=lambda: datetime.now(timezone.utc))
@@ -1,6 +1,6 @@
 from sqlalchemy import (
     Column, BigInteger, Integer, Numeric, Date, DateTime,
-    Boolean, String, ForeignKey, UniqueConstraint
+    Boolean, String, ForeignKey, UniqueConstraint, Index, text
 )
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
@@ -27,6 +27,17 @@ class Inventory(Base):
     __table_args__ = (
         # Ensures no duplicate (hotel, room, date) combinations
         UniqueConstraint("hotel_id", "room_id", "date", name="unique_hotel_room_date"),
+        # Booking path: one room's nights over a date range (reserve, confirm, cancel, modify)
+        Index("ix_inventory_room_date", "room_id", "date"),
+        # Hotel search: open nights in a date range, grouped by hotel. Partial on
+        # open nights; on Postgres it also carries everything search reads, so the
+        # availability check and min(price) come straight from the index.
+        Index(
+            "ix_inventory_open_date_hotel", "date", "hotel_id",
+            postgresql_include=["price", "total_count", "book_count", "reserved_count", "room_id"],
+            postgresql_where=text("closed = false"),
+            sqlite_where=text("closed = 0"),
+        ),
     )
 
     id             = Column(BigInteger, primary_key=True, autoincrement=True)
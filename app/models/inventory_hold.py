@@ -0,0 +1,37 @@
+from sqlalchemy import Column, BigInteger, Integer, Date, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from datetime import datetime, timezone
+from app.database import Base
+
+
+class InventoryHold(Base):
+    """
+    Append-mostly ledger of room holds — used instead of Inventory.reserved_count
+    when RESERVATION_MODE=ledger, so a hold never rewrites the hot Inventory row.
+
+    One row per (booking, night). Lifecycle:
+      init_booking     → INSERT, expires_at = now + booking_hold_minutes
+      confirm_booking  → expires_at = NULL (hold is permanent, awaiting compaction)
+      compaction job   → DELETE confirmed rows and fold their count into Inventory.book_count
+      cancel / expiry  → DELETE
+
+    A hold is "live" (counts against availability) while expires_at IS NULL or
+    expires_at > now, so an abandoned hold stops counting the moment it expires,
+    even before the sweeper deletes it:
+      available = total_count - book_count - reserved_count - SUM(live holds)
+    """
+    __tablename__ = "inventory_hold"
+    __table_args__ = (
+        # Availability range query: "live holds for room R between D1 and D2"
+        Index("ix_inventory_hold_room_date_expires", "room_id", "date", "expires_at"),
+    )
+
+    id         = Column(BigInteger, primary_key=True, autoincrement=True)
+    room_id    = Column(BigInteger, ForeignKey("Room.id"),    nullable=False)
+    date       = Column(Date,       nullable=False)
+    count      = Column(Integer,    nullable=False)
+    expires_at = Column(DateTime,   nullable=True)          # NULL = confirmed, not yet compacted
+    booking_id = Column(BigInteger, ForeignKey("Booking.id"), nullable=False, index=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    booking = relationship("Booking", back_populates="holds")
@@ -0,0 +1,49 @@
+from sqlalchemy import (
+    Column, BigInteger, Integer, Numeric, Date, DateTime,
+    Boolean, String, ForeignKey, UniqueConstraint, Index
+)
+from datetime import datetime, timezone
+from app.database import Base
+
+
+class InventorySegment(Base):
+    """
+    Run-length inventory: one row per run of consecutive nights whose values are
+    all the same — used instead of per-night Inventory rows when
+    RESERVATION_MODE=segments.
+
+    A freshly stocked room is one segment covering its whole horizon, and a room
+    that is never booked stays at one segment however far ahead it is stocked.
+    A write over a date range first splits the segments at the range's edges,
+    updates the segments inside it, then merges neighbours that became identical
+    again (see app/reservation/segments.py), so segments split only where
+    nights actually differ.
+
+    Columns mean what they do on Inventory, for every night of
+    [start_date, end_date] (both ends inclusive, like booking ranges):
+      available = total_count - book_count - reserved_count
+
+    The segments of a room never overlap; (room_id, start_date) is unique.
+    """
+    __tablename__ = "inventory_segment"
+    __table_args__ = (
+        UniqueConstraint("room_id", "start_date", name="unique_room_segment_start"),
+        # Search: segments of every room overlapping a date range
+        Index("ix_inventory_segment_end_start", "end_date", "start_date"),
+    )
+
+    id             = Column(BigInteger, primary_key=True, autoincrement=True)
+    hotel_id       = Column(BigInteger, ForeignKey("Hotel.id"), nullable=False)
+    room_id        = Column(BigInteger, ForeignKey("Room.id"),  nullable=False)
+    start_date     = Column(Date,    nullable=False)
+    end_date       = Column(Date,    nullable=False)
+    book_count     = Column(Integer, nullable=False, default=0)
+    reserved_count = Column(Integer, nullable=False, default=0)
+    total_count    = Column(Integer, nullable=False)
+    surge_factor   = Column(Numeric(5, 2),  nullable=False, default=1)
+    price          = Column(Numeric(10, 2), nullable=False)
+    city           = Column(String,  nullable=False)
+    closed         = Column(Boolean, nullable=False, default=False)
+    created_at     = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at     = Column(DateTime, default=lambda: datetime.now(timezone.utc),
+                            onupdate=lambda: datetime.now(timezone.utc))
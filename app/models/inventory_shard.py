@@ -0,0 +1,36 @@
+from sqlalchemy import Column, BigInteger, Integer, Date, ForeignKey, UniqueConstraint
+from app.database import Base
+
+
+class InventoryShard(Base):
+    """
+    Sub-counter of one (room, date) Inventory row, for flash-sale rooms.
+
+    When a night is sharded, its free rooms are moved out of the Inventory row
+    into N shard rows: Inventory.reserved_count is raised by the same amount
+    (the "block"), so every path that only reads Inventory sees the night as
+    taken, and bookings claim from a random shard instead — N rows to contend
+    on instead of one.
+
+      SUM(capacity) over a night's shards == the block inside reserved_count
+      shard free = capacity - claimed
+      available  = total_count - book_count - reserved_count + SUM(shard free)
+
+    Lifecycle (see app/reservation/sharding.py):
+      init_booking     → claimed += n on one shard (+ an InventoryShardClaim row)
+      confirm_booking  → capacity -= n, claimed -= n (the rooms leave the block;
+                         Inventory moves them from reserved_count to book_count)
+      expiry           → claimed -= n (the rooms go back to the shard)
+      rebalance        → capacities redistributed across the night's shards
+    """
+    __tablename__ = "inventory_shard"
+    __table_args__ = (
+        UniqueConstraint("room_id", "date", "shard", name="unique_room_date_shard"),
+    )
+
+    id       = Column(BigInteger, primary_key=True, autoincrement=True)
+    room_id  = Column(BigInteger, ForeignKey("Room.id"), nullable=False)
+    date     = Column(Date,    nullable=False)
+    shard    = Column(Integer, nullable=False)              # 0 .. N-1
+    capacity = Column(Integer, nullable=False, default=0)
+    claimed  = Column(Integer, nullable=False, default=0)   # rooms held by unconfirmed bookings
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, BigInteger, Integer, Date, ForeignKey
+from sqlalchemy.orm import relationship
+from app.database import Base
+
+
+class InventoryShardClaim(Base):
+    """
+    Which shard a booking's hold was taken from, one row per (booking, sharded night).
+
+    Confirmation and expiry use it to settle the right shard; the row is deleted
+    at that point. Nights of the booking that were not sharded have no claim and
+    follow the normal reserved_count path.
+    """
+    __tablename__ = "inventory_shard_claim"
+
+    id         = Column(BigInteger, primary_key=True, autoincrement=True)
+    booking_id = Column(BigInteger, ForeignKey("Booking.id"), nullable=False, index=True)
+    room_id    = Column(BigInteger, ForeignKey("Room.id"), nullable=False)
+    date       = Column(Date,    nullable=False)
+    shard      = Column(Integer, nullable=False)
+    count      = Column(Integer, nullable=False)
+
+    booking = relationship("Booking", back_populates="shard_claims")
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, JSON, Index
+from datetime import datetime, timezone
+from app.database import Base
+
+
+class OutboxMessage(Base):
+    """
+    Transactional outbox — side effects (Stripe calls) recorded in the SAME
+    transaction as the state change that requires them, and performed later by
+    outbox_service outside any inventory lock.
+
+    status:
+      PENDING — waiting for (another) attempt at next_attempt_at
+      DONE    — handler succeeded; its return value is in `result`
+      FAILED  — gave up after outbox_max_attempts; needs a human
+    """
+    __tablename__ = "outbox_message"
+    __table_args__ = (
+        # Dispatcher poll: "PENDING messages due now", oldest first
+        Index("ix_outbox_message_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id              = Column(BigInteger, primary_key=True, autoincrement=True)
+    kind            = Column(String(50), nullable=False)          # e.g. "stripe.refund"
+    dedup_key       = Column(String, unique=True, nullable=False)  # also sent to Stripe as Idempotency-Key
+    payload         = Column(JSON, nullable=False)
+    status          = Column(String(20), nullable=False, default="PENDING")
+    attempts        = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False,
+                             default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+    last_error      = Column(String, nullable=True)
+    result          = Column(JSON, nullable=True)
+    created_at      = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    processed_at    = Column(DateTime, nullable=True)
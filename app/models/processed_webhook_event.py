@@ -0,0 +1,20 @@
+from sqlalchemy import Column, String, DateTime
+from datetime import datetime, timezone
+from app.database import Base
+
+
+class ProcessedWebhookEvent(Base):
+    """
+    One row per Stripe event id ever accepted — the durable half of webhook de-duplication.
+
+    Inserted in the same transaction as the WebhookEvent it queues, so a redelivered
+    event fails on the primary key and is dropped before any booking or inventory
+    work happens. Rows older than `webhook_event_retention_days` are purged
+    (Stripe stops retrying after 3 days).
+    """
+    __tablename__ = "processed_webhook_event"
+
+    event_id    = Column(String, primary_key=True)     # Stripe "evt_..." id
+    type        = Column(String, nullable=False)
+    received_at = Column(DateTime, nullable=False, index=True,
+                         default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
@@ -21,3 +21,4 @@ class Room(Base):
 
     hotel       = relationship("Hotel",     back_populates="rooms")
     inventories = relationship("Inventory", back_populates="room", cascade="all, delete-orphan")
+    inventory_segments = relationship("InventorySegment", cascade="all, delete-orphan")   # RESERVATION_MODE=segments
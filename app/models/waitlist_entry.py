@@ -0,0 +1,33 @@
+from sqlalchemy import Column, BigInteger, Integer, String, Date, DateTime, ForeignKey, Index
+from datetime import datetime, timezone
+from app.database import Base
+
+
+class WaitlistEntry(Base):
+    """
+    A guest waiting for a sold-out room over a date range.
+
+    When rooms are given back (cancellation, hold expiry, reopened nights) the
+    waitlist promoter matches WAITING entries whose range overlaps the freed
+    nights, oldest first, and turns the ones that now fit into RESERVED bookings.
+
+    status: WAITING → PROMOTED (booking_id set) | CANCELLED (guest left) | EXPIRED (check-in passed)
+    """
+    __tablename__ = "waitlist_entry"
+    __table_args__ = (
+        # Promoter: "WAITING entries of room R overlapping [start, end]", FIFO
+        Index("ix_waitlist_entry_room_status_dates", "room_id", "status", "check_in_date", "check_out_date"),
+    )
+
+    id             = Column(BigInteger, primary_key=True, autoincrement=True)
+    user_id        = Column(BigInteger, ForeignKey("app_user.id"), nullable=False, index=True)
+    hotel_id       = Column(BigInteger, ForeignKey("Hotel.id"), nullable=False)
+    room_id        = Column(BigInteger, ForeignKey("Room.id"), nullable=False)
+    check_in_date  = Column(Date, nullable=False)
+    check_out_date = Column(Date, nullable=False)
+    rooms_count    = Column(Integer, nullable=False)
+    status         = Column(String(20), nullable=False, default="WAITING")
+    booking_id     = Column(BigInteger, ForeignKey("Booking.id"), nullable=True)
+    created_at     = Column(DateTime, nullable=False,
+                            default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+    promoted_at    = Column(DateTime, nullable=True)
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, JSON, Index
+from datetime import datetime, timezone
+from app.database import Base
+
+
+class WebhookEvent(Base):
+    """
+    Durable queue of verified Stripe webhook events.
+
+    The webhook route only verifies the signature and INSERTs here, then returns 2xx.
+    webhook_service.process_pending consumes the queue in batches.
+
+    status: PENDING → DONE | IGNORED (event type we don't handle) | FAILED (gave up)
+            | REFUNDED (paid for a booking that was no longer holding rooms)
+    """
+    __tablename__ = "webhook_event"
+    __table_args__ = (
+        # Consumer poll: "PENDING events, oldest first"
+        Index("ix_webhook_event_status_id", "status", "id"),
+    )
+
+    id           = Column(BigInteger, primary_key=True, autoincrement=True)
+    event_id     = Column(String, nullable=False, index=True)   # Stripe "evt_..." id
+    type         = Column(String, nullable=False)               # e.g. "checkout.session.completed"
+    payload      = Column(JSON, nullable=False)                 # raw event body as sent by Stripe
+    status       = Column(String(20), nullable=False, default="PENDING")
+    attempts     = Column(Integer, nullable=False, default=0)
+    last_error   = Column(String, nullable=True)
+    received_at  = Column(DateTime, nullable=False,
+                          default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+    processed_at = Column(DateTime, nullable=True)
@@ -39,3 +39,22 @@ def calculate_total_price(inventories: List) -> Decimal:
     """
     chain = build_pricing_chain()
     return sum(chain.calculate(inv) for inv in inventories) or Decimal("0")
+
+
+def calculate_line_prices(lines: List[List]) -> List[Decimal]:
+    """
+    calculate_total_price for several bookings with ONE pricing chain — used by
+    cart bookings so every line is priced by the same run.
+    Returns one per-room total per line, in order.
+    """
+    chain = build_pricing_chain()
+    return [sum(chain.calculate(inv) for inv in rows) or Decimal("0") for rows in lines]
+
+
+def calculate_night_prices(inventories: List) -> List[Decimal]:
+    """
+    Dynamic price of each inventory row on its own (one room, one night), with
+    ONE pricing chain — used to price just the nights a booking change adds.
+    """
+    chain = build_pricing_chain()
+    return [chain.calculate(inv) for inv in inventories]
@@ -0,0 +1,56 @@
+import time
+from typing import List
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app.models.inventory import Inventory
+from app.models.booking import Booking
+from app.reservation.counter import CounterReservation
+from app.reservation.strategy import RoomUnavailable, expected_nights
+from app.transactions import record_lock
+
+
+class AtomicReservation(CounterReservation):
+    """
+    Availability check and hold in ONE guarded statement:
+
+        UPDATE "Inventory" SET reserved_count = reserved_count + :n
+        WHERE room_id = :room AND date BETWEEN :in AND :out
+          AND closed = false AND total_count - book_count - reserved_count >= :n
+        RETURNING date, price, surge_factor, book_count, total_count
+
+    The rows are locked by the UPDATE itself and, like any row lock, stay
+    locked until the transaction commits or rolls back. What this saves over
+    `locking` is the separate SELECT ... FOR UPDATE round trip: the check and
+    the increment are computed by the database, so there is no
+    read-modify-write window in Python. Keep the rest of the transaction short.
+    Works on Postgres and on SQLite >= 3.35 (RETURNING).
+
+    If fewer rows come back than nights requested, some night was closed or
+    full — the transaction is rolled back so the partial increments vanish.
+    """
+    def _reserve(self, db: Session, booking: Booking) -> List:
+        room_id, rooms_count = booking.room_id, booking.rooms_count
+        check_in_date, check_out_date = booking.check_in_date, booking.check_out_date
+        started = time.perf_counter()
+        rows = db.execute(
+            update(Inventory)
+            .where(
+                Inventory.room_id == room_id,
+                Inventory.date.between(check_in_date, check_out_date),
+                Inventory.closed == False,
+                (Inventory.total_count - Inventory.book_count - Inventory.reserved_count) >= rooms_count,
+            )
+            .values(reserved_count=Inventory.reserved_count + rooms_count)
+            .returning(
+                Inventory.date, Inventory.price, Inventory.surge_factor,
+                Inventory.book_count, Inventory.total_count,
+            )
+            .execution_options(synchronize_session=False)
+        ).all()
+        # The guard takes the row locks itself — charge the statement as lock time
+        record_lock(started, len(rows), {(booking.hotel_id, room_id)})
+
+        if len(rows) != expected_nights(check_in_date, check_out_date):
+            db.rollback()   # undo the nights that DID match the guard
+            raise RoomUnavailable(room_id)
+        return rows
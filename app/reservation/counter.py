@@ -0,0 +1,214 @@
+from abc import abstractmethod
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import List, Optional, Sequence
+from fastapi import HTTPException
+from sqlalchemy import update, bindparam, case, func, and_
+from sqlalchemy.orm import Session
+from app.models.booking import Booking
+from app.models.enums import BookingStatusEnum
+from app.models.inventory import Inventory
+from app.reservation.strategy import (ReservationStrategy, RoomUnavailable, booking_nights, lock_booking_nights,
+                                      night_deltas)
+from app.reservation import sharding
+from app.transactions import lock_inventory
+
+
+class CounterReservation(ReservationStrategy):
+    """
+    Shared base for strategies that keep holds in Inventory.reserved_count
+    (locking and atomic). They differ only in how _reserve() takes the hold;
+    confirm, cancel and expiry all move the counters the same way.
+
+    Nights an admin has sharded (app/reservation/sharding.py) are held by
+    claiming from a shard instead, whichever of the two is configured.
+    """
+    def reserve(self, db: Session, booking: Booking) -> List:
+        sharded = sharding.sharded_nights(db, booking.room_id, booking.check_in_date, booking.check_out_date)
+        if sharded:
+            return sharding.reserve_from_shards(db, booking, sharded)
+        return self._reserve(db, booking)
+
+    @abstractmethod
+    def _reserve(self, db: Session, booking: Booking) -> List:
+        """Hold a booking none of whose nights is sharded."""
+
+    def _fit(self, db: Session, bookings: Sequence[Booking], op: str) -> tuple[List[Optional[List]], dict]:
+        """
+        Lock every night of every booking in one ordered pass and decide, in input
+        order, which bookings fit. Returns the rows per booking (None if it does not
+        fit) and the rooms to add to reserved_count per (room_id, date). Writes nothing.
+        """
+        by_night = lock_booking_nights(db, bookings, Inventory.closed == False, op=op)
+        deltas: dict[tuple[int, object], int] = defaultdict(int)
+        result = []
+        for b in bookings:
+            inventory_rows = [by_night.get((b.room_id, night)) for night in booking_nights(b)]
+            # Earlier bookings of the same batch count against this one
+            if any(inv is None
+                   or inv.total_count - inv.book_count - inv.reserved_count
+                      - deltas[(inv.room_id, inv.date)] < b.rooms_count
+                   for inv in inventory_rows):
+                result.append(None)
+                continue
+            for inv in inventory_rows:
+                deltas[(inv.room_id, inv.date)] += b.rooms_count
+            result.append(inventory_rows)
+        return result, deltas
+
+    def reserve_available(self, db: Session, bookings: Sequence[Booking]) -> List[Optional[List]]:
+        result, deltas = self._fit(db, bookings, op="booking_import")
+        if deltas:
+            # One executemany for the whole batch instead of a write per booking
+            inv = Inventory.__table__
+            db.execute(
+                update(inv)
+                .where(inv.c.room_id == bindparam("b_room_id"), inv.c.date == bindparam("b_date"))
+                .values(reserved_count=inv.c.reserved_count + bindparam("b_delta")),
+                [{"b_room_id": r, "b_date": d, "b_delta": n} for (r, d), n in sorted(deltas.items())],
+            )
+        return result
+
+    def confirm(self, db: Session, booking: Booking) -> None:
+        self.confirm_many(db, [booking])
+
+    def confirm_many(self, db: Session, bookings: Sequence[Booking]) -> List[Booking]:
+        # One ordered lock pass per batch: each room's rows are locked once, over the
+        # union of its bookings' ranges — also what keeps concurrent deliveries serialized
+        by_night = lock_booking_nights(db, bookings, op="confirm_booking")
+
+        deltas: dict[tuple[int, object], int] = defaultdict(int)
+        for b in bookings:
+            for night in booking_nights(b):
+                if (b.room_id, night) in by_night:
+                    deltas[(b.room_id, night)] += b.rooms_count
+        # Relative writes, not the locked values read back: correct even where
+        # FOR UPDATE is a no-op (SQLite), one executemany for the whole batch
+        if deltas:
+            inv = Inventory.__table__
+            db.execute(
+                update(inv)
+                .where(inv.c.room_id == bindparam("b_room_id"), inv.c.date == bindparam("b_date"))
+                .values(
+                    reserved_count=case(
+                        (inv.c.reserved_count >= bindparam("b_delta"), inv.c.reserved_count - bindparam("b_delta")),
+                        else_=0,
+                    ),
+                    book_count=inv.c.book_count + bindparam("b_delta"),
+                ),
+                [{"b_room_id": r, "b_date": d, "b_delta": n} for (r, d), n in sorted(deltas.items())],
+            )
+        # Rooms claimed from shards leave the block that reserved_count carried for them
+        sharding.settle_claims(db, [b.id for b in bookings])
+        return []
+
+    def cancel(self, db: Session, booking: Booking) -> None:
+        # Release inventory using SELECT FOR UPDATE — same reason as booking init
+        inventory_rows = lock_inventory(
+            db,
+            Inventory.room_id == booking.room_id,
+            Inventory.date.between(booking.check_in_date, booking.check_out_date),
+            op="cancel_booking",
+        )
+        if not inventory_rows:
+            return
+
+        inv = Inventory.__table__
+        db.execute(
+            update(inv)
+            .where(inv.c.room_id == booking.room_id,
+                   inv.c.date.between(booking.check_in_date, booking.check_out_date))
+            .values(book_count=case(
+                (inv.c.book_count >= booking.rooms_count, inv.c.book_count - booking.rooms_count),
+                else_=0,
+            ))
+        )
+
+    def modify(self, db: Session, booking: Booking, check_in_date: date, check_out_date: date,
+               rooms_count: int) -> List:
+        deltas = night_deltas(booking, check_in_date, check_out_date, rooms_count)
+        if not deltas:
+            return []
+        nights = list(deltas)
+        if sharding.sharded_nights(db, booking.room_id, nights[0], nights[-1]).keys() & deltas.keys():
+            raise HTTPException(400, "Bookings cannot be moved onto or off sharded nights")
+
+        # Lock only the nights whose count changes, in date order
+        by_night = {inv.date: inv for inv in lock_inventory(
+            db, Inventory.room_id == booking.room_id, Inventory.date.in_(nights), op="modify_booking",
+        )}
+        # A hold moves reserved_count, a confirmed booking book_count
+        column = (Inventory.book_count if booking.booking_status == BookingStatusEnum.CONFIRMED
+                  else Inventory.reserved_count)
+
+        # Gains: one guarded UPDATE per distinct delta (at most two — added nights
+        # and kept nights with more rooms), so a short night fails the whole change
+        gains: dict[int, list] = defaultdict(list)
+        for night, n in deltas.items():
+            if n > 0:
+                gains[n].append(night)
+        for n, group in sorted(gains.items()):
+            taken = db.execute(
+                update(Inventory)
+                .where(
+                    Inventory.room_id == booking.room_id,
+                    Inventory.date.in_(group),
+                    Inventory.closed == False,
+                    (Inventory.total_count - Inventory.book_count - Inventory.reserved_count) >= n,
+                )
+                .values({column.key: column + n})
+                .returning(Inventory.date)
+                .execution_options(synchronize_session=False)
+            ).all()
+            if len(taken) != len(group):
+                db.rollback()
+                raise RoomUnavailable(booking.room_id)
+
+        losses = [(night, -n) for night, n in deltas.items() if n < 0]
+        if losses:
+            inv = Inventory.__table__
+            col = inv.c[column.key]
+            db.execute(
+                update(inv)
+                .where(inv.c.room_id == booking.room_id, inv.c.date == bindparam("b_date"))
+                .values({column.key: case((col >= bindparam("b_delta"), col - bindparam("b_delta")), else_=0)}),
+                [{"b_date": night, "b_delta": n} for night, n in losses],
+            )
+        return [by_night[night] for night, n in deltas.items() if n > 0]
+
+    def release_expired(self, db: Session, bookings: Sequence) -> int:
+        # Sum the held rooms per (room_id, night) so each inventory row is written once,
+        # applied in (room_id, date) order so concurrent sweepers never deadlock
+        # Sharded nights go back to their shard — reserved_count keeps them in the block
+        from_shards = sharding.release_claims(db, [b.id for b in bookings])
+        deltas: dict[tuple[int, object], int] = defaultdict(int)
+        for b in bookings:
+            night = b.check_in_date
+            while night <= b.check_out_date:
+                if (b.id, night) not in from_shards:
+                    deltas[(b.room_id, night)] += b.rooms_count
+                night += timedelta(days=1)
+        if not deltas:
+            return len(from_shards)
+
+        inv = Inventory.__table__
+        db.execute(
+            update(inv)
+            .where(inv.c.room_id == bindparam("b_room_id"), inv.c.date == bindparam("b_date"))
+            .values(reserved_count=case(
+                (inv.c.reserved_count >= bindparam("b_delta"), inv.c.reserved_count - bindparam("b_delta")),
+                else_=0,
+            )),
+            [{"b_room_id": r, "b_date": d, "b_delta": n} for (r, d), n in sorted(deltas.items())],
+        )
+        return len(deltas) + len(from_shards)
+
+    def availability_filter(self, stmt, rooms_count: int, start_date: date, end_date: date):
+        # A sharded night's free rooms sit in its shards, not on the Inventory row
+        free = sharding.shard_free_subquery(start_date, end_date)
+        return stmt.outerjoin(
+            free, and_(free.c.room_id == Inventory.room_id, free.c.date == Inventory.date)
+        ).where(
+            (Inventory.total_count - Inventory.book_count - Inventory.reserved_count
+             + func.coalesce(free.c.free, 0)) >= rooms_count
+        )
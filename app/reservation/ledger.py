@@ -0,0 +1,263 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional, Sequence
+from sqlalchemy import select, update, delete, func, or_, and_, bindparam
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.booking import Booking
+from app.models.enums import BookingStatusEnum
+from app.models.inventory import Inventory
+from app.models.inventory_hold import InventoryHold
+from app.reservation.strategy import (ReservationStrategy, RoomUnavailable, expected_nights, booking_nights,
+                                      lock_booking_nights, night_deltas)
+from app.transactions import lock_inventory
+
+
+def _utcnow() -> datetime:
+    # Hold timestamps are stored naive-UTC, like every other DateTime column
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def live_holds_subquery(start_date: date, end_date: date, room_id: int = None):
+    """
+    SUM(count) of live holds per (room_id, date) — served by
+    ix_inventory_hold_room_date_expires as an index range scan.
+    """
+    stmt = (
+        select(InventoryHold.room_id, InventoryHold.date,
+               func.sum(InventoryHold.count).label("held"))
+        .where(
+            InventoryHold.date.between(start_date, end_date),
+            or_(InventoryHold.expires_at.is_(None), InventoryHold.expires_at > _utcnow()),
+        )
+        .group_by(InventoryHold.room_id, InventoryHold.date)
+    )
+    if room_id is not None:
+        stmt = stmt.where(InventoryHold.room_id == room_id)
+    return stmt.subquery()
+
+
+class LedgerReservation(ReservationStrategy):
+    """
+    Holds live in the inventory_hold ledger instead of Inventory.reserved_count.
+
+    reserve() still locks the room's Inventory rows (that is the serialization
+    point that makes check-then-insert safe) but never UPDATEs them, so no new
+    row versions are written on the table search_hotels scans. confirm() and
+    expiry touch only the ledger; Inventory.book_count is written in bulk by
+    hold_service.compact_confirmed_holds instead of once per booking.
+
+    Switch RESERVATION_MODE to or from "ledger" only when no holds are in flight —
+    holds taken under one mode are released by that mode's code path.
+    """
+    def reserve(self, db: Session, booking: Booking) -> List:
+        return self.reserve_many(db, [booking])[0]
+
+    def reserve_many(self, db: Session, bookings: Sequence[Booking]) -> List[List]:
+        result = self._fit(db, bookings, op="init_booking")
+        for booking, inventory_rows in zip(bookings, result):
+            if inventory_rows is None:
+                raise RoomUnavailable(booking.room_id)
+        return result
+
+    def reserve_available(self, db: Session, bookings: Sequence[Booking]) -> List[Optional[List]]:
+        return self._fit(db, bookings, op="booking_import")
+
+    def _fit(self, db: Session, bookings: Sequence[Booking], op: str) -> List[Optional[List]]:
+        """
+        Lock every night once, then give each booking that fits (in input order)
+        its ledger holds. Returns the rows per booking, None where it did not fit.
+        """
+        by_night = lock_booking_nights(db, bookings, Inventory.closed == False, op=op)
+        held = live_holds_subquery(min(b.check_in_date for b in bookings),
+                                   max(b.check_out_date for b in bookings))
+        held_by_night = {
+            (room_id, night): count
+            for room_id, night, count in db.execute(
+                select(held.c.room_id, held.c.date, held.c.held)
+                .where(held.c.room_id.in_({b.room_id for b in bookings}))
+            ).all()
+        }
+
+        expires_at = _utcnow() + timedelta(minutes=settings.booking_hold_minutes)
+        result = []
+        for booking in bookings:
+            inventory_rows = [by_night.get((booking.room_id, night)) for night in booking_nights(booking)]
+            if any(inv is None
+                   or inv.total_count - inv.book_count - inv.reserved_count
+                      - held_by_night.get((inv.room_id, inv.date), 0) < booking.rooms_count
+                   for inv in inventory_rows):
+                result.append(None)
+                continue
+
+            # Count this booking against later ones of the same batch
+            for inv in inventory_rows:
+                held_by_night[(inv.room_id, inv.date)] = (
+                    held_by_night.get((inv.room_id, inv.date), 0) + booking.rooms_count
+                )
+            # Attached through Booking.holds — inserted when the caller adds the booking
+            booking.holds = [
+                InventoryHold(room_id=booking.room_id, date=inv.date,
+                              count=booking.rooms_count, expires_at=expires_at)
+                for inv in inventory_rows
+            ]
+            result.append(inventory_rows)
+        return result
+
+    def confirm(self, db: Session, booking: Booking) -> None:
+        self.confirm_many(db, [booking])
+
+    def confirm_many(self, db: Session, bookings: Sequence[Booking]) -> List[Booking]:
+        # Pin the holds; compaction folds them into book_count later in bulk
+        ids = [b.id for b in bookings]
+        if not ids:
+            return []
+        refused = self._lapsed_and_taken(db, bookings)
+        pinned = [i for i in ids if i not in {b.id for b in refused}]
+        if pinned:
+            db.execute(
+                update(InventoryHold)
+                .where(InventoryHold.booking_id.in_(pinned))
+                .values(expires_at=None)
+                .execution_options(synchronize_session=False)
+            )
+        return refused
+
+    def _lapsed_and_taken(self, db: Session, bookings: Sequence[Booking]) -> List[Booking]:
+        """
+        Bookings whose holds lapsed before the payment arrived and no longer fit.
+
+        A lapsed hold stopped counting against availability, so another booking may
+        have taken its rooms; pinning it back would overbook the night. Those nights
+        are checked again under the inventory lock, in booking order, each booking
+        that fits counting against the next.
+        """
+        now = _utcnow()
+        lapsed_holds = db.execute(
+            select(InventoryHold.booking_id, InventoryHold.date, InventoryHold.count)
+            .where(InventoryHold.booking_id.in_([b.id for b in bookings]),
+                   InventoryHold.expires_at.is_not(None), InventoryHold.expires_at <= now)
+        ).all()
+        if not lapsed_holds:
+            return []
+        by_booking: dict[int, dict] = {}
+        for booking_id, night, count in lapsed_holds:
+            by_booking.setdefault(booking_id, {})[night] = count
+        lapsed = sorted((b for b in bookings if b.id in by_booking), key=lambda b: b.id)
+
+        by_night = lock_booking_nights(db, lapsed, op="confirm_booking")
+        held = live_holds_subquery(min(b.check_in_date for b in lapsed), max(b.check_out_date for b in lapsed))
+        held_by_night = {
+            (room_id, night): count
+            for room_id, night, count in db.execute(
+                select(held.c.room_id, held.c.date, held.c.held)
+                .where(held.c.room_id.in_({b.room_id for b in lapsed}))
+            ).all()
+        }
+        refused = []
+        for booking in lapsed:
+            nights = [(by_night.get((booking.room_id, night)), count) for night, count in by_booking[booking.id].items()]
+            if any(inv is None
+                   or inv.total_count - inv.book_count - inv.reserved_count
+                      - held_by_night.get((inv.room_id, inv.date), 0) < count
+                   for inv, count in nights):
+                refused.append(booking)
+                continue
+            for inv, count in nights:
+                held_by_night[(inv.room_id, inv.date)] = held_by_night.get((inv.room_id, inv.date), 0) + count
+        return refused
+
+    def cancel(self, db: Session, booking: Booking) -> None:
+        # Nights still in the ledger are released by deleting the hold; nights
+        # already compacted into book_count are decremented there instead
+        released = set(db.execute(
+            delete(InventoryHold)
+            .where(InventoryHold.booking_id == booking.id)
+            .returning(InventoryHold.date)
+            .execution_options(synchronize_session=False)
+        ).scalars().all())
+
+        compacted = [
+            booking.check_in_date + timedelta(days=i)
+            for i in range(expected_nights(booking.check_in_date, booking.check_out_date))
+            if booking.check_in_date + timedelta(days=i) not in released
+        ]
+        if compacted:
+            inv = Inventory.__table__
+            db.execute(
+                update(inv)
+                .where(inv.c.room_id == booking.room_id, inv.c.date == bindparam("b_date"))
+                .values(book_count=inv.c.book_count - booking.rooms_count),
+                [{"b_date": d} for d in compacted],
+            )
+
+    def modify(self, db: Session, booking: Booking, check_in_date: date, check_out_date: date,
+               rooms_count: int) -> List:
+        deltas = night_deltas(booking, check_in_date, check_out_date, rooms_count)
+        if not deltas:
+            return []
+        nights = list(deltas)
+        # Lock only the nights whose count changes — still the serialization point
+        by_night = {inv.date: inv for inv in lock_inventory(
+            db, Inventory.room_id == booking.room_id, Inventory.date.in_(nights), op="modify_booking",
+        )}
+        held = live_holds_subquery(nights[0], nights[-1], room_id=booking.room_id)
+        held_by_night = dict(db.execute(
+            select(held.c.date, held.c.held).where(held.c.date.in_(nights))
+        ).all())
+        for night, n in deltas.items():
+            inv = by_night.get(night)
+            if n > 0 and (inv is None or inv.closed
+                          or inv.total_count - inv.book_count - inv.reserved_count
+                             - held_by_night.get(night, 0) < n):
+                raise RoomUnavailable(booking.room_id)
+
+        # The booking's own ledger rows absorb the change; a confirmed night already
+        # compacted into book_count has none, and is adjusted there instead
+        own = {h.date: h for h in db.execute(
+            select(InventoryHold).where(InventoryHold.booking_id == booking.id, InventoryHold.date.in_(nights))
+        ).scalars()}
+        confirmed = booking.booking_status == BookingStatusEnum.CONFIRMED
+        expires_at = None if confirmed else (
+            booking.created_at.replace(tzinfo=None) + timedelta(minutes=settings.booking_hold_minutes)
+        )
+        compacted = []
+        for night, n in deltas.items():
+            hold = own.get(night)
+            if hold is not None:
+                hold.count += n
+                if hold.count <= 0:
+                    db.delete(hold)
+            elif night < booking.check_in_date or night > booking.check_out_date:
+                db.add(InventoryHold(room_id=booking.room_id, date=night, count=n,
+                                     expires_at=expires_at, booking_id=booking.id))
+            elif confirmed:
+                compacted.append({"b_date": night, "b_delta": n})
+        if compacted:
+            inv = Inventory.__table__
+            db.execute(
+                update(inv)
+                .where(inv.c.room_id == booking.room_id, inv.c.date == bindparam("b_date"))
+                .values(book_count=inv.c.book_count + bindparam("b_delta")),
+                compacted,
+            )
+        return [by_night[night] for night, n in deltas.items() if n > 0]
+
+    def release_expired(self, db: Session, bookings: Sequence) -> int:
+        # Expired holds already stopped counting — deleting them is just cleanup
+        ids = [b.id for b in bookings]
+        if not ids:
+            return 0
+        return db.execute(
+            delete(InventoryHold)
+            .where(InventoryHold.booking_id.in_(ids))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+    def availability_filter(self, stmt, rooms_count: int, start_date: date, end_date: date):
+        held = live_holds_subquery(start_date, end_date)
+        return stmt.outerjoin(
+            held, and_(held.c.room_id == Inventory.room_id, held.c.date == Inventory.date)
+        ).where(
+            (Inventory.total_count - Inventory.book_count - Inventory.reserved_count
+             - func.coalesce(held.c.held, 0)) >= rooms_count
+        )
@@ -0,0 +1,35 @@
+from typing import List, Sequence
+from sqlalchemy.orm import Session
+from app.models.booking import Booking
+from app.models.inventory import Inventory
+from app.reservation.counter import CounterReservation
+from app.reservation.strategy import RoomUnavailable
+
+
+class LockingReservation(CounterReservation):
+    """
+    The original pessimistic path: SELECT ... FOR UPDATE over every night,
+    then bump reserved_count on the loaded ORM rows in a Python loop.
+
+    Row locks are held from the SELECT until the caller commits, so every
+    concurrent booking for the same room queues behind this transaction.
+    """
+    def _reserve(self, db: Session, booking: Booking) -> List:
+        return self.reserve_many(db, [booking])[0]
+
+    def reserve_many(self, db: Session, bookings: Sequence[Booking]) -> List[List]:
+        # Lock every night of every line in one (room_id, date)-ordered pass — no other
+        # transaction can read/write these until we commit
+        result, deltas = self._fit(db, bookings, op="init_booking")
+        for booking, inventory_rows in zip(bookings, result):
+            if inventory_rows is None:
+                raise RoomUnavailable(booking.room_id)
+
+        # Hold the rooms (temporary reservation — 10 min window). Written relative to
+        # the stored value, so the expiry sweeper's unlocked decrements are never lost
+        # under a lock provider that does not lock the rows themselves (app/locks.py)
+        for booking, inventory_rows in zip(bookings, result):
+            for inv in inventory_rows:
+                if (inv.room_id, inv.date) in deltas:
+                    inv.reserved_count = Inventory.reserved_count + deltas.pop((inv.room_id, inv.date))
+        return result
@@ -0,0 +1,29 @@
+from app.config import settings
+from app.reservation.strategy import ReservationStrategy
+from app.reservation.locking import LockingReservation
+from app.reservation.atomic import AtomicReservation
+from app.reservation.ledger import LedgerReservation
+from app.reservation.segments import SegmentReservation
+
+
+# Keyed by settings.reservation_mode — add new strategies here
+_STRATEGIES = {
+    "locking": LockingReservation,
+    "atomic":  AtomicReservation,
+    "ledger":  LedgerReservation,
+    "segments": SegmentReservation,
+}
+
+
+def get_reservation_strategy() -> ReservationStrategy:
+    """
+    Returns the hold strategy selected by RESERVATION_MODE.
+
+    Read on every call (not cached at import) so the mode can be flipped
+    in tests and benchmarks without reloading modules.
+    """
+    try:
+        return _STRATEGIES[settings.reservation_mode]()
+    except KeyError:
+        raise ValueError(f"Unknown reservation_mode: {settings.reservation_mode!r} "
+                         f"(expected one of {sorted(_STRATEGIES)})")
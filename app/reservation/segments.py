@@ -0,0 +1,395 @@
+"""
+Run-length inventory (RESERVATION_MODE=segments).
+
+A room's nights are stored as InventorySegment rows, one per run of
+consecutive nights with identical values, instead of one Inventory row per
+night. Every write over a date range goes through the same three steps, under
+one lock per room (transactions.lock_rooms):
+
+  carve   split the segments at the range's edges, so the range is covered by
+          whole segments only
+  write   update those segments — the same counters Inventory has, written
+          relative to the stored value
+  merge   join neighbouring segments whose values are equal again
+
+so a room keeps as many segments as it has distinct runs of nights. Booking
+and pricing read the few segments of their range and expand them to per-night
+rows; search sums nights per segment without expanding anything.
+
+Sharding, room-edit propagation and the ledger are per-night features and are
+not available in this mode.
+"""
+from datetime import date, timedelta
+from types import SimpleNamespace
+from typing import List, Optional, Sequence
+from sqlalchemy import select, update, delete, insert, func, and_, or_, case, cast, false, literal, Date, Integer
+from sqlalchemy.orm import Session
+from app.models.booking import Booking
+from app.models.enums import BookingStatusEnum
+from app.models.hotel import Hotel
+from app.models.inventory import Inventory
+from app.models.inventory_segment import InventorySegment
+from app.models.room import Room
+from app.reservation.strategy import ReservationStrategy, RoomUnavailable, expected_nights, night_deltas
+from app.transactions import lock_rooms
+
+# Two neighbouring segments with equal values here are merged into one
+VALUE_COLUMNS = ("price", "surge_factor", "closed", "total_count", "book_count", "reserved_count")
+
+ONE_DAY = timedelta(days=1)
+
+
+# ── Dialect helpers — date arithmetic differs between Postgres and SQLite ────
+
+def _is_postgres(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def _nights_between(db: Session, first, last):
+    """Nights in [first, last] (inclusive) as an SQL expression."""
+    if _is_postgres(db):
+        return last - first + 1
+    return cast(func.julianday(last) - func.julianday(first), Integer) + 1
+
+
+def _next_day(db: Session, day):
+    return day + 1 if _is_postgres(db) else func.date(day, "+1 day")
+
+
+def _later(a, b):
+    return case((a > b, a), else_=b)
+
+
+def _earlier(a, b):
+    return case((a < b, a), else_=b)
+
+
+# ── Carve / merge ────────────────────────────────────────────────────────────
+
+def _segments(db: Session, room_id: int, start_date: date, end_date: date) -> List[InventorySegment]:
+    """The room's segments overlapping [start_date, end_date], in date order, freshly read."""
+    return db.execute(
+        select(InventorySegment)
+        .where(InventorySegment.room_id == room_id,
+               InventorySegment.start_date <= end_date, InventorySegment.end_date >= start_date)
+        .order_by(InventorySegment.start_date)
+        .execution_options(populate_existing=True)
+    ).scalars().all()
+
+
+def _split(db: Session, segment: InventorySegment, first_of_tail: date) -> InventorySegment:
+    """Cuts `segment` before `first_of_tail`. Returns the new tail segment."""
+    tail = InventorySegment(
+        hotel_id=segment.hotel_id, room_id=segment.room_id, city=segment.city,
+        start_date=first_of_tail, end_date=segment.end_date,
+        **{c: getattr(segment, c) for c in VALUE_COLUMNS},
+    )
+    segment.end_date = first_of_tail - ONE_DAY
+    db.add(tail)
+    return tail
+
+
+def carve(db: Session, room_id: int, start_date: date, end_date: date) -> List[InventorySegment]:
+    """
+    Splits the room's segments at start_date and after end_date. Returns the
+    segments now lying inside [start_date, end_date], in date order — nights
+    the room has no inventory for are simply not covered. The room must be locked.
+    """
+    inside = []
+    for segment in _segments(db, room_id, start_date, end_date):
+        if segment.start_date < start_date:
+            segment = _split(db, segment, start_date)
+        if segment.end_date > end_date:
+            _split(db, segment, end_date + ONE_DAY)
+        inside.append(segment)
+    db.flush()
+    return inside
+
+
+def merge(db: Session, room_id: int, start_date: date, end_date: date) -> int:
+    """
+    Joins equal neighbouring segments in and around [start_date, end_date].
+    Returns the number of segments removed. The room must be locked.
+    """
+    removed = 0
+    previous = None
+    for segment in _segments(db, room_id, start_date - ONE_DAY, end_date + ONE_DAY):
+        if (previous is not None and previous.end_date + ONE_DAY == segment.start_date
+                and all(getattr(previous, c) == getattr(segment, c) for c in VALUE_COLUMNS)):
+            previous.end_date = segment.end_date
+            db.delete(segment)
+            removed += 1
+        else:
+            previous = segment
+    db.flush()
+    return removed
+
+
+def _covers(segments: Sequence[InventorySegment], start_date: date, end_date: date) -> bool:
+    """True when the (carved) segments cover every night of the range, without gaps."""
+    expected = start_date
+    for segment in segments:
+        if segment.start_date != expected:
+            return False
+        expected = segment.end_date + ONE_DAY
+    return expected == end_date + ONE_DAY
+
+
+def expand(segments: Sequence[InventorySegment]) -> List[SimpleNamespace]:
+    """One row per night, with the attributes the pricing chain reads."""
+    nights = []
+    for segment in segments:
+        night = segment.start_date
+        while night <= segment.end_date:
+            nights.append(SimpleNamespace(
+                id=segment.id, room_id=segment.room_id, date=night,
+                price=segment.price, surge_factor=segment.surge_factor, closed=segment.closed,
+                book_count=segment.book_count, reserved_count=segment.reserved_count,
+                total_count=segment.total_count,
+            ))
+            night += ONE_DAY
+    return nights
+
+
+# ── Range writes ─────────────────────────────────────────────────────────────
+
+def take(db: Session, room_id: int, start_date: date, end_date: date, rooms: int,
+         column: str = "reserved_count") -> Optional[List[SimpleNamespace]]:
+    """
+    Adds `rooms` to `column` on every night of the range if every night is open
+    and has that many rooms free. Returns the nights as they were before the
+    write (for pricing), or None — then nothing was written. The room must be locked.
+    """
+    segments = carve(db, room_id, start_date, end_date)
+    if not _covers(segments, start_date, end_date) or any(
+            s.closed or s.total_count - s.book_count - s.reserved_count < rooms for s in segments):
+        merge(db, room_id, start_date, end_date)    # undo the carve
+        return None
+    nights = expand(segments)
+    counter = getattr(InventorySegment, column)
+    for segment in segments:
+        setattr(segment, column, counter + rooms)
+    db.flush()
+    merge(db, room_id, start_date, end_date)
+    return nights
+
+
+def give_back(db: Session, room_id: int, start_date: date, end_date: date, rooms: int,
+              column: str = "reserved_count", to_column: str = None) -> int:
+    """
+    Takes `rooms` off `column` (never below 0) on every night of the range, and
+    adds them to `to_column` if given (a hold becoming a confirmed booking).
+    Returns the nights touched. The room must be locked.
+    """
+    segments = carve(db, room_id, start_date, end_date)
+    nights = sum(expected_nights(s.start_date, s.end_date) for s in segments)
+    counter = getattr(InventorySegment, column)
+    for segment in segments:
+        setattr(segment, column, case((counter >= rooms, counter - rooms), else_=0))
+        if to_column:
+            setattr(segment, to_column, getattr(InventorySegment, to_column) + rooms)
+    db.flush()
+    merge(db, room_id, start_date, end_date)
+    return nights
+
+
+def set_values(db: Session, room_id: int, start_date: date, end_date: date, **values) -> List[InventorySegment]:
+    """Admin edit (closed, surge_factor, price) of a date range. Returns the segments of the range. The room must be locked."""
+    segments = carve(db, room_id, start_date, end_date)
+    for segment in segments:
+        for column, value in values.items():
+            setattr(segment, column, value)
+    db.flush()
+    merge(db, room_id, start_date, end_date)
+    return _segments(db, room_id, start_date, end_date)
+
+
+# ── Stocking ─────────────────────────────────────────────────────────────────
+
+def generate(db: Session, *room_criteria, start_date: date, end_date: date) -> int:
+    """
+    Stocks the matching rooms up to end_date, segments-mode counterpart of
+    inventory_service.generate_inventory. Does not commit.
+
+    A room whose last segment still has the room's fresh values (nothing booked,
+    open, no surge, current price and count) has that segment stretched to
+    end_date; any other room gets one new segment after its last one. Either
+    way the room gains no extra segment per day of horizon. Both steps are
+    single set-based statements over all the matching rooms.
+
+    Returns:
+        int: Number of segments stretched or inserted.
+    """
+    last = (
+        select(InventorySegment.room_id, func.max(InventorySegment.end_date).label("end_date"))
+        .group_by(InventorySegment.room_id)
+        .subquery("last_segment")
+    )
+    rooms = select(Room.id).join(Hotel, Hotel.id == Room.hotel_id).where(*room_criteria)
+
+    stretchable = (
+        select(InventorySegment.id)
+        .join(last, and_(last.c.room_id == InventorySegment.room_id, last.c.end_date == InventorySegment.end_date))
+        .join(Room, Room.id == InventorySegment.room_id)
+        .where(
+            InventorySegment.room_id.in_(rooms),
+            InventorySegment.end_date >= start_date - ONE_DAY,
+            InventorySegment.end_date < end_date,
+            InventorySegment.book_count == 0, InventorySegment.reserved_count == 0,
+            InventorySegment.closed == False, InventorySegment.surge_factor == 1,
+            InventorySegment.price == Room.base_price, InventorySegment.total_count == Room.total_count,
+        )
+    )
+    stretched = db.execute(
+        update(InventorySegment).where(InventorySegment.id.in_(stretchable)).values(end_date=end_date)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    start = literal(start_date, Date)
+    missing = (
+        select(Room.hotel_id, Room.id, _later(func.coalesce(_next_day(db, last.c.end_date), start), start),
+               literal(end_date, Date), Room.base_price, Room.total_count,
+               literal(1), literal(0), literal(0), false(), Hotel.city)
+        .select_from(Room)
+        .join(Hotel, Hotel.id == Room.hotel_id)
+        .outerjoin(last, last.c.room_id == Room.id)
+        .where(*room_criteria, or_(last.c.end_date.is_(None), last.c.end_date < end_date))
+    )
+    inserted = db.execute(
+        insert(InventorySegment).from_select(
+            ["hotel_id", "room_id", "start_date", "end_date", "price", "total_count",
+             "surge_factor", "book_count", "reserved_count", "closed", "city"],
+            missing,
+        )
+    ).rowcount
+    return stretched + inserted
+
+
+def compress(db: Session, *room_criteria) -> tuple[int, int]:
+    """
+    Converts the matching rooms' per-night Inventory rows into segments and
+    deletes the rows — the way to switch existing data to RESERVATION_MODE=segments.
+
+    One INSERT ... SELECT groups each room's consecutive nights with equal
+    values (gaps and islands: night number minus its rank among equal nights
+    is constant along a run). Does not commit.
+
+    Returns:
+        tuple[int, int]: Segments written, Inventory rows deleted.
+    """
+    if _is_postgres(db):
+        day_number = Inventory.date - literal(date(2000, 1, 1))
+    else:
+        day_number = cast(func.julianday(Inventory.date), Integer)
+    values = [getattr(Inventory, c) for c in VALUE_COLUMNS]
+    runs = (
+        select(Inventory.hotel_id, Inventory.room_id, Inventory.date, Inventory.city, *values,
+               (day_number - func.row_number().over(
+                   partition_by=[Inventory.room_id, *values], order_by=Inventory.date)).label("run"))
+        .join(Room, Room.id == Inventory.room_id)
+        .join(Hotel, Hotel.id == Room.hotel_id)
+        .where(*room_criteria)
+        .subquery("runs")
+    )
+    grouped = (
+        select(runs.c.hotel_id, runs.c.room_id, func.min(runs.c.date), func.max(runs.c.date),
+               func.min(runs.c.city), *[runs.c[c] for c in VALUE_COLUMNS])
+        .group_by(runs.c.hotel_id, runs.c.room_id, runs.c.run, *[runs.c[c] for c in VALUE_COLUMNS])
+    )
+    written = db.execute(
+        insert(InventorySegment).from_select(
+            ["hotel_id", "room_id", "start_date", "end_date", "city", *VALUE_COLUMNS], grouped,
+        )
+    ).rowcount
+    rooms = select(Room.id).join(Hotel, Hotel.id == Room.hotel_id).where(*room_criteria)
+    deleted = db.execute(
+        delete(Inventory).where(Inventory.room_id.in_(rooms)).execution_options(synchronize_session=False)
+    ).rowcount
+    return written, deleted
+
+
+# ── Strategy ─────────────────────────────────────────────────────────────────
+
+class SegmentReservation(ReservationStrategy):
+    """
+    Holds live in InventorySegment counters (reserved_count, then book_count),
+    as in the counter modes, but over date ranges instead of single nights.
+    Every method locks each room it writes once (transactions.lock_rooms).
+    """
+    def reserve(self, db: Session, booking: Booking) -> List:
+        lock_rooms(db, [booking.room_id], op="init_booking")
+        nights = take(db, booking.room_id, booking.check_in_date, booking.check_out_date, booking.rooms_count)
+        if nights is None:
+            db.rollback()
+            raise RoomUnavailable(booking.room_id)
+        return nights
+
+    def reserve_available(self, db: Session, bookings: Sequence[Booking]) -> List[Optional[List]]:
+        lock_rooms(db, [b.room_id for b in bookings], op="booking_import")
+        return [take(db, b.room_id, b.check_in_date, b.check_out_date, b.rooms_count) for b in bookings]
+
+    def confirm(self, db: Session, booking: Booking) -> None:
+        self.confirm_many(db, [booking])
+
+    def confirm_many(self, db: Session, bookings: Sequence[Booking]) -> List[Booking]:
+        lock_rooms(db, [b.room_id for b in bookings], op="confirm_booking")
+        for b in sorted(bookings, key=lambda b: (b.room_id, b.check_in_date)):
+            give_back(db, b.room_id, b.check_in_date, b.check_out_date, b.rooms_count,
+                      column="reserved_count", to_column="book_count")
+        return []
+
+    def cancel(self, db: Session, booking: Booking) -> None:
+        lock_rooms(db, [booking.room_id], op="cancel_booking")
+        give_back(db, booking.room_id, booking.check_in_date, booking.check_out_date, booking.rooms_count,
+                  column="book_count")
+
+    def modify(self, db: Session, booking: Booking, check_in_date: date, check_out_date: date,
+               rooms_count: int) -> List:
+        deltas = night_deltas(booking, check_in_date, check_out_date, rooms_count)
+        if not deltas:
+            return []
+        lock_rooms(db, [booking.room_id], op="modify_booking")
+        column = "book_count" if booking.booking_status == BookingStatusEnum.CONFIRMED else "reserved_count"
+
+        # Consecutive nights with the same change are one range write
+        runs: list[list] = []
+        for night, n in deltas.items():
+            if runs and runs[-1][2] == n and runs[-1][1] + ONE_DAY == night:
+                runs[-1][1] = night
+            else:
+                runs.append([night, night, n])
+
+        gained = []
+        for first, last, n in runs:
+            if n > 0:
+                nights = take(db, booking.room_id, first, last, n, column=column)
+                if nights is None:
+                    db.rollback()
+                    raise RoomUnavailable(booking.room_id)
+                gained += nights
+            else:
+                give_back(db, booking.room_id, first, last, -n, column=column)
+        return sorted(gained, key=lambda night: night.date)
+
+    def release_expired(self, db: Session, bookings: Sequence) -> int:
+        lock_rooms(db, [b.room_id for b in bookings])
+        return sum(give_back(db, b.room_id, b.check_in_date, b.check_out_date, b.rooms_count)
+                   for b in sorted(bookings, key=lambda b: (b.room_id, b.check_in_date)))
+
+    def hotel_availability(self, db: Session, rooms_count: int, start_date: date, end_date: date):
+        first = _later(InventorySegment.start_date, literal(start_date, Date))
+        last = _earlier(InventorySegment.end_date, literal(end_date, Date))
+        return (
+            select(InventorySegment.hotel_id, func.min(InventorySegment.price).label("min_price"))
+            .where(
+                InventorySegment.end_date >= start_date,
+                InventorySegment.start_date <= end_date,
+                InventorySegment.closed == False,
+                (InventorySegment.total_count - InventorySegment.book_count
+                 - InventorySegment.reserved_count) >= rooms_count,
+            )
+            .group_by(InventorySegment.hotel_id)
+            # A segment stands for all of its nights inside the range
+            .having(func.sum(_nights_between(db, first, last)) >= (end_date - start_date).days)
+            .subquery()
+        )
@@ -0,0 +1,258 @@
+"""
+Sharded inventory counters for flash-sale rooms (counter modes only).
+
+A sharded night's free rooms live in N InventoryShard rows instead of the
+Inventory row (see the model docstring for the accounting). A hold claims from
+one shard picked at random with a single guarded UPDATE, so concurrent bookings
+for the same night spread over N row locks instead of queueing on one.
+
+Only CounterReservation.reserve() draws from shards. The cart's locking path and
+bulk import see a sharded night as fully taken and reject it.
+"""
+import random
+import time
+from collections import defaultdict
+from datetime import date
+from typing import List, Optional, Sequence
+from sqlalchemy import select, update, delete, func, bindparam
+from sqlalchemy.orm import Session
+from app.models.booking import Booking
+from app.models.inventory import Inventory
+from app.models.inventory_shard import InventoryShard
+from app.models.inventory_shard_claim import InventoryShardClaim
+from app.reservation.strategy import RoomUnavailable, booking_nights, expected_nights
+from app.transactions import lock_inventory, record_lock
+from app import metrics
+
+
+def sharded_nights(db: Session, room_id: int, start_date: date, end_date: date) -> dict[date, int]:
+    """{date: shard count} for the room's sharded nights in the range — usually empty."""
+    return dict(db.execute(
+        select(InventoryShard.date, func.count())
+        .where(InventoryShard.room_id == room_id, InventoryShard.date.between(start_date, end_date))
+        .group_by(InventoryShard.date)
+    ).all())
+
+
+def shard_free_subquery(start_date: date, end_date: date):
+    """SUM(capacity - claimed) per (room_id, date) — the availability held in shards."""
+    return (
+        select(InventoryShard.room_id, InventoryShard.date,
+               func.sum(InventoryShard.capacity - InventoryShard.claimed).label("free"))
+        .where(InventoryShard.date.between(start_date, end_date))
+        .group_by(InventoryShard.room_id, InventoryShard.date)
+        .subquery()
+    )
+
+
+def _try_claim(db: Session, room_id: int, night: date, shard: int, count: int) -> bool:
+    started = time.perf_counter()
+    claimed = db.execute(
+        update(InventoryShard)
+        .where(
+            InventoryShard.room_id == room_id,
+            InventoryShard.date == night,
+            InventoryShard.shard == shard,
+            InventoryShard.capacity - InventoryShard.claimed >= count,
+        )
+        .values(claimed=InventoryShard.claimed + count)
+        .returning(InventoryShard.shard)
+        .execution_options(synchronize_session=False)
+    ).first() is not None
+    record_lock(started, int(claimed))
+    return claimed
+
+
+def claim(db: Session, room_id: int, night: date, shards: int, count: int) -> Optional[int]:
+    """
+    Claims `count` rooms on one shard of a night. Returns the shard, or None if
+    the night has fewer than `count` rooms left.
+
+    Shards are probed in random order. If every shard is short, the night is
+    rebalanced (pooling the spare rooms onto one shard) and claimed once more.
+    """
+    order = random.sample(range(shards), shards)
+    for shard in order:
+        if _try_claim(db, room_id, night, shard, count):
+            return shard
+    target = rebalance(db, room_id, night, need=count)
+    if target is not None and _try_claim(db, room_id, night, target, count):
+        return target
+    return None
+
+
+def rebalance(db: Session, room_id: int, night: date, need: int = 0) -> Optional[int]:
+    """
+    Redistributes a night's spare rooms across its shards.
+
+    Also folds rooms freed on the Inventory row since sharding (e.g. a cancelled
+    confirmed booking) into the block. If `need` > 0 and enough rooms are spare,
+    shard 0 gets `need` of them first and is returned; otherwise returns None.
+
+    Locks the Inventory row and then the shard rows. Confirmations lock in the
+    same order; a reserve that already holds a shard row may deadlock with one,
+    and @transactional retries it.
+    """
+    inv = lock_inventory(db, Inventory.room_id == room_id, Inventory.date == night, op="shard_rebalance")
+    started = time.perf_counter()
+    shards = db.execute(
+        select(InventoryShard)
+        .where(InventoryShard.room_id == room_id, InventoryShard.date == night)
+        .order_by(InventoryShard.shard)
+        .with_for_update()
+    ).scalars().all()
+    record_lock(started, len(shards))
+    if not inv or not shards:
+        return None
+    inv = inv[0]
+
+    freed = max(0, inv.total_count - inv.book_count - inv.reserved_count)
+    # Relative write — the expiry sweeper decrements reserved_count without our lock
+    inv.reserved_count = Inventory.reserved_count + freed
+    spare = sum(s.capacity - s.claimed for s in shards) + freed
+
+    first = min(need, spare)
+    base, extra = divmod(spare - first, len(shards))
+    for i, s in enumerate(shards):
+        s.capacity = s.claimed + base + (1 if i < extra else 0) + (first if i == 0 else 0)
+    db.flush()
+    metrics.inc("inventory_shard_rebalances_total")
+    return shards[0].shard if need and first >= need else None
+
+
+def reserve_from_shards(db: Session, booking: Booking, sharded: dict[date, int]) -> List:
+    """
+    Holds a booking some of whose nights are sharded: a claim per sharded night,
+    a guarded reserved_count UPDATE for the rest. All or nothing — on failure the
+    transaction is rolled back and 400 raised, like the atomic strategy.
+    """
+    unavailable = RoomUnavailable(booking.room_id)
+    rows = db.execute(
+        select(Inventory.date, Inventory.price, Inventory.surge_factor,
+               Inventory.book_count, Inventory.total_count, Inventory.closed)
+        .where(Inventory.room_id == booking.room_id,
+               Inventory.date.between(booking.check_in_date, booking.check_out_date))
+        .order_by(Inventory.date)
+    ).all()
+    if len(rows) != expected_nights(booking.check_in_date, booking.check_out_date) or any(r.closed for r in rows):
+        raise unavailable
+
+    plain = [night for night in booking_nights(booking) if night not in sharded]
+    if plain:
+        started = time.perf_counter()
+        held = db.execute(
+            update(Inventory)
+            .where(
+                Inventory.room_id == booking.room_id,
+                Inventory.date.in_(plain),
+                (Inventory.total_count - Inventory.book_count - Inventory.reserved_count) >= booking.rooms_count,
+            )
+            .values(reserved_count=Inventory.reserved_count + booking.rooms_count)
+            .returning(Inventory.date)
+            .execution_options(synchronize_session=False)
+        ).all()
+        record_lock(started, len(held))
+        if len(held) != len(plain):
+            db.rollback()
+            raise unavailable
+
+    # Shard claims below are charged to this hotel/room
+    record_lock(time.perf_counter(), 0, {(booking.hotel_id, booking.room_id)})
+    claims = []
+    for night in sorted(sharded):
+        shard = claim(db, booking.room_id, night, sharded[night], booking.rooms_count)
+        if shard is None:
+            db.rollback()
+            raise unavailable
+        claims.append(InventoryShardClaim(room_id=booking.room_id, date=night,
+                                          shard=shard, count=booking.rooms_count))
+    # Inserted with the booking, through Booking.shard_claims
+    booking.shard_claims = claims
+    metrics.inc("inventory_shard_claims_total", len(claims))
+    return rows
+
+
+def _take_claims(db: Session, booking_ids: Sequence[int]) -> list:
+    if not booking_ids:
+        return []
+    return db.execute(
+        delete(InventoryShardClaim)
+        .where(InventoryShardClaim.booking_id.in_(booking_ids))
+        .returning(InventoryShardClaim.booking_id, InventoryShardClaim.room_id,
+                   InventoryShardClaim.date, InventoryShardClaim.shard, InventoryShardClaim.count)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+
+def _apply(db: Session, claims: list, capacity_sign: int) -> None:
+    deltas: dict[tuple, int] = defaultdict(int)
+    for c in claims:
+        deltas[(c.room_id, c.date, c.shard)] += c.count
+    if not deltas:
+        return
+    t = InventoryShard.__table__
+    db.execute(
+        update(t)
+        .where(t.c.room_id == bindparam("b_room_id"), t.c.date == bindparam("b_date"),
+               t.c.shard == bindparam("b_shard"))
+        .values(claimed=t.c.claimed - bindparam("b_n"),
+                capacity=t.c.capacity + capacity_sign * bindparam("b_n")),
+        [{"b_room_id": r, "b_date": d, "b_shard": s, "b_n": n} for (r, d, s), n in sorted(deltas.items())],
+    )
+
+
+def settle_claims(db: Session, booking_ids: Sequence[int]) -> None:
+    """Confirmation: the claimed rooms leave their shards (and the block) for good."""
+    _apply(db, _take_claims(db, booking_ids), capacity_sign=-1)
+
+
+def release_claims(db: Session, booking_ids: Sequence[int]) -> set[tuple[int, date]]:
+    """Expiry: the claimed rooms go back to their shards. Returns the (booking_id, date) released."""
+    claims = _take_claims(db, booking_ids)
+    _apply(db, claims, capacity_sign=0)
+    return {(c.booking_id, c.date) for c in claims}
+
+
+def shard_nights(db: Session, rows: Sequence[Inventory], shards: int) -> int:
+    """
+    (Re)shards the given locked Inventory rows into `shards` sub-counters each
+    (0 removes sharding). Returns the number of nights changed.
+
+    Existing claims on these nights become plain reserved_count holds, so a
+    booking in flight is confirmed or expired through the normal path.
+    """
+    if not rows:
+        return 0
+    room_id = rows[0].room_id
+    dates = [inv.date for inv in rows]
+    unused = dict(db.execute(
+        select(InventoryShard.date, func.sum(InventoryShard.capacity - InventoryShard.claimed))
+        .where(InventoryShard.room_id == room_id, InventoryShard.date.in_(dates))
+        .group_by(InventoryShard.date)
+    ).all())
+    db.execute(
+        delete(InventoryShardClaim)
+        .where(InventoryShardClaim.room_id == room_id, InventoryShardClaim.date.in_(dates))
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        delete(InventoryShard)
+        .where(InventoryShard.room_id == room_id, InventoryShard.date.in_(dates))
+        .execution_options(synchronize_session=False)
+    )
+
+    for inv in rows:
+        # Release the old block (claimed rooms stay in reserved_count as plain holds),
+        # then block the night's free rooms again — one relative write per night
+        released = unused.get(inv.date, 0) or 0
+        free = max(0, inv.total_count - inv.book_count - inv.reserved_count + released) if shards > 0 else 0
+        inv.reserved_count = Inventory.reserved_count - released + free
+        if shards <= 0:
+            continue
+        base, extra = divmod(free, shards)
+        db.add_all([
+            InventoryShard(room_id=room_id, date=inv.date, shard=k,
+                           capacity=base + (1 if k < extra else 0), claimed=0)
+            for k in range(shards)
+        ])
+    return len(rows)
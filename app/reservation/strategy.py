@@ -0,0 +1,212 @@
+from abc import ABC, abstractmethod
+from datetime import date, timedelta
+from typing import Iterable, Iterator, List, Optional, Sequence
+from sqlalchemy import and_, or_, select, func
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from app.models.booking import Booking
+from app.models.inventory import Inventory
+from app.transactions import lock_inventory
+
+
+class RoomUnavailable(HTTPException):
+    """400: the room has no availability left for some night of the booking.
+
+    Strategies raise this, not a bare 400, when a hold does not fit, so the
+    admission gate can tell "sold out" from a request that was merely invalid.
+    """
+    def __init__(self, room_id: int):
+        super().__init__(400, f"Room {room_id} not available for the selected dates")
+
+
+class ReservationStrategy(ABC):
+    """
+    Abstract base for how a booking holds, confirms and gives back inventory.
+
+    booking_service and expiry_service only ever talk to this interface; the
+    concrete class is picked by `settings.reservation_mode`.
+
+    None of the methods commit — the caller commits the inventory change
+    together with the Booking state change, in one transaction.
+    """
+    @abstractmethod
+    def reserve(self, db: Session, booking: Booking) -> List:
+        """
+        Hold `booking.rooms_count` rooms on EVERY night of the booking range, or
+        raise HTTPException(400) — never a partial hold.
+
+        `booking` is transient (not yet added to the session). The returned rows
+        only need the attributes the pricing chain reads
+        (date, price, surge_factor, book_count, total_count).
+        """
+
+    def reserve_many(self, db: Session, bookings: Sequence[Booking]) -> List[List]:
+        """
+        reserve() for every booking of a cart, in the caller's transaction — all or none.
+
+        Returns the priced rows of each booking, in input order. On failure the
+        caller must roll back: earlier lines may already hold rooms. The default
+        reserves line by line in (room_id, check_in_date) order, so carts sharing
+        rooms lock them in the same order; strategies that lock rows up front
+        override it with a single pass over every line.
+        """
+        rows = {}
+        for booking in sorted(bookings, key=lambda b: (b.room_id, b.check_in_date)):
+            rows[id(booking)] = self.reserve(db, booking)
+        return [rows[id(b)] for b in bookings]
+
+    @abstractmethod
+    def reserve_available(self, db: Session, bookings: Sequence[Booking]) -> List[Optional[List]]:
+        """
+        Bulk import: hold every booking that still fits, taken in input order.
+
+        Returns the priced rows of each booking, or None for a booking that did
+        not fit (it holds nothing and does not count against later ones). All
+        bookings share one ordered lock pass and one batched inventory write.
+        """
+
+    @abstractmethod
+    def confirm(self, db: Session, booking: Booking) -> None:
+        """Turn the booking's hold into a confirmed booking (payment received)."""
+
+    def confirm_many(self, db: Session, bookings: Sequence[Booking]) -> List[Booking]:
+        """
+        confirm() for a batch of bookings in one transaction (webhook consumer).
+        Strategies override it to lock each room's inventory once per batch.
+
+        Returns the bookings that could not be confirmed: their hold lapsed before
+        the payment arrived and its rooms were taken in the meantime. They hold
+        nothing the caller may pin; the caller expires them. Strategies whose
+        holds only end through the expiry sweeper always return [].
+        """
+        for booking in bookings:
+            self.confirm(db, booking)
+        return []
+
+    @abstractmethod
+    def cancel(self, db: Session, booking: Booking) -> None:
+        """Give back the rooms of a CONFIRMED booking."""
+
+    @abstractmethod
+    def modify(self, db: Session, booking: Booking, check_in_date: date, check_out_date: date,
+               rooms_count: int) -> List:
+        """
+        Move the rooms `booking` holds (a hold, or a CONFIRMED booking) to a new
+        range and/or rooms_count, touching only the nights whose count changes
+        (see night_deltas). Nights that gain rooms are checked and taken all or
+        nothing, else HTTPException(400); nights that lose rooms give them back.
+
+        `booking` still carries its old range and count. Returns the locked
+        Inventory rows of the nights that gained rooms, in date order, as the
+        pricing chain sees them.
+        """
+
+    @abstractmethod
+    def release_expired(self, db: Session, bookings: Sequence) -> int:
+        """
+        Give back the holds of bookings the expiry sweeper just moved to EXPIRED.
+
+        `bookings` are rows with (id, room_id, check_in_date, check_out_date,
+        rooms_count). Returns the number of inventory nights touched.
+        """
+
+    def availability_filter(self, stmt, rooms_count: int, start_date: date, end_date: date):
+        """
+        Restrict a SELECT over Inventory to nights with `rooms_count` free rooms.
+        Used by hotel search; strategies that keep holds elsewhere override it.
+        """
+        return stmt.where(
+            (Inventory.total_count - Inventory.book_count - Inventory.reserved_count) >= rooms_count
+        )
+
+    def hotel_availability(self, db: Session, rooms_count: int, start_date: date, end_date: date):
+        """
+        Subquery of (hotel_id, min_price) for hotels with `rooms_count` free rooms
+        on the nights of the range — what hotel search joins against. Strategies
+        that do not keep one Inventory row per night override it.
+        """
+        return (
+            self.availability_filter(
+                select(Inventory.hotel_id, func.min(Inventory.price).label("min_price"))
+                .where(
+                    Inventory.date >= start_date,
+                    Inventory.date <= end_date,
+                    Inventory.closed == False,
+                ),
+                rooms_count, start_date, end_date,
+            )
+            .group_by(Inventory.hotel_id)
+            .having(func.count(Inventory.hotel_id) >= (end_date - start_date).days)
+            .subquery()
+        )
+
+
+def expected_nights(check_in_date: date, check_out_date: date) -> int:
+    """Number of inventory rows a booking range covers (both ends inclusive)."""
+    return (check_out_date - check_in_date).days + 1
+
+
+def booking_nights(booking) -> Iterator[date]:
+    """Every inventory date a booking covers (both ends inclusive)."""
+    for i in range(expected_nights(booking.check_in_date, booking.check_out_date)):
+        yield booking.check_in_date + timedelta(days=i)
+
+
+def night_deltas(booking, check_in_date: date, check_out_date: date, rooms_count: int) -> dict[date, int]:
+    """
+    {date: change in rooms} for moving a booking to a new range and rooms_count.
+    Nights whose count stays the same are left out — a one-night extension of a
+    week-long stay is one entry.
+    """
+    deltas: dict[date, int] = {}
+    for night in booking_nights(booking):
+        deltas[night] = -booking.rooms_count
+    for i in range(expected_nights(check_in_date, check_out_date)):
+        night = check_in_date + timedelta(days=i)
+        deltas[night] = deltas.get(night, 0) + rooms_count
+    return {night: n for night, n in sorted(deltas.items()) if n}
+
+
+def merge_night_spans(spans: Iterable[tuple[date, date]]) -> list[tuple[date, date]]:
+    """Inclusive (first, last) night spans merged where they overlap or touch, in date order."""
+    runs: list[list[date]] = []
+    for first, last in sorted(spans):
+        if runs and first - runs[-1][1] <= timedelta(days=1):
+            runs[-1][1] = max(runs[-1][1], last)
+        else:
+            runs.append([first, last])
+    return [(first, last) for first, last in runs]
+
+
+def night_runs(nights: Iterable[date]) -> list[tuple[date, date]]:
+    """
+    (first, last) of each run of consecutive nights — shrinking a stay at both
+    ends frees two runs, not the span between them.
+    """
+    return merge_night_spans((night, night) for night in nights)
+
+
+def lock_booking_nights(db: Session, bookings: Sequence, *criteria, op: str) -> dict:
+    """
+    Locks the Inventory rows of several bookings in one ordered pass.
+
+    Each room is locked once over the union of its bookings' ranges. Returns
+    {(room_id, date): Inventory}; nights filtered out by `criteria` are absent.
+    """
+    spans: dict[int, tuple] = {}
+    for b in bookings:
+        lo, hi = spans.get(b.room_id, (b.check_in_date, b.check_out_date))
+        spans[b.room_id] = (min(lo, b.check_in_date), max(hi, b.check_out_date))
+    if not spans:
+        return {}
+
+    inventory_rows = lock_inventory(
+        db,
+        or_(*[
+            and_(Inventory.room_id == room_id, Inventory.date.between(lo, hi))
+            for room_id, (lo, hi) in sorted(spans.items())
+        ]),
+        *criteria,
+        op=op,
+    )
+    return {(inv.room_id, inv.date): inv for inv in inventory_rows}
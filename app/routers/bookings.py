@@ -1,13 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+from app import booking_events
+from app.config import settings
+from app import database
 from app.database import get_db, get_by_id
 from app.models.user import User
 from app.models.booking import Booking
-from app.schemas.booking import BookingRequest, BookingOut, BookingStatusResponse, BookingPaymentInitResponse
+from app.models.enums import BookingStatusEnum
+from app.schemas.booking import (BookingRequest, BookingOut, BookingStatusResponse, BookingPaymentInitResponse,
+                                 CartBookingRequest, CartBookingOut, BookingModifyRequest, BookingModifyOut)
 from app.schemas.guest import GuestSchema
 from app.security.guards import get_current_user
-from app.services import booking_service
-from typing import List
+from app.services import booking_service, booking_import_service, idempotency_service
+from typing import AsyncIterator, List, Optional
 
 router = APIRouter(prefix="/bookings", tags=["Bookings"])
 
@@ -17,21 +25,118 @@ def init_booking(
     data: BookingRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
 ):
     """Initiates a new booking.
     
     Validates hotel and room existence, locks inventory to prevent double-booking, 
     and applies a temporary reservation hold based on dynamic pricing.
+
+    With an `Idempotency-Key` header, a retried request returns the original
+    response instead of holding inventory a second time.
     
     Args:
         data (BookingRequest): The booking details (hotel, room, dates, count).
         db (Session): The database session.
         current_user (User): The authenticated user making the booking.
+        idempotency_key (str, optional): Client-generated key identifying this attempt.
 
     Returns:
         BookingOut: The newly created booking in RESERVED status.
     """
-    return booking_service.init_booking(db, data, current_user)
+    return idempotency_service.run(
+        db, current_user.id, idempotency_key, "POST /bookings/init", data.model_dump(mode="json"),
+        lambda: BookingOut.model_validate(
+            booking_service.init_booking(db, data, current_user)
+        ).model_dump(mode="json"),
+        success_status=201,
+    )
+
+
+@router.post("/cart", response_model=CartBookingOut, status_code=201)
+def init_cart(
+    data: CartBookingRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
+):
+    """Initiates several bookings at once — every line is reserved or none is.
+
+    Lines may span rooms and hotels. Each line becomes its own RESERVED booking
+    and is paid for through the usual `/bookings/{id}/payments` route.
+
+    Args:
+        data (CartBookingRequest): The cart lines.
+        db (Session): The database session.
+        current_user (User): The authenticated user making the booking.
+        idempotency_key (str, optional): Client-generated key identifying this attempt.
+
+    Returns:
+        CartBookingOut: The created bookings, in request order, and their combined amount.
+    """
+    def handler():
+        bookings = booking_service.init_cart(db, data, current_user)
+        return CartBookingOut(
+            bookings=[BookingOut.model_validate(b) for b in bookings],
+            amount=sum(b.amount for b in bookings),
+        ).model_dump(mode="json")
+
+    return idempotency_service.run(
+        db, current_user.id, idempotency_key, "POST /bookings/cart", data.model_dump(mode="json"),
+        handler, success_status=201,
+    )
+
+
+async def _read_lines(request: Request) -> AsyncIterator[str]:
+    """Splits the streamed request body into lines without buffering it whole."""
+    pending = b""
+    async for chunk in request.stream():
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8-sig").rstrip("\r")
+    if pending:
+        yield pending.decode("utf-8-sig").rstrip("\r")
+
+
+@router.post("/import", status_code=200)
+async def import_bookings(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+):
+    """Bulk-reserves a tour operator's upload of bookings.
+
+    The body is NDJSON (one BookingRequest object per line) or, with
+    `Content-Type: text/csv`, a CSV file whose header names the BookingRequest
+    fields. Lines are reserved room by room — see
+    `booking_import_service.import_bookings` for the partial-failure rules —
+    and the response streams one NDJSON result per line as each room completes.
+
+    Args:
+        request (Request): The raw upload.
+        current_user (User): The authenticated user making the bookings.
+
+    Returns:
+        StreamingResponse: `application/x-ndjson`, one `{"line", "status", ...}` object per line.
+
+    Raises:
+        HTTPException: If the upload has more than `booking_import_max_lines` lines (413).
+    """
+    fmt = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    parser = booking_import_service.LineParser(fmt)
+    max_lines = settings.booking_import_max_lines + (1 if fmt == "csv" else 0)     # + CSV header
+    items = []
+    async for line in _read_lines(request):
+        if parser.line_no >= max_lines:
+            raise HTTPException(413, f"At most {settings.booking_import_max_lines} lines per import")
+        parsed = parser.feed(line)
+        if parsed is not None:
+            items.append(parsed)
+
+    # Runs in the threadpool while streaming, after get_db's session would have been
+    # closed — so the import opens and closes a session of its own
+    results = booking_import_service.import_bookings(database.SessionLocal, items, current_user)
+    return StreamingResponse((json.dumps(r) + "\n" for r in results), media_type="application/x-ndjson")
 
 
 @router.post("/{booking_id}/addGuests", response_model=BookingOut)
@@ -60,19 +165,29 @@ def initiate_payment(
     booking_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
 ):
     """Creates a Stripe Checkout session for the booking.
+
+    With an `Idempotency-Key` header, a retried request returns the same
+    checkout URL instead of creating a second Stripe session.
     
     Args:
         booking_id (int): The ID of the booking to pay for.
         db (Session): The database session.
         current_user (User): The authenticated user initiating payment.
+        idempotency_key (str, optional): Client-generated key identifying this attempt.
 
     Returns:
         BookingPaymentInitResponse: Contains the Stripe checkout URL.
     """
-    payment_url = booking_service.initiate_payment(db, booking_id, current_user)
-    return BookingPaymentInitResponse(payment_url=payment_url)
+    return idempotency_service.run(
+        db, current_user.id, idempotency_key, "POST /bookings/{booking_id}/payments",
+        {"booking_id": booking_id},
+        lambda: BookingPaymentInitResponse(
+            payment_url=booking_service.initiate_payment(db, booking_id, current_user)
+        ).model_dump(mode="json"),
+    )
 
 
 @router.post("/{booking_id}/cancel", response_model=BookingOut)
@@ -96,6 +211,33 @@ def cancel_booking(
     return booking_service.cancel_booking(db, booking_id, current_user)
 
 
+@router.patch("/{booking_id}", response_model=BookingModifyOut)
+def modify_booking(
+    booking_id: int,
+    data: BookingModifyRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Changes the dates and/or number of rooms of a held or confirmed booking.
+
+    Only the nights that change are locked and priced again. A confirmed
+    booking that gets cheaper is partially refunded; one that gets dearer
+    returns a Checkout URL for the difference.
+
+    Args:
+        booking_id (int): The ID of the booking to change.
+        data (BookingModifyRequest): The new dates and/or rooms_count.
+        db (Session): The database session.
+        current_user (User): The authenticated user changing the booking.
+
+    Returns:
+        BookingModifyOut: The updated booking, the price difference and any payment URL.
+    """
+    booking, difference, payment_url = booking_service.modify_booking(db, booking_id, data, current_user)
+    return BookingModifyOut(booking=BookingOut.model_validate(booking),
+                            amount_difference=difference, payment_url=payment_url)
+
+
 @router.get("/{booking_id}/status", response_model=BookingStatusResponse)
 def booking_status(
     booking_id: int,
@@ -105,7 +247,8 @@ def booking_status(
     """Retrieves the current status of a user's booking.
     
     This lightweight polling endpoint checks whether a payment has been 
-    successfully captured and finalized by the webhook.
+    successfully captured and finalized by the webhook. Clients waiting on a
+    payment should prefer `/bookings/{id}/status/stream`.
     
     Args:
         booking_id (int): The ID of the booking.
@@ -121,3 +264,70 @@ def booking_status(
     if booking.user_id != current_user.id:
         raise HTTPException(403, "You do not own this booking")
     return BookingStatusResponse(booking_status=booking.booking_status)
+
+
+_FINAL_STATUSES = {BookingStatusEnum.CONFIRMED.value, BookingStatusEnum.CANCELLED.value,
+                   BookingStatusEnum.EXPIRED.value}
+
+
+def _own_booking(db: Session, booking_id: int, current_user: User) -> tuple[str, int]:
+    booking = get_by_id(db, Booking, booking_id)
+    if not booking:
+        raise HTTPException(404, f"Booking not found: {booking_id}")
+    if booking.user_id != current_user.id:
+        raise HTTPException(403, "You do not own this booking")
+    snapshot = booking.booking_status.value, booking.status_version
+    db.rollback()   # nothing else reads the DB for the life of the stream
+    return snapshot
+
+
+@router.get("/{booking_id}/status/stream")
+async def booking_status_stream(
+    booking_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    last_event_id: Optional[int] = Header(default=None, alias="Last-Event-ID"),
+):
+    """Pushes the booking's status as Server-Sent Events instead of being polled.
+
+    Sends the current status first, then one `status` event per change until
+    the booking is CONFIRMED, CANCELLED or EXPIRED, or `booking_status_stream_seconds`
+    pass. The event id is the booking's status_version, so an `EventSource`
+    that reconnects with `Last-Event-ID` only receives what it missed.
+
+    Authentication and the initial read happen once per stream; after that the
+    stream is woken by the in-process pub/sub (app/booking_events.py), which
+    falls back to one batched version poll per process for changes committed by
+    other workers.
+
+    Args:
+        booking_id (int): The ID of the booking.
+        db (Session): The database session.
+        current_user (User): The authenticated user watching the booking.
+        last_event_id (int, optional): The last status_version the client received.
+
+    Returns:
+        StreamingResponse: `text/event-stream` of `{"booking_status", "version"}` events.
+    """
+    status, version = await run_in_threadpool(_own_booking, db, booking_id, current_user)
+    since = last_event_id if last_event_id is not None else -1
+
+    async def events():
+        changes = booking_events.updates(
+            booking_id, status, version, since,
+            timeout=settings.booking_status_stream_seconds,
+            heartbeat=settings.booking_status_heartbeat_seconds,
+        )
+        async for change in changes:
+            if change is None:
+                yield ": keep-alive\n\n"
+                continue
+            current, current_version = change
+            data = json.dumps({"booking_status": current, "version": current_version})
+            yield f"id: {current_version}\nevent: status\ndata: {data}\n\n"
+            if current in _FINAL_STATUSES:
+                await changes.aclose()
+                return
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -1,8 +1,14 @@
-from fastapi import APIRouter, Depends
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.user import User
-from app.schemas.inventory import InventorySchema, UpdateInventoryRequest
+from app.schemas.inventory import (
+    InventorySchema, InventoryColumnsOut, UpdateInventoryRequest, BulkUpdateInventoryRequest, InventoryUpdateOut,
+    ShardInventoryRequest, ShardInventoryOut,
+)
 from app.security.guards import require_hotel_manager
 from app.services import inventory_service
 
@@ -16,40 +22,134 @@ router = APIRouter(
 @router.get("/rooms/{room_id}", response_model=list[InventorySchema])
 def list_inventory(
     room_id: int,
+    response: Response,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    after: Optional[date] = None,
+    limit: Optional[int] = Query(None, ge=1, le=5000),
     db: Session = Depends(get_db),
     current_user: User = Depends(require_hotel_manager),
 ):
-    """Lists the 365-day inventory for a specific room.
-    
+    """Lists the inventory for a specific room, in date order.
+
+    With `limit`, the list is one page and the `X-Next-After` header carries the
+    `after` value for the next one (absent on the last page).
+
+    Args:
+        room_id (int): The ID of the room.
+        response (Response): Where the next-page header is set.
+        start_date (date, optional): First night to list.
+        end_date (date, optional): Last night to list.
+        after (date, optional): Keyset cursor — list only nights after this date.
+        limit (int, optional): Page size; the whole range when omitted.
+        db (Session): The database session.
+        current_user (User): The authenticated manager.
+
+    Returns:
+        list[InventorySchema]: Inventory rows for the room, ordered by date.
+    """
+    rows, next_after = inventory_service.get_room_inventory(db, room_id, current_user, start_date=start_date,
+                                                            end_date=end_date, after=after, limit=limit)
+    if next_after:
+        response.headers["X-Next-After"] = next_after.isoformat()
+    return rows
+
+
+@router.get("/rooms/{room_id}/columns", response_model=InventoryColumnsOut)
+def list_inventory_columns(
+    room_id: int,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    after: Optional[date] = None,
+    limit: Optional[int] = Query(None, ge=1, le=5000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_hotel_manager),
+):
+    """Lists a room's inventory as parallel arrays — compact for dashboards and long ranges.
+
+    Same filters and paging as the row listing; the next page's cursor is `next_after`.
+    The arrays are encoded directly, without building a model per night.
+
     Args:
         room_id (int): The ID of the room.
+        start_date (date, optional): First night to list.
+        end_date (date, optional): Last night to list.
+        after (date, optional): Keyset cursor — list only nights after this date.
+        limit (int, optional): Page size; the whole range when omitted.
         db (Session): The database session.
         current_user (User): The authenticated manager.
 
     Returns:
-        list[InventorySchema]: Ordered list of inventory rows for the room.
+        InventoryColumnsOut: One array per column, index-aligned by night.
     """
-    return inventory_service.get_room_inventory(db, room_id, current_user)
+    rows, next_after = inventory_service.get_room_inventory(db, room_id, current_user, start_date=start_date,
+                                                            end_date=end_date, after=after, limit=limit)
+    return JSONResponse(inventory_service.inventory_columns(rows, next_after))
 
 
-@router.patch("/rooms/{room_id}", response_model=list[InventorySchema])
+@router.patch("/rooms/{room_id}", response_model=InventoryUpdateOut)
 def update_inventory(
     room_id: int,
     data: UpdateInventoryRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_hotel_manager),
 ):
-    """Bulk-updates inventory for a room over a specified date range.
+    """Bulk-updates inventory for a room over a date range or a list of dates.
     
-    Can apply temporary closures or adjust dynamic pricing (surge factor).
+    Can apply temporary closures, adjust dynamic pricing (surge factor) or
+    override the nightly price, optionally on some weekdays only.
     
     Args:
         room_id (int): The ID of the room.
-        data (UpdateInventoryRequest): The update details (date range, closures, surge).
+        data (UpdateInventoryRequest): The update details (dates, weekdays, closures, surge, price).
         db (Session): The database session.
         current_user (User): The authenticated manager.
 
     Returns:
-        list[InventorySchema]: The updated inventory rows.
+        InventoryUpdateOut: How many nights were updated, and between which dates.
     """
-    return inventory_service.bulk_update(db=db, room_id=room_id, data=data, current_user=current_user)
+    return inventory_service.bulk_update(db=db, room_ids=[room_id], data=data, current_user=current_user)
+
+
+@router.patch("/rooms", response_model=InventoryUpdateOut)
+def update_rooms_inventory(
+    data: BulkUpdateInventoryRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_hotel_manager),
+):
+    """Applies the same inventory update to several rooms in one transaction.
+
+    Args:
+        data (BulkUpdateInventoryRequest): The rooms, plus the same fields as the single-room update.
+        db (Session): The database session.
+        current_user (User): The authenticated manager.
+
+    Returns:
+        InventoryUpdateOut: How many rooms and nights were updated, and between which dates.
+    """
+    return inventory_service.bulk_update(db=db, room_ids=data.room_ids, data=data, current_user=current_user)
+
+
+@router.put("/rooms/{room_id}/shards", response_model=ShardInventoryOut)
+def shard_inventory(
+    room_id: int,
+    data: ShardInventoryRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_hotel_manager),
+):
+    """Shards a room's inventory over a date range for a flash sale.
+
+    Bookings on sharded nights claim from one of `shards` sub-counters instead
+    of the single Inventory row. `shards: 0` folds the nights back.
+
+    Args:
+        room_id (int): The ID of the room.
+        data (ShardInventoryRequest): The date range and shard count.
+        db (Session): The database session.
+        current_user (User): The authenticated manager.
+
+    Returns:
+        ShardInventoryOut: Number of nights changed and shards per night.
+    """
+    return inventory_service.shard_inventory(db=db, room_id=room_id, data=data, current_user=current_user)
+
@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app import metrics
+
+# Unauthenticated on purpose — scraped by Prometheus from inside the cluster
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Exposes this worker's in-process metrics in the Prometheus text format.
+
+    Returns:
+        str: One line per series, e.g. `booking_holds_reclaimed_total 42`.
+    """
+    return metrics.render()
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.user import User
-from app.schemas.room import RoomSchema
+from app.schemas.room import RoomSchema, RoomUpdateOut
 from app.security.guards import require_hotel_manager
 from app.services import room_service
 
@@ -75,11 +75,13 @@ def get_room(
     return room_service.get_room(db, hotel_id, room_id, current_user)
 
 
-@router.put("/{room_id}", response_model=RoomSchema)
+@router.put("/{room_id}", response_model=RoomUpdateOut)
 def update_room(
     hotel_id: int,
     room_id: int,
     data: RoomSchema,
+    propagate: bool = False,
+    clamp: bool = False,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_hotel_manager),
 ):
@@ -89,13 +91,17 @@ def update_room(
         hotel_id (int): The ID of the hotel.
         room_id (int): The ID of the room.
         data (RoomSchema): The updated room data.
+        propagate (bool): Also apply a new base_price/total_count to all future nights.
+        clamp (bool): With propagate, cut overcommitted nights only down to what they hold instead of refusing.
         db (Session): The database session.
         current_user (User): The authenticated manager.
 
     Returns:
-        RoomSchema: The updated room record.
+        RoomUpdateOut: The updated room record, plus the inventory rows changed when propagating.
     """
-    return room_service.update_room(db, hotel_id, room_id, data, current_user)
+    room, propagation = room_service.update_room(db, hotel_id, room_id, data, current_user,
+                                                 propagate=propagate, clamp=clamp)
+    return RoomUpdateOut(**RoomSchema.model_validate(room).model_dump(), inventory=propagation)
 
 
 @router.delete("/{room_id}", status_code=204)
@@ -0,0 +1,70 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from typing import List
+from app.database import get_db
+from app.models.user import User
+from app.schemas.booking import BookingRequest
+from app.schemas.waitlist import WaitlistEntryOut
+from app.security.guards import get_current_user
+from app.services import waitlist_service
+
+router = APIRouter(prefix="/waitlist", tags=["Waitlist"])
+
+
+@router.post("", response_model=WaitlistEntryOut, status_code=201)
+def join_waitlist(
+    data: BookingRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Waits for a sold-out room instead of polling search.
+
+    When rooms are released on overlapping nights, waiting entries are promoted
+    oldest first into RESERVED bookings, which are then paid for through the
+    usual `/bookings/{id}/payments` route before their hold expires.
+
+    Args:
+        data (BookingRequest): The booking that could not be made.
+        db (Session): The database session.
+        current_user (User): The authenticated user.
+
+    Returns:
+        WaitlistEntryOut: The WAITING entry.
+    """
+    return waitlist_service.join(db, data, current_user)
+
+
+@router.get("", response_model=List[WaitlistEntryOut])
+def my_waitlist(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Lists the user's waitlist entries, newest first.
+
+    Args:
+        db (Session): The database session.
+        current_user (User): The authenticated user.
+
+    Returns:
+        List[WaitlistEntryOut]: The entries, with booking_id set once promoted.
+    """
+    return waitlist_service.list_entries(db, current_user)
+
+
+@router.delete("/{entry_id}", response_model=WaitlistEntryOut)
+def leave_waitlist(
+    entry_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Leaves the waitlist.
+
+    Args:
+        entry_id (int): The waitlist entry.
+        db (Session): The database session.
+        current_user (User): The authenticated user.
+
+    Returns:
+        WaitlistEntryOut: The CANCELLED entry.
+    """
+    return waitlist_service.leave(db, entry_id, current_user)
@@ -1,9 +1,10 @@
 import stripe
 from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.config import settings
-from app.services import booking_service
+from app.services import webhook_service
 
 router = APIRouter(prefix="/webhook", tags=["Webhook"])
 
@@ -17,8 +18,10 @@ async def capture_payment(
     """Handles Stripe webhook events.
     
     This endpoint is called asynchronously by Stripe. It reads the raw request 
-    body, verifies the cryptographic signature to ensure authenticity, and processes 
-    the `checkout.session.completed` event to finalize bookings.
+    body, verifies the cryptographic signature to ensure authenticity, stores the
+    event in the webhook_event queue and acknowledges immediately. Bookings are
+    confirmed by the webhook consumer worker (see `webhook_service.process_pending`),
+    so Stripe never waits on inventory locks.
     
     Args:
         request (Request): The raw incoming HTTP request (required for signature verification).
@@ -39,10 +42,7 @@ async def capture_payment(
     except stripe.error.SignatureVerificationError:
         raise HTTPException(400, "Invalid Stripe signature")
 
-    # Handle successful payment events
-    if event["type"] == "checkout.session.completed":
-        session_id = event["data"]["object"]["id"]
-        # Confirm the booking via the session ID
-        booking_service.confirm_booking(db, session_id)
+    # Persist the verified event — the sync DB call runs in the threadpool, off the event loop
+    await run_in_threadpool(webhook_service.enqueue_event, db, event.to_dict())
 
-    # Return 204 (no content) for all other event types — Stripe expects a 2xx
+    # Return 204 (no content) as soon as the event is durable — Stripe expects a 2xx
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, model_validator
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional, List
 from decimal import Decimal
 from datetime import date
@@ -22,6 +22,26 @@ class BookingRequest(BaseModel):
         return self
 
 
+class CartBookingRequest(BaseModel):
+    """Request body for POST /bookings/cart — several bookings reserved all-or-nothing."""
+    items: List[BookingRequest] = Field(min_length=1, max_length=20)
+
+
+class BookingModifyRequest(BaseModel):
+    """Request body for PATCH /bookings/{id} — omitted fields keep their current value."""
+    check_in_date: Optional[date] = None
+    check_out_date: Optional[date] = None
+    rooms_count: Optional[int] = Field(default=None, ge=1)
+
+    @model_validator(mode="after")
+    def validate_change(self):
+        if self.check_in_date is None and self.check_out_date is None and self.rooms_count is None:
+            raise ValueError("nothing to change")
+        if self.check_in_date and self.check_out_date and self.check_out_date <= self.check_in_date:
+            raise ValueError("check_out_date must be after check_in_date")
+        return self
+
+
 class BookingOut(BaseModel):
     """What we return for any booking — includes its attached guests."""
     id: int
@@ -36,6 +56,19 @@ class BookingOut(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class CartBookingOut(BaseModel):
+    """Response for POST /bookings/cart — one booking per cart line, in request order."""
+    bookings: List[BookingOut]
+    amount: Decimal
+
+
+class BookingModifyOut(BaseModel):
+    """Response for PATCH /bookings/{id}."""
+    booking: BookingOut
+    amount_difference: Decimal              # new amount - old amount
+    payment_url: Optional[str] = None       # Checkout for the difference, when a paid booking costs more
+
+
 class BookingStatusResponse(BaseModel):
     """Lightweight response for GET /bookings/{id}/status."""
     booking_status: BookingStatusEnum
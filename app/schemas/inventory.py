@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import Annotated, List, Optional
 from decimal import Decimal
 from datetime import date
 
@@ -17,13 +17,76 @@ class InventorySchema(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class InventoryColumnsOut(BaseModel):
+    """
+    Response for GET /admin/inventory/rooms/{room_id}/columns: one page of nights
+    as parallel arrays (index i of every array is the i-th night), in date order.
+    """
+    date: List[date]
+    total_count: List[int]
+    book_count: List[int]
+    reserved_count: List[int]
+    price: List[Decimal]
+    surge_factor: List[Decimal]
+    closed: List[bool]
+    next_after: Optional[date] = None   # pass as `after` for the next page; null on the last one
+
+
 class UpdateInventoryRequest(BaseModel):
     """
     Request body for PATCH /admin/inventory/rooms/{room_id}.
-    Admin can close a date range or set a surge multiplier (or both).
-    Both fields are optional — only provided ones get applied.
+    Admin can close nights, set a surge multiplier or override the price (any mix).
+    Only provided fields get applied.
+
+    The nights are either the start_date..end_date range or an explicit `dates`
+    list, optionally narrowed to `weekdays` (1 = Monday ... 7 = Sunday).
     """
-    start_date: date
-    end_date: date
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    dates: Optional[List[date]] = Field(default=None, min_length=1, max_length=731)
+    weekdays: Optional[List[Annotated[int, Field(ge=1, le=7)]]] = Field(default=None, min_length=1)
     closed: Optional[bool] = None
     surge_factor: Optional[Decimal] = None
+    price: Optional[Decimal] = Field(default=None, gt=0)
+
+    @model_validator(mode="after")
+    def validate_selection(self):
+        if self.dates is None:
+            if self.start_date is None or self.end_date is None:
+                raise ValueError("give start_date and end_date, or dates")
+            if self.end_date < self.start_date:
+                raise ValueError("end_date must not be before start_date")
+        elif self.start_date is not None or self.end_date is not None:
+            raise ValueError("give either start_date/end_date or dates, not both")
+        if self.closed is None and self.surge_factor is None and self.price is None:
+            raise ValueError("nothing to change")
+        return self
+
+
+class BulkUpdateInventoryRequest(UpdateInventoryRequest):
+    """Request body for PATCH /admin/inventory/rooms — the same change on several rooms."""
+    room_ids: List[int] = Field(min_length=1, max_length=500)
+
+
+class InventoryUpdateOut(BaseModel):
+    """What an inventory PATCH changed, instead of every row it touched."""
+    rooms: int                          # rooms with at least one night updated
+    nights: int                         # (room, night) rows updated
+    first_date: Optional[date] = None
+    last_date: Optional[date] = None
+
+
+class ShardInventoryRequest(BaseModel):
+    """
+    Request body for PUT /admin/inventory/rooms/{room_id}/shards.
+    Splits each night's free rooms into `shards` sub-counters; 0 removes sharding.
+    """
+    start_date: date
+    end_date: date
+    shards: int = Field(ge=0, le=64)
+
+
+class ShardInventoryOut(BaseModel):
+    """Response for PUT /admin/inventory/rooms/{room_id}/shards."""
+    nights: int
+    shards: int
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import Optional, List
+from datetime import date
 from decimal import Decimal
 
 
@@ -12,3 +13,16 @@ class RoomSchema(BaseModel):
     total_count: int
     capacity: int
     model_config = {"from_attributes": True}
+
+
+class InventoryPropagationOut(BaseModel):
+    """How many future nights a room update rewrote (PUT ...?propagate=true)."""
+    nights: int         # nights whose price and/or total_count now follow the room
+    clamped: int        # of those, nights whose total_count was cut only down to what they hold
+    skipped: int        # nights left at their old total_count because they hold more rooms
+    skipped_dates: List[date] = []   # those nights (filled by bookings while the edit was running)
+
+
+class RoomUpdateOut(RoomSchema):
+    """Response for PUT /admin/hotels/{hotel_id}/rooms/{room_id}."""
+    inventory: Optional[InventoryPropagationOut] = None
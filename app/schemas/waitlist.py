@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import date, datetime
+
+
+class WaitlistEntryOut(BaseModel):
+    """A waitlist entry — once PROMOTED, booking_id is the RESERVED booking to pay for."""
+    id: int
+    hotel_id: int
+    room_id: int
+    check_in_date: date
+    check_out_date: date
+    rooms_count: int
+    status: str
+    booking_id: Optional[int] = None
+    created_at: datetime
+    promoted_at: Optional[datetime] = None
+    model_config = {"from_attributes": True}
@@ -0,0 +1,204 @@
+import csv
+import json
+import logging
+from collections import defaultdict
+from typing import Callable, Iterable, Iterator, Optional, Union
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from app.models.booking import Booking
+from app.models.hotel import Hotel
+from app.models.room import Room
+from app.models.user import User
+from app.models.enums import BookingStatusEnum
+from app.schemas.booking import BookingRequest
+from app.pricing.pricing_service import calculate_line_prices
+from app.reservation.reservation_service import get_reservation_strategy
+from app.transactions import transactional
+from app import metrics
+
+logger = logging.getLogger(__name__)
+
+CSV_FIELDS = ("hotel_id", "room_id", "check_in_date", "check_out_date", "rooms_count")
+
+ParsedLine = tuple[int, Union[BookingRequest, str]]
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in err['loc']) or 'line'}: {err['msg']}" for err in exc.errors()
+    )
+
+
+class LineParser:
+    """Turns raw NDJSON or CSV lines, fed one at a time, into (line number, BookingRequest or error message).
+
+    Blank lines are skipped but still counted, so line numbers match the uploaded
+    file. CSV input must start with a header naming the BookingRequest fields.
+    """
+
+    def __init__(self, fmt: str):
+        self.fmt = fmt          # "ndjson" or "csv"
+        self.line_no = 0        # lines fed so far, blank ones included
+        self.header = None
+        self.stopped = False    # a bad CSV header ends the upload
+
+    def feed(self, line: str) -> Optional[ParsedLine]:
+        """Parses the next line. Returns None for blank lines, the CSV header and anything after a bad header."""
+        self.line_no += 1
+        if self.stopped or not line.strip():
+            return None
+        try:
+            if self.fmt == "csv":
+                values = next(csv.reader([line]))
+                if self.header is None:
+                    self.header = [v.strip() for v in values]
+                    missing = set(CSV_FIELDS) - set(self.header)
+                    if missing:
+                        self.stopped = True
+                        return self.line_no, f"CSV header is missing: {', '.join(sorted(missing))}"
+                    return None
+                record = dict(zip(self.header, (v.strip() for v in values)))
+            else:
+                record = json.loads(line)
+            return self.line_no, BookingRequest.model_validate(record)
+        except ValidationError as exc:
+            return self.line_no, _validation_message(exc)
+        except (ValueError, TypeError) as exc:
+            return self.line_no, f"Malformed {self.fmt} record: {exc}"
+
+
+def parse_lines(lines: Iterable[str], fmt: str) -> Iterator[ParsedLine]:
+    """LineParser over a whole iterable of lines.
+
+    Args:
+        lines (Iterable[str]): The uploaded body, one record per line.
+        fmt (str): "ndjson" or "csv".
+
+    Yields:
+        ParsedLine: One entry per non-blank record line.
+    """
+    parser = LineParser(fmt)
+    for line in lines:
+        parsed = parser.feed(line)
+        if parsed is not None:
+            yield parsed
+
+
+@transactional("booking_import")
+def _import_room(db: Session, lines: list[tuple[int, BookingRequest]], user_id: int) -> list[dict]:
+    """Reserves every line of one room that still fits — one lock pass, one inventory write, one commit."""
+    bookings = [
+        Booking(
+            hotel_id=item.hotel_id,
+            room_id=item.room_id,
+            user_id=user_id,
+            rooms_count=item.rooms_count,
+            check_in_date=item.check_in_date,
+            check_out_date=item.check_out_date,
+            booking_status=BookingStatusEnum.RESERVED,
+        )
+        for _, item in lines
+    ]
+    rows = get_reservation_strategy().reserve_available(db, bookings)
+
+    fitted = [(booking, r) for booking, r in zip(bookings, rows) if r is not None]
+    for (booking, _), price_per_room in zip(fitted, calculate_line_prices([r for _, r in fitted])):
+        booking.amount = price_per_room * booking.rooms_count
+    db.add_all([booking for booking, _ in fitted])
+    db.flush()
+
+    results = []
+    for (line_no, _), booking, r in zip(lines, bookings, rows):
+        if r is None:
+            results.append({"line": line_no, "status": "REJECTED",
+                            "error": f"Room {booking.room_id} not available for the selected dates"})
+        else:
+            results.append({"line": line_no, "status": "RESERVED",
+                            "booking_id": booking.id, "amount": str(booking.amount)})
+    db.commit()
+    return results
+
+
+def import_bookings(session_factory: Callable[[], Session], items: list[ParsedLine],
+                    current_user: User) -> Iterator[dict]:
+    """Reserves a bulk upload of bookings, yielding one result per line as each room finishes.
+
+    Lines are grouped by room. Each room is one transaction: its inventory rows are
+    locked once, lines are admitted in file order while they still fit, the holds
+    are written with one batched inventory update, and the room's bookings commit
+    together. Rooms are processed in room_id order, so imports never deadlock
+    each other.
+
+    Partial failure is per line — the upload as a whole is never all-or-nothing:
+      RESERVED  the booking was created (it expires like any other hold)
+      REJECTED  the room had no availability left for that line
+      INVALID   the line could not be parsed, or names an unknown hotel/room
+      FAILED    the room's transaction could not complete (e.g. lock contention
+                past the retry budget, or a database error) — none of that room's
+                lines were booked, and they are safe to resubmit
+
+    Results are NOT in file order; each carries its `line` number.
+
+    Args:
+        session_factory (Callable[[], Session]): Opens the session the import runs
+            in. The results are produced while the response streams, after the
+            request's own session has been closed.
+        items (list[ParsedLine]): Output of LineParser / parse_lines.
+        current_user (User): The user the bookings are made for.
+
+    Returns:
+        Iterator[dict]: Lazily evaluated per-line results.
+    """
+    user_id = current_user.id     # read now — the generator may run after the request scope
+
+    def lines_done() -> Iterator[dict]:
+        db = session_factory()
+        try:
+            yield from room_results(db)
+        finally:
+            db.close()
+
+    def room_results(db: Session) -> Iterator[dict]:
+        valid = [(n, item) for n, item in items if isinstance(item, BookingRequest)]
+        for n, item in items:
+            if not isinstance(item, BookingRequest):
+                yield {"line": n, "status": "INVALID", "error": item}
+
+        hotels = {h for (h,) in db.query(Hotel.id).filter(Hotel.id.in_({i.hotel_id for _, i in valid}))}
+        rooms = dict(db.query(Room.id, Room.hotel_id).filter(Room.id.in_({i.room_id for _, i in valid})).all())
+        db.rollback()
+
+        by_room: dict[int, list] = defaultdict(list)
+        for n, item in valid:
+            if item.hotel_id not in hotels:
+                yield {"line": n, "status": "INVALID", "error": f"Hotel not found: {item.hotel_id}"}
+            elif rooms.get(item.room_id) != item.hotel_id:
+                yield {"line": n, "status": "INVALID",
+                       "error": f"Room {item.room_id} not found in hotel {item.hotel_id}"}
+            else:
+                by_room[item.room_id].append((n, item))
+
+        for room_id in sorted(by_room):
+            lines = by_room[room_id]
+            try:
+                results = _import_room(db, lines, user_id)
+            except HTTPException as exc:
+                db.rollback()
+                logger.warning("booking import for room %s failed: %s", room_id, exc.detail)
+                results = [{"line": n, "status": "FAILED", "error": exc.detail} for n, _ in lines]
+            except SQLAlchemyError as exc:
+                # Not retryable (or out of retries) — this room fails, the next one still runs
+                db.rollback()
+                logger.exception("booking import for room %s failed", room_id)
+                results = [{"line": n, "status": "FAILED", "error": f"Database error: {type(exc).__name__}"}
+                           for n, _ in lines]
+            yield from results
+
+    def counted() -> Iterator[dict]:
+        for result in lines_done():
+            metrics.inc("bookings_imported_total", outcome=result["status"])
+            yield result
+
+    return counted()
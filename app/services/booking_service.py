@@ -1,21 +1,33 @@
+import uuid
+from decimal import Decimal
+from typing import Optional
+from sqlalchemy import update
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException
-from datetime import datetime, timedelta, timezone
-import stripe
+from datetime import date, datetime, timedelta, timezone
 from app.models.booking import Booking
-from app.models.inventory import Inventory
 from app.models.guest import Guest
 from app.models.user import User
 from app.models.enums import BookingStatusEnum
-from app.schemas.booking import BookingRequest
-from app.pricing.pricing_service import calculate_total_price
-from app.database import get_by_id, create_record
+from app.schemas.booking import BookingRequest, CartBookingRequest, BookingModifyRequest
+from app.pricing.pricing_service import calculate_total_price, calculate_line_prices, calculate_night_prices
+from app.reservation.reservation_service import get_reservation_strategy
+from app.reservation.strategy import expected_nights, night_deltas, night_runs
+from app.database import get_by_id
+from app.transactions import transactional
+from app import admission, booking_events
+from app.services import outbox_service, waitlist_service
+from app.services.expiry_service import HOLD_STATUSES
 from app.config import settings
+from app import metrics
 
 
 def has_booking_expired(booking: Booking) -> bool:
-    """Determines if a booking's 10-minute temporary payment window has expired.
+    """Determines if a booking's temporary payment window has expired.
+
+    The window length is `settings.booking_hold_minutes` (10 by default). Holds
+    that are never touched again are released by `expiry_service.sweep_expired_holds`.
 
     Args:
         booking (Booking): The booking to check.
@@ -27,14 +39,17 @@ def has_booking_expired(booking: Booking) -> bool:
     created = booking.created_at
     if created.tzinfo is None:
         created = created.replace(tzinfo=timezone.utc)
-    return datetime.now(timezone.utc) > created + timedelta(minutes=10)
+    return datetime.now(timezone.utc) > created + timedelta(minutes=settings.booking_hold_minutes)
 
 
 def init_booking(db: Session, data: BookingRequest, current_user: User) -> Booking:
-    """Initiates a new booking with pessimistic locking to prevent double-booking.
+    """Initiates a new booking without ever allowing double-booking.
 
-    Locks the requested inventory rows, applies a temporary hold via `reserved_count`,
-    and calculates dynamic total pricing.
+    Applies a temporary hold using the reservation strategy selected by
+    `settings.reservation_mode`, calculates dynamic total pricing, and inserts the
+    Booking in the same transaction as the hold (one commit). Requests for the
+    same room first pass the in-process admission gate (app/admission.py), so a
+    burst queues there instead of on row locks and pooled connections.
 
     Args:
         db (Session): The database session.
@@ -45,9 +60,18 @@ def init_booking(db: Session, data: BookingRequest, current_user: User) -> Booki
         Booking: The created RESERVED booking.
 
     Raises:
-        HTTPException: If the hotel/room is not found (404), or if the room 
-                       is unavailable for the requested dates (400).
+        HTTPException: If the hotel/room is not found (404), if the room
+                       is unavailable for the requested dates (400), if too many
+                       requests are already queued for the room (429), or if the
+                       inventory stays locked past the retry budget (409/503).
     """
+    with admission.admit(db, data.room_id, data.check_in_date, data.check_out_date, data.rooms_count):
+        return _create_booking(db, data, current_user)
+
+
+@transactional("init_booking")
+def _create_booking(db: Session, data: BookingRequest, current_user: User) -> Booking:
+    """The init_booking transaction: hold, price and insert."""
     from app.models.hotel import Hotel
     from app.models.room import Room
 
@@ -59,33 +83,7 @@ def init_booking(db: Session, data: BookingRequest, current_user: User) -> Booki
     if not room:
         raise HTTPException(404, f"Room not found: {data.room_id}")
 
-    days = (data.check_out_date - data.check_in_date).days + 1
-
-    # Lock matching inventory rows — no other transaction can read/write these until we commit
-    inventory_rows = db.execute(
-        select(Inventory)
-        .where(
-            Inventory.room_id == data.room_id,
-            Inventory.date.between(data.check_in_date, data.check_out_date),
-            Inventory.closed == False,
-            (Inventory.total_count - Inventory.book_count - Inventory.reserved_count) >= data.rooms_count,
-        )
-        .with_for_update()   # ← pessimistic lock
-    ).scalars().all()
-
-    if len(inventory_rows) != days:
-        raise HTTPException(400, "Room not available for the selected dates")
-
-    # Hold the rooms (temporary reservation — 10 min window)
-    for inv in inventory_rows:
-        inv.reserved_count += data.rooms_count
-
-    # Calculate price: per-room total × number of rooms
-    price_per_room = calculate_total_price(inventory_rows)
-    total_price = price_per_room * data.rooms_count
-
-    booking = create_record(
-        db, Booking,
+    booking = Booking(
         hotel_id=data.hotel_id,
         room_id=data.room_id,
         user_id=current_user.id,
@@ -93,12 +91,86 @@ def init_booking(db: Session, data: BookingRequest, current_user: User) -> Booki
         check_in_date=data.check_in_date,
         check_out_date=data.check_out_date,
         booking_status=BookingStatusEnum.RESERVED,
-        amount=total_price,
     )
+
+    # Hold the rooms (temporary reservation — 10 min window). The strategy never
+    # commits; the hold and the Booking insert below commit together.
+    inventory_rows = get_reservation_strategy().reserve(db, booking)
+
+    # Calculate price: per-room total × number of rooms
+    price_per_room = calculate_total_price(inventory_rows)
+    booking.amount = price_per_room * data.rooms_count
+
+    db.add(booking)
     db.commit()
+    db.refresh(booking)
     return booking
 
 
+@transactional("init_booking")
+def init_cart(db: Session, data: CartBookingRequest, current_user: User) -> list[Booking]:
+    """Reserves every line of a cart in one transaction — all lines or none.
+
+    Every hotel and room is validated first. The reservation strategy then locks
+    all affected inventory rows in one (room_id, date)-ordered pass, all lines are
+    priced by one pricing run, and every Booking is inserted with a single commit.
+
+    Args:
+        db (Session): The database session.
+        data (CartBookingRequest): The cart lines (hotel, room, dates, counts).
+        current_user (User): The user making the booking.
+
+    Returns:
+        list[Booking]: The created RESERVED bookings, in cart order.
+
+    Raises:
+        HTTPException: If a hotel/room is not found (404), a room does not belong
+                       to the line's hotel (400), any room is unavailable for its
+                       dates (400), or the inventory stays locked past the retry
+                       budget (409/503). Nothing is reserved in any of these cases.
+    """
+    from app.models.hotel import Hotel
+    from app.models.room import Room
+
+    hotels = {h.id for h in db.query(Hotel.id).filter(Hotel.id.in_({i.hotel_id for i in data.items}))}
+    rooms = dict(db.query(Room.id, Room.hotel_id).filter(Room.id.in_({i.room_id for i in data.items})).all())
+    for n, item in enumerate(data.items, start=1):
+        if item.hotel_id not in hotels:
+            raise HTTPException(404, f"Cart line {n}: hotel not found: {item.hotel_id}")
+        if item.room_id not in rooms:
+            raise HTTPException(404, f"Cart line {n}: room not found: {item.room_id}")
+        if rooms[item.room_id] != item.hotel_id:
+            raise HTTPException(400, f"Cart line {n}: room {item.room_id} does not belong to hotel {item.hotel_id}")
+
+    bookings = [
+        Booking(
+            hotel_id=item.hotel_id,
+            room_id=item.room_id,
+            user_id=current_user.id,
+            rooms_count=item.rooms_count,
+            check_in_date=item.check_in_date,
+            check_out_date=item.check_out_date,
+            booking_status=BookingStatusEnum.RESERVED,
+        )
+        for item in data.items
+    ]
+
+    try:
+        lines = get_reservation_strategy().reserve_many(db, bookings)
+    except HTTPException:
+        db.rollback()   # earlier lines may already hold rooms
+        raise
+
+    for booking, price_per_room in zip(bookings, calculate_line_prices(lines)):
+        booking.amount = price_per_room * booking.rooms_count
+
+    db.add_all(bookings)
+    db.commit()
+    for booking in bookings:
+        db.refresh(booking)
+    return bookings
+
+
 def add_guests(db: Session, booking_id: int, guest_ids: list[int], current_user: User) -> Booking:
     """Attaches a list of guest profiles to a booking.
 
@@ -128,6 +200,8 @@ def add_guests(db: Session, booking_id: int, guest_ids: list[int], current_user:
     guests = [get_by_id(db, Guest, gid) for gid in guest_ids]
     booking.guests = guests
     booking.booking_status = BookingStatusEnum.GUESTS_ADDED
+    booking.status_version += 1
+    booking_events.stage(db, [(booking.id, booking.booking_status.value, booking.status_version)])
     db.commit()
     db.refresh(booking)
     return booking
@@ -136,6 +210,11 @@ def add_guests(db: Session, booking_id: int, guest_ids: list[int], current_user:
 def initiate_payment(db: Session, booking_id: int, current_user: User):
     """Creates a Stripe Checkout session and transitions the booking to PAYMENTS_PENDING.
 
+    The Stripe call goes through the outbox: the request is committed as an
+    outbox message first, then dispatched right away with no transaction open.
+    If Stripe is down the message stays PENDING and the outbox worker retries
+    it; calling this again returns the same session once it exists.
+
     Args:
         db (Session): The database session.
         booking_id (int): The ID of the booking.
@@ -146,7 +225,8 @@ def initiate_payment(db: Session, booking_id: int, current_user: User):
 
     Raises:
         HTTPException: If the booking is not found (404), not owned by the user (403),
-                       expired (400), or in an invalid state for payment (400).
+                       expired (400), in an invalid state for payment (400), or if
+                       Stripe could not be reached yet (503).
     """
     booking = get_by_id(db, Booking, booking_id)
     if not booking:
@@ -155,32 +235,38 @@ def initiate_payment(db: Session, booking_id: int, current_user: User):
         raise HTTPException(403, "You do not own this booking")
     if has_booking_expired(booking):
         raise HTTPException(400, "Booking has expired")
-    if booking.booking_status not in (BookingStatusEnum.RESERVED, BookingStatusEnum.GUESTS_ADDED):
-        raise HTTPException(400, f"Cannot initiate payment for booking with status: {booking.booking_status}")
-
-    session = stripe.checkout.Session.create(
-        payment_method_types=["card"],
-        line_items=[{
-            "price_data": {
-                "currency": "usd",
-                "unit_amount": int(booking.amount * 100),  # Stripe uses cents
-                "product_data": {"name": f"Booking #{booking.id}"},
-            },
-            "quantity": 1,
-        }],
-        mode="payment",
-        success_url=f"{settings.frontend_url}/bookings/{booking.id}/status",
-        cancel_url=f"{settings.frontend_url}/bookings/{booking.id}/status",
-    )
 
-    booking.payment_session_id = session.id
-    booking.booking_status = BookingStatusEnum.PAYMENTS_PENDING
-    db.commit()
-    return session.url
+    dedup_key = f"checkout-booking-{booking.id}"
+    message = outbox_service.get_by_dedup_key(db, dedup_key)
+    if message is None:
+        if booking.booking_status not in (BookingStatusEnum.RESERVED, BookingStatusEnum.GUESTS_ADDED):
+            raise HTTPException(400, f"Cannot initiate payment for booking with status: {booking.booking_status}")
+        message = outbox_service.enqueue(db, "stripe.checkout_session", {"booking_id": booking.id}, dedup_key)
+        try:
+            db.commit()
+        except IntegrityError:
+            # A concurrent request enqueued it first — use theirs
+            db.rollback()
+            message = outbox_service.get_by_dedup_key(db, dedup_key)
+
+    if message.status != "DONE":
+        message = outbox_service.dispatch_one(db, message.id)
+    if message.status != "DONE":
+        raise HTTPException(503, "Payment provider unavailable, please retry", headers={"Retry-After": "2"})
+    if message.result["url"] is None:
+        # The hold lapsed before the session was attached; it was expired unused
+        raise HTTPException(400, "Booking has expired")
+    return message.result["url"]
 
 
+@transactional("cancel_booking")
 def cancel_booking(db: Session, booking_id: int, current_user: User) -> Booking:
-    """Cancels a confirmed booking, releases inventory, and issues a Stripe refund.
+    """Cancels a confirmed booking, releases inventory, and schedules a Stripe refund.
+
+    The refund is written to the outbox in the same transaction as the
+    cancellation and performed by the outbox worker, so inventory locks are
+    held for local DB work only. If anyone is waitlisted for the freed nights,
+    a waitlist promotion is queued the same way.
 
     Args:
         db (Session): The database session.
@@ -202,58 +288,232 @@ def cancel_booking(db: Session, booking_id: int, current_user: User) -> Booking:
     if booking.booking_status != BookingStatusEnum.CONFIRMED:
         raise HTTPException(400, f"Only confirmed bookings can be cancelled, current status: {booking.booking_status}")
 
-    # Release inventory using SELECT FOR UPDATE — same reason as booking init
-    inventory_rows = db.execute(
-        select(Inventory)
-        .where(
-            Inventory.room_id == booking.room_id,
-            Inventory.date.between(booking.check_in_date, booking.check_out_date),
-        )
-        .with_for_update()
-    ).scalars().all()
-
-    for inv in inventory_rows:
-        inv.book_count = max(0, inv.book_count - booking.rooms_count)
+    # Give the rooms back (locking strategy: SELECT FOR UPDATE — same reason as booking init)
+    get_reservation_strategy().cancel(db, booking)
 
-    # Stripe refund against the original payment intent
-    stripe_session = stripe.checkout.Session.retrieve(booking.payment_session_id)
-    stripe.Refund.create(payment_intent=stripe_session.payment_intent)
+    # Refund happens after commit via the outbox — never while inventory rows are locked
+    outbox_service.enqueue(
+        db, "stripe.refund",
+        {"booking_id": booking.id, "payment_session_id": booking.payment_session_id},
+        dedup_key=f"refund-booking-{booking.id}",
+    )
 
     booking.booking_status = BookingStatusEnum.CANCELLED
+    booking.status_version += 1
+    booking_events.stage(db, [(booking.id, booking.booking_status.value, booking.status_version)])
+    waitlist_service.notify_released(db, [(booking.room_id, booking.check_in_date, booking.check_out_date)])
     db.commit()
+    admission.rooms_released([booking.room_id])
     return booking
 
 
+MODIFIABLE_STATUSES = (BookingStatusEnum.RESERVED, BookingStatusEnum.GUESTS_ADDED, BookingStatusEnum.CONFIRMED)
+
+
+def modify_booking(db: Session, booking_id: int, data: BookingModifyRequest,
+                   current_user: User) -> tuple[Booking, Decimal, Optional[str]]:
+    """Changes a booking's dates and/or rooms_count, touching only what changes.
+
+    Only the nights whose room count changes are locked and written (see
+    ReservationStrategy.modify): extending a week-long stay by one night locks
+    one inventory row. Only those nights are priced again — nights the guest
+    keeps keep what they paid, nights given up are credited at the booking's
+    average rate per room-night.
+
+    A hold simply gets the new amount. For a CONFIRMED booking the difference
+    is settled through the outbox: a partial refund when it got cheaper, or a
+    Stripe Checkout session for the balance when it got dearer, created right
+    away so its URL can be returned.
+
+    Args:
+        db (Session): The database session.
+        booking_id (int): The booking to change.
+        data (BookingModifyRequest): The new range and/or rooms_count.
+        current_user (User): The authenticated user.
+
+    Returns:
+        tuple[Booking, Decimal, Optional[str]]: The updated booking, new amount minus
+            old amount, and the Checkout URL for a balance to pay (None if there is
+            none, or Stripe could not be reached yet — the outbox worker retries).
+
+    Raises:
+        HTTPException: If the booking is not found (404), not owned by the user (403),
+                       not modifiable in its status, expired, started or the new range
+                       is invalid (400), the new nights are unavailable (400), or the
+                       booking changed concurrently (409).
+    """
+    booking, difference, charge = _apply_modification(db, booking_id, data, current_user)
+    payment_url = None
+    if charge is not None:
+        message = outbox_service.dispatch_one(db, charge)
+        if message.status == "DONE":
+            payment_url = message.result["url"]
+        db.refresh(booking)
+    return booking, difference, payment_url
+
+
+@transactional("modify_booking")
+def _apply_modification(db: Session, booking_id: int, data: BookingModifyRequest,
+                        current_user: User) -> tuple[Booking, Decimal, Optional[int]]:
+    """The modify_booking transaction. Returns the booking, the difference and the balance message id."""
+    booking = get_by_id(db, Booking, booking_id)
+    if not booking:
+        raise HTTPException(404, f"Booking not found: {booking_id}")
+    if booking.user_id != current_user.id:
+        raise HTTPException(403, "You do not own this booking")
+    if booking.booking_status not in MODIFIABLE_STATUSES:
+        raise HTTPException(400, f"Cannot modify a booking with status: {booking.booking_status}")
+    if booking.booking_status != BookingStatusEnum.CONFIRMED and has_booking_expired(booking):
+        raise HTTPException(400, "Booking has expired")
+
+    check_in = data.check_in_date or booking.check_in_date
+    check_out = data.check_out_date or booking.check_out_date
+    rooms_count = data.rooms_count or booking.rooms_count
+    if check_out <= check_in:
+        raise HTTPException(400, "check_out_date must be after check_in_date")
+    if min(check_in, booking.check_in_date) < date.today():
+        raise HTTPException(400, "Bookings can only be changed before check-in")
+
+    deltas = night_deltas(booking, check_in, check_out, rooms_count)
+    if not deltas:
+        return booking, Decimal("0"), None
+
+    # Claim the change first: a concurrent modification, confirmation or
+    # cancellation of the same booking makes this guarded UPDATE match nothing
+    old_in, old_out, old_rooms, old_amount = (booking.check_in_date, booking.check_out_date,
+                                              booking.rooms_count, booking.amount)
+    claimed = db.execute(
+        update(Booking)
+        .where(Booking.id == booking.id, Booking.booking_status == booking.booking_status,
+               Booking.check_in_date == old_in, Booking.check_out_date == old_out,
+               Booking.rooms_count == old_rooms)
+        .values(check_in_date=check_in, check_out_date=check_out, rooms_count=rooms_count)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not claimed:
+        db.rollback()
+        raise HTTPException(409, "Booking changed concurrently, please retry")
+
+    gained_rows = get_reservation_strategy().modify(db, booking, check_in, check_out, rooms_count)
+
+    # Reprice the gained room-nights only; credit given-up ones at the average paid rate
+    added = sum((price * deltas[inv.date] for inv, price in zip(gained_rows, calculate_night_prices(gained_rows))),
+                Decimal("0"))
+    given_up = sum(-n for n in deltas.values() if n < 0)
+    rate = old_amount / (expected_nights(old_in, old_out) * old_rooms)
+    amount = (old_amount - rate * given_up + added).quantize(Decimal("0.01"))
+    difference = amount - old_amount
+
+    booking.check_in_date, booking.check_out_date, booking.rooms_count = check_in, check_out, rooms_count
+    booking.amount = amount
+
+    charge = None
+    if booking.booking_status == BookingStatusEnum.CONFIRMED and difference < 0:
+        outbox_service.enqueue(
+            db, "stripe.refund",
+            {"booking_id": booking.id, "payment_session_id": booking.payment_session_id,
+             "amount": str(-difference)},
+            dedup_key=f"modify-refund-booking-{booking.id}-{uuid.uuid4().hex}",
+        )
+    elif booking.booking_status == BookingStatusEnum.CONFIRMED and difference > 0:
+        charge = outbox_service.enqueue(
+            db, "stripe.balance_checkout", {"booking_id": booking.id, "amount": str(difference)},
+            dedup_key=f"balance-booking-{booking.id}-{uuid.uuid4().hex}",
+        )
+
+    released = [night for night, n in deltas.items() if n < 0]
+    if released:
+        waitlist_service.notify_released(db, [(booking.room_id, *run) for run in night_runs(released)])
+    db.commit()
+    if released:
+        admission.rooms_released([booking.room_id])
+    metrics.inc("booking_modifications_total", status=booking.booking_status.value)
+    return booking, difference, charge.id if charge is not None else None
+
+
+@transactional("confirm_booking")
 def confirm_booking(db: Session, session_id: str) -> None:
     """Finalizes a booking upon successful payment via Stripe webhook.
 
     Transitions inventory holds into confirmed bookings and updates the booking status.
-    Uses pessimistic locking to handle concurrent webhook deliveries.
+    Idempotent: confirming an already CONFIRMED booking is a no-op that never
+    touches the inventory.
 
     Args:
         db (Session): The database session.
         session_id (str): The Stripe checkout session ID.
 
     Raises:
-        HTTPException: If the booking associated with the session ID is not found (404).
+        HTTPException: If the booking associated with the session ID is not found (404),
+            or it was expired or cancelled before the payment arrived (409).
     """
-    booking = db.query(Booking).filter(Booking.payment_session_id == session_id).first()
+    booking = confirm_sessions(db, [session_id]).get(session_id)
     if not booking:
+        db.rollback()
         raise HTTPException(404, f"Booking not found for session: {session_id}")
+    if booking.booking_status != BookingStatusEnum.CONFIRMED:
+        db.rollback()
+        raise HTTPException(409, f"Booking is {booking.booking_status.value} and can no longer be confirmed")
+    db.commit()
 
-    # Lock inventory rows — prevents concurrent webhook deliveries from double-confirming
-    inventory_rows = db.execute(
-        select(Inventory)
-        .where(
-            Inventory.room_id == booking.room_id,
-            Inventory.date.between(booking.check_in_date, booking.check_out_date),
-        )
-        .with_for_update()
-    ).scalars().all()
 
-    for inv in inventory_rows:
-        inv.reserved_count = max(0, inv.reserved_count - booking.rooms_count)
-        inv.book_count += booking.rooms_count
+def confirm_sessions(db: Session, session_ids: list[str]) -> dict[str, Booking]:
+    """Confirms every booking paid through one of `session_ids`, in the caller's transaction.
 
-    booking.booking_status = BookingStatusEnum.CONFIRMED
-    db.commit()
+    The status flip is a guarded UPDATE ... RETURNING, so only bookings that were
+    still holding inventory are confirmed — exactly once, even when the same payment
+    is delivered twice or races the expiry sweeper. The reservation strategy then
+    locks each room's inventory once for the whole batch; a booking whose hold
+    lapsed and lost its rooms before the payment arrived is moved to EXPIRED
+    instead of being confirmed. Does not commit; the
+    confirmations are published to status streams when the caller does.
+
+    Args:
+        db (Session): The database session.
+        session_ids (list[str]): Stripe checkout session IDs.
+
+    Returns:
+        dict[str, Booking]: Every matching booking by session ID, whatever its status
+            now is; unknown IDs are absent.
+    """
+    if not session_ids:
+        return {}
+    session_ids = set(session_ids)
+    claimed = dict(db.execute(
+        update(Booking)
+        .where(Booking.payment_session_id.in_(session_ids), Booking.booking_status.in_(HOLD_STATUSES))
+        .values(booking_status=BookingStatusEnum.CONFIRMED, status_version=Booking.status_version + 1)
+        .returning(Booking.id, Booking.status_version)
+        .execution_options(synchronize_session=False)
+    ).all())
+    bookings = (
+        db.query(Booking)
+        .filter(Booking.payment_session_id.in_(session_ids))
+        .order_by(Booking.id)
+        .populate_existing()
+        .all()
+    )
+
+    # A hold that lapsed before the payment arrived may have lost its rooms; the
+    # strategy refuses those, and they end up EXPIRED as if the sweeper got there first
+    refused = get_reservation_strategy().confirm_many(db, [b for b in bookings if b.id in claimed])
+    if refused:
+        expired = dict(db.execute(
+            update(Booking)
+            .where(Booking.id.in_([b.id for b in refused]))
+            .values(booking_status=BookingStatusEnum.EXPIRED, status_version=Booking.status_version + 1)
+            .returning(Booking.id, Booking.status_version)
+            .execution_options(synchronize_session=False)
+        ).all())
+        get_reservation_strategy().release_expired(db, refused)
+        booking_events.stage(db, [(i, BookingStatusEnum.EXPIRED.value, v) for i, v in expired.items()])
+        for b in refused:
+            db.refresh(b)
+        claimed = {i: v for i, v in claimed.items() if i not in expired}
+        metrics.inc("late_confirms_refused_total", len(refused))
+    booking_events.stage(db, [(i, BookingStatusEnum.CONFIRMED.value, v) for i, v in claimed.items()])
+    duplicates = sum(1 for b in bookings
+                     if b.id not in claimed and b.booking_status == BookingStatusEnum.CONFIRMED)
+    if duplicates:
+        metrics.inc("webhook_duplicates_dropped_total", duplicates, stage="state")
+    return {b.payment_session_id: b for b in bookings}
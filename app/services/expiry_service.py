@@ -0,0 +1,90 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from app.models.booking import Booking
+from app.models.enums import BookingStatusEnum
+from app.reservation.reservation_service import get_reservation_strategy
+from app.config import settings
+from app.services import outbox_service, waitlist_service
+from app import admission, booking_events, metrics
+
+logger = logging.getLogger(__name__)
+
+# Every status in which a booking still holds reserved_count on Inventory
+HOLD_STATUSES = (
+    BookingStatusEnum.RESERVED,
+    BookingStatusEnum.GUESTS_ADDED,
+    BookingStatusEnum.PAYMENTS_PENDING,
+)
+
+
+def sweep_expired_holds(db: Session, batch_size: int = None) -> int:
+    """Expires one batch of abandoned holds and releases their inventory.
+
+    Safe to run concurrently from every worker process:
+      1. Candidates are picked oldest-first via ix_booking_status_created_at,
+         with FOR UPDATE SKIP LOCKED so parallel sweepers take disjoint batches.
+      2. The status flip is a guarded UPDATE ... RETURNING — only bookings this
+         call actually moved to EXPIRED come back, so a booking is released once
+         even if a user confirms or another sweeper claims it in the meantime.
+      3. The claimed holds are handed to the reservation strategy — in counter
+         modes that is one executemany UPDATE of reserved_count keyed on
+         (room_id, date); in ledger mode a DELETE of the expired ledger rows.
+      4. Rooms with guests on the waitlist get a promotion message in the
+         same transaction (waitlist_service.notify_released).
+      5. Bookings already sent to Checkout get a stripe.expire_session outbox
+         message, so their guests can no longer pay for a hold that is gone.
+
+    Args:
+        db (Session): The database session.
+        batch_size (int, optional): Max bookings per sweep (defaults to
+            `settings.expiry_sweep_batch_size`).
+
+    Returns:
+        int: Number of holds reclaimed by this sweep.
+    """
+    batch_size = batch_size or settings.expiry_sweep_batch_size
+    # created_at is a naive UTC column — compare against a naive UTC cutoff
+    cutoff = (datetime.now(timezone.utc) - timedelta(minutes=settings.booking_hold_minutes)).replace(tzinfo=None)
+
+    candidate_ids = db.execute(
+        select(Booking.id)
+        .where(Booking.booking_status.in_(HOLD_STATUSES), Booking.created_at < cutoff)
+        .order_by(Booking.created_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+    if not candidate_ids:
+        db.rollback()
+        metrics.set_gauge("expiry_sweep_last_reclaimed", 0)
+        return 0
+
+    claimed = db.execute(
+        update(Booking)
+        .where(Booking.id.in_(candidate_ids), Booking.booking_status.in_(HOLD_STATUSES))
+        .values(booking_status=BookingStatusEnum.EXPIRED, status_version=Booking.status_version + 1)
+        .returning(Booking.id, Booking.room_id, Booking.check_in_date, Booking.check_out_date, Booking.rooms_count,
+                   Booking.status_version, Booking.payment_session_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    booking_events.stage(db, [(b.id, BookingStatusEnum.EXPIRED.value, b.status_version) for b in claimed])
+
+    nights = get_reservation_strategy().release_expired(db, claimed)
+    waitlist_service.notify_released(db, [(b.room_id, b.check_in_date, b.check_out_date) for b in claimed])
+    for b in claimed:
+        if b.payment_session_id:
+            outbox_service.enqueue(
+                db, "stripe.expire_session",
+                {"booking_id": b.id, "payment_session_id": b.payment_session_id},
+                dedup_key=f"expire-checkout-booking-{b.id}",
+            )
+    db.commit()
+    admission.rooms_released({b.room_id for b in claimed})
+
+    metrics.inc("booking_holds_reclaimed_total", len(claimed))
+    metrics.inc("inventory_nights_released_total", nights)
+    metrics.set_gauge("expiry_sweep_last_reclaimed", len(claimed))
+    if claimed:
+        logger.info("expiry sweep reclaimed %d holds across %d inventory nights", len(claimed), nights)
+    return len(claimed)
@@ -0,0 +1,61 @@
+import logging
+from collections import defaultdict
+from sqlalchemy.orm import Session
+from sqlalchemy import select, update, delete, bindparam
+from app.models.inventory import Inventory
+from app.models.inventory_hold import InventoryHold
+from app import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def compact_confirmed_holds(db: Session, batch_size: int = 1000) -> int:
+    """Folds one batch of confirmed ledger holds into Inventory.book_count.
+
+    Confirmed holds (expires_at IS NULL) are deleted with a guarded
+    DELETE ... RETURNING and their counts summed per (room_id, date), so each
+    inventory night is written once per batch no matter how many bookings
+    confirmed on it. Like the expiry sweeper, batches are claimed with
+    FOR UPDATE SKIP LOCKED and are safe to run from every worker at once.
+
+    Args:
+        db (Session): The database session.
+        batch_size (int): Max ledger rows folded per call.
+
+    Returns:
+        int: Number of ledger rows compacted.
+    """
+    ids = db.execute(
+        select(InventoryHold.id)
+        .where(InventoryHold.expires_at.is_(None))
+        .order_by(InventoryHold.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+    if not ids:
+        db.rollback()
+        return 0
+
+    folded = db.execute(
+        delete(InventoryHold)
+        .where(InventoryHold.id.in_(ids), InventoryHold.expires_at.is_(None))
+        .returning(InventoryHold.room_id, InventoryHold.date, InventoryHold.count)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    deltas: dict[tuple[int, object], int] = defaultdict(int)
+    for room_id, night, count in folded:
+        deltas[(room_id, night)] += count
+    if deltas:
+        inv = Inventory.__table__
+        db.execute(
+            update(inv)
+            .where(inv.c.room_id == bindparam("b_room_id"), inv.c.date == bindparam("b_date"))
+            .values(book_count=inv.c.book_count + bindparam("b_delta")),
+            [{"b_room_id": r, "b_date": d, "b_delta": n} for (r, d), n in sorted(deltas.items())],
+        )
+    db.commit()
+
+    metrics.inc("inventory_holds_compacted_total", len(folded))
+    logger.info("compacted %d confirmed holds into %d inventory nights", len(folded), len(deltas))
+    return len(folded)
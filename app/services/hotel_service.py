@@ -1,3 +1,5 @@
+import logging
+import time
 from app.schemas.room import RoomSchema
 from sqlalchemy.orm import Session
 from sqlalchemy import func, select
@@ -7,12 +9,15 @@ from app.models.hotel import Hotel
 from app.models.room import Room
 from app.models.enums import BookingStatusEnum
 from app.models.booking import Booking
-from app.models.inventory import Inventory
 from app.models.user import User
 from app.schemas.hotel import HotelSchema, HotelPriceOut, HotelInfoOut
 from app.schemas.booking import HotelSearchRequest, HotelReportOut
 from app.schemas.common import PageResponse
+from app.reservation.reservation_service import get_reservation_strategy
 from app.database import get_by_id, get_all, create_record, update_record, delete_record
+from app.services import inventory_service
+
+logger = logging.getLogger(__name__)
 
 
 def _check_hotel_ownership(hotel: Hotel, current_user: User):
@@ -116,6 +121,11 @@ def update_hotel(db: Session, hotel_id: int, data: HotelSchema, current_user: Us
 def activate_hotel(db: Session, hotel_id: int, current_user: User) -> Hotel:
     """Activates a hotel, making it accessible to the public.
 
+    Rooms added while the hotel was inactive have no inventory yet, so every room
+    of the hotel is stocked here with one set-based INSERT ... SELECT
+    (inventory_service.init_inventory). Nights that already exist are skipped,
+    which makes activating an already active hotel a no-op.
+
     Args:
         db (Session): The database session.
         hotel_id (int): The ID of the hotel to activate.
@@ -131,7 +141,15 @@ def activate_hotel(db: Session, hotel_id: int, current_user: User) -> Hotel:
     if not hotel: 
       raise HTTPException(status_code=404, detail="Hotel not found")
     _check_hotel_ownership(hotel, current_user)
-    return update_record(db, hotel, active=True)
+    hotel.active = True
+    started = time.perf_counter()
+    inserted = inventory_service.init_inventory(db, Room.hotel_id == hotel.id)
+    if inserted:
+        elapsed = time.perf_counter() - started
+        logger.info("activated hotel %d: %d inventory rows in %.3fs (%.0f rows/s)",
+                    hotel.id, inserted, elapsed, inserted / elapsed if elapsed else 0)
+    db.refresh(hotel)
+    return hotel
 
 
 
@@ -255,17 +273,8 @@ def search_hotels(db: Session, data: HotelSearchRequest) -> PageResponse:
     Returns:
         PageResponse: A paginated page containing `HotelPriceOut` objects.
     """
-    inventory_subquery = (
-        select(Inventory.hotel_id, func.min(Inventory.price).label("min_price"))
-        .where(
-            Inventory.date >= data.check_in_date,
-            Inventory.date <= data.check_out_date,
-            Inventory.closed == False,
-            (Inventory.total_count - Inventory.book_count - Inventory.reserved_count) >= data.rooms_count
-        )
-        .group_by(Inventory.hotel_id)
-        .having(func.count(Inventory.hotel_id) >= (data.check_out_date - data.check_in_date).days)
-        .subquery()
+    inventory_subquery = get_reservation_strategy().hotel_availability(
+        db, data.rooms_count, data.start_date, data.end_date,
     )
 
     query = (
@@ -289,6 +298,7 @@ def search_hotels(db: Session, data: HotelSearchRequest) -> PageResponse:
     return PageResponse(
       content=content,
       total_elements=total,
+      total_pages=-(-total // data.size),
       page=data.page,
       size=data.size,
     ) 
@@ -0,0 +1,245 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional
+from fastapi import HTTPException
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.idempotency import IdempotencyRecord
+from app.config import settings
+from app import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class _Stored:
+    request_hash: str
+    status_code: int
+    body: Any
+
+
+class _LRU:
+    """Bounded, thread-safe map of (user_id, key) → completed response."""
+    def __init__(self):
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key) -> Optional[_Stored]:
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value: _Stored) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > settings.idempotency_cache_size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+_cache = _LRU()
+_key_locks: dict[tuple, list] = {}          # (user_id, key) → [Lock, waiter refcount]
+_key_locks_guard = threading.Lock()
+
+
+@contextmanager
+def _local_lock(cache_key: tuple):
+    """Serializes duplicates inside this process, so only one of them touches the DB claim."""
+    with _key_locks_guard:
+        entry = _key_locks.setdefault(cache_key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _key_locks_guard:
+            entry[1] -= 1
+            if entry[1] == 0:
+                _key_locks.pop(cache_key, None)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def request_fingerprint(endpoint: str, payload: Any) -> str:
+    """Stable hash of what the client asked for — a reused key must carry the same request."""
+    raw = json.dumps([endpoint, payload], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _replay(stored: _Stored, request_hash: str, endpoint: str):
+    if stored.request_hash != request_hash:
+        raise HTTPException(422, "Idempotency-Key was already used with a different request")
+    metrics.inc("idempotent_replays_total", endpoint=endpoint)
+    if stored.status_code >= 400:
+        raise HTTPException(stored.status_code, stored.body.get("detail"))
+    return stored.body
+
+
+def _claim(db: Session, user_id: int, key: str, endpoint: str, request_hash: str) -> Optional[_Stored]:
+    """
+    Insert the IN_PROGRESS claim row. Returns None if this request now owns the key,
+    or the stored response if another request already completed it.
+
+    If another process holds the claim, poll until it completes (or goes stale and
+    is taken over) for up to `idempotency_wait_seconds`, then give up with 409.
+    """
+    db.add(IdempotencyRecord(user_id=user_id, key=key, endpoint=endpoint,
+                             request_hash=request_hash, status="IN_PROGRESS"))
+    try:
+        db.commit()
+        return None
+    except IntegrityError:
+        db.rollback()
+
+    deadline = time.monotonic() + settings.idempotency_wait_seconds
+    while True:
+        record = db.query(IdempotencyRecord).filter(
+            IdempotencyRecord.user_id == user_id, IdempotencyRecord.key == key
+        ).first()
+        if record is None:
+            # The first request failed and released the key — retry the claim
+            return _claim(db, user_id, key, endpoint, request_hash)
+        if record.status == "COMPLETED":
+            stored = _Stored(record.request_hash, record.response_status, record.response_body)
+            db.rollback()
+            return stored
+        if record.request_hash != request_hash:
+            db.rollback()
+            raise HTTPException(422, "Idempotency-Key was already used with a different request")
+
+        stale_before = _utcnow() - timedelta(seconds=settings.idempotency_stale_seconds)
+        if record.updated_at is not None and record.updated_at < stale_before:
+            # Owner died mid-request — take over with a guarded UPDATE so only one waiter wins
+            taken = db.execute(
+                update(IdempotencyRecord)
+                .where(IdempotencyRecord.id == record.id,
+                       IdempotencyRecord.status == "IN_PROGRESS",
+                       IdempotencyRecord.updated_at == record.updated_at)
+                .values(updated_at=_utcnow())
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+            if taken:
+                return None
+
+        db.rollback()   # end the read so the next poll sees fresh commits
+        if time.monotonic() >= deadline:
+            raise HTTPException(409, "A request with this Idempotency-Key is still in progress",
+                                headers={"Retry-After": "1"})
+        time.sleep(0.05)
+
+
+def _finish(db: Session, user_id: int, key: str, status_code: int, body: Any) -> None:
+    db.rollback()   # discard anything a failed handler left in the session
+    db.execute(
+        update(IdempotencyRecord)
+        .where(IdempotencyRecord.user_id == user_id, IdempotencyRecord.key == key)
+        .values(status="COMPLETED", response_status=status_code, response_body=body)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def _release(db: Session, user_id: int, key: str) -> None:
+    db.rollback()
+    db.execute(
+        delete(IdempotencyRecord)
+        .where(IdempotencyRecord.user_id == user_id,
+               IdempotencyRecord.key == key,
+               IdempotencyRecord.status == "IN_PROGRESS")
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def run(db: Session, user_id: int, key: Optional[str], endpoint: str, payload: Any,
+        handler: Callable[[], Any], success_status: int = 200):
+    """Executes `handler` at most once per (user, Idempotency-Key).
+
+    A replay returns the stored response from the in-process LRU or the
+    idempotency_record table without calling the handler (so without touching
+    Inventory). Concurrent duplicates wait for the first request to finish.
+
+    Outcomes that are stored and replayed: success, and 4xx errors other than
+    409/429. Server errors and contention errors release the key so the client
+    can retry for real.
+
+    Args:
+        db (Session): The database session.
+        user_id (int): The authenticated user — keys are scoped per user.
+        key (str, optional): The Idempotency-Key header. None runs the handler directly.
+        endpoint (str): Route identifier, e.g. "POST /bookings/init".
+        payload (Any): JSON-serializable request data used to detect key reuse.
+        handler (Callable): Performs the request and returns a JSON-serializable body.
+        success_status (int): The route's success status code.
+
+    Returns:
+        Any: The (possibly replayed) response body.
+
+    Raises:
+        HTTPException: 422 if the key was used with a different request, 409 if the
+                       first request is still running after the wait budget, or the
+                       replayed/raised error of the handler.
+    """
+    if not key:
+        return handler()
+    if len(key) > 255:
+        raise HTTPException(400, "Idempotency-Key must be at most 255 characters")
+
+    request_hash = request_fingerprint(endpoint, payload)
+    cache_key = (user_id, key)
+
+    stored = _cache.get(cache_key)
+    if stored:
+        return _replay(stored, request_hash, endpoint)
+
+    with _local_lock(cache_key):
+        stored = _cache.get(cache_key) or _claim(db, user_id, key, endpoint, request_hash)
+        if stored:
+            _cache.put(cache_key, stored)
+            return _replay(stored, request_hash, endpoint)
+
+        try:
+            body = handler()
+        except HTTPException as exc:
+            if 400 <= exc.status_code < 500 and exc.status_code not in (409, 429):
+                _finish(db, user_id, key, exc.status_code, {"detail": exc.detail})
+                _cache.put(cache_key, _Stored(request_hash, exc.status_code, {"detail": exc.detail}))
+            else:
+                _release(db, user_id, key)
+            raise
+        except Exception:
+            _release(db, user_id, key)
+            raise
+
+        _finish(db, user_id, key, success_status, body)
+        _cache.put(cache_key, _Stored(request_hash, success_status, body))
+        return body
+
+
+def purge_expired(db: Session) -> int:
+    """Deletes idempotency records older than `idempotency_retention_hours`."""
+    cutoff = _utcnow() - timedelta(hours=settings.idempotency_retention_hours)
+    deleted = db.execute(
+        delete(IdempotencyRecord)
+        .where(IdempotencyRecord.created_at < cutoff)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return deleted
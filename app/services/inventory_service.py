@@ -1,22 +1,55 @@
+import logging
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import select, update, func, literal, literal_column, and_, or_, case, true, false, cast, Date, DateTime
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
-from sqlalchemy import select
 from fastapi import HTTPException
+from app.models.hotel import Hotel
 from app.models.inventory import Inventory
+from app.models.inventory_hold import InventoryHold
+from app.models.inventory_segment import InventorySegment
 from app.models.room import Room
 from app.models.user import User
-from app.schemas.inventory import UpdateInventoryRequest
+from app.schemas.inventory import UpdateInventoryRequest, ShardInventoryRequest
 from app.database import get_by_id, get_all
+from app.transactions import transactional, lock_inventory, lock_rooms
+from app.reservation import sharding, segments
+from app import admission
+from app.services import waitlist_service
+from app.config import settings
+from app import metrics
 
-def get_room_inventory(db: Session, room_id: int, current_user: User):
-    """Retrieves all inventory records for a specific room.
+logger = logging.getLogger(__name__)
+
+
+# Listed per night, in this order, by both inventory listings
+LISTED_COLUMNS = ("date", "total_count", "book_count", "reserved_count", "price", "surge_factor", "closed")
+
+
+def get_room_inventory(db: Session, room_id: int, current_user: User, start_date: Optional[date] = None,
+                       end_date: Optional[date] = None, after: Optional[date] = None,
+                       limit: Optional[int] = None) -> tuple[list, Optional[date]]:
+    """Lists a room's inventory nights in date order, one keyset page at a time.
+
+    Pages are cut by date rather than by offset: pass the previous page's last
+    date as `after` to get the next one. Each page is one range scan of
+    ix_inventory_room_date however deep it is, and nights booked or added between
+    two pages do not shift the rest. Only the listed columns are selected, so no
+    ORM objects are built.
 
     Args:
         db (Session): The database session.
         room_id (int): The ID of the room.
         current_user (User): The authenticated manager.
+        start_date (date, optional): First night to list.
+        end_date (date, optional): Last night to list.
+        after (date, optional): List only nights after this one (the keyset cursor).
+        limit (int, optional): Most nights to return; all of them when omitted.
 
     Returns:
-        list[Inventory]: A list of inventory rows.
+        tuple[list, Optional[date]]: The nights (each with `id` and LISTED_COLUMNS),
+            and the `after` for the next page — None on the last one.
 
     Raises:
         HTTPException: If the room is not found (404) or not owned by the user (403).
@@ -26,48 +59,462 @@ def get_room_inventory(db: Session, room_id: int, current_user: User):
         raise HTTPException(404, f"Room not found: {room_id}")
     if room.hotel.owner_id != current_user.id:
         raise HTTPException(403, "You do not own this room")
-    return get_all(db, Inventory, room_id=room_id)
+    if after is not None:
+        start_date = max(start_date or after, after + timedelta(days=1))
+    wanted = None if limit is None else limit + 1     # one extra night tells whether another page follows
+
+    if settings.reservation_mode == "segments":
+        query = db.query(InventorySegment).filter(InventorySegment.room_id == room_id)
+        if start_date is not None:
+            query = query.filter(InventorySegment.end_date >= start_date)
+        if end_date is not None:
+            query = query.filter(InventorySegment.start_date <= end_date)
+        rows = []
+        for segment in query.order_by(InventorySegment.start_date).yield_per(500):
+            rows += [night for night in segments.expand([segment])
+                     if (start_date is None or night.date >= start_date)
+                     and (end_date is None or night.date <= end_date)]
+            if wanted is not None and len(rows) >= wanted:
+                break
+        rows = rows[:wanted]
+    else:
+        stmt = select(Inventory.id, *(getattr(Inventory, column) for column in LISTED_COLUMNS)).where(
+            Inventory.room_id == room_id)
+        if start_date is not None:
+            stmt = stmt.where(Inventory.date >= start_date)
+        if end_date is not None:
+            stmt = stmt.where(Inventory.date <= end_date)
+        rows = db.execute(stmt.order_by(Inventory.date).limit(wanted)).all()
+
+    if limit is not None and len(rows) > limit:
+        return rows[:limit], rows[limit - 1].date
+    return rows, None
 
 
-def bulk_update(db: Session, room_id: int, data: UpdateInventoryRequest, current_user: User):
-    """Bulk updates inventory availability or pricing modifiers over a date range.
+def inventory_columns(rows: list, next_after: Optional[date]) -> dict:
+    """A page of get_room_inventory as parallel JSON-ready arrays, one per listed column."""
+    columns = {column: [getattr(row, column) for row in rows] for column in LISTED_COLUMNS}
+    columns["date"] = [night.isoformat() for night in columns["date"]]
+    for column in ("price", "surge_factor"):               # Decimals as strings, like InventorySchema
+        columns[column] = [str(value) for value in columns[column]]
+    columns["next_after"] = next_after.isoformat() if next_after else None
+    return columns
 
-    Applies pessimistic locking (SELECT FOR UPDATE) to ensure data integrity during 
-    concurrent updates.
+
+@transactional("inventory_bulk_update")
+def bulk_update(db: Session, room_ids: list[int], data: UpdateInventoryRequest, current_user: User) -> dict:
+    """Closes/reopens nights, sets their surge factor or overrides their price, on one or more rooms.
+
+    The nights are the request's date range or explicit date list, optionally
+    narrowed to some weekdays. Every selected (room, night) is rewritten by one
+    UPDATE ... RETURNING, so closing a year of one room is a single statement
+    instead of 365 ORM rows flushed one by one. The rooms are locked first
+    (lock_rooms, room_id order), so two edits of the same rooms queue instead of
+    deadlocking; lock waits are bounded and retried by @transactional.
+
+    Args:
+        db (Session): The database session.
+        room_ids (list[int]): The rooms to update.
+        data (UpdateInventoryRequest): The nights to select and the fields to set.
+        current_user (User): The authenticated manager.
+
+    Returns:
+        dict: `rooms` and `nights` updated, and the `first_date`/`last_date` among them.
+
+    Raises:
+        HTTPException: If a room is not found (404), not owned by the user (403),
+                       or the rooms stay locked by other transactions (409/503).
+    """
+    room_ids = sorted(set(room_ids))
+    owners = dict(db.execute(
+        select(Room.id, Hotel.owner_id).join(Hotel, Hotel.id == Room.hotel_id).where(Room.id.in_(room_ids))
+    ).all())
+    missing = [room_id for room_id in room_ids if room_id not in owners]
+    if missing:
+      raise HTTPException(404, f"Room not found {missing[0]}")
+    if any(owner_id != current_user.id for owner_id in owners.values()):
+      raise HTTPException(403, 'You do not own this room')
+
+    values = {column: getattr(data, column) for column in ("closed", "surge_factor", "price")
+              if getattr(data, column) is not None}
+    dates = _selected_dates(data)
+    lock_rooms(db, room_ids, op="inventory_bulk_update")
+    if settings.reservation_mode == "segments":
+      if dates is None:
+        dates = _dates_between(data.start_date, data.end_date)
+      updated = _bulk_update_segments(db, room_ids, dates, values)
+    elif dates == []:
+      updated = []
+    else:
+      nights = Inventory.date.between(data.start_date, data.end_date) if dates is None else Inventory.date.in_(dates)
+      updated = db.execute(
+          update(Inventory)
+          .where(Inventory.room_id.in_(room_ids), nights)
+          .values(**values)
+          .returning(Inventory.room_id, Inventory.date)
+          .execution_options(synchronize_session=False)
+      ).all()
+
+    spans: dict[int, tuple[date, date]] = {}
+    for room_id, night in updated:
+      first, last = spans.get(room_id, (night, night))
+      spans[room_id] = (min(first, night), max(last, night))
+    if data.closed is False:
+      waitlist_service.notify_released(db, [(room_id, *span) for room_id, span in spans.items()])
+    db.commit()
+    if data.closed is False:
+      admission.rooms_released(list(spans))
+    metrics.inc("inventory_bulk_updated_rows_total", len(updated))
+    return {
+        "rooms": len(spans),
+        "nights": len(updated),
+        "first_date": min((first for first, _ in spans.values()), default=None),
+        "last_date": max((last for _, last in spans.values()), default=None),
+    }
+
+
+def _dates_between(start_date: date, end_date: date) -> list[date]:
+    return [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+
+
+def _selected_dates(data: UpdateInventoryRequest) -> Optional[list[date]]:
+    """The nights an update picks, in order — or None when it is the whole start_date..end_date range."""
+    if data.dates is None and data.weekdays is None:
+        return None
+    nights = data.dates if data.dates is not None else _dates_between(data.start_date, data.end_date)
+    return sorted({night for night in nights if data.weekdays is None or night.isoweekday() in data.weekdays})
+
+
+def _bulk_update_segments(db: Session, room_ids: list[int], dates: list[date], values: dict) -> list[tuple[int, date]]:
+    """bulk_update in RESERVATION_MODE=segments: one range write per run of consecutive dates."""
+    runs: list[list[date]] = []
+    for night in dates:
+        if runs and night == runs[-1][1] + timedelta(days=1):
+            runs[-1][1] = night
+        else:
+            runs.append([night, night])
+    updated = []
+    for room_id in room_ids:
+        for start, end in runs:
+            for row in segments.expand(segments.set_values(db, room_id, start, end, **values)):
+                if start <= row.date <= end:
+                    updated.append((room_id, row.date))
+    return updated
+
+
+@transactional("inventory_bulk_update")
+def shard_inventory(db: Session, room_id: int, data: ShardInventoryRequest, current_user: User) -> dict:
+    """Splits a room's nights into sharded sub-counters for a flash sale (or undoes it).
+
+    Each night's free rooms are spread evenly over `data.shards` shard rows that
+    bookings claim from at random, so concurrent holds on the same night stop
+    queueing behind a single row lock. Search keeps seeing the summed availability.
 
     Args:
         db (Session): The database session.
         room_id (int): The ID of the room.
-        data (UpdateInventoryRequest): Contains the start date, end date, and fields to update.
+        data (ShardInventoryRequest): Date range and shard count (0 removes sharding).
         current_user (User): The authenticated manager.
 
     Returns:
-        list[Inventory]: The updated inventory rows.
+        dict: `nights` changed and the `shards` per night.
 
     Raises:
-        HTTPException: If the room is not found (404) or not owned by the user (403).
+        HTTPException: If the room is not found (404), not owned by the user (403),
+                       or the reservation mode does not support shards (400).
     """
+    if settings.reservation_mode not in ("locking", "atomic"):
+        raise HTTPException(400, f"Sharded inventory is not supported in {settings.reservation_mode} mode")
 
     room = get_by_id(db, Room, room_id)
-    if not room: 
-      raise HTTPException(404, f"Room not found {room_id}")
+    if not room:
+        raise HTTPException(404, f"Room not found {room_id}")
     if room.hotel.owner_id != current_user.id:
-      raise HTTPException(403, 'You do not own this room')
+        raise HTTPException(403, 'You do not own this room')
 
-    rows = db.execute((
-            select(Inventory)
-            .where(
-                Inventory.room_id == room_id,
-                Inventory.date.between(data.start_date, data.end_date),
-            )).with_for_update()).scalars().all()
-    
-    for row in rows: 
-      if data.closed is not None: 
-        row.closed = data.closed
-      if data.surge_factor is not None: 
-        row.surge_factor = data.surge_factor 
-    
+    rows = lock_inventory(
+        db,
+        Inventory.room_id == room_id,
+        Inventory.date.between(data.start_date, data.end_date),
+        op="inventory_bulk_update",
+    )
+    nights = sharding.shard_nights(db, rows, data.shards)
     db.commit()
-    return rows
+    return {"nights": nights, "shards": data.shards}
+
+
+
+# ── Inventory generation ─────────────────────────────────────────────────────
 
-  
+_GENERATED_COLUMNS = ["hotel_id", "room_id", "date", "price", "total_count", "surge_factor",
+                      "book_count", "reserved_count", "closed", "city", "created_at", "updated_at"]
+
+
+def _date_series(db: Session, start_date: date, end_date: date):
+    """One row per date in [start_date, end_date]: generate_series on Postgres, a recursive CTE elsewhere."""
+    if db.get_bind().dialect.name == "postgresql":
+        return select(
+            cast(func.generate_series(cast(start_date, DateTime), cast(end_date, DateTime),
+                                      literal_column("interval '1 day'")), Date).label("date")
+        ).subquery("days")
+    days = select(literal(start_date, Date).label("date")).cte("days", recursive=True, nesting=True)
+    return days.union_all(select(func.date(days.c.date, "+1 day")).where(days.c.date < end_date))
+
+
+def _insert_ignoring_existing(db: Session):
+    """INSERT that skips rows already present under unique_hotel_room_date."""
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    return dialect.insert(Inventory.__table__)
+
+
+def generate_inventory(db: Session, *room_criteria, start_date: date, end_date: date) -> int:
+    """Creates the missing inventory rows of the matching rooms between two dates.
+
+    One set-based INSERT ... SELECT: every (room, date) of the date series is
+    anti-joined against Inventory, and only the pairs with no row are inserted,
+    priced from the room's current base_price and total_count. Rows inserted concurrently by
+    someone else are skipped by ON CONFLICT DO NOTHING on unique_hotel_room_date,
+    so the statement is safe to repeat and to run from several workers. Does not commit.
+    In RESERVATION_MODE=segments the rooms are stocked with run-length segments
+    instead (segments.generate), and the count is of segments written.
+
+    Args:
+        db (Session): The database session.
+        *room_criteria: Filters on Room/Hotel picking the rooms (e.g. Room.hotel_id == 7).
+        start_date (date): First date to stock.
+        end_date (date): Last date to stock (inclusive).
+
+    Returns:
+        int: Number of inventory rows inserted.
+    """
+    if end_date < start_date:
+        return 0
+    if settings.reservation_mode == "segments":
+        return segments.generate(db, *room_criteria, start_date=start_date, end_date=end_date)
+    days = _date_series(db, start_date, end_date)
+    now = datetime.now(timezone.utc)
+    missing = (
+        select(Room.hotel_id, Room.id, days.c.date, Room.base_price, Room.total_count,
+               literal(1), literal(0), literal(0), false(), Hotel.city,
+               literal(now, DateTime), literal(now, DateTime))
+        .select_from(Room)
+        .join(Hotel, Hotel.id == Room.hotel_id)
+        .join(days, true())
+        .outerjoin(Inventory, and_(Inventory.hotel_id == Room.hotel_id, Inventory.room_id == Room.id,
+                                   Inventory.date == days.c.date))
+        .where(*room_criteria, Inventory.id.is_(None))
+    )
+    # Wrapped so a recursive CTE stays inside the SELECT (sqlite3 reports no rowcount
+    # for a statement starting with WITH); WHERE true keeps SQLite from reading
+    # ON CONFLICT as a join constraint
+    missing = missing.subquery("missing")
+    stmt = (
+        _insert_ignoring_existing(db)
+        .from_select(_GENERATED_COLUMNS, select(*missing.c).where(true()))
+        .on_conflict_do_nothing(index_elements=["hotel_id", "room_id", "date"])
+    )
+    return db.execute(stmt).rowcount
+
+
+def init_inventory(db: Session, *room_criteria) -> int:
+    """Stocks the matching rooms from today to the end of the horizon and commits.
+
+    Used when a room is created on an active hotel and when a hotel is activated.
+
+    Args:
+        db (Session): The database session.
+        *room_criteria: Filters on Room/Hotel picking the rooms.
+
+    Returns:
+        int: Number of inventory rows inserted.
+    """
+    today = date.today()
+    inserted = generate_inventory(db, *room_criteria, start_date=today,
+                                  end_date=today + timedelta(days=settings.inventory_horizon_days - 1))
+    db.commit()
+    return inserted
+
+
+def extend_horizon(db: Session, after_room_id: int = 0, batch_size: int = None,
+                   days: int = None) -> tuple[int, Optional[int]]:
+    """Stocks one batch of active rooms `days` ahead of today — one transaction.
+
+    Rooms are taken in id order after `after_room_id` with FOR UPDATE SKIP LOCKED,
+    so workers running at the same time split the rooms between them instead of
+    repeating each other's batches. Only the missing dates are inserted (see
+    generate_inventory), so a run that was interrupted simply starts over and
+    finds the finished rooms already stocked.
+
+    Args:
+        db (Session): The database session.
+        after_room_id (int): Resume after this room id (previous batch's cursor).
+        batch_size (int, optional): Rooms per batch (defaults to `settings.inventory_horizon_batch_rooms`).
+        days (int, optional): Horizon length (defaults to `settings.inventory_horizon_days`).
+
+    Returns:
+        tuple[int, Optional[int]]: Rows inserted, and the cursor to resume from
+            (None when every room has been visited).
+    """
+    batch_size = batch_size or settings.inventory_horizon_batch_rooms
+    days = days or settings.inventory_horizon_days
+    room_ids = db.execute(
+        select(Room.id)
+        .join(Hotel, Hotel.id == Room.hotel_id)
+        .where(Hotel.active == True, Room.id > after_room_id)
+        .order_by(Room.id)
+        .limit(batch_size)
+        .with_for_update(of=Room, skip_locked=True)
+    ).scalars().all()
+    if not room_ids:
+        db.rollback()
+        return 0, None
+
+    today = date.today()
+    inserted = generate_inventory(db, Room.id.in_(room_ids),
+                                  start_date=today, end_date=today + timedelta(days=days - 1))
+    db.commit()
+    if inserted:
+        metrics.inc("inventory_horizon_rows_total", inserted)
+        logger.info("inventory horizon: %d rows for rooms %d..%d", inserted, room_ids[0], room_ids[-1])
+    return inserted, room_ids[-1] if len(room_ids) == batch_size else None
+
+
+# ── Propagating room changes ─────────────────────────────────────────────────
+
+def _taken():
+    """book_count + reserved_count + the night's live ledger holds, evaluated per row in SQL."""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    held = (
+        select(func.coalesce(func.sum(InventoryHold.count), 0))
+        .where(InventoryHold.room_id == Inventory.room_id, InventoryHold.date == Inventory.date,
+               or_(InventoryHold.expires_at.is_(None), InventoryHold.expires_at > now))
+        .scalar_subquery()
+    )
+    return Inventory.book_count + Inventory.reserved_count + held
+
+
+def count_overcommitted(db: Session, room_id: int, total_count: int, start_date: date,
+                        end_date: Optional[date] = None) -> tuple[int, Optional[date]]:
+    """Nights from `start_date` (to `end_date`, if given) that already hold more than `total_count` rooms.
+
+    Returns:
+        tuple[int, Optional[date]]: How many such nights, and the first of them.
+    """
+    stmt = select(func.count(), func.min(Inventory.date)).where(
+        Inventory.room_id == room_id, Inventory.date >= start_date, _taken() > total_count)
+    if end_date is not None:
+        stmt = stmt.where(Inventory.date <= end_date)
+    count, first = db.execute(stmt).one()
+    return count, first
+
+
+@transactional("inventory_bulk_update")
+def _propagate_chunk(db: Session, room_id: int, start_date: date, end_date: date,
+                     price=None, total_count: Optional[int] = None, clamp: bool = False,
+                     released: bool = False, refuse_until: Optional[date] = None) -> dict:
+    """One date window of propagate_room_changes, in one transaction.
+
+    With `refuse_until`, nothing is written if a night up to that date holds more
+    than total_count rooms (409).
+    """
+    window = (Inventory.room_id == room_id, Inventory.date.between(start_date, end_date))
+    result = {"nights": 0, "clamped": 0, "skipped": 0, "skipped_dates": []}
+    # The room lock queues other edits of this room; the row locks queue bookings of
+    # these nights, so what a night holds cannot change between the check and the write
+    lock_rooms(db, [room_id], op="inventory_bulk_update")
+    lock_inventory(db, *window, op="inventory_bulk_update")
+    fits = ()
+    if total_count is not None:
+        fits = (_taken() <= total_count,)
+        # Nights that cannot shrink that far: raised only to what they already hold, or left alone
+        short = (_taken() > total_count,)
+        if refuse_until is not None:
+            nights, first = count_overcommitted(db, room_id, total_count, start_date, refuse_until)
+            if nights:
+                raise HTTPException(409, f"{nights} night(s) from {first} already hold more than "
+                                         f"{total_count} rooms; retry with clamp=true to keep what they hold")
+        if clamp:
+            values = {"total_count": _taken()}
+            if price is not None:
+                values["price"] = price
+            result["clamped"] = db.execute(
+                update(Inventory).where(*window, *short).values(**values)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+        else:
+            if price is not None:
+                db.execute(update(Inventory).where(*window, *short).values(price=price)
+                           .execution_options(synchronize_session=False))
+            result["skipped_dates"] = db.execute(
+                select(Inventory.date).where(*window, *short).order_by(Inventory.date)
+            ).scalars().all()
+            result["skipped"] = len(result["skipped_dates"])
+    values = {}
+    if price is not None:
+        values["price"] = price
+    if total_count is not None:
+        values["total_count"] = total_count
+    result["nights"] = db.execute(
+        update(Inventory).where(*window, *fits).values(**values)
+        .execution_options(synchronize_session=False)
+    ).rowcount + result["clamped"]
+    if released:
+        waitlist_service.notify_released(db, [(room_id, start_date, end_date)])
+    db.commit()
+    return result
+
+
+def propagate_room_changes(db: Session, room: Room, price=None, total_count: Optional[int] = None,
+                           clamp: bool = False) -> dict:
+    """Pushes a room's new base price and/or room count onto its future inventory.
+
+    Every night from today on is rewritten by set-based UPDATEs, one window of
+    `settings.inventory_propagate_chunk_days` nights per transaction, so a long
+    horizon never holds its row locks all at once. Nights that already hold more
+    rooms than the new total_count (book_count + reserved_count + live ledger
+    holds) are never shrunk below that: with `clamp` they get exactly what they
+    hold, otherwise they keep their old total_count and are counted as skipped.
+    The comparison happens inside the UPDATE, so no row is read into Python.
+    Sharded nights count their shard block as reserved, so they cannot shrink.
+
+    Each window takes the room lock and locks its inventory rows before it checks
+    or writes anything. Without `clamp`, the first window refuses the whole edit
+    (409, nothing written) if any future night already holds more than the new
+    total_count; a night that a booking fills after that, while later windows are
+    still pending, is left alone and listed in `skipped_dates`.
+
+    Call it before saving the new values on the room: a total_count above the
+    room's current one frees rooms, and the waitlist is told about them.
+
+    Args:
+        db (Session): The database session.
+        room (Room): The room whose inventory to update.
+        price (Decimal, optional): New per-night price.
+        total_count (int, optional): New number of rooms per night.
+        clamp (bool): Clamp overcommitted nights instead of skipping them.
+
+    Returns:
+        dict: `nights` updated, of which `clamped`, and `skipped` nights left untouched,
+            with their `skipped_dates`.
+
+    Raises:
+        HTTPException: Without `clamp`, if a night already holds more than total_count rooms (409).
+    """
+    totals = {"nights": 0, "clamped": 0, "skipped": 0, "skipped_dates": []}
+    if price is None and total_count is None:
+        return totals
+    released = total_count is not None and total_count > room.total_count
+    start = date.today()
+    last = db.scalar(select(func.max(Inventory.date)).where(Inventory.room_id == room.id))
+    chunk = timedelta(days=settings.inventory_propagate_chunk_days)
+    while last is not None and start <= last:
+        end = min(start + chunk - timedelta(days=1), last)
+        refuse_until = last if total_count is not None and not clamp and start == date.today() else None
+        for key, n in _propagate_chunk(db, room.id, start, end, price=price, total_count=total_count,
+                                       clamp=clamp, released=released, refuse_until=refuse_until).items():
+            totals[key] += n
+        start = end + timedelta(days=1)
+    if released:
+        admission.rooms_released([room.id])
+    metrics.inc("inventory_propagated_rows_total", totals["nights"])
+    return totals
@@ -0,0 +1,227 @@
+import logging
+import random
+from decimal import Decimal
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional
+import stripe
+from sqlalchemy.orm import Session
+from sqlalchemy import select, update, func
+from app.models.booking import Booking
+from app.models.enums import BookingStatusEnum
+from app.models.outbox import OutboxMessage
+from app.database import get_by_id
+from app.config import settings
+from app import booking_events, metrics
+
+logger = logging.getLogger(__name__)
+
+
+BALANCE_PURPOSE = "booking_balance"   # Checkout metadata of a balance payment
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def enqueue(db: Session, kind: str, payload: dict, dedup_key: str) -> OutboxMessage:
+    """Adds a message to the caller's transaction — it is only visible once the caller commits.
+
+    Args:
+        db (Session): The database session holding the state change.
+        kind (str): Handler name, a key of HANDLERS.
+        payload (dict): JSON arguments for the handler.
+        dedup_key (str): Unique per side effect; doubles as the Stripe Idempotency-Key.
+
+    Returns:
+        OutboxMessage: The pending (unflushed) message.
+    """
+    message = OutboxMessage(kind=kind, payload=payload, dedup_key=dedup_key, status="PENDING")
+    db.add(message)
+    return message
+
+
+def get_by_dedup_key(db: Session, dedup_key: str) -> Optional[OutboxMessage]:
+    return db.query(OutboxMessage).filter(OutboxMessage.dedup_key == dedup_key).first()
+
+
+# ── Handlers — run with NO inventory locks held; must be safe to repeat ──────
+# (waitlist.promote is the exception: it is a local transaction that takes them;
+#  waitlist.notify calls the notification service, not Stripe)
+
+def _create_checkout_session(db: Session, message: OutboxMessage) -> dict:
+    booking = get_by_id(db, Booking, message.payload["booking_id"])
+    session = stripe.checkout.Session.create(
+        payment_method_types=["card"],
+        line_items=[{
+            "price_data": {
+                "currency": "usd",
+                "unit_amount": int(booking.amount * 100),  # Stripe uses cents
+                "product_data": {"name": f"Booking #{booking.id}"},
+            },
+            "quantity": 1,
+        }],
+        mode="payment",
+        success_url=f"{settings.frontend_url}/bookings/{booking.id}/status",
+        cancel_url=f"{settings.frontend_url}/bookings/{booking.id}/status",
+        idempotency_key=message.dedup_key,
+    )
+    # Guarded — a booking that expired meanwhile is not resurrected
+    version = db.execute(
+        update(Booking)
+        .where(Booking.id == booking.id,
+               Booking.booking_status.in_((BookingStatusEnum.RESERVED, BookingStatusEnum.GUESTS_ADDED)))
+        .values(payment_session_id=session.id, booking_status=BookingStatusEnum.PAYMENTS_PENDING,
+                status_version=Booking.status_version + 1)
+        .returning(Booking.status_version)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    if version is None:
+        # Nobody may pay for it — close the session rather than hand out its URL
+        stripe.checkout.Session.expire(session.id)
+        return {"session_id": session.id, "url": None}
+    booking_events.stage(db, [(booking.id, BookingStatusEnum.PAYMENTS_PENDING.value, version)])
+    return {"session_id": session.id, "url": session.url}
+
+
+def _balance_checkout(db: Session, message: OutboxMessage) -> dict:
+    # Checkout for what a modified, already paid booking now costs on top.
+    # Tagged in metadata so the webhook consumer does not look for a booking to confirm.
+    booking_id = message.payload["booking_id"]
+    session = stripe.checkout.Session.create(
+        payment_method_types=["card"],
+        line_items=[{
+            "price_data": {
+                "currency": "usd",
+                "unit_amount": int(Decimal(message.payload["amount"]) * 100),
+                "product_data": {"name": f"Booking #{booking_id} change"},
+            },
+            "quantity": 1,
+        }],
+        mode="payment",
+        metadata={"purpose": BALANCE_PURPOSE, "booking_id": str(booking_id)},
+        success_url=f"{settings.frontend_url}/bookings/{booking_id}/status",
+        cancel_url=f"{settings.frontend_url}/bookings/{booking_id}/status",
+        idempotency_key=message.dedup_key,
+    )
+    return {"session_id": session.id, "url": session.url}
+
+
+def _expire_checkout_session(db: Session, message: OutboxMessage) -> dict:
+    # The hold behind it was swept; a session already paid is refunded by the
+    # webhook consumer instead (webhook_service._process_batch)
+    session = stripe.checkout.Session.retrieve(message.payload["payment_session_id"])
+    if session.status == "open":
+        session = stripe.checkout.Session.expire(session.id)
+    return {"session_id": session.id, "status": session.status}
+
+
+def _refund(db: Session, message: OutboxMessage) -> dict:
+    # Stripe refund against the original payment intent — in full, or just
+    # "amount" when a booking change made it cheaper
+    session = stripe.checkout.Session.retrieve(message.payload["payment_session_id"])
+    params = {}
+    if message.payload.get("amount"):
+        params["amount"] = int(Decimal(message.payload["amount"]) * 100)
+    refund = stripe.Refund.create(payment_intent=session.payment_intent,
+                                  idempotency_key=message.dedup_key, **params)
+    return {"payment_intent": session.payment_intent, "refund_id": getattr(refund, "id", None)}
+
+
+def _promote_waitlist(db: Session, message: OutboxMessage) -> dict:
+    from app.services import waitlist_service   # waitlist_service enqueues through this module
+    return waitlist_service.handle_promotion(db, message)
+
+
+def _notify_waitlist(db: Session, message: OutboxMessage) -> dict:
+    from app.services import waitlist_service
+    return waitlist_service.handle_notification(db, message)
+
+
+HANDLERS: dict[str, Callable[[Session, OutboxMessage], Any]] = {
+    "stripe.checkout_session": _create_checkout_session,
+    "stripe.balance_checkout": _balance_checkout,
+    "stripe.expire_session":   _expire_checkout_session,
+    "stripe.refund":           _refund,
+    "waitlist.promote":        _promote_waitlist,
+    "waitlist.notify":         _notify_waitlist,
+}
+
+
+def _backoff(attempts: int) -> timedelta:
+    """Exponential backoff capped at 5 minutes, with jitter."""
+    return timedelta(seconds=min(300, 2 ** attempts) * random.uniform(0.5, 1.0))
+
+
+def _claim(db: Session, message_id: int) -> bool:
+    """Lease a due message to this worker by pushing next_attempt_at forward (guarded UPDATE)."""
+    now = _utcnow()
+    claimed = db.execute(
+        update(OutboxMessage)
+        .where(OutboxMessage.id == message_id,
+               OutboxMessage.status == "PENDING",
+               OutboxMessage.next_attempt_at <= now)
+        .values(next_attempt_at=now + timedelta(seconds=settings.outbox_lease_seconds),
+                attempts=OutboxMessage.attempts + 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return bool(claimed)
+
+
+def dispatch_one(db: Session, message_id: int) -> OutboxMessage:
+    """Performs one outbox message now if it is due and nobody else holds its lease.
+
+    Args:
+        db (Session): The database session (must have no open transaction holding locks).
+        message_id (int): The message to run.
+
+    Returns:
+        OutboxMessage: The message after the attempt (DONE, PENDING for retry, or FAILED).
+    """
+    if _claim(db, message_id):
+        message = db.get(OutboxMessage, message_id)
+        try:
+            result = HANDLERS[message.kind](db, message)
+        except Exception as exc:
+            db.rollback()
+            message = db.get(OutboxMessage, message_id)
+            message.last_error = str(exc)[:1000]
+            if message.attempts >= settings.outbox_max_attempts:
+                message.status = "FAILED"
+                logger.error("outbox message %s (%s) failed permanently: %s", message.id, message.kind, exc)
+            else:
+                message.next_attempt_at = _utcnow() + _backoff(message.attempts)
+            metrics.inc("outbox_dispatched_total", kind=message.kind,
+                        outcome="failed" if message.status == "FAILED" else "retry")
+            db.commit()
+        else:
+            message.status = "DONE"
+            message.result = result
+            message.processed_at = _utcnow()
+            metrics.inc("outbox_dispatched_total", kind=message.kind, outcome="done")
+            db.commit()
+    db.expire_all()
+    return db.get(OutboxMessage, message_id)
+
+
+def dispatch_due(db: Session, batch_size: int = None) -> int:
+    """Runs every PENDING message that is due, oldest first. Returns how many completed.
+
+    Safe to run from every worker process — each message is leased by a guarded
+    UPDATE before its handler runs.
+    """
+    batch_size = batch_size or settings.outbox_batch_size
+    ids = db.execute(
+        select(OutboxMessage.id)
+        .where(OutboxMessage.status == "PENDING", OutboxMessage.next_attempt_at <= _utcnow())
+        .order_by(OutboxMessage.next_attempt_at)
+        .limit(batch_size)
+    ).scalars().all()
+    db.rollback()
+
+    done = sum(1 for message_id in ids if dispatch_one(db, message_id).status == "DONE")
+    metrics.set_gauge("outbox_pending", db.execute(
+        select(func.count()).select_from(OutboxMessage).where(OutboxMessage.status == "PENDING")
+    ).scalar())
+    db.rollback()
+    return done
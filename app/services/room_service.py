@@ -1,42 +1,27 @@
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
-from datetime import date, timedelta
 from app.models.room import Room
 from app.models.hotel import Hotel
-from app.models.inventory import Inventory
 from app.models.user import User
 from app.schemas.room import RoomSchema
-from app.database import get_by_id, get_all, create_record, update_record, delete_record, bulk_create
+from app.database import get_by_id, get_all, create_record, update_record, delete_record
+from app.services import inventory_service
+from app.config import settings
 
 
 def _init_inventory(db: Session, hotel: Hotel, room: Room) -> None:
     """
-    REFERENCE — bulk generate 365 inventory rows when a room is created on an active hotel.
+    REFERENCE — generate a year of inventory rows when a room is created on an active hotel.
 
-    Study this before implementing the functions below. Key things to notice:
-      - A list comprehension builds all 365 Inventory objects in memory first
-      - bulk_create() sends them in a single transaction (not 365 round-trips)
+    Key things to notice:
+      - No Inventory objects are built in Python: inventory_service.generate_inventory
+        runs one INSERT ... SELECT over a generated date series
       - Each row copies price and total_count from the room at creation time
       - city is denormalized (copied from hotel) to make inventory queries faster
       - All counts start at 0; surge_factor starts at 1; closed starts as False
+      - Rows that already exist are skipped, so calling it twice is harmless
     """
-    today = date.today()
-    rows = [
-        Inventory(
-            hotel_id=hotel.id,
-            room_id=room.id,
-            date=today + timedelta(days=i),
-            price=room.base_price,
-            total_count=room.total_count,
-            surge_factor=1,
-            book_count=0,
-            reserved_count=0,
-            closed=False,
-            city=hotel.city,
-        )
-        for i in range(365)
-    ]
-    bulk_create(db, rows)
+    inventory_service.init_inventory(db, Room.id == room.id)
 
 
 def create_room(db: Session, hotel_id: int, data: RoomSchema, current_user: User) -> Room:
@@ -111,7 +96,8 @@ def get_room(db: Session, hotel_id: int, room_id: int, current_user: User) -> Ro
     return room
 
 
-def update_room(db: Session, hotel_id: int, room_id: int, data: RoomSchema, current_user: User) -> Room:
+def update_room(db: Session, hotel_id: int, room_id: int, data: RoomSchema, current_user: User,
+                propagate: bool = False, clamp: bool = False):
     """
     Update a room's details — only if the requesting user owns the parent hotel.
 
@@ -123,8 +109,14 @@ def update_room(db: Session, hotel_id: int, room_id: int, data: RoomSchema, curr
     Should you allow the client to change the room's `id` field via the update?
     Think about what to exclude from the data dump.
 
-    Note: updating base_price or total_count does NOT retroactively change
-    existing inventory rows — those were set at room creation.
+    Note: by default, updating base_price or total_count does NOT retroactively
+    change existing inventory rows — those were set at room creation. With
+    `propagate`, a changed base_price or total_count is pushed onto every future
+    night (inventory_service.propagate_room_changes). A total_count below what a
+    night already holds is refused with 409 before anything is written, unless
+    `clamp` asks for those nights to keep exactly what they hold.
+
+    Returns a (room, propagation counts or None) pair.
     """
     hotel = get_by_id(db, Hotel, hotel_id)
     if not hotel:
@@ -134,7 +126,17 @@ def update_room(db: Session, hotel_id: int, room_id: int, data: RoomSchema, curr
     room = get_by_id(db, Room, room_id)
     if not room:
         raise HTTPException(404, f"Room not found: {room_id}")
-    return update_record(db, room, **data.model_dump(exclude_none=True, exclude={"id"}))
+
+    propagation = None
+    if propagate:
+        if settings.reservation_mode == "segments":
+            raise HTTPException(400, "Propagating room changes is not supported in segments mode")
+        price = data.base_price if data.base_price != room.base_price else None
+        total_count = data.total_count if data.total_count != room.total_count else None
+        propagation = inventory_service.propagate_room_changes(db, room, price=price, total_count=total_count,
+                                                               clamp=clamp)
+    room = update_record(db, room, **data.model_dump(exclude_none=True, exclude={"id"}))
+    return room, propagation
 
 def delete_room(db: Session, hotel_id: int, room_id: int, current_user: User) -> None:
     """
@@ -0,0 +1,319 @@
+import json
+import logging
+import urllib.request
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, Optional
+from fastapi import HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from app.models.booking import Booking
+from app.models.hotel import Hotel
+from app.models.room import Room
+from app.models.user import User
+from app.models.outbox import OutboxMessage
+from app.models.waitlist_entry import WaitlistEntry
+from app.models.enums import BookingStatusEnum
+from app.schemas.booking import BookingRequest
+from app.pricing.pricing_service import calculate_line_prices
+from app.reservation.reservation_service import get_reservation_strategy
+from app.reservation.strategy import merge_night_spans
+from app.database import get_by_id
+from app.transactions import transactional
+from app.services import outbox_service
+from app.config import settings
+from app import admission, metrics
+
+logger = logging.getLogger(__name__)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def join(db: Session, data: BookingRequest, current_user: User) -> WaitlistEntry:
+    """Puts the user on the waitlist for a room and date range.
+
+    Joining twice for the same room, dates and rooms_count returns the existing
+    WAITING entry instead of queueing a second one.
+
+    Args:
+        db (Session): The database session.
+        data (BookingRequest): The booking the user could not make.
+        current_user (User): The user joining the waitlist.
+
+    Returns:
+        WaitlistEntry: The WAITING entry.
+
+    Raises:
+        HTTPException: If the hotel/room is not found (404), the room is not in
+                       that hotel (400), or the stay starts in the past (400).
+    """
+    hotel = get_by_id(db, Hotel, data.hotel_id)
+    if not hotel:
+        raise HTTPException(404, f"Hotel not found: {data.hotel_id}")
+    room = get_by_id(db, Room, data.room_id)
+    if not room or room.hotel_id != data.hotel_id:
+        raise HTTPException(404, f"Room {data.room_id} not found in hotel {data.hotel_id}")
+    if data.check_in_date < date.today():
+        raise HTTPException(400, "check_in_date is in the past")
+
+    existing = db.query(WaitlistEntry).filter(
+        WaitlistEntry.user_id == current_user.id,
+        WaitlistEntry.room_id == data.room_id,
+        WaitlistEntry.status == "WAITING",
+        WaitlistEntry.check_in_date == data.check_in_date,
+        WaitlistEntry.check_out_date == data.check_out_date,
+        WaitlistEntry.rooms_count == data.rooms_count,
+    ).first()
+    if existing:
+        return existing
+
+    entry = WaitlistEntry(
+        user_id=current_user.id,
+        hotel_id=data.hotel_id,
+        room_id=data.room_id,
+        check_in_date=data.check_in_date,
+        check_out_date=data.check_out_date,
+        rooms_count=data.rooms_count,
+        status="WAITING",
+    )
+    db.add(entry)
+    db.commit()
+    db.refresh(entry)
+    metrics.inc("waitlist_joined_total")
+    return entry
+
+
+def list_entries(db: Session, current_user: User) -> list[WaitlistEntry]:
+    """Returns the user's waitlist entries, newest first."""
+    return (
+        db.query(WaitlistEntry)
+        .filter(WaitlistEntry.user_id == current_user.id)
+        .order_by(WaitlistEntry.id.desc())
+        .all()
+    )
+
+
+def leave(db: Session, entry_id: int, current_user: User) -> WaitlistEntry:
+    """Takes a WAITING entry off the waitlist.
+
+    The status flip is guarded, so it cannot race a promotion of the same entry:
+    one of them wins and the other sees the entry is no longer WAITING.
+
+    Args:
+        db (Session): The database session.
+        entry_id (int): The waitlist entry.
+        current_user (User): The authenticated user.
+
+    Returns:
+        WaitlistEntry: The CANCELLED entry.
+
+    Raises:
+        HTTPException: If the entry is not found (404), not owned by the user (403),
+                       or no longer WAITING (400).
+    """
+    entry = get_by_id(db, WaitlistEntry, entry_id)
+    if not entry:
+        raise HTTPException(404, f"Waitlist entry not found: {entry_id}")
+    if entry.user_id != current_user.id:
+        raise HTTPException(403, "You do not own this waitlist entry")
+
+    left = db.execute(
+        update(WaitlistEntry)
+        .where(WaitlistEntry.id == entry_id, WaitlistEntry.status == "WAITING")
+        .values(status="CANCELLED")
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    db.refresh(entry)
+    if not left:
+        raise HTTPException(400, f"Waitlist entry is already {entry.status}")
+    return entry
+
+
+def notify_released(db: Session, spans: Iterable[tuple[int, date, date]]) -> int:
+    """Schedules waitlist promotion for rooms that just got inventory back.
+
+    Called in the transaction that releases the rooms (cancellation, hold expiry,
+    reopening nights) — the promotion request is an outbox message, so it exists
+    exactly when the release commits. A room's spans are merged where they touch
+    or overlap, and each resulting run gets its own message, so nights still
+    booked between two runs are not searched. Only rooms with a WAITING entry
+    get messages. Does not commit.
+
+    Args:
+        db (Session): The database session holding the release.
+        spans (Iterable[tuple[int, date, date]]): (room_id, first night, last night) freed.
+
+    Returns:
+        int: Number of promotion messages enqueued.
+    """
+    by_room: dict[int, list[tuple[date, date]]] = defaultdict(list)
+    for room_id, start, end in spans:
+        by_room[room_id].append((start, end))
+    if not by_room:
+        return 0
+
+    waiting = set(db.execute(
+        select(WaitlistEntry.room_id).distinct()
+        .where(WaitlistEntry.room_id.in_(by_room), WaitlistEntry.status == "WAITING",
+               WaitlistEntry.check_in_date >= date.today())
+    ).scalars().all())
+    enqueued = 0
+    for room_id in sorted(waiting):
+        for start, end in merge_night_spans(by_room[room_id]):
+            _enqueue_promotion(db, room_id, start, end, after_id=0)
+            enqueued += 1
+    return enqueued
+
+
+
+def _enqueue_promotion(db: Session, room_id: int, start: date, end: date, after_id: int,
+                       dedup_key: str = None) -> OutboxMessage:
+    return outbox_service.enqueue(
+        db, "waitlist.promote",
+        {"room_id": room_id, "start": start.isoformat(), "end": end.isoformat(), "after_id": after_id},
+        dedup_key=dedup_key or f"waitlist-promote-{room_id}-{uuid.uuid4().hex}",
+    )
+
+
+@transactional("waitlist_promote")
+def promote(db: Session, room_id: int, start: date, end: date,
+            after_id: int = 0, batch_size: int = None) -> tuple[int, Optional[int]]:
+    """Turns WAITING entries that now fit into RESERVED bookings — one bounded batch.
+
+    Entries overlapping [start, end] are taken oldest first (id > after_id), with
+    FOR UPDATE SKIP LOCKED so concurrent promoters never share an entry. The whole
+    batch goes through the reservation strategy's reserve_available(): one
+    ordered lock pass over the room's inventory, admitting entries in FIFO order
+    while they fit. Entries whose check-in has passed are expired on the way.
+    Each promoted guest gets a "waitlist.notify" outbox message with the
+    booking and the time it must be paid by — the hold expires like any other,
+    `settings.booking_hold_minutes` after it was made. Does not commit.
+
+    Args:
+        db (Session): The database session.
+        room_id (int): The room that got inventory back.
+        start (date): First freed night.
+        end (date): Last freed night.
+        after_id (int): Resume after this entry id (previous batch's cursor).
+        batch_size (int, optional): Max entries per batch (defaults to
+            `settings.waitlist_promote_batch_size`).
+
+    Returns:
+        tuple[int, Optional[int]]: Entries promoted, and the cursor to resume from
+            if the batch was full (None when the room's matching entries are done).
+    """
+    batch_size = batch_size or settings.waitlist_promote_batch_size
+    today = date.today()
+    db.execute(
+        update(WaitlistEntry)
+        .where(WaitlistEntry.room_id == room_id, WaitlistEntry.status == "WAITING",
+               WaitlistEntry.check_in_date < today)
+        .values(status="EXPIRED")
+        .execution_options(synchronize_session=False)
+    )
+
+    # Interval overlap on inclusive night ranges — served by ix_waitlist_entry_room_status_dates
+    entries = db.execute(
+        select(WaitlistEntry)
+        .where(
+            WaitlistEntry.room_id == room_id,
+            WaitlistEntry.status == "WAITING",
+            WaitlistEntry.check_in_date <= end,
+            WaitlistEntry.check_out_date >= start,
+            WaitlistEntry.id > after_id,
+        )
+        .order_by(WaitlistEntry.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+    if not entries:
+        return 0, None
+
+    bookings = [
+        Booking(
+            hotel_id=e.hotel_id,
+            room_id=e.room_id,
+            user_id=e.user_id,
+            rooms_count=e.rooms_count,
+            check_in_date=e.check_in_date,
+            check_out_date=e.check_out_date,
+            booking_status=BookingStatusEnum.RESERVED,
+        )
+        for e in entries
+    ]
+    rows = get_reservation_strategy().reserve_available(db, bookings)
+
+    fitted = [(e, b, r) for e, b, r in zip(entries, bookings, rows) if r is not None]
+    for (_, booking, _), price_per_room in zip(fitted, calculate_line_prices([r for _, _, r in fitted])):
+        booking.amount = price_per_room * booking.rooms_count
+    db.add_all([booking for _, booking, _ in fitted])
+    db.flush()
+
+    now = _utcnow()
+    pay_by = now + timedelta(minutes=settings.booking_hold_minutes)
+    for entry, booking, _ in fitted:
+        entry.status = "PROMOTED"
+        entry.booking_id = booking.id
+        entry.promoted_at = now
+        outbox_service.enqueue(
+            db, "waitlist.notify",
+            {"entry_id": entry.id, "booking_id": booking.id, "user_id": entry.user_id,
+             "pay_by": pay_by.isoformat()},
+            dedup_key=f"waitlist-notify-{entry.id}",
+        )
+    metrics.inc("waitlist_promoted_total", len(fitted))
+    cursor = entries[-1].id if len(entries) == batch_size else None
+    return len(fitted), cursor
+
+
+def handle_promotion(db: Session, message: OutboxMessage) -> dict:
+    """Outbox handler for "waitlist.promote": one batch, plus a follow-up message if more entries match.
+
+    The batch takes one of the room's admission slots, so it queues behind the
+    room's booking requests like one more of them (a full gate answers 429 and
+    the outbox retries the message later). It commits before giving the slot
+    back, as init_booking does, so no booking admitted after it waits on its
+    row locks. The follow-up message's dedup key is derived from this one, so
+    running the message again after that commit does not queue a second one.
+    """
+    p = message.payload
+    start, end = date.fromisoformat(p["start"]), date.fromisoformat(p["end"])
+    with admission.slot(db, p["room_id"]):
+        promoted, cursor = promote(db, p["room_id"], start, end, after_id=p["after_id"])
+        follow_up = f"{message.dedup_key}-after-{cursor}"
+        if cursor is not None and outbox_service.get_by_dedup_key(db, follow_up) is None:
+            _enqueue_promotion(db, p["room_id"], start, end, after_id=cursor, dedup_key=follow_up)
+        db.commit()
+    if promoted:
+        logger.info("waitlist: promoted %d entries for room %s", promoted, p["room_id"])
+    return {"promoted": promoted, "next_after_id": cursor}
+
+
+def handle_notification(db: Session, message: OutboxMessage) -> dict:
+    """Outbox handler for "waitlist.notify": tells a promoted guest their booking is waiting for payment.
+
+    POSTs the notice as JSON to `settings.waitlist_notify_url` (the mailer or push
+    service); a failed delivery raises and the outbox retries it. Without a URL
+    the notice is only logged.
+    """
+    p = message.payload
+    user = get_by_id(db, User, p["user_id"])
+    notice = {
+        "email": user.email if user else None,
+        "booking_id": p["booking_id"],
+        "pay_by": p["pay_by"],
+        "url": f"{settings.frontend_url}/bookings/{p['booking_id']}/status",
+    }
+    if not settings.waitlist_notify_url:
+        logger.info("waitlist: booking %s is ready for %s until %s", p["booking_id"], notice["email"], p["pay_by"])
+        return {"delivered": False}
+    request = urllib.request.Request(
+        settings.waitlist_notify_url, data=json.dumps(notice).encode(), method="POST",
+        headers={"Content-Type": "application/json", "Idempotency-Key": message.dedup_key},
+    )
+    with urllib.request.urlopen(request, timeout=settings.waitlist_notify_timeout_seconds) as response:
+        return {"delivered": True, "status": response.status}
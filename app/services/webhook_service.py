@@ -0,0 +1,241 @@
+import logging
+import threading
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import select, delete, func
+from sqlalchemy.exc import IntegrityError
+from app.models.webhook_event import WebhookEvent
+from app.models.processed_webhook_event import ProcessedWebhookEvent
+from app.models.enums import BookingStatusEnum
+from app.services import booking_service, outbox_service
+from app.services.outbox_service import BALANCE_PURPOSE
+from app.transactions import transactional
+from app.config import settings
+from app import metrics
+
+logger = logging.getLogger(__name__)
+
+CHECKOUT_COMPLETED = "checkout.session.completed"
+
+
+def _is_booking_payment(event: WebhookEvent) -> bool:
+    """A completed Checkout that pays for a booking (not the balance of a booking change)."""
+    if event.type != CHECKOUT_COMPLETED:
+        return False
+    metadata = event.payload["data"]["object"].get("metadata") or {}
+    return metadata.get("purpose") != BALANCE_PURPOSE
+
+
+class _SeenEvents:
+    """Bounded, thread-safe set of Stripe event ids this process has already accepted."""
+    def __init__(self):
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, event_id: str) -> bool:
+        with self._lock:
+            if event_id not in self._data:
+                return False
+            self._data.move_to_end(event_id)
+            return True
+
+    def add(self, event_id: str) -> None:
+        with self._lock:
+            self._data[event_id] = None
+            self._data.move_to_end(event_id)
+            while len(self._data) > settings.webhook_dedup_cache_size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+_seen = _SeenEvents()
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def enqueue_event(db: Session, event: dict) -> Optional[WebhookEvent]:
+    """Durably stores a verified Stripe event and commits — nothing else.
+
+    The webhook route acknowledges Stripe as soon as this returns; booking
+    confirmation happens later in process_pending. Redeliveries are dropped here:
+    first by the in-process LRU, then by the processed_webhook_event primary key,
+    so a duplicate never reaches the queue or an inventory transaction.
+
+    Args:
+        db (Session): The database session.
+        event (dict): The raw event body, already signature-verified.
+
+    Returns:
+        Optional[WebhookEvent]: The stored PENDING event, or None for a duplicate.
+    """
+    event_id = event["id"]
+    if event_id in _seen:
+        metrics.inc("webhook_duplicates_dropped_total", stage="cache")
+        return None
+
+    db.add(ProcessedWebhookEvent(event_id=event_id, type=event["type"]))
+    row = WebhookEvent(event_id=event_id, type=event["type"], payload=event, status="PENDING")
+    db.add(row)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Accepted before — by another worker process, or before this one restarted
+        db.rollback()
+        _seen.add(event_id)
+        metrics.inc("webhook_duplicates_dropped_total", stage="store")
+        return None
+
+    _seen.add(event_id)
+    metrics.inc("webhook_events_received_total", type=event["type"])
+    return row
+
+
+@transactional("confirm_booking")
+def _process_batch(db: Session, event_ids: list[int]) -> int:
+    """Confirms the bookings behind `event_ids` and marks the events done, in one transaction."""
+    events = db.execute(
+        select(WebhookEvent)
+        .where(WebhookEvent.id.in_(event_ids), WebhookEvent.status == "PENDING")
+        .order_by(WebhookEvent.id)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+    if not events:
+        db.rollback()
+        return 0
+
+    session_ids = [e.payload["data"]["object"]["id"] for e in events if _is_booking_payment(e)]
+    found = booking_service.confirm_sessions(db, session_ids)
+
+    now = _utcnow()
+    outcomes = Counter()
+    refunds = set()
+    for e in events:
+        e.attempts += 1
+        booking = found.get(e.payload["data"]["object"]["id"]) if _is_booking_payment(e) else None
+        if e.type != CHECKOUT_COMPLETED:
+            e.status = "IGNORED"
+        elif not _is_booking_payment(e):
+            # Balance of a booking change — the booking was already updated when it was changed
+            e.status = "DONE"
+        elif booking is None:
+            # No booking for this session (yet) — retried until webhook_max_attempts
+            e.last_error = "booking not found"
+            e.status = "FAILED" if e.attempts >= settings.webhook_max_attempts else "PENDING"
+        elif booking.booking_status == BookingStatusEnum.CONFIRMED:
+            e.status = "DONE"
+        else:
+            # Paid after the hold expired (or a repeat delivery for a cancelled booking):
+            # refund it in full. Same dedup key as cancel_booking's refund, so a booking
+            # is refunded once however many times its payment is delivered.
+            dedup_key = f"refund-booking-{booking.id}"
+            if dedup_key not in refunds and outbox_service.get_by_dedup_key(db, dedup_key) is None:
+                outbox_service.enqueue(
+                    db, "stripe.refund",
+                    {"booking_id": booking.id, "payment_session_id": booking.payment_session_id},
+                    dedup_key=dedup_key,
+                )
+            refunds.add(dedup_key)
+            e.last_error = f"booking is {booking.booking_status.value}"
+            e.status = "REFUNDED"
+        if e.status != "PENDING":
+            e.processed_at = now
+        outcomes[(e.type, e.status)] += 1
+    db.commit()
+
+    for (event_type, status), n in outcomes.items():
+        if status != "PENDING":
+            metrics.inc("webhook_events_processed_total", n, type=event_type, outcome=status)
+    return sum(1 for e in events if e.status != "PENDING")
+
+
+def _record_failure(db: Session, event_id: int, error: Exception) -> None:
+    """Counts a failed attempt on one event that broke its batch."""
+    db.rollback()
+    event = db.get(WebhookEvent, event_id)
+    if event is None or event.status != "PENDING":
+        return
+    event.attempts += 1
+    event.last_error = repr(error)[:500]
+    if event.attempts >= settings.webhook_max_attempts:
+        event.status = "FAILED"
+        event.processed_at = _utcnow()
+        metrics.inc("webhook_events_processed_total", type=event.type, outcome="FAILED")
+    db.commit()
+
+
+def process_pending(db: Session, batch_size: int = None) -> int:
+    """Consumes one batch of PENDING webhook events, oldest first.
+
+    The whole batch is confirmed in a single transaction so each room's inventory
+    rows are locked once per batch instead of once per event. If the batch fails,
+    its events are retried one at a time so a single bad event cannot hold up the rest.
+    Safe to run from every worker process — events are claimed with SKIP LOCKED.
+
+    Args:
+        db (Session): The database session.
+        batch_size (int, optional): Max events per batch (defaults to
+            `settings.webhook_batch_size`).
+
+    Returns:
+        int: Number of events that left the queue (DONE, IGNORED, REFUNDED or FAILED).
+    """
+    batch_size = batch_size or settings.webhook_batch_size
+    event_ids = db.execute(
+        select(WebhookEvent.id)
+        .where(WebhookEvent.status == "PENDING")
+        .order_by(WebhookEvent.id)
+        .limit(batch_size)
+    ).scalars().all()
+    db.rollback()
+
+    handled = 0
+    if event_ids:
+        try:
+            handled = _process_batch(db, event_ids)
+        except Exception:
+            logger.exception("webhook batch of %d failed; retrying events one by one", len(event_ids))
+            db.rollback()
+            for event_id in event_ids:
+                try:
+                    handled += _process_batch(db, [event_id])
+                except Exception as exc:
+                    _record_failure(db, event_id, exc)
+
+    report_queue(db)
+    return handled
+
+
+def report_queue(db: Session) -> None:
+    """Publishes queue depth and the age of the oldest PENDING event as gauges."""
+    depth, oldest = db.execute(
+        select(func.count(), func.min(WebhookEvent.received_at))
+        .where(WebhookEvent.status == "PENDING")
+    ).one()
+    db.rollback()
+    metrics.set_gauge("webhook_queue_depth", depth)
+    metrics.set_gauge("webhook_queue_lag_seconds",
+                      (_utcnow() - oldest).total_seconds() if oldest else 0)
+
+
+def purge_processed(db: Session) -> int:
+    """Deletes de-duplication records and finished events older than `webhook_event_retention_days`."""
+    cutoff = _utcnow() - timedelta(days=settings.webhook_event_retention_days)
+    deleted = db.execute(
+        delete(ProcessedWebhookEvent)
+        .where(ProcessedWebhookEvent.received_at < cutoff)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.execute(
+        delete(WebhookEvent)
+        .where(WebhookEvent.status.in_(("DONE", "IGNORED")), WebhookEvent.received_at < cutoff)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return deleted
@@ -0,0 +1,285 @@
+"""
+Shared transaction policy for the booking and inventory write paths.
+
+Every service function that locks inventory is wrapped in @transactional(op),
+which:
+  - sets per-operation lock_timeout / statement_timeout (Postgres, SET LOCAL)
+    so a request fails fast instead of queueing behind a slow transaction
+  - retries deadlocks, serialization failures and lock timeouts with
+    jittered exponential backoff, up to the operation's attempt budget
+  - turns an exhausted budget into a clean 409 (contention) or 503 (timeout)
+    instead of a 500 or a worker thread stuck for seconds
+
+Row locks are always taken through lock_inventory(), which orders them by
+(room_id, date). Two transactions that lock overlapping ranges then acquire
+the shared rows in the same order and cannot deadlock each other. With a
+non-row `lock_provider` (app/locks.py) it locks whole rooms instead, in
+room_id order, then reads the rows without FOR UPDATE.
+
+Every @transactional call is also timed. Per call it records, as histograms
+labelled by op and hotel: total duration (all attempts), time spent acquiring
+row locks, rows locked, and retries. A call slower than `slow_txn_log_ms` is
+logged as one JSON line (`slow_txn {...}`) that also names the rooms. The cost
+is a few perf_counter() calls and one metrics lock per transaction.
+"""
+import functools
+import json
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+from fastapi import HTTPException
+from sqlalchemy import select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.inventory import Inventory
+from app.models.room import Room
+from app.locks import LockNotAvailable, get_lock_provider
+from app import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class TxnPolicy:
+    lock_timeout_ms: int
+    statement_timeout_ms: int
+    max_attempts: int
+    nowait: bool = False      # FOR UPDATE NOWAIT — fail immediately instead of waiting lock_timeout
+
+
+def _policy(op: str) -> TxnPolicy:
+    """Per-operation policy. Read on every call so settings can be changed at runtime/in tests."""
+    default = TxnPolicy(settings.lock_timeout_ms, settings.statement_timeout_ms, settings.txn_max_attempts)
+    overrides = {
+        # Flash-sale switch: give up on a locked night immediately and let the client retry
+        "init_booking": TxnPolicy(settings.lock_timeout_ms, settings.statement_timeout_ms,
+                                  settings.txn_max_attempts, nowait=settings.booking_lock_nowait),
+        # Admin bulk edits touch up to 365 rows per room — give them more time, fewer retries
+        "inventory_bulk_update": TxnPolicy(settings.lock_timeout_ms * 2, settings.statement_timeout_ms * 2, 2),
+        # Bulk import locks a whole room's worth of lines in one pass — same budget
+        "booking_import": TxnPolicy(settings.lock_timeout_ms * 2, settings.statement_timeout_ms * 2, 2),
+    }
+    return overrides.get(op, default)
+
+
+# SQLSTATE → failure kind (Postgres). SQLite only ever reports "database is locked".
+_PG_CODES = {
+    "40P01": "deadlock",
+    "40001": "serialization",
+    "55P03": "lock_timeout",        # lock_not_available — lock_timeout or NOWAIT
+    "57014": "statement_timeout",   # query_canceled
+}
+_RETRYABLE = {"deadlock", "serialization", "lock_timeout"}
+
+
+def classify_db_error(exc: Exception) -> Optional[str]:
+    """Map a driver error to a failure kind, or None if it is not a concurrency failure."""
+    if isinstance(exc, LockNotAvailable):
+        return "lock_timeout"
+    code = getattr(exc.orig, "pgcode", None)
+    if code in _PG_CODES:
+        return _PG_CODES[code]
+    if "database is locked" in str(exc.orig):
+        return "lock_timeout"
+    return None
+
+
+# ── Instrumentation ───────────────────────────────────────────────────────────
+
+@dataclass
+class TxnStats:
+    """What one @transactional call spent, filled in by lock helpers while it runs."""
+    op: str
+    started: float = field(default_factory=time.perf_counter)
+    lock_wait: float = 0.0
+    rows_locked: int = 0
+    retries: int = 0
+    hotels: set = field(default_factory=set)
+    rooms: set = field(default_factory=set)
+
+
+_active = threading.local()
+
+
+def current_stats() -> Optional[TxnStats]:
+    """The innermost @transactional call running on this thread, if any."""
+    stack = getattr(_active, "stack", None)
+    return stack[-1] if stack else None
+
+
+def record_lock(started: float, rows: int, rooms: Iterable[tuple[int, int]] = ()) -> None:
+    """
+    Charges a row-locking statement to the running transaction.
+
+    `started` is the perf_counter() taken just before the statement; `rooms` are
+    the (hotel_id, room_id) pairs it touched. A no-op outside @transactional.
+    """
+    stats = current_stats()
+    if stats is None:
+        return
+    stats.lock_wait += time.perf_counter() - started
+    stats.rows_locked += rows
+    for hotel_id, room_id in rooms:
+        stats.hotels.add(hotel_id)
+        stats.rooms.add(room_id)
+
+
+def _label(ids: set) -> str:
+    # One id, or "multi" for carts/batches — keeps series count bounded by hotels, not requests
+    if not ids:
+        return "none"
+    return str(next(iter(ids))) if len(ids) == 1 else "multi"
+
+
+def _finish(stats: TxnStats, outcome: str) -> None:
+    duration = time.perf_counter() - stats.started
+    labels = {"op": stats.op, "hotel": _label(stats.hotels)}
+    if settings.txn_metrics_room_label:
+        labels["room"] = _label(stats.rooms)
+    metrics.observe("txn_duration_seconds", duration, **labels)
+    metrics.observe("txn_lock_wait_seconds", stats.lock_wait, **labels)
+    metrics.observe("txn_rows_locked", stats.rows_locked, buckets=metrics.COUNT_BUCKETS, **labels)
+    metrics.observe("txn_retries", stats.retries, buckets=metrics.COUNT_BUCKETS, **labels)
+    if settings.slow_txn_log_ms and duration * 1000 >= settings.slow_txn_log_ms:
+        logger.warning("slow_txn %s", json.dumps({
+            "op": stats.op,
+            "outcome": outcome,
+            "duration_ms": round(duration * 1000, 1),
+            "lock_wait_ms": round(stats.lock_wait * 1000, 1),
+            "rows_locked": stats.rows_locked,
+            "retries": stats.retries,
+            "hotel_ids": sorted(stats.hotels)[:10],
+            "room_ids": sorted(stats.rooms)[:10],
+        }))
+
+
+def apply_timeouts(db: Session, op: str) -> None:
+    """SET LOCAL the operation's timeouts — they vanish at COMMIT/ROLLBACK."""
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    policy = _policy(op)
+    # SET does not take bind parameters — values are ints from settings, never user input
+    db.execute(text(f"SET LOCAL lock_timeout = '{int(policy.lock_timeout_ms)}ms'"))
+    db.execute(text(f"SET LOCAL statement_timeout = '{int(policy.statement_timeout_ms)}ms'"))
+
+
+def lock_inventory(db: Session, *criteria, op: str = None, skip_locked: bool = False) -> list[Inventory]:
+    """
+    SELECT ... FOR UPDATE over Inventory, always in (room_id, date) order — or,
+    with a non-row `lock_provider`, a lock per room (room_id order) and a plain
+    SELECT of the same rows.
+
+    Use this for every inventory row lock instead of an ad-hoc with_for_update(),
+    so all code paths agree on the lock order and the configured provider.
+    """
+    nowait = bool(op) and _policy(op).nowait and not skip_locked
+    provider = get_lock_provider()
+    started = time.perf_counter()
+    if provider.row_locks:
+        rows = db.execute(
+            select(Inventory)
+            .where(*criteria)
+            .order_by(Inventory.room_id, Inventory.date)
+            .with_for_update(nowait=nowait, skip_locked=skip_locked)
+        ).scalars().all()
+    else:
+        room_ids = db.execute(
+            select(Inventory.room_id).distinct().where(*criteria).order_by(Inventory.room_id)
+        ).scalars().all()
+        locked = provider.acquire(db, room_ids, nowait=nowait, skip_locked=skip_locked)
+        # Read after locking; populate_existing so rows loaded earlier are refreshed
+        rows = db.execute(
+            select(Inventory)
+            .where(*criteria, Inventory.room_id.in_(locked))
+            .order_by(Inventory.room_id, Inventory.date)
+            .execution_options(populate_existing=True)
+        ).scalars().all() if locked else []
+    record_lock(started, len(rows), {(inv.hotel_id, inv.room_id) for inv in rows})
+    return rows
+
+
+def lock_rooms(db: Session, room_ids: Iterable[int], op: str = None) -> None:
+    """
+    One lock per room, in room_id order, held until the transaction ends: the
+    Room row FOR UPDATE, or the configured provider's room lock.
+
+    For run-length inventory (app/reservation/segments.py), where a write splits
+    and merges segment rows, so no set of rows can be locked up front.
+    """
+    room_ids = sorted(set(room_ids))
+    if not room_ids:
+        return
+    nowait = bool(op) and _policy(op).nowait
+    provider = get_lock_provider()
+    started = time.perf_counter()
+    if provider.row_locks:
+        rooms = db.execute(
+            select(Room.hotel_id, Room.id).where(Room.id.in_(room_ids)).order_by(Room.id)
+            .with_for_update(nowait=nowait)
+        ).all()
+        record_lock(started, len(rooms), {(r.hotel_id, r.id) for r in rooms})
+    else:
+        record_lock(started, len(provider.acquire(db, room_ids, nowait=nowait)))
+
+
+def _backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff, in seconds."""
+    cap = settings.txn_retry_base_delay_ms * (2 ** (attempt - 1)) / 1000
+    return random.uniform(0, cap)
+
+
+def transactional(op: str):
+    """
+    Decorator for service functions that take `db` as first positional or keyword arg.
+
+    Example:
+        @transactional("init_booking")
+        def init_booking(db: Session, data: BookingRequest, current_user: User) -> Booking:
+            ...
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            db: Session = kwargs["db"] if "db" in kwargs else args[0]
+            policy = _policy(op)
+            stats = TxnStats(op)
+            stack = _active.__dict__.setdefault("stack", [])
+            stack.append(stats)
+            outcome = "error"
+            try:
+                for attempt in range(1, policy.max_attempts + 1):
+                    try:
+                        apply_timeouts(db, op)
+                        result = fn(*args, **kwargs)
+                        outcome = "ok"
+                        return result
+                    except HTTPException as exc:
+                        outcome = f"http_{exc.status_code}"
+                        raise
+                    except (DBAPIError, LockNotAvailable) as exc:
+                        db.rollback()
+                        kind = classify_db_error(exc)
+                        if kind is None:
+                            raise
+                        metrics.inc("txn_failures_total", op=op, kind=kind)
+                        if kind in _RETRYABLE and attempt < policy.max_attempts:
+                            metrics.inc("txn_retries_total", op=op, kind=kind)
+                            stats.retries += 1
+                            time.sleep(_backoff(attempt))
+                            continue
+                        logger.warning("%s gave up after %d attempt(s): %s", op, attempt, kind)
+                        outcome = kind
+                        if kind == "statement_timeout":
+                            raise HTTPException(503, "The server is busy, please retry shortly",
+                                                headers={"Retry-After": "1"})
+                        raise HTTPException(409, "These dates are being booked by someone else, please retry",
+                                            headers={"Retry-After": "1"})
+            finally:
+                stack.pop()
+                _finish(stats, outcome)
+        return wrapper
+    return decorator
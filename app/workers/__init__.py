@@ -0,0 +1,2 @@
+# Background workers — thin loops around service functions, started from main.py's lifespan.
+# Like routers, they hold no business logic: every tick opens a session and calls a service.
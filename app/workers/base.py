@@ -0,0 +1,36 @@
+import logging
+import random
+import threading
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicWorker(threading.Thread):
+    """
+    Daemon thread that calls `tick()` every `interval` seconds until stopped.
+
+    - The first tick is delayed by a random fraction of the interval so that
+      the 4 gunicorn workers booting together don't all sweep in lock-step.
+    - Exceptions are logged and swallowed — one bad tick must not kill the loop.
+    - stop() wakes the thread immediately instead of waiting out the interval.
+    """
+    def __init__(self, name: str, interval: float, tick: Callable[[], None]):
+        super().__init__(name=name, daemon=True)
+        self.interval = interval
+        self.tick = tick
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        if self._stopped.wait(random.uniform(0, self.interval)):
+            return
+        while not self._stopped.is_set():
+            try:
+                self.tick()
+            except Exception:
+                logger.exception("background worker %s failed", self.name)
+            self._stopped.wait(self.interval)
+
+    def stop(self, timeout: float = 5) -> None:
+        self._stopped.set()
+        self.join(timeout)
@@ -0,0 +1,29 @@
+from app.config import settings
+from app.database import SessionLocal
+from app.services import expiry_service, idempotency_service, webhook_service
+from app.workers.base import PeriodicWorker
+
+
+def run_once() -> int:
+    """Drain every expired hold, one batch per transaction. Returns holds reclaimed.
+
+    Also purges idempotency records and webhook de-duplication records past their
+    retention — same cadence, same worker.
+    """
+    total = 0
+    db = SessionLocal()
+    try:
+        while True:
+            reclaimed = expiry_service.sweep_expired_holds(db, settings.expiry_sweep_batch_size)
+            total += reclaimed
+            if reclaimed < settings.expiry_sweep_batch_size:
+                break
+        idempotency_service.purge_expired(db)
+        webhook_service.purge_processed(db)
+        return total
+    finally:
+        db.close()
+
+
+def build_worker() -> PeriodicWorker:
+    return PeriodicWorker("expiry-sweeper", settings.expiry_sweep_interval_seconds, run_once)
@@ -0,0 +1,22 @@
+from app.config import settings
+from app.database import SessionLocal
+from app.services import hold_service
+from app.workers.base import PeriodicWorker
+
+
+def run_once() -> int:
+    """Fold every confirmed ledger hold into book_count, one batch per transaction."""
+    total = 0
+    db = SessionLocal()
+    try:
+        while True:
+            compacted = hold_service.compact_confirmed_holds(db, settings.hold_compaction_batch_size)
+            total += compacted
+            if compacted < settings.hold_compaction_batch_size:
+                return total
+    finally:
+        db.close()
+
+
+def build_worker() -> PeriodicWorker:
+    return PeriodicWorker("hold-compactor", settings.hold_compaction_interval_seconds, run_once)
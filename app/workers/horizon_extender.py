@@ -0,0 +1,22 @@
+from app.config import settings
+from app.database import SessionLocal
+from app.services import inventory_service
+from app.workers.base import PeriodicWorker
+
+
+def run_once() -> int:
+    """Stock every active room `inventory_horizon_days` ahead, one batch of rooms per transaction."""
+    total = 0
+    db = SessionLocal()
+    try:
+        cursor = 0
+        while cursor is not None:
+            inserted, cursor = inventory_service.extend_horizon(db, after_room_id=cursor)
+            total += inserted
+        return total
+    finally:
+        db.close()
+
+
+def build_worker() -> PeriodicWorker:
+    return PeriodicWorker("horizon-extender", settings.inventory_horizon_interval_seconds, run_once)
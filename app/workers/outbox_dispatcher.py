@@ -0,0 +1,17 @@
+from app.config import settings
+from app.database import SessionLocal
+from app.services import outbox_service
+from app.workers.base import PeriodicWorker
+
+
+def run_once() -> int:
+    """Run every due outbox message. Returns how many completed."""
+    db = SessionLocal()
+    try:
+        return outbox_service.dispatch_due(db, settings.outbox_batch_size)
+    finally:
+        db.close()
+
+
+def build_worker() -> PeriodicWorker:
+    return PeriodicWorker("outbox-dispatcher", settings.outbox_poll_interval_seconds, run_once)
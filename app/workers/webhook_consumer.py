@@ -0,0 +1,23 @@
+from app.config import settings
+from app.database import SessionLocal
+from app.services import webhook_service
+from app.workers.base import PeriodicWorker
+
+
+def run_once() -> int:
+    """Drain the webhook event queue, one batch per transaction. Returns events consumed."""
+    total = 0
+    db = SessionLocal()
+    try:
+        while True:
+            handled = webhook_service.process_pending(db, settings.webhook_batch_size)
+            total += handled
+            if handled < settings.webhook_batch_size:
+                break
+        return total
+    finally:
+        db.close()
+
+
+def build_worker() -> PeriodicWorker:
+    return PeriodicWorker("webhook-consumer", settings.webhook_consume_interval_seconds, run_once)
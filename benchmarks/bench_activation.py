@@ -0,0 +1,73 @@
+"""
+Hotel activation — stocking every room of a freshly activated hotel.
+
+Compares, on the same rooms:
+
+  orm       one list of Inventory objects per room through bulk_save_objects
+            (how room creation used to do it)
+  set       inventory_service.init_inventory: one INSERT ... SELECT over a
+            generated date series for the whole hotel (what activate_hotel runs)
+
+    python -m benchmarks.bench_activation --rooms 200
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.bench_activation --rooms 200 --days 730
+"""
+import argparse
+import time
+from datetime import date, timedelta
+
+from benchmarks.common import make_engine, seed
+from sqlalchemy import delete, update
+from app.config import settings
+from app.models import Hotel, Inventory, Room
+from app.services import inventory_service
+
+
+def stock_orm(db, hotel_id: int, days: int) -> int:
+    hotel = db.get(Hotel, hotel_id)
+    today = date.today()
+    rows = 0
+    for room in db.query(Room).filter(Room.hotel_id == hotel_id):
+        batch = [
+            Inventory(hotel_id=hotel.id, room_id=room.id, date=today + timedelta(days=i),
+                      price=room.base_price, total_count=room.total_count, surge_factor=1,
+                      book_count=0, reserved_count=0, closed=False, city=hotel.city)
+            for i in range(days)
+        ]
+        db.bulk_save_objects(batch)
+        rows += len(batch)
+    db.commit()
+    return rows
+
+
+def stock_set(db, hotel_id: int, days: int) -> int:
+    settings.inventory_horizon_days = days
+    return inventory_service.init_inventory(db, Room.hotel_id == hotel_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, default=200)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    engine, Session = make_engine()
+    _, hotel_id, _ = seed(Session, rooms=args.rooms, days=0)
+    for label, stock in (("orm", stock_orm), ("set", stock_set)):
+        timings = []
+        for _ in range(args.repeat):
+            db = Session()
+            db.execute(delete(Inventory).where(Inventory.hotel_id == hotel_id))
+            db.execute(update(Hotel).where(Hotel.id == hotel_id).values(active=True))
+            db.commit()
+            start = time.perf_counter()
+            rows = stock(db, hotel_id, args.days)
+            timings.append(time.perf_counter() - start)
+            db.close()
+        best = min(timings)
+        print(f"{label:<6} rooms={args.rooms}  rows={rows}  best={best:.3f}s  rows_per_s={rows / best:,.0f}")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Inventory admin edits — closing or repricing a year of nights.
+
+Compares, on the same rooms:
+
+  orm       lock every row of the range through lock_inventory, set the field
+            on each ORM object and flush (how bulk_update used to do it)
+  set       inventory_service.bulk_update: one UPDATE ... RETURNING over all
+            the selected (room, night) pairs
+
+for a whole year (`range`) and for weekends only (`weekends`), one room at a
+time and all `--rooms` in one request.
+
+    python -m benchmarks.bench_bulk_update --rooms 50
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.bench_bulk_update --rooms 200
+"""
+import argparse
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+from benchmarks.common import make_engine, seed
+from app.models import Inventory
+from app.schemas.inventory import UpdateInventoryRequest
+from app.services import inventory_service
+from app.transactions import lock_inventory
+
+PATTERNS = {"range": None, "weekends": [6, 7]}
+
+
+def update_orm(db, room_ids: list[int], data: UpdateInventoryRequest) -> int:
+    rows = lock_inventory(db, Inventory.room_id.in_(room_ids),
+                          Inventory.date.between(data.start_date, data.end_date))
+    rows = [row for row in rows if data.weekdays is None or row.date.isoweekday() in data.weekdays]
+    for row in rows:
+        row.closed = data.closed
+    db.commit()
+    return len(rows)
+
+
+def update_set(db, room_ids: list[int], data: UpdateInventoryRequest, user) -> int:
+    return inventory_service.bulk_update(db, room_ids, data, user)["nights"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, default=50)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    engine, Session = make_engine()
+    user_id, _, room_ids = seed(Session, rooms=args.rooms, days=args.days)
+    user = SimpleNamespace(id=user_id)
+    today = date.today()
+    for pattern, weekdays in PATTERNS.items():
+        for batch in ("per-room", "all-rooms"):
+            groups = [[room_id] for room_id in room_ids] if batch == "per-room" else [room_ids]
+            for label in ("orm", "set"):
+                timings = []
+                for i in range(args.repeat):
+                    data = UpdateInventoryRequest(start_date=today, end_date=today + timedelta(days=args.days - 1),
+                                                  weekdays=weekdays, closed=i % 2 == 0)
+                    db = Session()
+                    start = time.perf_counter()
+                    nights = sum(update_orm(db, group, data) if label == "orm" else update_set(db, group, data, user)
+                                 for group in groups)
+                    timings.append(time.perf_counter() - start)
+                    db.close()
+                best = min(timings)
+                print(f"{pattern:<9} {batch:<10} {label:<4} nights={nights}  best={best:.3f}s  "
+                      f"nights_per_s={nights / best:,.0f}")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+Concurrency load test — thousands of mixed booking operations against the real
+service layer, then an audit of every inventory row.
+
+Each worker (a thread, optionally inside several processes) runs a random mix of
+
+  init     booking_service.init_booking for 1-2 rooms over 1-3 nights
+  confirm  a payment arriving for one of its own holds (booking_service.confirm_booking)
+  cancel   booking_service.cancel_booking of one of its own confirmed bookings
+  expire   back-dating one of its own holds and running expiry_service.sweep_expired_holds
+
+over a few small rooms and a short date window, so rooms sell out and are
+released all the time. Afterwards it checks, for every inventory night:
+
+  overbooked   book_count + reserved_count + live ledger holds > total_count
+  drift        that total differs from the rooms of the bookings that should
+               hold the night (RESERVED/GUESTS_ADDED/PAYMENTS_PENDING/CONFIRMED)
+
+and exits non-zero if either is found.
+
+    python -m benchmarks.bench_concurrency --threads 16 --ops 200
+    python -m benchmarks.bench_concurrency --processes 4 --threads 8 --modes atomic
+    python -m benchmarks.bench_concurrency --modes locking --lock-providers row local --deferred
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.bench_concurrency --lock-providers row advisory
+
+SQLite ignores FOR UPDATE, so by default every SQLite transaction starts with
+BEGIN IMMEDIATE (one writer at a time) as a stand-in. The audit then checks
+each strategy's accounting, but the latencies say nothing about row-lock
+contention — run against Postgres for that. With --deferred the stand-in is
+off: only `atomic`, whose guarded UPDATE needs no read lock, stays correct —
+unless the `local` lock provider (app/locks.py) serializes each room in-process.
+
+--lock-providers runs every mode once per provider (row / advisory / local) so
+their latencies can be compared; with several processes, `local` coordinates
+through lock files in a temporary room_lock_dir. On deferred SQLite a room
+lock holder can still queue on the database write lock held by a transaction
+waiting for that room; lock_timeout_ms breaks the cycle, which shows in p99.
+"""
+import argparse
+import multiprocessing
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from benchmarks.common import connect, make_engine, seed, summarize
+from fastapi import HTTPException
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import sessionmaker
+from app.config import settings
+from app.models.booking import Booking
+from app.models.enums import BookingStatusEnum
+from app.models.inventory import Inventory
+from app.models.inventory_segment import InventorySegment
+from app.reservation.ledger import live_holds_subquery
+from app.reservation.segments import expand
+from app.reservation.strategy import booking_nights
+from app.schemas.booking import BookingRequest
+from app.services import booking_service, expiry_service
+from app.services.expiry_service import HOLD_STATUSES
+
+MODES = ("locking", "atomic", "ledger", "segments")
+LOCK_PROVIDERS = ("row", "advisory", "local")
+OPS = ("init", "confirm", "cancel", "expire")
+WEIGHTS = (6, 2, 1, 1)
+
+
+# ── One worker thread ─────────────────────────────────────────────────────────
+
+def _init(db, ctx, rng) -> None:
+    check_in = date.today() + timedelta(days=rng.randrange(ctx.days - 3))
+    booking = booking_service.init_booking(db, BookingRequest(
+        hotel_id=ctx.hotel_id, room_id=rng.choice(ctx.room_ids),
+        check_in_date=check_in, check_out_date=check_in + timedelta(days=rng.randint(1, 2)),
+        rooms_count=rng.randint(1, 2),
+    ), ctx.user)
+    ctx.held.append(booking.id)
+
+
+def _confirm(db, ctx, rng) -> None:
+    booking_id = ctx.held.pop(rng.randrange(len(ctx.held)))
+    session_id = f"cs_load_{booking_id}"
+    db.execute(update(Booking)
+               .where(Booking.id == booking_id, Booking.booking_status.in_(HOLD_STATUSES))
+               .values(payment_session_id=session_id, booking_status=BookingStatusEnum.PAYMENTS_PENDING))
+    db.commit()
+    booking_service.confirm_booking(db, session_id)
+    ctx.confirmed.append(booking_id)
+
+
+def _cancel(db, ctx, rng) -> None:
+    booking_service.cancel_booking(db, ctx.confirmed.pop(rng.randrange(len(ctx.confirmed))), ctx.user)
+
+
+def _expire(db, ctx, rng) -> None:
+    booking_id = ctx.held.pop(rng.randrange(len(ctx.held)))
+    long_ago = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=1)
+    db.execute(update(Booking).where(Booking.id == booking_id).values(created_at=long_ago))
+    db.commit()
+    expiry_service.sweep_expired_holds(db, 50)
+
+
+_RUN = {"init": _init, "confirm": _confirm, "cancel": _cancel, "expire": _expire}
+
+
+def _pick(ctx, rng) -> str:
+    op = rng.choices(OPS, WEIGHTS)[0]
+    if op in ("confirm", "expire") and not ctx.held:
+        return "init"
+    if op == "cancel" and not ctx.confirmed:
+        return "init"
+    return op
+
+
+def _worker(Session, ids, ops: int, rng_seed: int, days: int, results: dict, lock: threading.Lock) -> None:
+    user_id, hotel_id, room_ids = ids
+    ctx = SimpleNamespace(user=SimpleNamespace(id=user_id), hotel_id=hotel_id, room_ids=room_ids,
+                          days=days, held=[], confirmed=[])
+    rng = random.Random(rng_seed)
+    latencies, outcomes = defaultdict(list), Counter()
+    db = Session()
+    try:
+        for _ in range(ops):
+            op = _pick(ctx, rng)
+            t0 = time.perf_counter()
+            try:
+                _RUN[op](db, ctx, rng)
+                outcome = "ok"
+            except HTTPException as exc:
+                db.rollback()
+                outcome = f"http_{exc.status_code}"
+            except Exception:
+                db.rollback()
+                outcome = "error"
+            latencies[op].append(time.perf_counter() - t0)
+            outcomes[(op, outcome)] += 1
+    finally:
+        db.close()
+    with lock:
+        for op, samples in latencies.items():
+            results["latencies"][op].extend(samples)
+        results["outcomes"].update(outcomes)
+
+
+def run_threads(Session, ids, threads: int, ops: int, days: int, seed_base: int = 0) -> dict:
+    """Runs `threads` workers of `ops` operations each. Returns latencies and outcome counts."""
+    results = {"latencies": defaultdict(list), "outcomes": Counter()}
+    lock = threading.Lock()
+    workers = [threading.Thread(target=_worker, args=(Session, ids, ops, seed_base + i, days, results, lock))
+               for i in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return results
+
+
+def _process_main(url: str, immediate: bool, mode: str, lock_provider: str, room_lock_dir: str, ids,
+                  threads: int, ops: int, days: int, seed_base: int) -> dict:
+    settings.reservation_mode = mode
+    settings.lock_provider = lock_provider
+    settings.room_lock_dir = room_lock_dir
+    settings.slow_txn_log_ms = 0
+    engine = connect(url, immediate)
+    try:
+        results = run_threads(sessionmaker(bind=engine, autocommit=False, autoflush=False),
+                              ids, threads, ops, days, seed_base)
+        return {"latencies": dict(results["latencies"]), "outcomes": dict(results["outcomes"])}
+    finally:
+        engine.dispose()
+
+
+def run(engine, Session, ids, mode: str, threads: int, ops: int, days: int,
+        processes: int = 1, immediate: bool = False, lock_provider: str = "row") -> tuple[dict, float]:
+    """The whole load: in this process, or split over `processes` child processes."""
+    settings.reservation_mode = mode
+    settings.lock_provider = lock_provider
+    start = time.perf_counter()
+    if processes <= 1:
+        results = run_threads(Session, ids, threads, ops, days)
+    else:
+        url = engine.url.render_as_string(hide_password=False)
+        lock_dir = settings.room_lock_dir or tempfile.mkdtemp(prefix="room_locks_")
+        with multiprocessing.get_context("spawn").Pool(processes) as pool:
+            parts = pool.starmap(_process_main, [
+                (url, immediate, mode, lock_provider, lock_dir, ids, threads, ops, days, p * threads)
+                for p in range(processes)
+            ])
+        results = {"latencies": defaultdict(list), "outcomes": Counter()}
+        for part in parts:
+            for op, samples in part["latencies"].items():
+                results["latencies"][op].extend(samples)
+            results["outcomes"].update(part["outcomes"])
+    return results, time.perf_counter() - start
+
+
+# ── Audit ─────────────────────────────────────────────────────────────────────
+
+def audit(Session, room_ids: list[int]) -> dict:
+    """Counts overbooked nights and nights whose counters drifted from the bookings."""
+    db = Session()
+    try:
+        start, end = date.today(), date.today() + timedelta(days=365)
+        held = live_holds_subquery(start, end)
+        rows = db.execute(
+            select(Inventory.room_id, Inventory.date, Inventory.total_count,
+                   (Inventory.book_count + Inventory.reserved_count
+                    + func.coalesce(held.c.held, 0)).label("taken"))
+            .outerjoin(held, (held.c.room_id == Inventory.room_id) & (held.c.date == Inventory.date))
+            .where(Inventory.room_id.in_(room_ids))
+        ).all()
+        # Run-length rooms: one row per night of each segment
+        rows += [SimpleNamespace(room_id=n.room_id, date=n.date, total_count=n.total_count,
+                                 taken=n.book_count + n.reserved_count)
+                 for n in expand(db.query(InventorySegment).filter(InventorySegment.room_id.in_(room_ids)).all())]
+
+        expected = Counter()
+        holding = (*HOLD_STATUSES, BookingStatusEnum.CONFIRMED)
+        for b in db.query(Booking).filter(Booking.room_id.in_(room_ids), Booking.booking_status.in_(holding)):
+            for night in booking_nights(b):
+                expected[(b.room_id, night)] += b.rooms_count
+        return {
+            "nights": len(rows),
+            "overbooked": sum(1 for r in rows if r.taken > r.total_count),
+            "drift": sum(1 for r in rows if r.taken != expected[(r.room_id, r.date)]),
+        }
+    finally:
+        db.close()
+
+
+def report(label: str, results: dict, elapsed: float, checks: dict) -> list[str]:
+    lines = []
+    everything = []
+    for op in OPS:
+        samples = results["latencies"].get(op, [])
+        everything += samples
+        outcomes = {k[1]: v for k, v in results["outcomes"].items() if k[0] == op}
+        lines.append(summarize(f"{label}:{op}", samples, elapsed,
+                               **{k: outcomes[k] for k in sorted(outcomes)}))
+    lines.append(summarize(f"{label}:all", everything, elapsed, **checks))
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8, help="worker threads per process")
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--ops", type=int, default=250, help="operations per thread")
+    parser.add_argument("--rooms", type=int, default=3)
+    parser.add_argument("--capacity", type=int, default=6, help="total_count of every room")
+    parser.add_argument("--days", type=int, default=10, help="date window the stays fall in")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    parser.add_argument("--lock-providers", nargs="+", default=["row"], choices=list(LOCK_PROVIDERS),
+                        help="run each mode under each lock provider (see app/locks.py)")
+    parser.add_argument("--deferred", action="store_true",
+                        help="SQLite only: plain deferred transactions (no stand-in for FOR UPDATE)")
+    args = parser.parse_args()
+    settings.slow_txn_log_ms = 0    # thousands of contended transactions would flood the output
+
+    failed = False
+    for mode in args.modes:
+        for provider in args.lock_providers:
+            engine, Session = make_engine(begin_immediate=not args.deferred)
+            ids = seed(Session, rooms=args.rooms, total_count=args.capacity, days=args.days,
+                       segments=mode == "segments")
+            results, elapsed = run(engine, Session, ids, mode, args.threads, args.ops, args.days,
+                                   args.processes, immediate=not args.deferred, lock_provider=provider)
+            checks = audit(Session, ids[2])
+            print("\n".join(report(f"{mode}/{provider}", results, elapsed, checks)))
+            errors = sum(n for (_, outcome), n in results["outcomes"].items() if outcome == "error")
+            failed |= bool(checks["overbooked"] or checks["drift"] or errors)
+            engine.dispose()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
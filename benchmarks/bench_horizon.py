@@ -0,0 +1,55 @@
+"""
+Rolling inventory horizon — how long inventory_service.extend_horizon takes to
+stock every active room, batch by batch.
+
+Three passes over the same rooms:
+
+  initial  rooms with no inventory at all: `--days` rows per room
+  daily    the next day's run: one new night per room (horizon + 1)
+  noop     nothing missing: only the anti-join runs
+
+    python -m benchmarks.bench_horizon --rooms 20000
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.bench_horizon --rooms 50000 --batch 1000
+"""
+import argparse
+import time
+
+from benchmarks.common import make_engine, seed, summarize
+from app.services import inventory_service
+
+
+def extend_all(Session, days: int, batch: int) -> tuple[list[float], int, float]:
+    """One full pass. Returns per-batch latencies, rows inserted and elapsed seconds."""
+    db = Session()
+    latencies, inserted, cursor = [], 0, 0
+    start = time.perf_counter()
+    try:
+        while cursor is not None:
+            t0 = time.perf_counter()
+            rows, cursor = inventory_service.extend_horizon(db, after_room_id=cursor,
+                                                            batch_size=batch, days=days)
+            latencies.append(time.perf_counter() - t0)
+            inserted += rows
+    finally:
+        db.close()
+    return latencies, inserted, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, default=10_000)
+    parser.add_argument("--days", type=int, default=365, help="horizon length")
+    parser.add_argument("--batch", type=int, default=500, help="rooms per transaction")
+    args = parser.parse_args()
+
+    engine, Session = make_engine()
+    seed(Session, rooms=args.rooms, days=0)
+    for label, days in (("initial", args.days), ("daily", args.days + 1), ("noop", args.days + 1)):
+        latencies, inserted, elapsed = extend_all(Session, days, args.batch)
+        print(summarize(label, latencies, elapsed, rows=inserted,
+                        rows_per_s=int(inserted / elapsed) if elapsed else 0, seconds=round(elapsed, 2)))
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
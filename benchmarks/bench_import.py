@@ -0,0 +1,85 @@
+"""
+Bulk import — POST /bookings/import vs. one /bookings/init per line.
+
+Builds an upload of `--lines` one-night, one-room bookings spread over `--rooms`
+rooms and reserves it twice on fresh databases:
+
+  per-line  booking_service.init_booking once per line (a lock pass, an
+            inventory write and a commit each — what a client looping over
+            /bookings/init costs, minus HTTP)
+  import    booking_import_service.import_bookings (one lock pass, one
+            batched inventory update and one commit per room)
+
+    python -m benchmarks.bench_import --lines 1000 --rooms 10
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.bench_import
+"""
+import argparse
+import json
+import time
+from datetime import date, timedelta
+
+from benchmarks.common import make_engine, seed
+from app.config import settings
+from app.models.user import User
+from app.schemas.booking import BookingRequest
+from app.services import booking_import_service, booking_service
+
+
+def _upload(hotel_id: int, room_ids: list[int], lines: int, days: int) -> list[str]:
+    out = []
+    for i in range(lines):
+        check_in = date.today() + timedelta(days=1 + (i // len(room_ids)) % (days - 2))
+        out.append(json.dumps({
+            "hotel_id": hotel_id, "room_id": room_ids[i % len(room_ids)],
+            "check_in_date": check_in.isoformat(),
+            "check_out_date": (check_in + timedelta(days=1)).isoformat(),
+            "rooms_count": 1,
+        }))
+    return out
+
+
+def per_line(Session, user_id, upload) -> int:
+    db = Session()
+    try:
+        user = db.get(User, user_id)
+        for line in upload:
+            booking_service.init_booking(db, BookingRequest.model_validate_json(line), user)
+        return len(upload)
+    finally:
+        db.close()
+
+
+def bulk(Session, user_id, upload) -> int:
+    db = Session()
+    try:
+        user = db.get(User, user_id)
+        items = list(booking_import_service.parse_lines(upload, "ndjson"))
+        results = list(booking_import_service.import_bookings(Session, items, user))
+        return sum(1 for r in results if r["status"] == "RESERVED")
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=1000)
+    parser.add_argument("--rooms", type=int, default=10)
+    parser.add_argument("--mode", default="atomic", choices=["locking", "atomic", "ledger"])
+    args = parser.parse_args()
+    settings.reservation_mode = args.mode
+
+    for label, fn in (("per-line", per_line), ("import", bulk)):
+        engine, Session = make_engine()
+        days = 60
+        user_id, hotel_id, room_ids = seed(Session, rooms=args.rooms, total_count=args.lines, days=days)
+        upload = _upload(hotel_id, room_ids, args.lines, days)
+        start = time.perf_counter()
+        reserved = fn(Session, user_id, upload)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<10}  lines={args.lines:<6} reserved={reserved:<6} "
+              f"elapsed={elapsed:7.3f}s  throughput={args.lines / elapsed:9.1f} lines/s")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
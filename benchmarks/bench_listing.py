@@ -0,0 +1,76 @@
+"""
+Manager inventory listing — one room's nights, loaded and encoded as JSON.
+
+  orm       every Inventory row as an ORM object, validated and dumped through
+            list[InventorySchema] (how GET /admin/inventory/rooms/{id} used to work)
+  rows      inventory_service.get_room_inventory (column select, date order)
+            through the same list[InventorySchema]
+  columns   get_room_inventory as parallel arrays (GET .../columns), encoded
+            without a model per night
+
+for the whole horizon (`all`) and for one month page (`month`: start/end
+filters plus limit).
+
+    python -m benchmarks.bench_listing --days 730
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.bench_listing --days 1095
+"""
+import argparse
+import json
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+from benchmarks.common import make_engine, seed
+from pydantic import TypeAdapter
+from app.database import get_all
+from app.models import Inventory
+from app.schemas.inventory import InventorySchema
+from app.services import inventory_service
+
+ROWS = TypeAdapter(list[InventorySchema])
+
+
+def list_orm(db, user, room_id: int, **_) -> bytes:
+    rows = get_all(db, Inventory, room_id=room_id)
+    return ROWS.dump_json(ROWS.validate_python(rows))
+
+
+def list_rows(db, user, room_id: int, **page) -> bytes:
+    rows, _ = inventory_service.get_room_inventory(db, room_id, user, **page)
+    return ROWS.dump_json(ROWS.validate_python(rows))
+
+
+def list_columns(db, user, room_id: int, **page) -> bytes:
+    rows, next_after = inventory_service.get_room_inventory(db, room_id, user, **page)
+    return json.dumps(inventory_service.inventory_columns(rows, next_after)).encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=730, help="nights stocked for the room")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    engine, Session = make_engine()
+    user_id, _, room_ids = seed(Session, rooms=1, days=args.days)
+    user = SimpleNamespace(id=user_id)
+    month = date.today() + timedelta(days=60)
+    pages = {"all": {}, "month": {"start_date": month, "end_date": month + timedelta(days=30), "limit": 31}}
+    for page, params in pages.items():
+        for label, listing in (("orm", list_orm), ("rows", list_rows), ("columns", list_columns)):
+            if label == "orm" and page == "month":
+                continue                      # the old endpoint had no filters
+            timings = []
+            db = Session()
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                body = listing(db, user, room_ids[0], **params)
+                timings.append(time.perf_counter() - start)
+                db.expunge_all()
+            db.close()
+            print(f"{page:<6} {label:<8} bytes={len(body):>8,}  best={min(timings) * 1000:7.2f}ms")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
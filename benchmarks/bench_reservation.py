@@ -0,0 +1,123 @@
+"""
+Reservation strategies — throughput and latency of /bookings/init under contention.
+
+Every worker thread repeatedly books 1 room for the SAME 3-night stay on the
+SAME room, which is the flash-sale worst case. Capacity is sized so the room
+never sells out and every attempt exercises the full write path
+(hold + Booking insert + commit), exactly as booking_service.init_booking does.
+
+    python -m benchmarks.bench_reservation --threads 16 --ops 200
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.bench_reservation
+
+On Postgres the latency gap between modes is lock-wait time: `locking` holds
+row locks from the SELECT until commit, `atomic` only for one UPDATE, and
+`ledger` locks without rewriting the Inventory rows at all.
+
+After each run the script checks that no night was overbooked
+(book_count + reserved_count + live ledger holds <= total_count). On SQLite,
+FOR UPDATE is a no-op, so the locking path can lose updates there — that is
+the read-modify-write window the atomic path closes.
+"""
+import argparse
+import threading
+import time
+from datetime import date, timedelta
+
+from benchmarks.common import make_engine, seed, summarize
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from app.models.booking import Booking
+from app.models.enums import BookingStatusEnum
+from app.models.inventory import Inventory
+from app.reservation.atomic import AtomicReservation
+from app.reservation.ledger import LedgerReservation, live_holds_subquery
+from app.reservation.locking import LockingReservation
+
+STRATEGIES = {
+    "locking": LockingReservation,
+    "atomic":  AtomicReservation,
+    "ledger":  LedgerReservation,
+}
+
+
+def run(strategy, Session, ids, threads: int, ops: int):
+    user_id, hotel_id, (room_id,) = ids
+    check_in = date.today() + timedelta(days=5)
+    check_out = check_in + timedelta(days=2)
+    latencies, rejected, errors = [], [0], [0]
+    lock = threading.Lock()
+
+    def worker():
+        db = Session()
+        try:
+            for _ in range(ops):
+                t0 = time.perf_counter()
+                booking = Booking(hotel_id=hotel_id, room_id=room_id, user_id=user_id, rooms_count=1,
+                                  check_in_date=check_in, check_out_date=check_out,
+                                  booking_status=BookingStatusEnum.RESERVED, amount=0)
+                try:
+                    strategy.reserve(db, booking)
+                    db.add(booking)
+                    db.commit()
+                except HTTPException:
+                    db.rollback()
+                    with lock:
+                        rejected[0] += 1
+                    continue
+                except Exception:
+                    db.rollback()
+                    with lock:
+                        errors[0] += 1
+                    continue
+                elapsed = time.perf_counter() - t0
+                with lock:
+                    latencies.append(elapsed)
+        finally:
+            db.close()
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return latencies, time.perf_counter() - start, rejected[0], errors[0]
+
+
+def overbooked_rows(Session, room_id) -> int:
+    """Nights where confirmed + held rooms exceed capacity — must always be 0."""
+    db = Session()
+    try:
+        start, end = date.today(), date.today() + timedelta(days=365)
+        held = live_holds_subquery(start, end, room_id)
+        return db.execute(
+            select(func.count()).select_from(Inventory)
+            .outerjoin(held, held.c.date == Inventory.date)
+            .where(
+                Inventory.room_id == room_id,
+                Inventory.book_count + Inventory.reserved_count + func.coalesce(held.c.held, 0)
+                > Inventory.total_count,
+            )
+        ).scalar()
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=100, help="reservations per thread")
+    parser.add_argument("--modes", nargs="+", default=list(STRATEGIES), choices=list(STRATEGIES))
+    args = parser.parse_args()
+
+    for label in args.modes:
+        engine, Session = make_engine()
+        ids = seed(Session, rooms=1, total_count=args.threads * args.ops)
+        latencies, elapsed, rejected, errors = run(STRATEGIES[label](), Session, ids, args.threads, args.ops)
+        print(summarize(label, latencies, elapsed, rejected=rejected, errors=errors,
+                        overbooked_rows=overbooked_rows(Session, ids[2][0])))
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
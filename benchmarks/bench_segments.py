@@ -0,0 +1,132 @@
+"""
+Per-night Inventory rows vs run-length inventory_segment rows
+(RESERVATION_MODE=atomic vs segments) on the same hotels.
+
+For each layout, on its own fresh database:
+
+  stock    hotels x rooms stocked `--days` ahead (inventory_service.init_inventory)
+  size     inventory rows, and the database size on disk
+  search   hotel_service.search_hotels over random 1-7 night ranges
+  book     booking_service.init_booking of 1-2 rooms over 1-3 random nights
+
+and after the bookings, how many rows the layout holds.
+
+    python -m benchmarks.bench_segments --hotels 100 --rooms 100
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.bench_segments --hotels 100 --rooms 100
+"""
+import argparse
+import os
+import random
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+from benchmarks.common import make_engine, seed, summarize
+from fastapi import HTTPException
+from sqlalchemy import func, select, text
+from app.config import settings
+from app.models import Hotel, Inventory
+from app.models.inventory_segment import InventorySegment
+from app.schemas.booking import BookingRequest, HotelSearchRequest
+from app.services import booking_service, hotel_service, inventory_service
+
+LAYOUTS = {"daily": ("atomic", Inventory), "segments": ("segments", InventorySegment)}
+
+
+def disk_bytes(engine) -> int:
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as conn:
+            return conn.execute(text("SELECT pg_database_size(current_database())")).scalar()
+    with engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")   # count pages still in the WAL too
+    return os.path.getsize(engine.url.database)
+
+
+def stock(Session, hotels: int, rooms: int, days: int) -> tuple[list, float]:
+    """Seeds the hotels without inventory, then stocks them all. Returns [(user, hotel, rooms)] and seconds."""
+    ids = [seed(Session, rooms=rooms, days=0) for _ in range(hotels)]
+    settings.inventory_horizon_days = days
+    db = Session()
+    try:
+        started = time.perf_counter()
+        inventory_service.init_inventory(db, Hotel.active == True)
+        return ids, time.perf_counter() - started
+    finally:
+        db.close()
+
+
+def search(Session, ops: int, days: int, rng) -> list[float]:
+    latencies = []
+    db = Session()
+    try:
+        for _ in range(ops):
+            start = date.today() + timedelta(days=rng.randrange(days - 7))
+            request = HotelSearchRequest(city="Bench City", start_date=start,
+                                         end_date=start + timedelta(days=rng.randint(1, 7)),
+                                         rooms_count=rng.randint(1, 3), page=1, size=10)
+            t0 = time.perf_counter()
+            hotel_service.search_hotels(db, request)
+            latencies.append(time.perf_counter() - t0)
+            db.rollback()
+    finally:
+        db.close()
+    return latencies
+
+
+def book(Session, ids, ops: int, days: int, rng) -> tuple[list[float], int]:
+    latencies, rejected = [], 0
+    db = Session()
+    try:
+        for _ in range(ops):
+            user_id, hotel_id, room_ids = rng.choice(ids)
+            check_in = date.today() + timedelta(days=rng.randrange(days - 3))
+            request = BookingRequest(hotel_id=hotel_id, room_id=rng.choice(room_ids), check_in_date=check_in,
+                                     check_out_date=check_in + timedelta(days=rng.randint(1, 2)),
+                                     rooms_count=rng.randint(1, 2))
+            t0 = time.perf_counter()
+            try:
+                booking_service.init_booking(db, request, SimpleNamespace(id=user_id))
+            except HTTPException:
+                db.rollback()
+                rejected += 1
+            latencies.append(time.perf_counter() - t0)
+    finally:
+        db.close()
+    return latencies, rejected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hotels", type=int, default=100)
+    parser.add_argument("--rooms", type=int, default=100, help="rooms per hotel")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--searches", type=int, default=50)
+    parser.add_argument("--bookings", type=int, default=500)
+    parser.add_argument("--layouts", nargs="+", default=list(LAYOUTS), choices=list(LAYOUTS))
+    args = parser.parse_args()
+    settings.slow_txn_log_ms = 0
+
+    for layout in args.layouts:
+        mode, model = LAYOUTS[layout]
+        settings.reservation_mode = mode
+        engine, Session = make_engine()
+        ids, stock_seconds = stock(Session, args.hotels, args.rooms, args.days)
+        db = Session()
+        rows = db.scalar(select(func.count()).select_from(model))
+        db.close()
+        print(f"{layout:<9} rooms={args.hotels * args.rooms}  rows={rows}  "
+              f"disk={disk_bytes(engine) / 2**20:.1f}MiB  stock={stock_seconds:.2f}s")
+
+        rng = random.Random(1)
+        searches = search(Session, args.searches, args.days, rng)
+        print(summarize(f"{layout}:search", searches, sum(searches)))
+        bookings, rejected = book(Session, ids, args.bookings, args.days, rng)
+        db = Session()
+        rows = db.scalar(select(func.count()).select_from(model))
+        db.close()
+        print(summarize(f"{layout}:book", bookings, sum(bookings), rejected=rejected, rows_after=rows))
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
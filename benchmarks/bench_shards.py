@@ -0,0 +1,114 @@
+"""
+Sharded counters — /bookings/init throughput on ONE hot night vs. shard count.
+
+Every thread books 1 room for the same single night of the same room. With
+`--shards 0` the night is a plain Inventory row (every hold updates that one
+row); with N > 0 its capacity is split over N InventoryShard rows and each hold
+claims a random one.
+
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.bench_shards --threads 32 --shards 0 1 4 16
+
+Row-level contention only exists on Postgres. SQLite takes a database-wide
+write lock per transaction, so there the numbers stay flat whatever the shard
+count — run it against Postgres to see the scaling.
+"""
+import argparse
+import threading
+import time
+from datetime import date, timedelta
+
+from benchmarks.common import make_engine, seed, summarize
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from app.models.booking import Booking
+from app.models.enums import BookingStatusEnum
+from app.models.inventory import Inventory
+from app.models.inventory_shard import InventoryShard
+from app.reservation import sharding
+from app.reservation.atomic import AtomicReservation
+from app.transactions import lock_inventory
+
+
+def run(Session, ids, night: date, threads: int, ops: int):
+    user_id, hotel_id, (room_id,) = ids
+    strategy = AtomicReservation()
+    latencies, rejected, errors = [], [0], [0]
+    lock = threading.Lock()
+
+    def worker():
+        db = Session()
+        try:
+            for _ in range(ops):
+                t0 = time.perf_counter()
+                booking = Booking(hotel_id=hotel_id, room_id=room_id, user_id=user_id, rooms_count=1,
+                                  check_in_date=night, check_out_date=night,
+                                  booking_status=BookingStatusEnum.RESERVED, amount=0)
+                try:
+                    strategy.reserve(db, booking)
+                    db.add(booking)
+                    db.commit()
+                except HTTPException:
+                    db.rollback()
+                    with lock:
+                        rejected[0] += 1
+                    continue
+                except Exception:
+                    db.rollback()
+                    with lock:
+                        errors[0] += 1
+                    continue
+                with lock:
+                    latencies.append(time.perf_counter() - t0)
+        finally:
+            db.close()
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return latencies, time.perf_counter() - start, rejected[0], errors[0]
+
+
+def oversold(Session, room_id: int, night: date) -> int:
+    """Rooms held beyond the night's capacity — must always be 0."""
+    db = Session()
+    try:
+        inv = db.execute(select(Inventory).where(Inventory.room_id == room_id, Inventory.date == night)).scalar_one()
+        over_shards = db.execute(
+            select(func.coalesce(func.sum(InventoryShard.claimed - InventoryShard.capacity), 0))
+            .where(InventoryShard.room_id == room_id, InventoryShard.date == night,
+                   InventoryShard.claimed > InventoryShard.capacity)
+        ).scalar()
+        return max(0, inv.book_count + inv.reserved_count - inv.total_count) + over_shards
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--ops", type=int, default=50, help="reservations per thread")
+    parser.add_argument("--shards", type=int, nargs="+", default=[0, 1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    night = date.today() + timedelta(days=3)
+    for shards in args.shards:
+        engine, Session = make_engine()
+        ids = seed(Session, rooms=1, total_count=args.threads * args.ops, days=7)
+        room_id = ids[2][0]
+        if shards:
+            db = Session()
+            rows = lock_inventory(db, Inventory.room_id == room_id, Inventory.date == night)
+            sharding.shard_nights(db, rows, shards)
+            db.commit()
+            db.close()
+        latencies, elapsed, rejected, errors = run(Session, ids, night, args.threads, args.ops)
+        print(summarize(f"shards={shards}", latencies, elapsed, rejected=rejected, errors=errors,
+                        oversold=oversold(Session, room_id, night)))
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,9 @@
+import os
 import pytest
+
+# Background workers would poll the real DATABASE_URL — keep them off under test
+os.environ.setdefault("RUN_BACKGROUND_WORKERS", "false")
+
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine, BigInteger
 from sqlalchemy.ext.compiler import compiles
@@ -0,0 +1,126 @@
+"""
+Per-room admission gate in front of /bookings/init: sold-out fast path,
+bounded queue, and forgetting sold-out ranges when rooms come back.
+"""
+import threading
+from datetime import date, timedelta
+import pytest
+from fastapi import HTTPException
+from app import admission
+from app.config import settings
+
+
+def _future(days: int) -> date:
+    return date.today() + timedelta(days=days)
+
+
+def _init(client, headers, active_hotel, day: int, nights: int, rooms_count: int):
+    return client.post("/bookings/init", headers=headers, json={
+        "hotel_id": active_hotel["hotel"]["id"],
+        "room_id": active_hotel["room"]["id"],
+        "check_in_date": _future(day).isoformat(),
+        "check_out_date": _future(day + nights).isoformat(),
+        "rooms_count": rooms_count,
+    })
+
+
+def test_sold_out_range_is_rejected_without_a_transaction(client, db, guest_headers, active_hotel, monkeypatch):
+    monkeypatch.setattr(settings, "admission_sold_out_ttl_seconds", 60)
+    room_id = active_hotel["room"]["id"]
+    assert _init(client, guest_headers, active_hotel, 320, 1, 5).status_code == 201
+    assert _init(client, guest_headers, active_hotel, 320, 1, 1).status_code == 400
+
+    # A wider, bigger request can't fit either — the gate answers without calling the service
+    calls = []
+
+    def create_booking(*args, **kwargs):
+        calls.append(args)
+        raise HTTPException(400, "still sold out")
+
+    monkeypatch.setattr("app.services.booking_service._create_booking", create_booking)
+    r = _init(client, guest_headers, active_hotel, 319, 3, 2)
+    assert r.status_code == 400
+    assert r.json()["detail"] == f"Room {room_id} not available for the selected dates"
+    assert calls == []
+
+    # Releasing the room forgets what we knew about it
+    admission.rooms_released([room_id])
+    assert _init(client, guest_headers, active_hotel, 319, 3, 2).json()["detail"] == "still sold out"
+    assert len(calls) == 1
+
+
+def test_other_400s_are_not_remembered_as_sold_out(client, db, guest_headers, active_hotel, monkeypatch):
+    monkeypatch.setattr(settings, "admission_sold_out_ttl_seconds", 60)
+    calls = []
+
+    def create_booking(*args, **kwargs):
+        calls.append(args)
+        raise HTTPException(400, "Dates are outside the bookable range")
+
+    monkeypatch.setattr("app.services.booking_service._create_booking", create_booking)
+    for _ in range(2):
+        r = _init(client, guest_headers, active_hotel, 325, 1, 1)
+        assert r.json()["detail"] == "Dates are outside the bookable range"
+    assert len(calls) == 2
+
+
+def test_full_queue_answers_429(db, monkeypatch):
+    monkeypatch.setattr(settings, "admission_max_inflight", 1)
+    monkeypatch.setattr(settings, "admission_queue_size", 1)
+    monkeypatch.setattr(settings, "admission_wait_seconds", 5)
+    room_id, ci, co = 987_654, _future(321), _future(322)
+
+    inside, release = threading.Event(), threading.Event()
+    outcomes = []
+
+    def holder():
+        with admission.admit(db, room_id, ci, co, 1):
+            inside.set()
+            release.wait(5)
+
+    def waiter():
+        try:
+            with admission.admit(db, room_id, ci, co, 1):
+                outcomes.append("admitted")
+        except HTTPException as exc:
+            outcomes.append(exc.status_code)
+
+    first = threading.Thread(target=holder)
+    first.start()
+    assert inside.wait(5)
+    second = threading.Thread(target=waiter)
+    second.start()
+    while admission._gates[room_id].waiting == 0:
+        threading.Event().wait(0.01)
+
+    with pytest.raises(HTTPException) as exc:
+        with admission.admit(db, room_id, ci, co, 1):
+            pass
+    assert exc.value.status_code == 429
+    assert exc.value.headers["Retry-After"] == "1"
+
+    release.set()
+    first.join(5)
+    second.join(5)
+    assert outcomes == ["admitted"]
+    assert room_id not in admission._gates
+
+
+def test_gate_times_out_with_429(db, monkeypatch):
+    monkeypatch.setattr(settings, "admission_max_inflight", 1)
+    monkeypatch.setattr(settings, "admission_wait_seconds", 0.05)
+    room_id, ci, co = 987_655, _future(323), _future(324)
+    outcomes = []
+
+    def waiter():
+        try:
+            with admission.admit(db, room_id, ci, co, 1):
+                outcomes.append("admitted")
+        except HTTPException as exc:
+            outcomes.append(exc.status_code)
+
+    with admission.admit(db, room_id, ci, co, 1):
+        t = threading.Thread(target=waiter)
+        t.start()
+        t.join(5)
+    assert outcomes == [429]
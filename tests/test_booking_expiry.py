@@ -0,0 +1,67 @@
+"""
+Expiry sweeper — abandoned holds give their reserved_count back.
+"""
+from datetime import date, datetime, timedelta, timezone
+from app import metrics
+from app.config import settings
+from app.models.booking import Booking
+from app.models.enums import BookingStatusEnum
+from app.models.inventory import Inventory
+from app.services import expiry_service
+
+
+def _init(client, headers, active_hotel, offset: int, rooms_count: int = 1) -> int:
+    check_in = date.today() + timedelta(days=offset)
+    r = client.post("/bookings/init", headers=headers, json={
+        "hotel_id": active_hotel["hotel"]["id"],
+        "room_id": active_hotel["room"]["id"],
+        "check_in_date": check_in.isoformat(),
+        "check_out_date": (check_in + timedelta(days=1)).isoformat(),
+        "rooms_count": rooms_count,
+    })
+    assert r.status_code == 201
+    return r.json()["id"]
+
+
+def _age(db, booking_id: int, minutes: int) -> None:
+    booking = db.get(Booking, booking_id)
+    booking.created_at = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(minutes=minutes)
+    db.commit()
+
+
+def test_sweep_releases_only_expired_holds(client, db, guest_headers, active_hotel, monkeypatch):
+    monkeypatch.setattr(settings, "reservation_mode", "atomic")
+    room_id = active_hotel["room"]["id"]
+    stale = _init(client, guest_headers, active_hotel, offset=200, rooms_count=2)
+    fresh = _init(client, guest_headers, active_hotel, offset=200, rooms_count=1)
+    _age(db, stale, minutes=settings.booking_hold_minutes + 1)
+    before = metrics.get("booking_holds_reclaimed_total")
+
+    assert expiry_service.sweep_expired_holds(db) >= 1
+
+    db.expire_all()
+    assert db.get(Booking, stale).booking_status == BookingStatusEnum.EXPIRED
+    assert db.get(Booking, fresh).booking_status == BookingStatusEnum.RESERVED
+    held = [inv.reserved_count for inv in db.query(Inventory).filter(
+        Inventory.room_id == room_id,
+        Inventory.date.between(date.today() + timedelta(days=200), date.today() + timedelta(days=201)),
+    )]
+    assert held == [1, 1]   # only the fresh booking's hold remains
+    assert metrics.get("booking_holds_reclaimed_total") >= before + 1
+
+
+def test_sweep_is_idempotent(client, db, guest_headers, active_hotel, monkeypatch):
+    """A second sweep (e.g. another gunicorn worker) must not release the same hold again."""
+    monkeypatch.setattr(settings, "reservation_mode", "atomic")
+    booking_id = _init(client, guest_headers, active_hotel, offset=210)
+    _age(db, booking_id, minutes=settings.booking_hold_minutes + 1)
+
+    expiry_service.sweep_expired_holds(db)
+    assert expiry_service.sweep_expired_holds(db) == 0
+
+
+def test_metrics_endpoint_exposes_sweep_counters(client):
+    metrics.inc("booking_holds_reclaimed_total", 0)
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert "booking_holds_reclaimed_total" in r.text
@@ -0,0 +1,121 @@
+"""
+Bulk booking import — per-line results streamed back as NDJSON.
+"""
+import json
+from datetime import date, timedelta
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from app import database
+from app.config import settings
+from app.models.booking import Booking
+from app.models.inventory import Inventory
+from app.reservation import reservation_service
+
+
+@pytest.fixture(autouse=True)
+def import_sessions(db, monkeypatch):
+    """The import opens its own sessions — on the test database."""
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=db.get_bind()))
+
+
+def _future(days: int) -> date:
+    return date.today() + timedelta(days=days)
+
+
+def _record(active_hotel, check_in: date, rooms_count: int) -> dict:
+    return {
+        "hotel_id": active_hotel["hotel"]["id"],
+        "room_id": active_hotel["room"]["id"],
+        "check_in_date": check_in.isoformat(),
+        "check_out_date": (check_in + timedelta(days=1)).isoformat(),
+        "rooms_count": rooms_count,
+    }
+
+
+def _results(response) -> dict:
+    return {r["line"]: r for r in map(json.loads, response.text.splitlines())}
+
+
+@pytest.mark.parametrize("mode", ["locking", "atomic", "ledger"])
+def test_import_reserves_what_fits(client, db, guest_headers, active_hotel, monkeypatch, mode):
+    monkeypatch.setattr(settings, "reservation_mode", mode)
+    body = "\n".join([
+        json.dumps(_record(active_hotel, _future(290), 3)),
+        json.dumps(_record(active_hotel, _future(290), 3)),   # only 2 of 5 rooms left
+        "",
+        json.dumps(_record(active_hotel, _future(290), 2)),
+        "{not json",
+        json.dumps({**_record(active_hotel, _future(290), 1), "room_id": 10**6}),
+    ])
+
+    r = client.post("/bookings/import", headers=guest_headers, content=body)
+
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    results = _results(r)
+    assert {n: res["status"] for n, res in results.items()} == {
+        1: "RESERVED", 2: "REJECTED", 4: "RESERVED", 5: "INVALID", 6: "INVALID",
+    }
+    ids = [results[1]["booking_id"], results[4]["booking_id"]]
+    assert [db.get(Booking, i).rooms_count for i in ids] == [3, 2]
+
+
+def test_import_accepts_csv(client, db, guest_headers, active_hotel, monkeypatch):
+    monkeypatch.setattr(settings, "reservation_mode", "atomic")
+    rec = _record(active_hotel, _future(295), 2)
+    body = ",".join(rec) + "\n" + ",".join(str(v) for v in rec.values()) + "\n"
+
+    r = client.post("/bookings/import", headers={**guest_headers, "Content-Type": "text/csv"}, content=body)
+
+    assert _results(r)[2]["status"] == "RESERVED"
+    db.expire_all()
+    inv = db.query(Inventory).filter(Inventory.room_id == rec["room_id"],
+                                     Inventory.date == _future(295)).one()
+    assert inv.reserved_count == 2
+
+
+def test_import_rejects_oversized_upload(client, guest_headers, active_hotel, monkeypatch):
+    monkeypatch.setattr(settings, "booking_import_max_lines", 2)
+    body = "\n".join(json.dumps(_record(active_hotel, _future(298), 1)) for _ in range(4))
+
+    r = client.post("/bookings/import", headers=guest_headers, content=body)
+
+    assert r.status_code == 413
+
+
+@pytest.mark.parametrize("fmt", ["ndjson", "csv"])
+def test_import_limit_is_exact(client, guest_headers, active_hotel, monkeypatch, fmt):
+    monkeypatch.setattr(settings, "booking_import_max_lines", 2)
+    monkeypatch.setattr(settings, "reservation_mode", "atomic")
+    rec = _record(active_hotel, _future(297), 1)
+    if fmt == "csv":
+        headers = {**guest_headers, "Content-Type": "text/csv"}
+        line, header = ",".join(str(v) for v in rec.values()), [",".join(rec)]
+    else:
+        headers, line, header = guest_headers, json.dumps(rec), []
+
+    r = client.post("/bookings/import", headers=headers, content="\n".join(header + [line] * 2))
+    assert r.status_code == 200
+    assert len(_results(r)) == 2
+    r = client.post("/bookings/import", headers=headers, content="\n".join(header + [line] * 3))
+    assert r.status_code == 413
+
+
+def test_database_error_fails_only_its_room(client, db, guest_headers, active_hotel, monkeypatch):
+    monkeypatch.setattr(settings, "reservation_mode", "atomic")
+    strategy = reservation_service.get_reservation_strategy()
+
+    def broken(self, db, bookings):
+        raise OperationalError("UPDATE Inventory", {}, Exception("disk I/O error"))
+
+    monkeypatch.setattr(type(strategy), "reserve_available", broken)
+    body = "\n".join([json.dumps(_record(active_hotel, _future(299), 1)),
+                      json.dumps({**_record(active_hotel, _future(299), 1), "hotel_id": 10**6})])
+
+    r = client.post("/bookings/import", headers=guest_headers, content=body)
+
+    assert r.status_code == 200
+    results = _results(r)
+    assert (results[1]["status"], results[1]["error"]) == ("FAILED", "Database error: OperationalError")
+    assert results[2]["status"] == "INVALID"
@@ -0,0 +1,198 @@
+"""
+Booking modification — PATCH /bookings/{id} moves only the nights whose room
+count changes, reprices only those, and settles a paid booking's difference
+through the outbox.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import func, select
+from app.config import settings
+from app.models.booking import Booking
+from app.models.inventory import Inventory
+from app.models.outbox import OutboxMessage
+from app.reservation import counter, ledger
+from app.reservation.ledger import live_holds_subquery
+from app.services import booking_service, outbox_service
+
+
+def _future(days: int) -> date:
+    return date.today() + timedelta(days=days)
+
+
+def _book(client, headers, active_hotel, first: int, last: int, rooms_count: int) -> dict:
+    r = client.post("/bookings/init", headers=headers, json={
+        "hotel_id": active_hotel["hotel"]["id"],
+        "room_id": active_hotel["room"]["id"],
+        "check_in_date": _future(first).isoformat(),
+        "check_out_date": _future(last).isoformat(),
+        "rooms_count": rooms_count,
+    })
+    assert r.status_code == 201, r.text
+    return r.json()
+
+
+def _taken(db, room_id: int, first: int, last: int) -> list[int]:
+    """book_count + reserved_count + live ledger holds per night."""
+    db.expire_all()
+    held = live_holds_subquery(_future(first), _future(last), room_id=room_id)
+    return [n for (n,) in db.execute(
+        select(Inventory.book_count + Inventory.reserved_count + func.coalesce(held.c.held, 0))
+        .outerjoin(held, held.c.date == Inventory.date)
+        .where(Inventory.room_id == room_id, Inventory.date.between(_future(first), _future(last)))
+        .order_by(Inventory.date)
+    ).all()]
+
+
+@pytest.fixture
+def locked_nights(monkeypatch):
+    """Records the inventory dates every strategy lock_inventory() call returns."""
+    seen = []
+    for module in (counter, ledger):
+        original = module.lock_inventory
+
+        def spy(*args, _original=original, **kwargs):
+            rows = _original(*args, **kwargs)
+            seen.append([inv.date for inv in rows])
+            return rows
+        monkeypatch.setattr(module, "lock_inventory", spy)
+    return seen
+
+
+@pytest.mark.parametrize("mode,day", [("atomic", 355), ("ledger", 360)])
+def test_modify_locks_and_prices_only_changed_nights(client, db, guest_headers, active_hotel,
+                                                     locked_nights, monkeypatch, mode, day):
+    monkeypatch.setattr(settings, "reservation_mode", mode)
+    room_id = active_hotel["room"]["id"]
+    booking = _book(client, guest_headers, active_hotel, day, day + 1, 1)
+
+    # Extend by one night: one row locked, the kept nights keep their price
+    r = client.patch(f"/bookings/{booking['id']}", headers=guest_headers,
+                     json={"check_out_date": _future(day + 2).isoformat()})
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert locked_nights[-1] == [_future(day + 2)]
+    assert body["booking"]["check_out_date"] == _future(day + 2).isoformat()
+    added = Decimal(body["amount_difference"])
+    assert added > 0
+    assert Decimal(body["booking"]["amount"]) == Decimal(booking["amount"]) + added
+    assert body["payment_url"] is None
+    assert _taken(db, room_id, day, day + 2) == [1, 1, 1]
+
+    # Drop the first night and take 2 rooms: first night released, the others +1
+    r = client.patch(f"/bookings/{booking['id']}", headers=guest_headers,
+                     json={"check_in_date": _future(day + 1).isoformat(), "rooms_count": 2})
+    assert r.status_code == 200, r.text
+    assert locked_nights[-1] == [_future(day), _future(day + 1), _future(day + 2)]
+    assert _taken(db, room_id, day, day + 2) == [0, 2, 2]
+    assert r.json()["booking"]["rooms_count"] == 2
+
+    # Same values again — nothing to do
+    r = client.patch(f"/bookings/{booking['id']}", headers=guest_headers, json={"rooms_count": 2})
+    assert Decimal(r.json()["amount_difference"]) == 0
+
+
+def test_modify_is_all_or_nothing(client, db, guest_headers, active_hotel, monkeypatch):
+    monkeypatch.setattr(settings, "reservation_mode", "atomic")
+    room_id = active_hotel["room"]["id"]
+    booking = _book(client, guest_headers, active_hotel, 342, 343, 1)
+    _book(client, guest_headers, active_hotel, 344, 345, 4)
+
+    r = client.patch(f"/bookings/{booking['id']}", headers=guest_headers,
+                     json={"check_out_date": _future(344).isoformat(), "rooms_count": 2})
+    assert r.status_code == 400
+    assert _taken(db, room_id, 342, 344) == [1, 1, 4]
+    db.expire_all()
+    unchanged = db.get(Booking, booking["id"])
+    assert unchanged.rooms_count == 1 and unchanged.check_out_date == _future(343)
+
+    r = client.patch(f"/bookings/{booking['id']}", headers=guest_headers,
+                     json={"check_in_date": _future(344).isoformat()})
+    assert r.status_code == 400     # check-out would be before check-in
+
+
+class _FakeStripe:
+    def __init__(self):
+        self.calls = []
+        fake = self
+
+        class _Session:
+            @staticmethod
+            def create(**kw):
+                fake.calls.append(("Session.create", kw))
+                return SimpleNamespace(id=f"cs_balance_{len(fake.calls)}", url="https://stripe.fake/balance")
+
+            @staticmethod
+            def retrieve(session_id):
+                return SimpleNamespace(id=session_id, payment_intent=f"pi_{session_id}")
+
+        class _Refund:
+            @staticmethod
+            def create(**kw):
+                fake.calls.append(("Refund.create", kw))
+                return SimpleNamespace(id=f"re_{len(fake.calls)}")
+
+        self.checkout = SimpleNamespace(Session=_Session)
+        self.Refund = _Refund
+
+
+def test_confirmed_booking_settles_the_difference(client, db, guest_headers, active_hotel, monkeypatch):
+    monkeypatch.setattr(settings, "reservation_mode", "atomic")
+    fake = _FakeStripe()
+    monkeypatch.setattr(outbox_service, "stripe", fake)
+    room_id = active_hotel["room"]["id"]
+    created = _book(client, guest_headers, active_hotel, 356, 358, 2)
+    booking = db.get(Booking, created["id"])
+    booking.payment_session_id = f"cs_modify_{booking.id}"
+    db.commit()
+    booking_service.confirm_booking(db, booking.payment_session_id)
+
+    # Cheaper: one room fewer → partial refund queued, book_count moves
+    r = client.patch(f"/bookings/{created['id']}", headers=guest_headers, json={"rooms_count": 1})
+    assert r.status_code == 200, r.text
+    difference = Decimal(r.json()["amount_difference"])
+    assert difference == -(Decimal(created["amount"]) / 2).quantize(Decimal("0.01"))
+    db.expire_all()
+    [refund] = db.query(OutboxMessage).filter(OutboxMessage.kind == "stripe.refund",
+                                              OutboxMessage.payload["booking_id"].as_integer() == created["id"]).all()
+    assert outbox_service.dispatch_one(db, refund.id).status == "DONE"
+    [(_, kw)] = fake.calls
+    assert kw["amount"] == int(-difference * 100)
+    assert [inv.book_count for inv in db.query(Inventory).filter(
+        Inventory.room_id == room_id, Inventory.date.between(_future(356), _future(358))
+    ).order_by(Inventory.date)] == [1, 1, 1]
+
+    # Dearer: one more night → Checkout for the balance, created right away
+    r = client.patch(f"/bookings/{created['id']}", headers=guest_headers,
+                     json={"check_out_date": _future(359).isoformat()})
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["payment_url"] == "https://stripe.fake/balance"
+    assert body["booking"]["booking_status"] == "CONFIRMED"
+    [_, (_, kw)] = fake.calls
+    assert kw["line_items"][0]["price_data"]["unit_amount"] == int(Decimal(body["amount_difference"]) * 100)
+    assert kw["metadata"]["purpose"] == "booking_balance"
+    assert _taken(db, room_id, 356, 359) == [1, 1, 1, 1]
+
+
+def test_shrinking_both_ends_frees_two_runs(client, db, guest_headers, active_hotel, monkeypatch):
+    monkeypatch.setattr(settings, "reservation_mode", "atomic")
+    room_id = active_hotel["room"]["id"]
+    booking = _book(client, guest_headers, active_hotel, 310, 316, 5)
+    r = client.post("/waitlist", headers=guest_headers, json={
+        "hotel_id": active_hotel["hotel"]["id"], "room_id": room_id,
+        "check_in_date": _future(313).isoformat(), "check_out_date": _future(314).isoformat(), "rooms_count": 1,
+    })
+    assert r.status_code == 201, r.text
+
+    r = client.patch(f"/bookings/{booking['id']}", headers=guest_headers,
+                     json={"check_in_date": _future(312).isoformat(), "check_out_date": _future(314).isoformat()})
+    assert r.status_code == 200, r.text
+
+    db.expire_all()
+    spans = sorted((m.payload["start"], m.payload["end"]) for m in db.query(OutboxMessage).filter(
+        OutboxMessage.kind == "waitlist.promote", OutboxMessage.status == "PENDING")
+        if m.payload["room_id"] == room_id)
+    assert spans == [(_future(310).isoformat(), _future(311).isoformat()),
+                     (_future(315).isoformat(), _future(316).isoformat())]
@@ -0,0 +1,122 @@
+"""
+Booking status stream — SSE pushed by the in-process pub/sub on commit, with
+the batched version poll as the cross-worker fallback.
+"""
+import asyncio
+import json
+import threading
+from datetime import date, timedelta
+from sqlalchemy import update
+from sqlalchemy.orm import sessionmaker
+from app import booking_events, database, metrics
+from app.config import settings
+from app.models.booking import Booking
+from app.models.enums import BookingStatusEnum
+from app.services import booking_service
+
+
+def _future(days: int) -> date:
+    return date.today() + timedelta(days=days)
+
+
+def _paid_booking(client, db, headers, active_hotel, day: int) -> Booking:
+    r = client.post("/bookings/init", headers=headers, json={
+        "hotel_id": active_hotel["hotel"]["id"],
+        "room_id": active_hotel["room"]["id"],
+        "check_in_date": _future(day).isoformat(),
+        "check_out_date": _future(day + 1).isoformat(),
+        "rooms_count": 1,
+    })
+    booking = db.get(Booking, r.json()["id"])
+    booking.payment_session_id = f"cs_stream_{booking.id}"
+    booking.booking_status = BookingStatusEnum.PAYMENTS_PENDING
+    db.commit()
+    return booking
+
+
+def _events(body: str) -> list[dict]:
+    return [json.loads(line[len("data: "):]) for line in body.splitlines() if line.startswith("data: ")]
+
+
+def _later(seconds: float, fn) -> threading.Thread:
+    t = threading.Timer(seconds, fn)
+    t.start()
+    return t
+
+
+def test_confirm_is_pushed_to_the_stream(client, db, guest_headers, active_hotel, monkeypatch):
+    monkeypatch.setattr(settings, "booking_status_poll_seconds", 60)   # only the pub/sub can wake us
+    booking = _paid_booking(client, db, guest_headers, active_hotel, 345)
+    session_id = booking.payment_session_id
+    TestSessionLocal = sessionmaker(bind=db.get_bind())
+    before = metrics.get("booking_status_notifications_total", source="local")
+
+    def confirm():
+        other = TestSessionLocal()
+        try:
+            booking_service.confirm_booking(other, session_id)
+        finally:
+            other.close()
+
+    timer = _later(0.3, confirm)
+    r = client.get(f"/bookings/{booking.id}/status/stream", headers=guest_headers)
+    timer.join()
+
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/event-stream")
+    assert _events(r.text) == [{"booking_status": "PAYMENTS_PENDING", "version": 0},
+                               {"booking_status": "CONFIRMED", "version": 1}]
+    assert metrics.get("booking_status_notifications_total", source="local") == before + 1
+    assert booking.id not in booking_events._subs
+
+
+def test_change_from_another_worker_is_picked_up_by_the_poll(client, db, guest_headers, active_hotel, monkeypatch):
+    monkeypatch.setattr(settings, "booking_status_poll_seconds", 0.05)
+    TestSessionLocal = sessionmaker(bind=db.get_bind())
+    monkeypatch.setattr(database, "SessionLocal", TestSessionLocal)
+    booking = _paid_booking(client, db, guest_headers, active_hotel, 346)
+
+    def expire_elsewhere():
+        # Another process: commits the change without touching this process's pub/sub
+        other = TestSessionLocal()
+        other.execute(update(Booking).where(Booking.id == booking.id)
+                      .values(booking_status=BookingStatusEnum.EXPIRED, status_version=Booking.status_version + 1))
+        other.commit()
+        other.close()
+
+    timer = _later(0.2, expire_elsewhere)
+    r = client.get(f"/bookings/{booking.id}/status/stream", headers=guest_headers)
+    timer.join()
+    assert _events(r.text)[-1] == {"booking_status": "EXPIRED", "version": 1}
+
+
+def test_reconnect_with_last_event_id_skips_what_was_seen(client, db, guest_headers, active_hotel, monkeypatch):
+    monkeypatch.setattr(settings, "booking_status_stream_seconds", 0.2)
+    monkeypatch.setattr(settings, "booking_status_heartbeat_seconds", 0.05)
+    booking = _paid_booking(client, db, guest_headers, active_hotel, 347)
+
+    r = client.get(f"/bookings/{booking.id}/status/stream", headers={**guest_headers, "Last-Event-ID": "0"})
+    assert _events(r.text) == []
+    assert ": keep-alive" in r.text
+
+
+def test_clients_of_one_booking_share_a_subscription():
+    async def scenario():
+        async def watch():
+            seen = []
+            async for change in booking_events.updates(987_001, "RESERVED", 3, since=-1, timeout=5, heartbeat=5):
+                seen.append(change)
+                if change[0] == "CONFIRMED":
+                    return seen
+
+        watchers = [asyncio.create_task(watch()) for _ in range(50)]
+        await asyncio.sleep(0.01)
+        assert len(booking_events._subs) == 1 and booking_events._subs[987_001].clients == 50
+
+        # Published from another thread, as the webhook consumer would
+        await asyncio.to_thread(booking_events.publish, [(987_001, "CONFIRMED", 4)])
+        results = await asyncio.gather(*watchers)
+        assert all(seen == [("RESERVED", 3), ("CONFIRMED", 4)] for seen in results)
+        assert 987_001 not in booking_events._subs
+
+    asyncio.run(scenario())
@@ -0,0 +1,82 @@
+"""
+Cart bookings — several lines reserved in one transaction, all or nothing,
+under every reservation mode.
+"""
+from datetime import date, timedelta
+import pytest
+from sqlalchemy import func
+from app.config import settings
+from app.models.booking import Booking
+from app.models.inventory import Inventory
+from app.models.inventory_hold import InventoryHold
+
+MODES = ["locking", "atomic", "ledger"]
+
+
+def _future(days: int) -> date:
+    return date.today() + timedelta(days=days)
+
+
+def _line(active_hotel, check_in: date, nights: int, rooms_count: int) -> dict:
+    return {
+        "hotel_id": active_hotel["hotel"]["id"],
+        "room_id": active_hotel["room"]["id"],
+        "check_in_date": check_in.isoformat(),
+        "check_out_date": (check_in + timedelta(days=nights)).isoformat(),
+        "rooms_count": rooms_count,
+    }
+
+
+def _held(db, room_id: int, night: date) -> int:
+    """Rooms held on one night, whichever mode took the hold."""
+    db.expire_all()
+    inv = db.query(Inventory).filter(Inventory.room_id == room_id, Inventory.date == night).one()
+    ledger = db.query(func.coalesce(func.sum(InventoryHold.count), 0)).filter(
+        InventoryHold.room_id == room_id, InventoryHold.date == night).scalar()
+    return inv.reserved_count + ledger
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_cart_reserves_every_line(client, db, guest_headers, active_hotel, monkeypatch, mode):
+    monkeypatch.setattr(settings, "reservation_mode", mode)
+    room_id = active_hotel["room"]["id"]
+
+    r = client.post("/bookings/cart", headers=guest_headers, json={"items": [
+        _line(active_hotel, _future(272), 1, 2),
+        _line(active_hotel, _future(270), 2, 1),   # overlaps the first line on day 272
+    ]})
+
+    assert r.status_code == 201
+    body = r.json()
+    assert [b["check_in_date"] for b in body["bookings"]] == [_future(272).isoformat(), _future(270).isoformat()]
+    assert all(b["booking_status"] == "RESERVED" for b in body["bookings"])
+    assert float(body["amount"]) == pytest.approx(sum(float(b["amount"]) for b in body["bookings"]))
+    assert [_held(db, room_id, _future(d)) for d in (270, 271, 272, 273)] == [1, 1, 3, 2]
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_cart_is_all_or_nothing(client, db, guest_headers, active_hotel, monkeypatch, mode):
+    """Two lines that fit on their own but not together must both be rejected."""
+    monkeypatch.setattr(settings, "reservation_mode", mode)
+    room_id = active_hotel["room"]["id"]
+    bookings_before = db.query(Booking).count()
+
+    r = client.post("/bookings/cart", headers=guest_headers, json={"items": [
+        _line(active_hotel, _future(280), 1, 3),
+        _line(active_hotel, _future(281), 1, 3),   # day 281 would need 6 of 5 rooms
+    ]})
+
+    assert r.status_code == 400
+    assert f"Room {room_id} not available" in r.json()["detail"]
+    assert [_held(db, room_id, _future(d)) for d in (280, 281, 282)] == [0, 0, 0]
+    assert db.query(Booking).count() == bookings_before
+
+
+def test_cart_rejects_room_from_another_hotel(client, db, guest_headers, active_hotel):
+    line = _line(active_hotel, _future(285), 1, 1)
+    line["hotel_id"] = active_hotel["hotel"]["id"] + 1000
+
+    r = client.post("/bookings/cart", headers=guest_headers, json={"items": [line]})
+
+    assert r.status_code == 404
+    assert r.json()["detail"].startswith("Cart line 1:")
@@ -0,0 +1,37 @@
+"""
+Overbooking invariants under real concurrency — a small run of the
+benchmarks/bench_concurrency.py load (init/confirm/cancel/expire from many
+threads against a WAL SQLite file), then an audit of every inventory night.
+"""
+import pytest
+from app.config import settings
+from benchmarks.bench_concurrency import audit, run
+from benchmarks.common import make_engine, seed
+
+
+@pytest.mark.parametrize("mode, immediate, lock_provider", [
+    ("atomic", False, "row"),      # the guarded UPDATE must hold up with no lock stand-in at all
+    ("atomic", True, "row"),
+    ("locking", True, "row"),      # FOR UPDATE strategies need BEGIN IMMEDIATE on SQLite...
+    ("ledger", True, "row"),
+    ("segments", True, "row"),
+    ("locking", False, "local"),   # ...or in-process room locks
+])
+def test_mixed_load_never_overbooks(monkeypatch, mode, immediate, lock_provider):
+    monkeypatch.setattr(settings, "reservation_mode", mode)
+    monkeypatch.setattr(settings, "lock_provider", lock_provider)
+    monkeypatch.setattr(settings, "slow_txn_log_ms", 0)
+    engine, Session = make_engine(begin_immediate=immediate)
+    try:
+        ids = seed(Session, rooms=2, total_count=4, days=8, segments=mode == "segments")
+        results, _ = run(engine, Session, ids, mode, threads=6, ops=40, days=8, immediate=immediate,
+                         lock_provider=lock_provider)
+
+        outcomes = results["outcomes"]
+        assert sum(outcomes.values()) == 6 * 40
+        assert not [k for k in outcomes if k[1] == "error"]
+        assert outcomes[("init", "ok")] and outcomes[("init", "http_400")]   # it did sell out
+        assert outcomes[("confirm", "ok")] and outcomes[("cancel", "ok")] and outcomes[("expire", "ok")]
+        assert audit(Session, ids[2]) == {"nights": 16, "overbooked": 0, "drift": 0}
+    finally:
+        engine.dispose()
@@ -0,0 +1,122 @@
+"""
+Ledger reservation mode — holds live in inventory_hold, not Inventory.reserved_count.
+"""
+from datetime import date, datetime, timedelta, timezone
+from app.config import settings
+from app.models.booking import Booking
+from app.models.enums import BookingStatusEnum
+from app.models.inventory import Inventory
+from app.models.inventory_hold import InventoryHold
+from app.services import booking_service, expiry_service, hold_service
+
+
+def _init(client, headers, active_hotel, check_in: date, rooms_count: int):
+    return client.post("/bookings/init", headers=headers, json={
+        "hotel_id": active_hotel["hotel"]["id"],
+        "room_id": active_hotel["room"]["id"],
+        "check_in_date": check_in.isoformat(),
+        "check_out_date": (check_in + timedelta(days=1)).isoformat(),
+        "rooms_count": rooms_count,
+    })
+
+
+def _nights(db, room_id: int, check_in: date) -> list[Inventory]:
+    db.expire_all()
+    return db.query(Inventory).filter(
+        Inventory.room_id == room_id,
+        Inventory.date.between(check_in, check_in + timedelta(days=1)),
+    ).order_by(Inventory.date).all()
+
+
+def test_ledger_hold_leaves_inventory_untouched(client, db, guest_headers, active_hotel, monkeypatch):
+    monkeypatch.setattr(settings, "reservation_mode", "ledger")
+    room_id = active_hotel["room"]["id"]
+    check_in = date.today() + timedelta(days=150)
+
+    r = _init(client, guest_headers, active_hotel, check_in, rooms_count=3)
+
+    assert r.status_code == 201
+    assert [inv.reserved_count for inv in _nights(db, room_id, check_in)] == [0, 0]
+    holds = db.query(InventoryHold).filter(InventoryHold.booking_id == r.json()["id"]).all()
+    assert sorted(h.count for h in holds) == [3, 3]
+
+    # total_count is 5 — the 3 live ledger holds leave only 2
+    assert _init(client, guest_headers, active_hotel, check_in, rooms_count=3).status_code == 400
+    assert _init(client, guest_headers, active_hotel, check_in, rooms_count=2).status_code == 201
+
+
+def test_ledger_confirm_then_compact_folds_into_book_count(client, db, guest_headers, active_hotel, monkeypatch):
+    monkeypatch.setattr(settings, "reservation_mode", "ledger")
+    room_id = active_hotel["room"]["id"]
+    check_in = date.today() + timedelta(days=160)
+    booking_id = _init(client, guest_headers, active_hotel, check_in, rooms_count=2).json()["id"]
+    booking = db.get(Booking, booking_id)
+    booking.payment_session_id = f"sess_ledger_{booking_id}"
+    db.commit()
+
+    booking_service.confirm_booking(db, booking.payment_session_id)
+    assert [inv.book_count for inv in _nights(db, room_id, check_in)] == [0, 0]
+
+    while hold_service.compact_confirmed_holds(db):
+        pass
+    assert [inv.book_count for inv in _nights(db, room_id, check_in)] == [2, 2]
+    assert db.query(InventoryHold).filter(InventoryHold.booking_id == booking_id).count() == 0
+
+
+def test_ledger_expired_hold_stops_counting_and_is_swept(client, db, guest_headers, active_hotel, monkeypatch):
+    monkeypatch.setattr(settings, "reservation_mode", "ledger")
+    check_in = date.today() + timedelta(days=170)
+    booking_id = _init(client, guest_headers, active_hotel, check_in, rooms_count=5).json()["id"]
+
+    past = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(minutes=settings.booking_hold_minutes + 1)
+    db.get(Booking, booking_id).created_at = past
+    for hold in db.query(InventoryHold).filter(InventoryHold.booking_id == booking_id):
+        hold.expires_at = past
+    db.commit()
+
+    # Expired before the sweeper runs — already bookable again
+    assert _init(client, guest_headers, active_hotel, check_in, rooms_count=1).status_code == 201
+
+    expiry_service.sweep_expired_holds(db)
+    db.expire_all()
+    assert db.get(Booking, booking_id).booking_status == BookingStatusEnum.EXPIRED
+    assert db.query(InventoryHold).filter(InventoryHold.booking_id == booking_id).count() == 0
+
+
+def _lapse(db, booking_id: int) -> str:
+    past = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(minutes=1)
+    for hold in db.query(InventoryHold).filter(InventoryHold.booking_id == booking_id):
+        hold.expires_at = past
+    booking = db.get(Booking, booking_id)
+    booking.payment_session_id = f"sess_lapsed_{booking_id}"
+    db.commit()
+    return booking.payment_session_id
+
+
+def test_ledger_late_confirm_is_refused_when_rooms_were_taken(client, db, guest_headers, active_hotel, monkeypatch):
+    monkeypatch.setattr(settings, "reservation_mode", "ledger")
+    check_in = date.today() + timedelta(days=180)
+    booking_id = _init(client, guest_headers, active_hotel, check_in, rooms_count=3).json()["id"]
+    session_id = _lapse(db, booking_id)
+    assert _init(client, guest_headers, active_hotel, check_in, rooms_count=4).status_code == 201
+
+    confirmed = booking_service.confirm_sessions(db, [session_id])
+    db.commit()
+
+    assert confirmed[session_id].booking_status == BookingStatusEnum.EXPIRED
+    assert db.query(InventoryHold).filter(InventoryHold.booking_id == booking_id).count() == 0
+    assert _init(client, guest_headers, active_hotel, check_in, rooms_count=2).status_code == 400
+
+
+def test_ledger_late_confirm_is_pinned_when_rooms_are_still_free(client, db, guest_headers, active_hotel, monkeypatch):
+    monkeypatch.setattr(settings, "reservation_mode", "ledger")
+    check_in = date.today() + timedelta(days=185)
+    booking_id = _init(client, guest_headers, active_hotel, check_in, rooms_count=3).json()["id"]
+    session_id = _lapse(db, booking_id)
+
+    booking_service.confirm_booking(db, session_id)
+
+    assert db.get(Booking, booking_id).booking_status == BookingStatusEnum.CONFIRMED
+    holds = db.query(InventoryHold).filter(InventoryHold.booking_id == booking_id).all()
+    assert [h.expires_at for h in holds] == [None, None]
+    assert _init(client, guest_headers, active_hotel, check_in, rooms_count=3).status_code == 400
@@ -0,0 +1,79 @@
+"""
+Idempotency-Key on POST /bookings/init — replays never touch Inventory twice.
+"""
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+from app.config import settings
+from app.models.booking import Booking
+from app.models.inventory import Inventory
+from app.models.user import User
+from app.services import idempotency_service
+from conftest import TestSessionLocal
+
+
+def _body(active_hotel, offset: int) -> dict:
+    check_in = date.today() + timedelta(days=offset)
+    return {
+        "hotel_id": active_hotel["hotel"]["id"],
+        "room_id": active_hotel["room"]["id"],
+        "check_in_date": check_in.isoformat(),
+        "check_out_date": (check_in + timedelta(days=1)).isoformat(),
+        "rooms_count": 1,
+    }
+
+
+def test_replayed_init_returns_stored_booking(client, db, guest_headers, active_hotel, monkeypatch):
+    monkeypatch.setattr(settings, "reservation_mode", "atomic")
+    headers = {**guest_headers, "Idempotency-Key": str(uuid.uuid4())}
+    body = _body(active_hotel, offset=220)
+
+    first = client.post("/bookings/init", headers=headers, json=body)
+    replay = client.post("/bookings/init", headers=headers, json=body)
+
+    assert first.status_code == replay.status_code == 201
+    assert first.json() == replay.json()
+    assert db.query(Booking).filter(Booking.room_id == body["room_id"]).count() == 1
+    db.expire_all()
+    inv = db.query(Inventory).filter(Inventory.room_id == body["room_id"],
+                                     Inventory.date == date.fromisoformat(body["check_in_date"])).one()
+    assert inv.reserved_count == 1
+
+
+def test_key_reuse_with_different_body_is_rejected(client, guest_headers, active_hotel, monkeypatch):
+    monkeypatch.setattr(settings, "reservation_mode", "atomic")
+    headers = {**guest_headers, "Idempotency-Key": str(uuid.uuid4())}
+
+    assert client.post("/bookings/init", headers=headers, json=_body(active_hotel, 230)).status_code == 201
+    assert client.post("/bookings/init", headers=headers, json=_body(active_hotel, 231)).status_code == 422
+
+
+def test_concurrent_duplicates_run_handler_once(db, guest_headers):
+    """Two threads with the same key: the second waits for the first and replays its result."""
+    user_id = db.query(User).filter(User.email == "guest@test.com").one().id
+    key = str(uuid.uuid4())
+    calls = []
+
+    def handler():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"id": 42}
+
+    results = []
+
+    def attempt():
+        session = TestSessionLocal()
+        try:
+            results.append(idempotency_service.run(session, user_id, key, "POST /test", {}, handler))
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=attempt) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [{"id": 42}, {"id": 42}]
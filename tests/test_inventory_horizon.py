@@ -0,0 +1,60 @@
+"""
+Rolling inventory horizon — the extender inserts only the missing nights of
+every active room, in batches of rooms, and is safe to repeat.
+"""
+from datetime import date, timedelta
+from sqlalchemy import func, select
+from app.config import settings
+from app.models.inventory import Inventory
+from app.services import inventory_service
+
+
+def _extend_all(db) -> int:
+    """What the horizon-extender worker does each tick, on the test session."""
+    total, cursor = 0, 0
+    while cursor is not None:
+        inserted, cursor = inventory_service.extend_horizon(db, after_room_id=cursor)
+        total += inserted
+    return total
+
+
+def _nights(db, room_id: int) -> list[date]:
+    db.expire_all()
+    return db.execute(
+        select(Inventory.date).where(Inventory.room_id == room_id).order_by(Inventory.date)
+    ).scalars().all()
+
+
+def test_extender_fills_the_horizon_and_gaps(db, active_hotel, monkeypatch):
+    room_id = active_hotel["room"]["id"]
+    _extend_all(db)                 # bring every room in the shared DB up to date first
+    today = date.today()
+    # A hole in the middle, e.g. rows lost to a bad manual cleanup
+    db.query(Inventory).filter(Inventory.room_id == room_id,
+                               Inventory.date.between(today + timedelta(days=100),
+                                                      today + timedelta(days=102))).delete()
+    db.commit()
+
+    monkeypatch.setattr(settings, "inventory_horizon_days", 370)
+    inserted = _extend_all(db)
+
+    nights = _nights(db, room_id)
+    assert nights == [today + timedelta(days=i) for i in range(370)]
+    rooms = db.execute(select(func.count(func.distinct(Inventory.room_id)))
+                       .where(Inventory.date == today + timedelta(days=369))).scalar()
+    assert inserted == rooms * 5 + 3
+    row = db.query(Inventory).filter(Inventory.room_id == room_id,
+                                     Inventory.date == today + timedelta(days=369)).one()
+    assert (row.book_count, row.reserved_count, row.closed, row.total_count) == (0, 0, False, 5)
+    assert row.price == 100 and row.city == active_hotel["hotel"]["city"]
+
+    # Nothing missing any more — a second run (or a concurrent worker) inserts nothing
+    assert _extend_all(db) == 0
+
+
+def test_extender_walks_rooms_in_batches(db, active_hotel):
+    cursor, batches = 0, 0
+    while cursor is not None:
+        _, cursor = inventory_service.extend_horizon(db, after_room_id=cursor, batch_size=1)
+        batches += 1
+    assert batches > 1
@@ -0,0 +1,109 @@
+"""
+Run-length inventory (RESERVATION_MODE=segments): a room is one segment until
+bookings or admin edits make its nights differ, and merges back afterwards.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+import pytest
+from app.config import settings
+from app.models.booking import Booking
+from app.models.inventory import Inventory
+from app.models.inventory_segment import InventorySegment
+from app.models.room import Room
+from app.reservation import segments
+from app.reservation.reservation_service import get_reservation_strategy
+from app.services import booking_service, inventory_service
+
+
+@pytest.fixture
+def segments_mode(monkeypatch):
+    monkeypatch.setattr(settings, "reservation_mode", "segments")
+
+
+def _future(days: int) -> date:
+    return date.today() + timedelta(days=days)
+
+
+def _segments(db, room_id: int) -> list[tuple]:
+    db.expire_all()
+    return [(s.start_date, s.end_date, s.book_count, s.reserved_count, s.closed)
+            for s in db.query(InventorySegment).filter(InventorySegment.room_id == room_id)
+                       .order_by(InventorySegment.start_date)]
+
+
+def _hotel_found(db, active_hotel, rooms_count: int, first: int, last: int) -> bool:
+    available = get_reservation_strategy().hotel_availability(db, rooms_count, _future(first), _future(last))
+    return db.query(available.c.hotel_id).filter(available.c.hotel_id == active_hotel["hotel"]["id"]).count() == 1
+
+
+def test_booking_splits_and_cancel_merges(segments_mode, client, db, guest_headers, active_hotel):
+    room_id = active_hotel["room"]["id"]
+    assert _segments(db, room_id) == [(_future(0), _future(364), 0, 0, False)]
+    assert db.query(Inventory).filter(Inventory.room_id == room_id).count() == 0
+
+    r = client.post("/bookings/init", headers=guest_headers, json={
+        "hotel_id": active_hotel["hotel"]["id"], "room_id": room_id,
+        "check_in_date": _future(10).isoformat(), "check_out_date": _future(12).isoformat(),
+        "rooms_count": 4,
+    })
+    assert r.status_code == 201, r.text
+    assert Decimal(r.json()["amount"]) > 0
+    assert _segments(db, room_id) == [
+        (_future(0), _future(9), 0, 0, False),
+        (_future(10), _future(12), 0, 4, False),
+        (_future(13), _future(364), 0, 0, False),
+    ]
+    assert not _hotel_found(db, active_hotel, 2, 11, 14)
+    assert _hotel_found(db, active_hotel, 2, 13, 16)
+
+    booking = db.get(Booking, r.json()["id"])
+    booking.payment_session_id = f"cs_segments_{booking.id}"
+    db.commit()
+    booking_service.confirm_booking(db, booking.payment_session_id)
+    assert _segments(db, room_id)[1] == (_future(10), _future(12), 4, 0, False)
+
+    # The strategy alone — cancel_booking would also queue a Stripe refund
+    get_reservation_strategy().cancel(db, db.get(Booking, booking.id))
+    db.commit()
+    assert _segments(db, room_id) == [(_future(0), _future(364), 0, 0, False)]
+
+
+def test_admin_edits_and_horizon_keep_runs_whole(segments_mode, client, db, manager_headers, active_hotel):
+    room_id = active_hotel["room"]["id"]
+    r = client.patch(f"/admin/inventory/rooms/{room_id}", headers=manager_headers, json={
+        "start_date": _future(20).isoformat(), "end_date": _future(21).isoformat(), "closed": True,
+    })
+    assert r.status_code == 200 and r.json()["nights"] == 2
+    assert len(_segments(db, room_id)) == 3
+    listing = client.get(f"/admin/inventory/rooms/{room_id}", headers=manager_headers).json()
+    assert len(listing) == 365 and [row["date"] for row in listing if row["closed"]] == \
+        [_future(20).isoformat(), _future(21).isoformat()]
+
+    client.patch(f"/admin/inventory/rooms/{room_id}", headers=manager_headers, json={
+        "start_date": _future(20).isoformat(), "end_date": _future(21).isoformat(), "closed": False,
+    })
+    # A weekday pattern writes one run per selected night, and reverting it merges them all back
+    pattern = {"start_date": _future(50).isoformat(), "end_date": _future(63).isoformat(), "weekdays": [1, 3]}
+    r = client.patch(f"/admin/inventory/rooms/{room_id}", headers=manager_headers, json={**pattern, "price": 90})
+    assert r.json()["nights"] == 4 and len(_segments(db, room_id)) == 9
+    client.patch(f"/admin/inventory/rooms/{room_id}", headers=manager_headers, json={**pattern, "price": 100})
+    # A longer horizon stretches the room's last, untouched segment instead of adding one
+    assert inventory_service.generate_inventory(db, Room.id == room_id, start_date=_future(0),
+                                                end_date=_future(399)) == 1
+    assert _segments(db, room_id) == [(_future(0), _future(399), 0, 0, False)]
+
+
+def test_compress_converts_nightly_rows(client, db, manager_headers, active_hotel):
+    room_id = active_hotel["room"]["id"]
+    client.patch(f"/admin/inventory/rooms/{room_id}", headers=manager_headers, json={
+        "start_date": _future(30).isoformat(), "end_date": _future(34).isoformat(), "surge_factor": 1.5,
+    })
+    before = {(inv.date, inv.surge_factor, inv.closed, inv.book_count)
+              for inv in db.query(Inventory).filter(Inventory.room_id == room_id)}
+
+    written, deleted = segments.compress(db, Room.id == room_id)
+    db.commit()
+    assert (written, deleted) == (3, 365)
+    after = segments.expand(db.query(InventorySegment).filter(InventorySegment.room_id == room_id)
+                            .order_by(InventorySegment.start_date).all())
+    assert {(n.date, n.surge_factor, n.closed, n.book_count) for n in after} == before
@@ -0,0 +1,100 @@
+"""
+Sharded inventory counters — a night's free rooms split over N shard rows.
+"""
+from datetime import date, datetime, timedelta, timezone
+import pytest
+from sqlalchemy import select
+from app.config import settings
+from app.models.booking import Booking
+from app.models.inventory import Inventory
+from app.models.inventory_shard import InventoryShard
+from app.reservation.reservation_service import get_reservation_strategy
+from app.services import booking_service, expiry_service
+
+
+def _future(days: int) -> date:
+    return date.today() + timedelta(days=days)
+
+
+def _shard(client, manager_headers, active_hotel, start: int, end: int, shards: int):
+    r = client.put(f"/admin/inventory/rooms/{active_hotel['room']['id']}/shards", headers=manager_headers,
+                   json={"start_date": _future(start).isoformat(), "end_date": _future(end).isoformat(),
+                         "shards": shards})
+    assert r.status_code == 200
+    return r.json()
+
+
+def _book(client, guest_headers, active_hotel, start: int, end: int, rooms: int):
+    return client.post("/bookings/init", headers=guest_headers, json={
+        "hotel_id": active_hotel["hotel"]["id"],
+        "room_id": active_hotel["room"]["id"],
+        "check_in_date": _future(start).isoformat(),
+        "check_out_date": _future(end).isoformat(),
+        "rooms_count": rooms,
+    })
+
+
+def _night(db, active_hotel, days: int):
+    db.expire_all()
+    room_id = active_hotel["room"]["id"]
+    inv = db.query(Inventory).filter(Inventory.room_id == room_id, Inventory.date == _future(days)).one()
+    shards = db.query(InventoryShard).filter(InventoryShard.room_id == room_id,
+                                             InventoryShard.date == _future(days)).order_by(InventoryShard.shard).all()
+    return inv, [(s.capacity, s.claimed) for s in shards]
+
+
+@pytest.mark.parametrize("mode", ["locking", "atomic"])
+def test_sharded_night_sells_exactly_its_capacity(client, db, manager_headers, guest_headers,
+                                                  active_hotel, monkeypatch, mode):
+    monkeypatch.setattr(settings, "reservation_mode", mode)
+    assert _shard(client, manager_headers, active_hotel, 300, 301, 2) == {"nights": 2, "shards": 2}
+    inv, shards = _night(db, active_hotel, 300)
+    assert inv.reserved_count == 5 and shards == [(3, 0), (2, 0)]
+
+    codes = [_book(client, guest_headers, active_hotel, 300, 301, 1).status_code for _ in range(6)]
+
+    assert codes == [201] * 5 + [400]
+    inv, shards = _night(db, active_hotel, 300)
+    assert inv.reserved_count == 5 and sum(c for _, c in shards) == 5
+
+
+def test_confirm_and_expiry_settle_the_claimed_shard(client, db, manager_headers, guest_headers, active_hotel):
+    _shard(client, manager_headers, active_hotel, 304, 304, 2)
+    kept = db.get(Booking, _book(client, guest_headers, active_hotel, 303, 304, 2).json()["id"])
+    dropped = db.get(Booking, _book(client, guest_headers, active_hotel, 304, 305, 1).json()["id"])
+
+    kept.payment_session_id = f"cs_shard_{kept.id}"
+    dropped.created_at = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(hours=1)
+    db.commit()
+    booking_service.confirm_booking(db, kept.payment_session_id)
+    expiry_service.sweep_expired_holds(db)
+
+    inv, shards = _night(db, active_hotel, 304)
+    assert (inv.book_count, inv.reserved_count) == (2, 3)         # block shrank by the 2 confirmed rooms
+    assert sum(cap for cap, _ in shards) == 3 and all(c == 0 for _, c in shards)
+    plain, _ = _night(db, active_hotel, 305)                       # unsharded night of the expired booking
+    assert plain.reserved_count == 0
+
+
+def test_exhausted_shards_are_rebalanced(client, db, manager_headers, guest_headers, active_hotel):
+    _shard(client, manager_headers, active_hotel, 308, 308, 3)      # capacities 2, 2, 1
+
+    r = _book(client, guest_headers, active_hotel, 308, 309, 4)     # no single shard has 4
+
+    assert r.status_code == 201
+    inv, shards = _night(db, active_hotel, 308)
+    assert shards[0][1] == 4 and sum(cap for cap, _ in shards) == 5
+
+
+def test_search_sees_summed_availability_and_unshard_restores(client, db, manager_headers, active_hotel):
+    _shard(client, manager_headers, active_hotel, 312, 312, 4)
+    room_id = active_hotel["room"]["id"]
+    stmt = get_reservation_strategy().availability_filter(
+        select(Inventory.id).where(Inventory.room_id == room_id, Inventory.date == _future(312)),
+        5, _future(312), _future(312),
+    )
+    assert len(db.execute(stmt).all()) == 1
+
+    _shard(client, manager_headers, active_hotel, 312, 312, 0)
+    inv, shards = _night(db, active_hotel, 312)
+    assert inv.reserved_count == 0 and shards == []
@@ -0,0 +1,94 @@
+"""
+Lock providers behind lock_inventory() — the `local` provider (what SQLite gets
+instead of FOR UPDATE) holds one lock per room until the transaction ends.
+"""
+import threading
+import time
+from datetime import date, timedelta
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import sessionmaker
+from app.config import settings
+from app.locks import advisory_key, get_lock_provider
+from app.models.inventory import Inventory
+from app.transactions import lock_inventory, transactional
+
+
+@pytest.fixture
+def local_locks(monkeypatch):
+    monkeypatch.setattr(settings, "lock_provider", "local")
+    monkeypatch.setattr(settings, "lock_timeout_ms", 2000)
+
+
+def _night(room_id: int, day: int):
+    return Inventory.room_id == room_id, Inventory.date == date.today() + timedelta(days=day)
+
+
+def test_second_writer_waits_for_commit(db, active_hotel, local_locks):
+    room_id = active_hotel["room"]["id"]
+    Session = sessionmaker(bind=db.get_bind())
+    first, second = Session(), Session()
+    order = []
+
+    [inv] = lock_inventory(first, *_night(room_id, 355))
+    inv.surge_factor = 2
+
+    def waiter():
+        [seen] = lock_inventory(second, *_night(room_id, 355))
+        order.append(("second", seen.surge_factor))
+        second.rollback()
+
+    t = threading.Thread(target=waiter)
+    t.start()
+    time.sleep(0.2)
+    order.append(("first", None))
+    first.commit()                  # releases the room
+    t.join(5)
+    first.close()
+    second.close()
+    # The waiter ran only after the commit, and read what it committed
+    assert order == [("first", None), ("second", 2)]
+
+
+def test_busy_room_gives_409_after_retries(db, active_hotel, local_locks, monkeypatch):
+    monkeypatch.setattr(settings, "lock_timeout_ms", 20)
+    monkeypatch.setattr(settings, "txn_retry_base_delay_ms", 1)
+    room_id = active_hotel["room"]["id"]
+    holder = sessionmaker(bind=db.get_bind())()
+    lock_inventory(holder, *_night(room_id, 356))
+    attempts = []
+
+    @transactional("cancel_booking")
+    def op(db):
+        attempts.append(1)
+        return lock_inventory(db, *_night(room_id, 356))
+
+    other = sessionmaker(bind=db.get_bind())()
+    try:
+        with pytest.raises(HTTPException) as exc:
+            op(other)
+        assert exc.value.status_code == 409
+        assert len(attempts) == settings.txn_max_attempts
+        # skip_locked returns nothing instead of waiting
+        assert lock_inventory(other, *_night(room_id, 356), skip_locked=True) == []
+
+        holder.rollback()           # rollback releases the room too
+        assert len(op(other)) == 1
+    finally:
+        other.rollback()
+        holder.close()
+        other.close()
+
+
+def test_unknown_provider_is_rejected(monkeypatch):
+    monkeypatch.setattr(settings, "lock_provider", "zookeeper")
+    with pytest.raises(ValueError):
+        get_lock_provider()
+
+
+def test_advisory_keys_fit_bigint_for_large_room_ids():
+    keys = [advisory_key(room_id) for room_id in (1, 2**31 - 1, 2**31, 2**40)]
+    assert len(set(keys)) == 4
+    assert all(0 < key < 2**63 for key in keys)
+    with pytest.raises(ValueError):
+        advisory_key(2**48)
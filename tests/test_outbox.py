@@ -0,0 +1,139 @@
+"""
+Transactional outbox — Stripe is never called while inventory rows are locked.
+
+A local FakeStripe stands in for the SDK: it is slow on purpose and records
+every call, so the tests can prove cancel_booking returns without waiting on it
+and that the refund happens exactly once, afterwards.
+"""
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+import pytest
+from app.config import settings
+from app.models.booking import Booking
+from app.models.enums import BookingStatusEnum
+from app.models.outbox import OutboxMessage
+from app.services import booking_service, outbox_service
+
+STRIPE_LATENCY = 0.5
+
+
+class FakeStripe:
+    """Just enough of the stripe module for outbox_service, with a fixed latency."""
+    def __init__(self):
+        self.calls = []
+        self.fail_next = 0
+        fake = self
+
+        class _Session:
+            @staticmethod
+            def create(**kw):
+                return fake._call("Session.create", kw, SimpleNamespace(
+                    id=f"cs_fake_{len(fake.calls)}", url="https://stripe.fake/pay"))
+
+            @staticmethod
+            def retrieve(session_id):
+                return fake._call("Session.retrieve", {"id": session_id},
+                                  SimpleNamespace(id=session_id, payment_intent=f"pi_{session_id}", status="open"))
+
+            @staticmethod
+            def expire(session_id):
+                return fake._call("Session.expire", {"id": session_id},
+                                  SimpleNamespace(id=session_id, status="expired"))
+
+        class _Refund:
+            @staticmethod
+            def create(**kw):
+                return fake._call("Refund.create", kw, SimpleNamespace(id=f"re_{len(fake.calls)}"))
+
+        self.checkout = SimpleNamespace(Session=_Session)
+        self.Refund = _Refund
+
+    def _call(self, name, kwargs, result):
+        time.sleep(STRIPE_LATENCY)
+        self.calls.append((name, kwargs))
+        if self.fail_next:
+            self.fail_next -= 1
+            raise ConnectionError("stripe unreachable")
+        return result
+
+
+@pytest.fixture
+def fake_stripe(monkeypatch):
+    fake = FakeStripe()
+    monkeypatch.setattr(outbox_service, "stripe", fake)
+    return fake
+
+
+@pytest.fixture
+def confirmed_booking(client, db, guest_headers, active_hotel, monkeypatch):
+    monkeypatch.setattr(settings, "reservation_mode", "atomic")
+    check_in = date.today() + timedelta(days=240)
+    r = client.post("/bookings/init", headers=guest_headers, json={
+        "hotel_id": active_hotel["hotel"]["id"],
+        "room_id": active_hotel["room"]["id"],
+        "check_in_date": check_in.isoformat(),
+        "check_out_date": (check_in + timedelta(days=1)).isoformat(),
+        "rooms_count": 1,
+    })
+    booking = db.get(Booking, r.json()["id"])
+    booking.payment_session_id = f"cs_outbox_{booking.id}"
+    db.commit()
+    booking_service.confirm_booking(db, booking.payment_session_id)
+    return booking
+
+
+def test_cancel_does_not_wait_on_stripe(client, db, guest_headers, confirmed_booking, fake_stripe):
+    started = time.perf_counter()
+    r = client.post(f"/bookings/{confirmed_booking.id}/cancel", headers=guest_headers)
+    elapsed = time.perf_counter() - started
+
+    assert r.status_code == 200
+    assert r.json()["booking_status"] == "CANCELLED"
+    assert fake_stripe.calls == []            # nothing happened inside the locked transaction
+    assert elapsed < STRIPE_LATENCY
+
+    outbox_service.dispatch_due(db)
+    assert [name for name, _ in fake_stripe.calls] == ["Session.retrieve", "Refund.create"]
+    assert fake_stripe.calls[1][1]["idempotency_key"] == f"refund-booking-{confirmed_booking.id}"
+
+    outbox_service.dispatch_due(db)          # already DONE — no second refund
+    assert len(fake_stripe.calls) == 2
+
+
+def test_failed_refund_is_retried_later(client, db, guest_headers, confirmed_booking, fake_stripe):
+    client.post(f"/bookings/{confirmed_booking.id}/cancel", headers=guest_headers)
+    fake_stripe.fail_next = 1
+
+    outbox_service.dispatch_due(db)
+    message = outbox_service.get_by_dedup_key(db, f"refund-booking-{confirmed_booking.id}")
+    assert message.status == "PENDING" and message.attempts == 1 and message.last_error
+
+    message.next_attempt_at = message.created_at   # pretend the backoff elapsed
+    db.commit()
+    outbox_service.dispatch_due(db)
+    db.expire_all()
+    assert db.get(OutboxMessage, message.id).status == "DONE"
+
+
+def test_checkout_for_expired_booking_is_closed(client, db, guest_headers, active_hotel, fake_stripe, monkeypatch):
+    monkeypatch.setattr(settings, "reservation_mode", "atomic")
+    check_in = date.today() + timedelta(days=245)
+    r = client.post("/bookings/init", headers=guest_headers, json={
+        "hotel_id": active_hotel["hotel"]["id"],
+        "room_id": active_hotel["room"]["id"],
+        "check_in_date": check_in.isoformat(),
+        "check_out_date": (check_in + timedelta(days=1)).isoformat(),
+        "rooms_count": 1,
+    })
+    booking_id = r.json()["id"]
+    message = outbox_service.enqueue(db, "stripe.checkout_session", {"booking_id": booking_id},
+                                     f"checkout-booking-{booking_id}")
+    db.get(Booking, booking_id).booking_status = BookingStatusEnum.EXPIRED   # swept meanwhile
+    db.commit()
+
+    message = outbox_service.dispatch_one(db, message.id)
+
+    assert message.status == "DONE" and message.result["url"] is None
+    assert [name for name, _ in fake_stripe.calls] == ["Session.create", "Session.expire"]
+    assert db.get(Booking, booking_id).payment_session_id is None
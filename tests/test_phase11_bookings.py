@@ -5,6 +5,7 @@ Phase 11 — Booking tests.
 SQLAlchemy Select object so it becomes a no-op in the test environment.
 Stripe calls are always mocked.
 """
+from datetime import date, timedelta
 from unittest.mock import patch, MagicMock
 
 
@@ -14,6 +15,11 @@ from unittest.mock import patch, MagicMock
 _FOR_UPDATE_PATCH = "sqlalchemy.sql.selectable.Select.with_for_update"
 
 
+def _future(days: int) -> str:
+    """ISO date `days` from today — inventory only exists for the next 365 days."""
+    return (date.today() + timedelta(days=days)).isoformat()
+
+
 def test_init_booking(client, guest_headers, active_hotel):
     """Reserve inventory for a future date range — no payment yet."""
     hotel_id = active_hotel["hotel"]["id"]
@@ -23,15 +29,15 @@ def test_init_booking(client, guest_headers, active_hotel):
         r = client.post("/bookings/init", headers=guest_headers, json={
             "hotel_id": hotel_id,
             "room_id": room_id,
-            "check_in_date": "2026-08-05",
-            "check_out_date": "2026-08-07",
+            "check_in_date": _future(30),
+            "check_out_date": _future(32),
             "rooms_count": 1
         })
     assert r.status_code == 201
     assert r.json()["booking_status"] == "RESERVED"
 
 
-@patch("app.services.booking_service.stripe.checkout.Session.create")
+@patch("app.services.outbox_service.stripe.checkout.Session.create")
 def test_initiate_payment(mock_create, client, guest_headers, active_hotel):
     """After init, calling /bookings/{id}/pay creates a Stripe session."""
     hotel_id = active_hotel["hotel"]["id"]
@@ -44,8 +50,8 @@ def test_initiate_payment(mock_create, client, guest_headers, active_hotel):
         init_resp = client.post("/bookings/init", headers=guest_headers, json={
             "hotel_id": hotel_id,
             "room_id": room_id,
-            "check_in_date": "2026-09-01",
-            "check_out_date": "2026-09-03",
+            "check_in_date": _future(60),
+            "check_out_date": _future(62),
             "rooms_count": 1
         })
     assert init_resp.status_code == 201
@@ -27,3 +27,24 @@ def test_activate_hotel(client, manager_headers, test_hotel):
 def test_delete_hotel(client, manager_headers, test_hotel):
     r = client.delete(f"/admin/hotels/{test_hotel['id']}", headers=manager_headers)
     assert r.status_code == 204
+
+
+def test_activation_stocks_rooms_added_while_inactive(client, manager_headers, test_hotel):
+    hotel_id = test_hotel["id"]
+    room_ids = []
+    for _ in range(2):
+        r = client.post(f"/admin/hotels/{hotel_id}/rooms", headers=manager_headers, json={
+            "type": "STANDARD", "base_price": 80.00, "photos": [], "amenities": [],
+            "total_count": 3, "capacity": 2,
+        })
+        room_ids.append(r.json()["id"])
+    assert client.get(f"/admin/inventory/rooms/{room_ids[0]}", headers=manager_headers).json() == []
+
+    # Activating twice must not duplicate anything
+    for _ in range(2):
+        assert client.patch(f"/admin/hotels/{hotel_id}/activate", headers=manager_headers).status_code == 200
+    for room_id in room_ids:
+        rows = client.get(f"/admin/inventory/rooms/{room_id}", headers=manager_headers).json()
+        assert len(rows) == 365
+        assert len({row["date"] for row in rows}) == 365
+        assert all(row["total_count"] == 3 and row["book_count"] == 0 for row in rows)
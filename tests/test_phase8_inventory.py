@@ -5,6 +5,9 @@ Phase 8 — Inventory admin tests.
 should trigger 365 inventory rows to be pre-generated.
 """
 from datetime import date, timedelta
+from decimal import Decimal
+import pytest
+from app.config import settings
 
 
 def test_list_inventory(client, manager_headers, active_hotel):
@@ -25,4 +28,89 @@ def test_bulk_update_closes_dates(client, manager_headers, active_hotel):
         "closed": True
     })
     assert r.status_code == 200
-    assert all(row["closed"] for row in r.json())
+    assert r.json() == {"rooms": 1, "nights": 2, "first_date": today, "last_date": tomorrow}
+    listing = client.get(f"/admin/inventory/rooms/{room_id}", headers=manager_headers).json()
+    assert [row["date"] for row in listing if row["closed"]] == [today, tomorrow]
+
+
+def test_bulk_update_weekdays_on_several_rooms(client, manager_headers, active_hotel):
+    hotel_id = active_hotel["hotel"]["id"]
+    room = {k: v for k, v in active_hotel["room"].items() if k != "id"}
+    second = client.post(f"/admin/hotels/{hotel_id}/rooms", headers=manager_headers, json=room).json()
+    room_ids = [active_hotel["room"]["id"], second["id"]]
+    start = date.today() + timedelta(days=40)
+
+    # Two weeks, weekends only: 4 nights a room
+    r = client.patch("/admin/inventory/rooms", headers=manager_headers, json={
+        "room_ids": room_ids, "start_date": start.isoformat(),
+        "end_date": (start + timedelta(days=13)).isoformat(), "weekdays": [6, 7], "price": 150,
+    })
+    assert r.status_code == 200, r.text
+    assert r.json()["rooms"] == 2 and r.json()["nights"] == 8
+    for room_id in room_ids:
+        listing = client.get(f"/admin/inventory/rooms/{room_id}", headers=manager_headers).json()
+        repriced = [date.fromisoformat(row["date"]) for row in listing if Decimal(row["price"]) == 150]
+        assert len(repriced) == 4 and {night.isoweekday() for night in repriced} == {6, 7}
+
+    # An explicit list of dates
+    nights = [(start + timedelta(days=d)).isoformat() for d in (2, 9)]
+    r = client.patch(f"/admin/inventory/rooms/{room_ids[1]}", headers=manager_headers, json={
+        "dates": nights, "closed": True, "surge_factor": 1.25,
+    })
+    assert r.json() == {"rooms": 1, "nights": 2, "first_date": nights[0], "last_date": nights[1]}
+    listing = client.get(f"/admin/inventory/rooms/{room_ids[1]}", headers=manager_headers).json()
+    assert [(row["date"], row["surge_factor"]) for row in listing if row["closed"]] == \
+        [(night, "1.25") for night in nights]
+
+
+def test_bulk_update_validation(client, manager_headers, active_hotel):
+    room_id = active_hotel["room"]["id"]
+    today = date.today().isoformat()
+    for body in ({"start_date": today, "end_date": today},                                     # nothing to set
+                 {"start_date": today, "closed": True},                                        # half a range
+                 {"start_date": today, "end_date": today, "dates": [today], "closed": True},   # both selectors
+                 {"dates": [today], "weekdays": [0], "closed": True}):                         # no weekday 0
+        assert client.patch(f"/admin/inventory/rooms/{room_id}", headers=manager_headers,
+                            json=body).status_code == 422
+    r = client.patch("/admin/inventory/rooms", headers=manager_headers, json={
+        "room_ids": [room_id, 987654], "dates": [today], "closed": True,
+    })
+    assert r.status_code == 404
+
+
+@pytest.fixture(params=["atomic", "segments"])
+def mode(request, monkeypatch):
+    monkeypatch.setattr(settings, "reservation_mode", request.param)
+    return request.param
+
+
+def test_list_inventory_pages_by_date(mode, client, manager_headers, active_hotel):
+    url = f"/admin/inventory/rooms/{active_hotel['room']['id']}"
+    month = [(date.today() + timedelta(days=d)).isoformat() for d in range(10, 40)]
+    client.patch(url, headers=manager_headers, json={"dates": month[3:5], "closed": True})
+
+    pages, after = [], None
+    while True:
+        params = {"start_date": month[0], "end_date": month[-1], "limit": 12, **({"after": after} if after else {})}
+        r = client.get(url, headers=manager_headers, params=params)
+        assert r.status_code == 200
+        pages.append(r.json())
+        after = r.headers.get("X-Next-After")
+        if after is None:
+            break
+        assert after == pages[-1][-1]["date"]
+    assert [len(page) for page in pages] == [12, 12, 6]
+    rows = [row for page in pages for row in page]
+    assert [row["date"] for row in rows] == month
+
+    r = client.get(f"{url}/columns", headers=manager_headers,
+                   params={"start_date": month[0], "end_date": month[-1], "limit": 20})
+    columns = r.json()
+    assert columns["next_after"] == month[19]
+    assert columns["date"] == month[:20]
+    for field in ("total_count", "book_count", "reserved_count", "price", "surge_factor", "closed"):
+        assert columns[field] == [row[field] for row in rows[:20]]
+    assert columns["closed"][3:5] == [True, True]
+
+    r = client.get(f"{url}/columns", headers=manager_headers, params={"after": month[-1], "end_date": month[-1]})
+    assert r.json()["date"] == [] and r.json()["next_after"] is None
@@ -0,0 +1,130 @@
+"""
+Query-plan regression test: the hot booking and search paths must reach
+Inventory and Booking through an index, never a full table scan.
+
+Each endpoint runs for real with every SELECT/UPDATE/DELETE it sends recorded,
+then each recorded statement is EXPLAINed with its own parameters.
+"""
+import re
+from contextlib import contextmanager
+from datetime import date, timedelta
+import pytest
+from sqlalchemy import event, text
+from app.config import settings
+from app.models.booking import Booking
+from app.services import booking_service
+
+HOT_TABLES = ("Inventory", "Booking")
+
+# sqlite_stat1 for an Inventory at production shape (100 hotels x 100 rooms x 365
+# nights), so SQLite costs plans by it rather than by the few rooms the tests
+# create. The unique (hotel_id, room_id, date) index is marked unordered and
+# noskipscan: it is there for the constraint, and without these SQLite would
+# rather walk all of it than sort a search's matches for GROUP BY, or skip-scan
+# its leading column — plans Postgres would not pick at this size.
+INVENTORY_STATS = {
+    None:                           "3650000",
+    "sqlite_autoindex_Inventory_1": "3650000 36500 365 1 unordered noskipscan",
+    "ix_inventory_room_date":       "3650000 365 1",
+    "ix_inventory_open_date_hotel": "3600000 10000 100",
+}
+
+
+@contextmanager
+def _recorded(db):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and re.match(r"\s*(SELECT|UPDATE|DELETE)\b", statement, re.I):
+            statements.append((statement, parameters))
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def _full_scans(db, statements) -> list[str]:
+    """Plan lines that read a hot table without an index, with the statement they came from."""
+    conn = db.connection().connection.driver_connection
+    if db.get_bind().dialect.name == "sqlite":
+        conn.execute('ANALYZE "Inventory"')          # creates sqlite_stat1
+        conn.execute("DELETE FROM sqlite_stat1 WHERE tbl = 'Inventory'")
+        conn.executemany("INSERT INTO sqlite_stat1 (tbl, idx, stat) VALUES ('Inventory', ?, ?)",
+                         list(INVENTORY_STATS.items()))
+        conn.execute("ANALYZE sqlite_schema")         # reload the statistics
+    scans = []
+    for statement, parameters in statements:
+        if not any(f'"{table}"' in statement for table in HOT_TABLES):
+            continue
+        if db.get_bind().dialect.name == "postgresql":
+            cursor = conn.cursor()
+            cursor.execute("SET LOCAL enable_seqscan = off")   # tiny tables would seq-scan anyway
+            cursor.execute("EXPLAIN " + statement, parameters)
+            plan = [row[0] for row in cursor.fetchall()]
+            pattern = r"Seq Scan on \"?(%s)\"?\b"
+        else:
+            plan = [row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + statement, parameters)]
+            # a full walk of the table or of an index, or a skip-scan over a leading column
+            pattern = r"^SCAN \"?(%s)\"?\b|^SEARCH \"?(%s)\"?\b.*\(ANY\("
+        pattern = pattern.replace("%s", "|".join(HOT_TABLES))
+        scans += [f"{line}  <-  {statement}" for line in plan if re.search(pattern, line)]
+    return scans
+
+
+def _future(days: int) -> str:
+    return (date.today() + timedelta(days=days)).isoformat()
+
+
+@pytest.fixture
+def booked(client, db, guest_headers, active_hotel):
+    """A RESERVED booking on the active hotel's room, with a payment session."""
+    r = client.post("/bookings/init", headers=guest_headers, json={
+        "hotel_id": active_hotel["hotel"]["id"], "room_id": active_hotel["room"]["id"],
+        "check_in_date": _future(200), "check_out_date": _future(202), "rooms_count": 1,
+    })
+    assert r.status_code == 201, r.text
+    booking = db.get(Booking, r.json()["id"])
+    booking.payment_session_id = f"cs_plan_{booking.id}"
+    db.commit()
+    return booking
+
+
+@pytest.mark.parametrize("mode", ["atomic", "locking"])
+def test_booking_path_uses_indexes(client, db, guest_headers, active_hotel, monkeypatch, mode):
+    monkeypatch.setattr(settings, "reservation_mode", mode)
+    with _recorded(db) as statements:
+        r = client.post("/bookings/init", headers=guest_headers, json={
+            "hotel_id": active_hotel["hotel"]["id"], "room_id": active_hotel["room"]["id"],
+            "check_in_date": _future(210), "check_out_date": _future(213), "rooms_count": 1,
+        })
+        assert r.status_code == 201, r.text
+    assert _full_scans(db, statements) == []
+
+
+def test_confirm_uses_indexes(db, booked):
+    with _recorded(db) as statements:
+        booking_service.confirm_booking(db, booked.payment_session_id)
+    assert _full_scans(db, statements) == []
+
+
+def test_search_and_listings_use_indexes(client, db, guest_headers, manager_headers, active_hotel, booked):
+    hotel_id = active_hotel["hotel"]["id"]
+    booking_service.confirm_booking(db, booked.payment_session_id)   # something for the report to sum
+    with _recorded(db) as statements:
+        r = client.request("GET", "/hotels/search", headers=guest_headers, json={
+            "city": "Austin", "start_date": _future(30), "end_date": _future(33),
+            "rooms_count": 1, "page": 1, "size": 10,
+        })
+        assert r.status_code == 200, r.text
+        assert client.get("/users/myBookings", headers=guest_headers).status_code == 200
+        assert client.get(f"/admin/hotels/{hotel_id}/bookings", headers=manager_headers).status_code == 200
+        r = client.get(f"/admin/inventory/rooms/{active_hotel['room']['id']}/columns", headers=manager_headers,
+                       params={"start_date": _future(30), "end_date": _future(60), "after": _future(40), "limit": 7})
+        assert r.status_code == 200, r.text
+        r = client.get(f"/admin/hotels/{hotel_id}/reports", headers=manager_headers,
+                       params={"start_date": _future(0), "end_date": _future(300)})
+        assert r.status_code == 200, r.text
+    assert _full_scans(db, statements) == []
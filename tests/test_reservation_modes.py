@@ -0,0 +1,61 @@
+"""
+Reservation strategies — the atomic (single guarded UPDATE ... RETURNING) path.
+
+SQLite >= 3.35 supports RETURNING, so unlike the locking path these tests
+need no `with_for_update` patch.
+"""
+from datetime import date, timedelta
+from app.config import settings
+from app.models.inventory import Inventory
+
+
+def _future(days: int) -> date:
+    return date.today() + timedelta(days=days)
+
+
+def _booking_body(active_hotel, check_in: date, check_out: date, rooms_count: int) -> dict:
+    return {
+        "hotel_id": active_hotel["hotel"]["id"],
+        "room_id": active_hotel["room"]["id"],
+        "check_in_date": check_in.isoformat(),
+        "check_out_date": check_out.isoformat(),
+        "rooms_count": rooms_count,
+    }
+
+
+def _reserved(db, room_id: int, start: date, end: date) -> list[int]:
+    db.expire_all()
+    rows = db.query(Inventory).filter(
+        Inventory.room_id == room_id, Inventory.date.between(start, end)
+    ).order_by(Inventory.date).all()
+    return [r.reserved_count for r in rows]
+
+
+def test_atomic_init_booking_holds_every_night(client, db, guest_headers, active_hotel, monkeypatch):
+    monkeypatch.setattr(settings, "reservation_mode", "atomic")
+    check_in, check_out = _future(100), _future(102)
+
+    r = client.post("/bookings/init", headers=guest_headers,
+                    json=_booking_body(active_hotel, check_in, check_out, 2))
+
+    assert r.status_code == 201
+    assert r.json()["booking_status"] == "RESERVED"
+    assert _reserved(db, active_hotel["room"]["id"], check_in, check_out) == [2, 2, 2]
+
+
+def test_atomic_init_booking_is_all_or_nothing(client, db, guest_headers, active_hotel, monkeypatch):
+    """One full night in the range must reject the booking and leave no partial hold."""
+    monkeypatch.setattr(settings, "reservation_mode", "atomic")
+    room_id = active_hotel["room"]["id"]
+    check_in, check_out = _future(110), _future(112)
+
+    full = db.query(Inventory).filter(Inventory.room_id == room_id,
+                                      Inventory.date == _future(111)).one()
+    full.book_count = full.total_count
+    db.commit()
+
+    r = client.post("/bookings/init", headers=guest_headers,
+                    json=_booking_body(active_hotel, check_in, check_out, 1))
+
+    assert r.status_code == 400
+    assert _reserved(db, room_id, check_in, check_out) == [0, 0, 0]
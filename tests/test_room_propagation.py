@@ -0,0 +1,77 @@
+"""
+PUT /admin/hotels/{id}/rooms/{id}?propagate=true pushes a new base price and
+room count onto the room's future inventory, never below what a night holds.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+import pytest
+from app.config import settings
+from app.models.inventory import Inventory
+from app.services import inventory_service
+
+
+def _future(days: int) -> date:
+    return date.today() + timedelta(days=days)
+
+
+def _put_room(client, headers, active_hotel, query: str, **changes):
+    room = {k: v for k, v in active_hotel["room"].items() if k != "id"}
+    return client.put(f"/admin/hotels/{active_hotel['hotel']['id']}/rooms/{active_hotel['room']['id']}{query}",
+                      headers=headers, json={**room, **changes})
+
+
+def _nights(db, room_id: int) -> dict[date, tuple[int, Decimal]]:
+    db.expire_all()
+    return {inv.date: (inv.total_count, inv.price)
+            for inv in db.query(Inventory).filter(Inventory.room_id == room_id)}
+
+
+@pytest.mark.parametrize("mode", ["atomic", "ledger"])
+def test_room_count_cut_is_refused_or_clamped(client, db, manager_headers, guest_headers,
+                                              active_hotel, monkeypatch, mode):
+    monkeypatch.setattr(settings, "reservation_mode", mode)
+    monkeypatch.setattr(settings, "inventory_propagate_chunk_days", 100)   # 4 transactions
+    room_id = active_hotel["room"]["id"]
+    r = client.post("/bookings/init", headers=guest_headers, json={
+        "hotel_id": active_hotel["hotel"]["id"], "room_id": room_id,
+        "check_in_date": _future(150).isoformat(), "check_out_date": _future(151).isoformat(),
+        "rooms_count": 3,
+    })
+    assert r.status_code == 201, r.text
+
+    r = _put_room(client, manager_headers, active_hotel, "?propagate=true", total_count=2, base_price=120)
+    assert r.status_code == 409
+    assert set(_nights(db, room_id).values()) == {(5, Decimal(100))}     # nothing written
+
+    r = _put_room(client, manager_headers, active_hotel, "?propagate=true&clamp=true", total_count=2, base_price=120)
+    assert r.status_code == 200, r.text
+    assert r.json()["inventory"] == {"nights": 365, "clamped": 2, "skipped": 0, "skipped_dates": []}
+    assert r.json()["total_count"] == 2
+    nights = _nights(db, room_id)
+    assert [nights.pop(_future(d)) for d in (150, 151)] == [(3, Decimal(120))] * 2
+    assert set(nights.values()) == {(2, Decimal(120))}
+
+
+def test_update_without_propagate_leaves_inventory(client, db, manager_headers, active_hotel):
+    r = _put_room(client, manager_headers, active_hotel, "", total_count=9, base_price=80)
+    assert r.status_code == 200
+    assert r.json()["inventory"] is None
+    assert set(_nights(db, active_hotel["room"]["id"]).values()) == {(5, Decimal(100))}
+
+
+def test_night_filled_during_propagation_is_reported(client, db, guest_headers, active_hotel, monkeypatch):
+    monkeypatch.setattr(settings, "reservation_mode", "atomic")
+    room_id = active_hotel["room"]["id"]
+    r = client.post("/bookings/init", headers=guest_headers, json={
+        "hotel_id": active_hotel["hotel"]["id"], "room_id": room_id,
+        "check_in_date": _future(160).isoformat(), "check_out_date": _future(161).isoformat(),
+        "rooms_count": 4,
+    })
+    assert r.status_code == 201, r.text
+
+    # A later window of an edit whose up-front check passed before this booking landed
+    result = inventory_service._propagate_chunk(db, room_id, _future(150), _future(169), total_count=3)
+
+    assert result == {"nights": 18, "clamped": 0, "skipped": 2, "skipped_dates": [_future(160), _future(161)]}
+    nights = _nights(db, room_id)
+    assert [nights[_future(d)] for d in (159, 160, 161)] == [(3, Decimal(100)), (5, Decimal(100)), (5, Decimal(100))]
@@ -0,0 +1,121 @@
+"""
+@transactional — retry budget, backoff and HTTP mapping of lock failures,
+and the per-transaction timing it records.
+
+Postgres errors are simulated with a fake driver exception carrying a SQLSTATE.
+"""
+import json
+import logging
+import time
+from datetime import date, timedelta
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.exc import OperationalError
+from app import metrics
+from app.config import settings
+from app.transactions import transactional
+
+
+class _PgError(Exception):
+    def __init__(self, pgcode: str):
+        super().__init__(pgcode)
+        self.pgcode = pgcode
+
+
+def _flaky(db, failures: list[str]):
+    """Service stand-in that raises the queued SQLSTATEs, then succeeds."""
+    calls = []
+
+    @transactional("init_booking")
+    def op(db):
+        calls.append(1)
+        if failures:
+            raise OperationalError("UPDATE ...", {}, _PgError(failures.pop(0)))
+        return "ok"
+
+    return op, calls
+
+
+@pytest.fixture(autouse=True)
+def _no_sleep(monkeypatch):
+    monkeypatch.setattr(settings, "txn_retry_base_delay_ms", 0)
+
+
+def test_deadlock_is_retried_until_success(db):
+    op, calls = _flaky(db, ["40P01", "40001"])
+    assert op(db) == "ok"
+    assert len(calls) == 3
+
+
+def test_exhausted_budget_returns_409(db, monkeypatch):
+    monkeypatch.setattr(settings, "txn_max_attempts", 2)
+    op, calls = _flaky(db, ["55P03", "55P03", "55P03"])
+    with pytest.raises(HTTPException) as exc:
+        op(db)
+    assert exc.value.status_code == 409
+    assert len(calls) == 2
+
+
+def test_statement_timeout_returns_503_without_retry(db):
+    op, calls = _flaky(db, ["57014"])
+    with pytest.raises(HTTPException) as exc:
+        op(db)
+    assert exc.value.status_code == 503
+    assert len(calls) == 1
+
+
+def test_unrelated_db_errors_propagate(db):
+    op, _ = _flaky(db, ["23505"])   # unique_violation — not a concurrency failure
+    with pytest.raises(OperationalError):
+        op(db)
+
+
+# ── Instrumentation ───────────────────────────────────────────────────────────
+
+def test_booking_records_lock_histograms(client, guest_headers, active_hotel, monkeypatch):
+    monkeypatch.setattr(settings, "reservation_mode", "locking")
+    labels = {"op": "init_booking", "hotel": str(active_hotel["hotel"]["id"])}
+    check_in = date.today() + timedelta(days=350)
+
+    r = client.post("/bookings/init", headers=guest_headers, json={
+        "hotel_id": active_hotel["hotel"]["id"],
+        "room_id": active_hotel["room"]["id"],
+        "check_in_date": check_in.isoformat(),
+        "check_out_date": (check_in + timedelta(days=2)).isoformat(),
+        "rooms_count": 1,
+    })
+    assert r.status_code == 201
+
+    assert metrics.get_histogram("txn_rows_locked", **labels) == (1, 3)   # 3 nights, inclusive
+    assert metrics.get_histogram("txn_retries", **labels) == (1, 0)
+    count, duration = metrics.get_histogram("txn_duration_seconds", **labels)
+    _, lock_wait = metrics.get_histogram("txn_lock_wait_seconds", **labels)
+    assert count == 1 and 0 < lock_wait <= duration
+
+    body = client.get("/metrics").text
+    assert "# TYPE txn_lock_wait_seconds histogram" in body
+    assert f'txn_rows_locked_bucket{{hotel="{labels["hotel"]}",op="init_booking",le="5"}} 1' in body
+    assert f'txn_rows_locked_count{{hotel="{labels["hotel"]}",op="init_booking"}} 1' in body
+
+
+def test_slow_transaction_is_logged_as_json(db, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "slow_txn_log_ms", 1)
+    before = metrics.get_histogram("txn_retries", op="init_booking", hotel="none")
+    failures = ["40P01", "40001"]
+
+    @transactional("init_booking")
+    def op(db):
+        if failures:
+            raise OperationalError("UPDATE ...", {}, _PgError(failures.pop(0)))
+        time.sleep(0.005)
+        return "ok"
+
+    with caplog.at_level(logging.WARNING, logger="app.transactions"):
+        assert op(db) == "ok"
+
+    [line] = [r.getMessage() for r in caplog.records if r.getMessage().startswith("slow_txn ")]
+    entry = json.loads(line[len("slow_txn "):])
+    assert entry["op"] == "init_booking" and entry["outcome"] == "ok"
+    assert entry["retries"] == 2 and entry["duration_ms"] >= 5
+    after = metrics.get_histogram("txn_retries", op="init_booking", hotel="none")
+    assert after == (before[0] + 1, before[1] + 2)
@@ -0,0 +1,147 @@
+"""
+Waitlist — guests queue for a sold-out room and are promoted into RESERVED
+bookings, oldest first, when rooms are released.
+"""
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+import pytest
+from app import admission
+from app.config import settings
+from app.models.booking import Booking
+from app.models.inventory import Inventory
+from app.models.outbox import OutboxMessage
+from app.services import expiry_service, outbox_service
+
+
+def _future(days: int) -> date:
+    return date.today() + timedelta(days=days)
+
+
+def _request(active_hotel, day: int, rooms_count: int) -> dict:
+    return {
+        "hotel_id": active_hotel["hotel"]["id"],
+        "room_id": active_hotel["room"]["id"],
+        "check_in_date": _future(day).isoformat(),
+        "check_out_date": _future(day + 1).isoformat(),
+        "rooms_count": rooms_count,
+    }
+
+
+def _expire(db, booking_id: int) -> None:
+    booking = db.get(Booking, booking_id)
+    booking.created_at = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(minutes=60)
+    db.commit()
+    expiry_service.sweep_expired_holds(db)
+
+
+def _promotions(db, room_id: int) -> list[OutboxMessage]:
+    db.expire_all()
+    return [m for m in db.query(OutboxMessage).filter(OutboxMessage.kind == "waitlist.promote",
+                                                      OutboxMessage.status == "PENDING").all()
+            if m.payload["room_id"] == room_id]
+
+
+def test_released_rooms_go_to_the_waitlist_in_order(client, db, guest_headers, active_hotel):
+    room_id = active_hotel["room"]["id"]
+    sold = client.post("/bookings/init", headers=guest_headers, json=_request(active_hotel, 330, 5)).json()
+    assert client.post("/bookings/init", headers=guest_headers,
+                       json=_request(active_hotel, 330, 1)).status_code == 400
+
+    first = client.post("/waitlist", headers=guest_headers, json=_request(active_hotel, 330, 4)).json()
+    second = client.post("/waitlist", headers=guest_headers, json=_request(active_hotel, 331, 2)).json()
+    third = client.post("/waitlist", headers=guest_headers, json=_request(active_hotel, 331, 1)).json()
+    assert first["status"] == "WAITING"
+    # Joining again with the same request is a no-op
+    again = client.post("/waitlist", headers=guest_headers, json=_request(active_hotel, 331, 1)).json()
+    assert again["id"] == third["id"]
+
+    _expire(db, sold["id"])
+    [message] = _promotions(db, room_id)
+    assert outbox_service.dispatch_one(db, message.id).result == {"promoted": 2, "next_after_id": None}
+
+    entries = {e["id"]: e for e in client.get("/waitlist", headers=guest_headers).json()}
+    # 4 rooms to the oldest entry, 1 left over for day 331: too few for the 2-room entry, enough for the last
+    assert [entries[e["id"]]["status"] for e in (first, second, third)] == ["PROMOTED", "WAITING", "PROMOTED"]
+    promoted = db.get(Booking, entries[first["id"]]["booking_id"])
+    assert promoted.booking_status.value == "RESERVED" and promoted.rooms_count == 4
+    assert promoted.amount > 0
+
+    db.expire_all()
+    reserved = [inv.reserved_count for inv in db.query(Inventory).filter(
+        Inventory.room_id == room_id, Inventory.date.in_([_future(330), _future(331), _future(332)]))
+        .order_by(Inventory.date)]
+    assert reserved == [4, 5, 1]
+
+
+def test_promotion_runs_in_bounded_batches(client, db, guest_headers, active_hotel, monkeypatch):
+    monkeypatch.setattr(settings, "waitlist_promote_batch_size", 1)
+    room_id = active_hotel["room"]["id"]
+    sold = client.post("/bookings/init", headers=guest_headers, json=_request(active_hotel, 335, 5)).json()
+    a = client.post("/waitlist", headers=guest_headers, json=_request(active_hotel, 335, 2)).json()
+    b = client.post("/waitlist", headers=guest_headers, json=_request(active_hotel, 335, 1)).json()
+
+    _expire(db, sold["id"])
+    [message] = _promotions(db, room_id)
+    assert outbox_service.dispatch_one(db, message.id).result == {"promoted": 1, "next_after_id": a["id"]}
+
+    [follow_up] = _promotions(db, room_id)
+    assert follow_up.payload["after_id"] == a["id"]
+    assert outbox_service.dispatch_one(db, follow_up.id).result == {"promoted": 1, "next_after_id": b["id"]}
+
+    [last] = _promotions(db, room_id)
+    assert outbox_service.dispatch_one(db, last.id).result == {"promoted": 0, "next_after_id": None}
+    assert _promotions(db, room_id) == []
+
+
+def test_no_promotion_without_waiters_and_leaving(client, db, guest_headers, active_hotel):
+    room_id = active_hotel["room"]["id"]
+    held = client.post("/bookings/init", headers=guest_headers, json=_request(active_hotel, 340, 1)).json()
+    _expire(db, held["id"])
+    assert _promotions(db, room_id) == []
+
+    entry = client.post("/waitlist", headers=guest_headers, json=_request(active_hotel, 341, 1)).json()
+    r = client.delete(f"/waitlist/{entry['id']}", headers=guest_headers)
+    assert r.status_code == 200 and r.json()["status"] == "CANCELLED"
+    assert client.delete(f"/waitlist/{entry['id']}", headers=guest_headers).status_code == 400
+
+
+def test_promoted_guest_is_notified(client, db, guest_headers, active_hotel, monkeypatch):
+    monkeypatch.setattr(settings, "booking_hold_minutes", 45)
+    room_id = active_hotel["room"]["id"]
+    sold = client.post("/bookings/init", headers=guest_headers, json=_request(active_hotel, 345, 5)).json()
+    entry = client.post("/waitlist", headers=guest_headers, json=_request(active_hotel, 345, 2)).json()
+
+    _expire(db, sold["id"])
+    [message] = _promotions(db, room_id)
+    outbox_service.dispatch_one(db, message.id)
+
+    [notice] = db.query(OutboxMessage).filter(OutboxMessage.dedup_key == f"waitlist-notify-{entry['id']}").all()
+    booking = db.get(Booking, notice.payload["booking_id"])
+    pay_by = datetime.fromisoformat(notice.payload["pay_by"])
+    assert booking.user_id == notice.payload["user_id"] and booking.rooms_count == 2
+    assert timedelta(minutes=44) < pay_by - datetime.now(timezone.utc).replace(tzinfo=None) <= timedelta(minutes=45)
+
+    # No notification service configured: logged, and done
+    assert outbox_service.dispatch_one(db, notice.id).result == {"delivered": False}
+
+
+def test_promotion_commits_before_giving_the_slot_back(client, db, guest_headers, active_hotel, monkeypatch):
+    room_id = active_hotel["room"]["id"]
+    sold = client.post("/bookings/init", headers=guest_headers, json=_request(active_hotel, 348, 5)).json()
+    entry = client.post("/waitlist", headers=guest_headers, json=_request(active_hotel, 348, 1)).json()
+    open_at_release = []
+    slot = admission.slot
+
+    @contextmanager
+    def recording_slot(session, slot_room_id, **kwargs):
+        with slot(session, slot_room_id, **kwargs):
+            yield
+            open_at_release.append(bool(session.new or session.dirty) or session.in_transaction())
+
+    monkeypatch.setattr(admission, "slot", recording_slot)
+    _expire(db, sold["id"])
+    [message] = _promotions(db, room_id)
+    assert outbox_service.dispatch_one(db, message.id).result["promoted"] == 1
+    assert open_at_release == [False]
+    promoted = {e["id"]: e for e in client.get("/waitlist", headers=guest_headers).json()}[entry["id"]]
+    assert promoted["status"] == "PROMOTED"
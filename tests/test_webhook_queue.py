@@ -0,0 +1,192 @@
+"""
+Non-blocking Stripe webhook: the route only stores the event, the consumer
+confirms bookings in batches, and redelivered events are dropped.
+"""
+import json
+from datetime import date, datetime, timedelta, timezone
+import pytest
+import stripe
+from fastapi import HTTPException
+from app import metrics
+from app.config import settings
+from app.models.booking import Booking
+from app.models.enums import BookingStatusEnum
+from app.models.inventory import Inventory
+from app.models.outbox import OutboxMessage
+from app.models.webhook_event import WebhookEvent
+from app.services import booking_service, expiry_service, webhook_service
+
+
+@pytest.fixture
+def verified_signatures(monkeypatch):
+    # What construct_event returns once the signature checks out
+    monkeypatch.setattr(stripe.Webhook, "construct_event",
+                        lambda payload, sig, secret: stripe.Event.construct_from(json.loads(payload), secret))
+
+
+def _event(event_id, session_id, event_type="checkout.session.completed"):
+    return {"id": event_id, "type": event_type, "data": {"object": {"id": session_id}}}
+
+
+def _reserve(client, db, guest_headers, active_hotel, days):
+    check_in = date.today() + timedelta(days=days)
+    r = client.post("/bookings/init", headers=guest_headers, json={
+        "hotel_id": active_hotel["hotel"]["id"],
+        "room_id": active_hotel["room"]["id"],
+        "check_in_date": check_in.isoformat(),
+        "check_out_date": (check_in + timedelta(days=1)).isoformat(),
+        "rooms_count": 1,
+    })
+    booking = db.get(Booking, r.json()["id"])
+    booking.payment_session_id = f"cs_queue_{booking.id}"
+    db.commit()
+    return booking
+
+
+def test_webhook_acknowledges_before_confirming(client, db, guest_headers, active_hotel,
+                                                verified_signatures, monkeypatch):
+    monkeypatch.setattr(settings, "reservation_mode", "atomic")
+    booking = _reserve(client, db, guest_headers, active_hotel, 250)
+
+    r = client.post("/webhook/payment", headers={"Stripe-Signature": "t=1,v1=x"},
+                    content=json.dumps(_event("evt_ack_1", booking.payment_session_id)))
+    assert r.status_code == 204
+
+    stored = db.query(WebhookEvent).filter(WebhookEvent.event_id == "evt_ack_1").one()
+    assert stored.status == "PENDING"
+    db.refresh(booking)
+    assert booking.booking_status.value == "RESERVED"
+
+    webhook_service.process_pending(db)
+    db.expire_all()
+    assert db.get(WebhookEvent, stored.id).status == "DONE"
+    assert db.get(Booking, booking.id).booking_status.value == "CONFIRMED"
+    assert metrics.get("webhook_queue_depth") == 0
+
+
+def test_invalid_signature_is_not_stored(client, db):
+    r = client.post("/webhook/payment", headers={"Stripe-Signature": "t=1,v1=bad"},
+                    content=json.dumps(_event("evt_bad_sig", "cs_nope")))
+    assert r.status_code == 400
+    assert db.query(WebhookEvent).filter(WebhookEvent.event_id == "evt_bad_sig").count() == 0
+
+
+def test_batch_confirms_same_room_once(client, db, guest_headers, active_hotel, monkeypatch):
+    monkeypatch.setattr(settings, "reservation_mode", "atomic")
+    first = _reserve(client, db, guest_headers, active_hotel, 254)
+    second = _reserve(client, db, guest_headers, active_hotel, 254)
+    webhook_service.enqueue_event(db, _event("evt_batch_1", first.payment_session_id))
+    webhook_service.enqueue_event(db, _event("evt_batch_2", second.payment_session_id))
+    webhook_service.enqueue_event(db, _event("evt_batch_3", "cs_x", "charge.refunded"))
+
+    assert webhook_service.process_pending(db) >= 3
+    db.expire_all()
+    inv = db.query(Inventory).filter(
+        Inventory.room_id == active_hotel["room"]["id"],
+        Inventory.date == date.today() + timedelta(days=254),
+    ).one()
+    assert (inv.book_count, inv.reserved_count) == (2, 0)
+    statuses = dict(db.query(WebhookEvent.event_id, WebhookEvent.status)
+                    .filter(WebhookEvent.event_id.like("evt_batch_%")).all())
+    assert statuses == {"evt_batch_1": "DONE", "evt_batch_2": "DONE", "evt_batch_3": "IGNORED"}
+
+
+def test_unknown_session_is_retried_then_failed(db, monkeypatch):
+    monkeypatch.setattr(settings, "webhook_max_attempts", 2)
+    event = webhook_service.enqueue_event(db, _event("evt_orphan", "cs_does_not_exist"))
+
+    webhook_service.process_pending(db)
+    db.expire_all()
+    assert db.get(WebhookEvent, event.id).status == "PENDING"
+    webhook_service.process_pending(db)
+    db.expire_all()
+    row = db.get(WebhookEvent, event.id)
+    assert (row.status, row.attempts, row.last_error) == ("FAILED", 2, "booking not found")
+
+
+def test_payment_after_expiry_is_refunded_once(client, db, guest_headers, active_hotel, monkeypatch):
+    monkeypatch.setattr(settings, "reservation_mode", "atomic")
+    booking = _reserve(client, db, guest_headers, active_hotel, 256)
+    booking.booking_status = BookingStatusEnum.PAYMENTS_PENDING
+    booking.created_at = (datetime.now(timezone.utc).replace(tzinfo=None)
+                          - timedelta(minutes=settings.booking_hold_minutes + 1))
+    db.commit()
+
+    expiry_service.sweep_expired_holds(db)
+    expire = db.query(OutboxMessage).filter(OutboxMessage.dedup_key == f"expire-checkout-booking-{booking.id}").one()
+    assert expire.payload == {"booking_id": booking.id, "payment_session_id": booking.payment_session_id}
+
+    # Paid before the session was expired, and delivered twice
+    webhook_service.enqueue_event(db, _event("evt_late_1", booking.payment_session_id))
+    webhook_service.enqueue_event(db, _event("evt_late_2", booking.payment_session_id))
+    webhook_service.process_pending(db)
+    db.expire_all()
+    statuses = dict(db.query(WebhookEvent.event_id, WebhookEvent.status)
+                    .filter(WebhookEvent.event_id.like("evt_late_%")).all())
+    assert statuses == {"evt_late_1": "REFUNDED", "evt_late_2": "REFUNDED"}
+    refunds = db.query(OutboxMessage).filter(OutboxMessage.kind == "stripe.refund",
+                                             OutboxMessage.payload["booking_id"].as_integer() == booking.id).all()
+    assert [m.dedup_key for m in refunds] == [f"refund-booking-{booking.id}"]
+    assert db.get(Booking, booking.id).booking_status == BookingStatusEnum.EXPIRED
+
+    # Not for other tests' dispatchers to send to Stripe
+    for message in [expire, *refunds]:
+        db.delete(message)
+    db.commit()
+
+
+def test_balance_payment_needs_no_booking(db):
+    payload = _event("evt_balance", "cs_balance_only")
+    payload["data"]["object"]["metadata"] = {"purpose": "booking_balance", "booking_id": "1"}
+    event = webhook_service.enqueue_event(db, payload)
+
+    webhook_service.process_pending(db)
+    db.expire_all()
+    assert db.get(WebhookEvent, event.id).status == "DONE"
+
+
+# ── De-duplication ───────────────────────────────────────────────────────────
+
+def test_redelivered_event_is_dropped(db):
+    before = metrics.get("webhook_duplicates_dropped_total", stage="cache")
+    assert webhook_service.enqueue_event(db, _event("evt_dup_1", "cs_dup")) is not None
+    assert webhook_service.enqueue_event(db, _event("evt_dup_1", "cs_dup")) is None
+    assert metrics.get("webhook_duplicates_dropped_total", stage="cache") == before + 1
+
+    # Another process (empty LRU) is stopped by the processed_webhook_event key
+    webhook_service._seen.clear()
+    before = metrics.get("webhook_duplicates_dropped_total", stage="store")
+    assert webhook_service.enqueue_event(db, _event("evt_dup_1", "cs_dup")) is None
+    assert metrics.get("webhook_duplicates_dropped_total", stage="store") == before + 1
+    assert db.query(WebhookEvent).filter(WebhookEvent.event_id == "evt_dup_1").count() == 1
+
+
+def test_confirm_is_idempotent(client, db, guest_headers, active_hotel, monkeypatch):
+    monkeypatch.setattr(settings, "reservation_mode", "atomic")
+    booking = _reserve(client, db, guest_headers, active_hotel, 258)
+    # Two distinct events for the same payment, e.g. a manual resend from the dashboard
+    webhook_service.enqueue_event(db, _event("evt_twice_1", booking.payment_session_id))
+    webhook_service.process_pending(db)
+    webhook_service.enqueue_event(db, _event("evt_twice_2", booking.payment_session_id))
+    webhook_service.process_pending(db)
+    booking_service.confirm_booking(db, booking.payment_session_id)
+
+    db.expire_all()
+    inv = db.query(Inventory).filter(
+        Inventory.room_id == active_hotel["room"]["id"],
+        Inventory.date == date.today() + timedelta(days=258),
+    ).one()
+    assert (inv.book_count, inv.reserved_count) == (1, 0)
+    assert metrics.get("webhook_duplicates_dropped_total", stage="state") >= 2
+
+
+def test_late_payment_for_expired_booking_is_not_confirmed(client, db, guest_headers, active_hotel):
+    booking = _reserve(client, db, guest_headers, active_hotel, 262)
+    booking.booking_status = BookingStatusEnum.EXPIRED
+    db.commit()
+
+    with pytest.raises(HTTPException) as exc:
+        booking_service.confirm_booking(db, booking.payment_session_id)
+    assert exc.value.status_code == 409
+    db.expire_all()
+    assert db.get(Booking, booking.id).booking_status == BookingStatusEnum.EXPIRED